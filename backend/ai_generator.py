@@ -1,13 +1,22 @@
+import datetime
 import json
-from typing import Any, Dict, List, Optional
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, Iterator, List, Optional, Tuple
 
 import google.generativeai as genai
+from google.generativeai.types.content_types import FunctionLibrary
+
+from context_packer import estimate_tokens
+from llm_client import LLMUnavailableError, ResilientLLMClient
+from search_tools import ToolContext, ToolRound
 
 
 class AIGenerator:
     """Handles interactions with Google Gemini API for generating responses"""
 
-    # Static system prompt to avoid rebuilding on each call
+    # Static system prompt, sent as the model's system instruction
     SYSTEM_PROMPT = """You are an AI assistant for a course materials system. You have access to a search tool for course content.
 
 CRITICAL: You MUST use the search_course_content function for ANY question that could be about course materials, including:
@@ -15,7 +24,7 @@ CRITICAL: You MUST use the search_course_content function for ANY question that
 - Questions mentioning "MCP", "Anthropic", "Computer Use", "Retrieval", "Prompt", "Chroma", or similar terms
 - Any question that might have an answer in the course database
 
-ALWAYS search first, then provide your answer based on the search results.
+ALWAYS search first, then provide your answer based on the search results. When course material retrieved for the question is already included, answer from it and only search again if it does not cover the question.
 
 Example questions that require search:
 - "What is MCP?"
@@ -28,9 +37,37 @@ If no results are found, then use your general knowledge.
 
 Be direct and helpful in your responses."""
 
-    def __init__(self, api_key: str, model: str):
+    # Refresh the context cache's TTL when less than this many seconds remain
+    CACHE_REFRESH_MARGIN = 60.0
+
+    def __init__(
+        self,
+        api_key: str,
+        model: str,
+        max_tool_rounds: int = 2,
+        max_parallel_tools: int = 4,
+        client: Optional[ResilientLLMClient] = None,
+    ):
         genai.configure(api_key=api_key)
-        self.model = genai.GenerativeModel(model)
+        self.model_name = model
+        # Deadlines, retries, hedging and circuit breaking for model calls
+        self.client = client or ResilientLLMClient()
+        # Model turns allowed to call tools before it must answer
+        self.max_tool_rounds = max_tool_rounds
+        self.max_parallel_tools = max_parallel_tools
+        self._tool_pool: Optional[ThreadPoolExecutor] = None
+        self._tool_pool_lock = threading.Lock()
+        self._system_prompt_tokens = estimate_tokens(self.SYSTEM_PROMPT)
+        # Converted tool declarations, by their definitions' JSON
+        self._tool_libraries: Dict[str, FunctionLibrary] = {}
+
+        # Server-side cache of the system prompt and tool declarations
+        self._context_cache = None
+        self._cached_model = None
+        self._cached_tools: Optional[FunctionLibrary] = None
+        self._cache_ttl = 0.0
+        self._cache_expires_at = 0.0
+        self._cache_lock = threading.Lock()
 
         # Configuration for generation
         self.generation_config = {
@@ -52,116 +89,164 @@ Be direct and helpful in your responses."""
             },
         ]
 
+        # Settings and system prompt are converted once, not on every request
+        self.model = genai.GenerativeModel(
+            model,
+            generation_config=self.generation_config,
+            safety_settings=self.safety_settings,
+            system_instruction=self.SYSTEM_PROMPT,
+        )
+
+    def enable_context_cache(self, tools: List, ttl_seconds: float = 3600) -> bool:
+        """
+        Cache the system prompt and tool declarations on Gemini's side.
+
+        Requests offering these tools then reference the cache instead of
+        sending the static prefix. Gemini only caches prefixes above a
+        model-specific minimum size; if creating the cache fails, requests
+        keep sending the prefix.
+
+        Args:
+            tools: Tool definitions, as later passed to generate_response
+            ttl_seconds: Cache lifetime, extended while the generator is used
+
+        Returns:
+            Whether the cache was created
+        """
+        library = self._tool_library(tools)
+        try:
+            cache = genai.caching.CachedContent.create(
+                model=self.model_name,
+                system_instruction=self.SYSTEM_PROMPT,
+                tools=library,
+                ttl=datetime.timedelta(seconds=ttl_seconds),
+            )
+            cached_model = genai.GenerativeModel.from_cached_content(
+                cache,
+                generation_config=self.generation_config,
+                safety_settings=self.safety_settings,
+            )
+        except Exception as e:
+            print(f"Error creating Gemini context cache: {e}")
+            return False
+
+        with self._cache_lock:
+            self._context_cache = cache
+            self._cached_model = cached_model
+            self._cached_tools = library
+            self._cache_ttl = ttl_seconds
+            self._cache_expires_at = time.monotonic() + ttl_seconds
+        return True
+
+    def close(self):
+        """Delete the context cache, if any, and stop the call threads"""
+        self.client.close()
+        with self._cache_lock:
+            cache, self._context_cache = self._context_cache, None
+            self._cached_model = None
+            self._cached_tools = None
+        if cache is not None:
+            try:
+                cache.delete()
+            except Exception as e:
+                print(f"Error deleting Gemini context cache: {e}")
+
     def generate_response(
         self,
         query: str,
         conversation_history: Optional[str] = None,
         tools: Optional[List] = None,
         tool_manager=None,
+        context: Optional[ToolContext] = None,
+        retrieved: Optional[str] = None,
     ) -> str:
         """
         Generate AI response with optional tool usage and conversation context.
 
+        The model may call tools for up to max_tool_rounds turns. Calls made
+        in the same turn run concurrently, and their results are sent back as
+        function-response parts.
+
         Args:
             query: The user's question or request
             conversation_history: Previous messages for context
             tools: Available tools the AI can use
             tool_manager: Manager to execute tools
+            context: Collects this query's sources and per-round timings
+            retrieved: Search results fetched before the call, sent with the
+                question so the model can answer without searching
 
         Returns:
             Generated response as string
         """
 
-        # Build prompt with system instructions and conversation history
-        full_prompt = self.SYSTEM_PROMPT
-        if conversation_history:
-            full_prompt += f"\n\nPrevious conversation:\n{conversation_history}"
-        full_prompt += f"\n\nUser question: {query}"
+        # Build prompt with conversation history
+        full_prompt = self._build_prompt(query, conversation_history, retrieved)
+        contents = [{"role": "user", "parts": [full_prompt]}]
 
         # Convert tools for Gemini format if available
         gemini_tools = None
         if tools:
-            gemini_tools = self._convert_tools_to_gemini_format(tools)
+            gemini_tools = self._tool_library(tools)
 
         try:
-            # Generate response with Gemini
-            if gemini_tools:
-                response = self.model.generate_content(
-                    full_prompt,
-                    generation_config=self.generation_config,
-                    safety_settings=self.safety_settings,
-                    tools=gemini_tools,
+            tool_results: List[str] = []
+            round_number = 1
+            while True:
+                started = time.perf_counter()
+                model, tool_arguments = self._model_for_round(
+                    gemini_tools, round_number
                 )
+                response = self._generate(model, contents, tool_arguments)
+                model_seconds = time.perf_counter() - started
 
                 # Handle function calling if needed
+                function_calls = self._find_function_calls(response)
                 if (
-                    response.candidates
-                    and len(response.candidates) > 0
-                    and response.candidates[0].content
-                    and response.candidates[0].content.parts
-                    and tool_manager
+                    not function_calls
+                    or not tool_manager
+                    or not gemini_tools
+                    or round_number > self.max_tool_rounds
                 ):
-                    for part in response.candidates[0].content.parts:
-                        if hasattr(part, "function_call") and part.function_call:
-                            return self._handle_gemini_function_call(
-                                part.function_call, tool_manager, full_prompt
-                            )
-            else:
-                response = self.model.generate_content(
-                    full_prompt,
-                    generation_config=self.generation_config,
-                    safety_settings=self.safety_settings,
+                    self._record_round(context, round_number, model_seconds, contents)
+                    break
+                tool_results = self._run_tool_round(
+                    function_calls,
+                    response.candidates[0].content,
+                    contents,
+                    tool_manager,
+                    context,
+                    round_number,
+                    model_seconds,
                 )
+                round_number += 1
 
             # Safely extract text from response with proper error handling
-            if response and response.candidates and len(response.candidates) > 0:
-                candidate = response.candidates[0]
-
-                # Check finish_reason for safety filters or other issues
-                if hasattr(candidate, "finish_reason"):
-                    if candidate.finish_reason == 2:  # SAFETY
-                        return "I'm having trouble processing your question about course materials. This appears to be an educational query, so please try rephrasing it or contact support if this continues."
-                    elif candidate.finish_reason == 3:  # RECITATION
-                        return "I cannot provide that specific response due to content policy. Please try asking in a different way."
-                    elif candidate.finish_reason == 4:  # OTHER
-                        return "I encountered a technical issue generating a response. Please try again with your question."
-
-                # Try to extract text safely
-                if candidate.content and candidate.content.parts:
-                    for part in candidate.content.parts:
-                        if hasattr(part, "text") and part.text:
-                            try:
-                                return (
-                                    str(part.text)
-                                    .encode("utf-8", errors="replace")
-                                    .decode("utf-8")
-                                )
-                            except:
-                                return part.text
-
-                # If no text content, check if there are function calls without text
-                if candidate.content and candidate.content.parts:
-                    for part in candidate.content.parts:
-                        if hasattr(part, "function_call") and part.function_call:
-                            # This should be handled by function call logic above
-                            return "Processing your request..."
-
-            # Fallback - try direct text access with error handling
-            try:
-                if response and hasattr(response, "text") and response.text:
-                    return (
-                        str(response.text)
-                        .encode("utf-8", errors="replace")
-                        .decode("utf-8")
-                    )
-            except Exception:
-                pass  # Fall through to default message
+            text = self._extract_text(response)
+            if text:
+                if self._is_blocked(response):
+                    self._mark_failed(context)
+                return text
+
+            if tool_results:
+                return f"Based on the search results: {' '.join(tool_results)}"
+
+            self._mark_failed(context)
+            # If no text content, check if there are function calls without text
+            if function_calls:
+                # Only reached without a tool manager to run them
+                return "Processing your request..."
 
             return "I apologize, but I couldn't generate a response. Please try again."
 
-        except UnicodeEncodeError as e:
+        except LLMUnavailableError:
+            # The caller answers without the model instead
+            raise
+        except UnicodeEncodeError:
+            self._mark_failed(context)
             return "I apologize, there was an encoding issue with the response. Please try again."
         except Exception as e:
+            self._mark_failed(context)
             # Handle encoding issues in error messages
             try:
                 error_msg = str(e).encode("utf-8", errors="replace").decode("utf-8")
@@ -169,6 +254,472 @@ Be direct and helpful in your responses."""
             except:
                 return "Error generating response. Please try again."
 
+    def generate_response_stream(
+        self,
+        query: str,
+        conversation_history: Optional[str] = None,
+        tools: Optional[List] = None,
+        tool_manager=None,
+        context: Optional[ToolContext] = None,
+        retrieved: Optional[str] = None,
+    ) -> Iterator[Dict[str, Any]]:
+        """
+        Generate AI response as a stream of events.
+
+        Unless search results were retrieved beforehand, the first tool
+        decision completes before anything is sent. Every later turn is
+        streamed: it either calls more tools (up to max_tool_rounds turns) or
+        streams the answer as it is generated.
+
+        Args:
+            query: The user's question or request
+            conversation_history: Previous messages for context
+            tools: Available tools the AI can use
+            tool_manager: Manager to execute tools
+            context: Collects this query's sources and per-round timings
+            retrieved: Search results fetched before the call; the answer is
+                then streamed from the first call
+
+        Yields:
+            {"type": "sources", "sources": [...]} after each round of tool
+            calls (all sources so far), then {"type": "token", "text": "..."}
+            for each piece of answer text
+        """
+        full_prompt = self._build_prompt(query, conversation_history, retrieved)
+        contents = [{"role": "user", "parts": [full_prompt]}]
+        if context is None:
+            context = ToolContext()
+        gemini_tools = None
+        if tools and tool_manager:
+            gemini_tools = self._tool_library(tools)
+
+        try:
+            round_number = 1
+            if gemini_tools and retrieved is None:
+                # The tool decision has to complete before anything can stream
+                started = time.perf_counter()
+                model, tool_arguments = self._model_for_round(
+                    gemini_tools, round_number
+                )
+                response = self._generate(model, contents, tool_arguments)
+                model_seconds = time.perf_counter() - started
+
+                function_calls = self._find_function_calls(response)
+                if not function_calls:
+                    self._record_round(context, round_number, model_seconds, contents)
+                    text = self._extract_text(response)
+                    if not text or self._is_blocked(response):
+                        context.failed = True
+                    yield {
+                        "type": "token",
+                        "text": text
+                        or "I apologize, but I couldn't generate a response. Please try again.",
+                    }
+                    return
+
+                self._run_tool_round(
+                    function_calls,
+                    response.candidates[0].content,
+                    contents,
+                    tool_manager,
+                    context,
+                    round_number,
+                    model_seconds,
+                )
+                yield {"type": "sources", "sources": list(context.sources)}
+                round_number += 1
+
+            while True:
+                started = time.perf_counter()
+                model, tool_arguments = self._model_for_round(
+                    gemini_tools, round_number
+                )
+                stream = self._generate(model, contents, tool_arguments, stream=True)
+
+                produced_text = False
+                function_calls = []
+                for chunk in stream:
+                    function_calls.extend(self._find_function_calls(chunk))
+                    if self._is_blocked(chunk):
+                        context.failed = True
+                    text = self._extract_chunk_text(chunk)
+                    if text:
+                        produced_text = True
+                        yield {"type": "token", "text": text}
+                model_seconds = time.perf_counter() - started
+
+                if (
+                    not function_calls
+                    or not gemini_tools
+                    or round_number > self.max_tool_rounds
+                ):
+                    self._record_round(context, round_number, model_seconds, contents)
+                    break
+                self._run_tool_round(
+                    function_calls,
+                    {"role": "model", "parts": function_calls},
+                    contents,
+                    tool_manager,
+                    context,
+                    round_number,
+                    model_seconds,
+                )
+                yield {"type": "sources", "sources": list(context.sources)}
+                round_number += 1
+
+            if not produced_text:
+                text = self._extract_text(stream)
+                if not text or self._is_blocked(stream):
+                    context.failed = True
+                yield {
+                    "type": "token",
+                    "text": text
+                    or "I apologize, but I couldn't generate a response. Please try again.",
+                }
+
+        except LLMUnavailableError:
+            raise
+        except Exception as e:
+            context.failed = True
+            # Handle encoding issues in error messages
+            error_msg = str(e).encode("utf-8", errors="replace").decode("utf-8")
+            yield {"type": "token", "text": f"Error generating response: {error_msg}"}
+
+    def _build_prompt(
+        self,
+        query: str,
+        conversation_history: Optional[str],
+        retrieved: Optional[str] = None,
+    ) -> str:
+        """Build prompt with conversation history (instructions are sent separately)"""
+        full_prompt = ""
+        if conversation_history:
+            full_prompt += f"Previous conversation:\n{conversation_history}\n\n"
+        if retrieved is not None:
+            full_prompt += (
+                f"Course material retrieved for the question:\n{retrieved}\n\n"
+            )
+        full_prompt += f"User question: {query}"
+        return full_prompt
+
+    def _generate(
+        self,
+        model,
+        contents: List[Dict[str, Any]],
+        tool_arguments: Dict[str, Any],
+        stream: bool = False,
+    ):
+        """
+        Call the model through the resilient client.
+
+        The SDK's own retry (503 only, for up to ten minutes) is turned off,
+        and each attempt's transport timeout is the time left before the
+        client's deadline. A stream is returned once its first chunk arrives,
+        so only that part is retried; streams are never hedged.
+
+        Raises:
+            LLMUnavailableError: If the model could not be reached in time
+        """
+        if stream:
+            tool_arguments = {**tool_arguments, "stream": True}
+
+        def attempt(timeout: float):
+            return model.generate_content(
+                contents,
+                request_options={"timeout": timeout, "retry": None},
+                **tool_arguments,
+            )
+
+        return self.client.call(attempt, hedge=False if stream else None)
+
+    def _tool_library(self, tools: List) -> FunctionLibrary:
+        """Gemini declarations for tools, converted once per distinct definition"""
+        key = json.dumps(tools, sort_keys=True)
+        library = self._tool_libraries.get(key)
+        if library is None:
+            library = FunctionLibrary(self._convert_tools_to_gemini_format(tools))
+            self._tool_libraries[key] = library
+        return library
+
+    def _model_for_round(
+        self, gemini_tools: Optional[FunctionLibrary], round_number: int
+    ) -> Tuple[Any, Dict[str, Any]]:
+        """
+        Model and tool arguments for one call.
+
+        Calls past max_tool_rounds may not call tools. A cached model cannot
+        take a tool config, so those calls use the plain model.
+        """
+        if not gemini_tools:
+            return self.model, {}
+        if round_number > self.max_tool_rounds:
+            # Tools stay declared since earlier calls are in the history
+            # A new dict each time, as the SDK converts tool_config in place
+            return self.model, {
+                "tools": gemini_tools,
+                "tool_config": {"function_calling_config": {"mode": "NONE"}},
+            }
+
+        cached_model = self._cached_model_for(gemini_tools)
+        if cached_model is not None:
+            # System prompt and tools are part of the cached prefix
+            return cached_model, {}
+        return self.model, {"tools": gemini_tools}
+
+    def _cached_model_for(self, gemini_tools: FunctionLibrary) -> Optional[Any]:
+        """The cached-prefix model if it was built for these tools and is live"""
+        with self._cache_lock:
+            if self._cached_model is None or gemini_tools is not self._cached_tools:
+                return None
+            if time.monotonic() > self._cache_expires_at - self.CACHE_REFRESH_MARGIN:
+                try:
+                    self._context_cache.update(
+                        ttl=datetime.timedelta(seconds=self._cache_ttl)
+                    )
+                    self._cache_expires_at = time.monotonic() + self._cache_ttl
+                except Exception as e:
+                    print(f"Error refreshing Gemini context cache: {e}")
+                    self._cached_model = None
+                    return None
+            return self._cached_model
+
+    def _find_function_calls(self, response) -> List[Any]:
+        """Return the function call parts of a response, in order"""
+        if (
+            response
+            and response.candidates
+            and len(response.candidates) > 0
+            and response.candidates[0].content
+            and response.candidates[0].content.parts
+        ):
+            return [
+                part.function_call
+                for part in response.candidates[0].content.parts
+                if hasattr(part, "function_call") and part.function_call
+            ]
+        return []
+
+    def _run_tool_round(
+        self,
+        function_calls: List[Any],
+        model_turn: Any,
+        contents: List[Any],
+        tool_manager,
+        context: Optional[ToolContext],
+        round_number: int,
+        model_seconds: float,
+    ) -> List[str]:
+        """
+        Execute one turn's function calls and add them to the conversation.
+
+        Args:
+            function_calls: Calls requested by the model, in order
+            model_turn: The model's content holding those calls
+            contents: Conversation so far, extended in place
+            tool_manager: Manager to execute tools
+            context: Collects sources and the round's timing
+            round_number: 1-based index of the model turn
+            model_seconds: Time the model took to request the calls
+
+        Returns:
+            Tool results in call order
+        """
+        started = time.perf_counter()
+        # One context per call, merged in call order so sources are stable
+        call_contexts = [ToolContext() for _ in function_calls]
+
+        def execute(index: int) -> str:
+            function_call = function_calls[index]
+            try:
+                return tool_manager.execute_tool(
+                    function_call.name,
+                    context=call_contexts[index],
+                    **self._convert_function_args(function_call),
+                )
+            except Exception as e:
+                return f"Error executing {function_call.name}: {e}"
+
+        if len(function_calls) == 1:
+            results = [execute(0)]
+        else:
+            results = list(
+                self._get_tool_pool().map(execute, range(len(function_calls)))
+            )
+
+        if context is not None:
+            for call_context in call_contexts:
+                context.sources.extend(call_context.sources)
+                context.retrieved_tokens += call_context.retrieved_tokens
+                context.packed_tokens += call_context.packed_tokens
+            context.rounds.append(
+                ToolRound(
+                    round_number,
+                    model_seconds,
+                    time.perf_counter() - started,
+                    [function_call.name for function_call in function_calls],
+                    self._estimate_prompt_tokens(contents),
+                )
+            )
+
+        contents.append(model_turn)
+        contents.append(
+            {
+                "role": "user",
+                "parts": [
+                    {
+                        "function_response": {
+                            "name": function_call.name,
+                            "response": {"result": result},
+                        }
+                    }
+                    for function_call, result in zip(function_calls, results)
+                ],
+            }
+        )
+        return results
+
+    def _record_round(
+        self,
+        context: Optional[ToolContext],
+        round_number: int,
+        model_seconds: float,
+        contents: List[Any],
+    ):
+        """Record the timing and prompt size of a model turn that called no tools"""
+        if context is not None:
+            context.rounds.append(
+                ToolRound(
+                    round_number,
+                    model_seconds,
+                    prompt_tokens=self._estimate_prompt_tokens(contents),
+                )
+            )
+
+    def _estimate_prompt_tokens(self, contents: List[Any]) -> int:
+        """Estimated input tokens of the system prompt, text and tool results"""
+        tokens = self._system_prompt_tokens
+        for turn in contents:
+            if not isinstance(turn, dict):
+                continue  # Model turns only hold short function calls
+            for part in turn["parts"]:
+                if isinstance(part, str):
+                    tokens += estimate_tokens(part)
+                elif isinstance(part, dict) and "function_response" in part:
+                    result = part["function_response"]["response"]["result"]
+                    tokens += estimate_tokens(str(result))
+        return tokens
+
+    def _get_tool_pool(self) -> ThreadPoolExecutor:
+        """Threads running one turn's tool calls concurrently, created on first use"""
+        with self._tool_pool_lock:
+            if self._tool_pool is None:
+                self._tool_pool = ThreadPoolExecutor(
+                    max_workers=self.max_parallel_tools, thread_name_prefix="tool-call"
+                )
+            return self._tool_pool
+
+    def _blocked_message(self, response) -> Optional[str]:
+        """Message for a response the model stopped for safety or other issues"""
+        if response and response.candidates and len(response.candidates) > 0:
+            candidate = response.candidates[0]
+
+            # Check finish_reason for safety filters or other issues
+            if hasattr(candidate, "finish_reason"):
+                if candidate.finish_reason == 2:  # SAFETY
+                    return "I'm having trouble processing your question about course materials. This appears to be an educational query, so please try rephrasing it or contact support if this continues."
+                elif candidate.finish_reason == 3:  # RECITATION
+                    return "I cannot provide that specific response due to content policy. Please try asking in a different way."
+                elif candidate.finish_reason == 4:  # OTHER
+                    return "I encountered a technical issue generating a response. Please try again with your question."
+        return None
+
+    def _is_blocked(self, response) -> bool:
+        """Whether the model stopped without a real answer"""
+        return self._blocked_message(response) is not None
+
+    @staticmethod
+    def _mark_failed(context: Optional[ToolContext]):
+        """Flag the answer as an error or refusal, so it is not reused"""
+        if context is not None:
+            context.failed = True
+
+    def _extract_text(self, response) -> Optional[str]:
+        """Safely extract answer text, mapping blocked responses to messages"""
+        blocked = self._blocked_message(response)
+        if blocked:
+            return blocked
+
+        if response and response.candidates and len(response.candidates) > 0:
+            candidate = response.candidates[0]
+
+            # Try to extract text safely
+            if candidate.content and candidate.content.parts:
+                for part in candidate.content.parts:
+                    if hasattr(part, "text") and part.text:
+                        try:
+                            return (
+                                str(part.text)
+                                .encode("utf-8", errors="replace")
+                                .decode("utf-8")
+                            )
+                        except:
+                            return part.text
+
+        # Fallback - try direct text access with error handling
+        try:
+            if response and hasattr(response, "text") and response.text:
+                return (
+                    str(response.text).encode("utf-8", errors="replace").decode("utf-8")
+                )
+        except Exception:
+            pass  # Fall through to no text
+
+        return None
+
+    def _extract_chunk_text(self, chunk) -> str:
+        """Join the text parts of one streamed chunk"""
+        if not chunk.candidates or not chunk.candidates[0].content:
+            return ""
+
+        texts = [
+            str(part.text)
+            for part in chunk.candidates[0].content.parts
+            if hasattr(part, "text") and part.text
+        ]
+        return "".join(texts).encode("utf-8", errors="replace").decode("utf-8")
+
+    def _convert_function_args(self, function_call) -> Dict[str, Any]:
+        """Convert protobuf function call args to a plain dict"""
+        function_args = {}
+        if function_call.args:
+            if hasattr(function_call.args, "fields"):
+                # Handle protobuf Struct format
+                for key, value in function_call.args.fields.items():
+                    if hasattr(value, "string_value") and value.string_value:
+                        function_args[key] = value.string_value
+                    elif hasattr(value, "number_value"):
+                        function_args[key] = (
+                            int(value.number_value)
+                            if value.number_value.is_integer()
+                            else value.number_value
+                        )
+                    elif hasattr(value, "bool_value"):
+                        function_args[key] = value.bool_value
+                    elif hasattr(value, "list_value"):
+                        function_args[key] = [
+                            item.string_value for item in value.list_value.values
+                        ]
+                    else:
+                        # Fallback
+                        function_args[key] = str(value)
+            else:
+                # Handle dict-like format (fallback)
+                try:
+                    function_args = dict(function_call.args)
+                except:
+                    pass  # Use empty dict
+        return function_args
+
     def _convert_tools_to_gemini_format(self, tools: List) -> List:
         """Convert Claude tool format to Gemini function format"""
         gemini_tools = []
@@ -184,112 +735,3 @@ Be direct and helpful in your responses."""
             }
             gemini_tools.append(gemini_tool)
         return gemini_tools
-
-    def _handle_gemini_function_call(
-        self, function_call, tool_manager, original_prompt
-    ):
-        """
-        Handle Gemini function calling and get follow-up response.
-
-        Args:
-            function_call: The function call from Gemini
-            tool_manager: Manager to execute tools
-            original_prompt: The original prompt for context
-
-        Returns:
-            Final response text after tool execution
-        """
-        try:
-            # Execute the function call
-            function_name = function_call.name
-
-            # Convert protobuf args to dict properly
-            function_args = {}
-            if function_call.args:
-                if hasattr(function_call.args, "fields"):
-                    # Handle protobuf Struct format
-                    for key, value in function_call.args.fields.items():
-                        if hasattr(value, "string_value") and value.string_value:
-                            function_args[key] = value.string_value
-                        elif hasattr(value, "number_value"):
-                            function_args[key] = (
-                                int(value.number_value)
-                                if value.number_value.is_integer()
-                                else value.number_value
-                            )
-                        elif hasattr(value, "bool_value"):
-                            function_args[key] = value.bool_value
-                        elif hasattr(value, "list_value"):
-                            function_args[key] = [
-                                item.string_value for item in value.list_value.values
-                            ]
-                        else:
-                            # Fallback
-                            function_args[key] = str(value)
-                else:
-                    # Handle dict-like format (fallback)
-                    try:
-                        function_args = dict(function_call.args)
-                    except:
-                        pass  # Use empty dict
-
-            tool_result = tool_manager.execute_tool(function_name, **function_args)
-
-            # Create follow-up prompt with tool result
-            follow_up_prompt = f"{original_prompt}\n\nFunction call result: {tool_result}\n\nBased on this information, provide a comprehensive answer:"
-
-            # Generate final response
-            response = self.model.generate_content(
-                follow_up_prompt,
-                generation_config=self.generation_config,
-                safety_settings=self.safety_settings,
-            )
-
-            # Safely extract text from response with proper error handling
-            if response and response.candidates and len(response.candidates) > 0:
-                candidate = response.candidates[0]
-
-                # Check finish_reason for safety filters or other issues
-                if hasattr(candidate, "finish_reason"):
-                    if candidate.finish_reason == 2:  # SAFETY
-                        return "I'm having trouble processing your question about course materials. This appears to be an educational query, so please try rephrasing it or contact support if this continues."
-                    elif candidate.finish_reason == 3:  # RECITATION
-                        return "I cannot provide that specific response due to content policy. Please try asking in a different way."
-                    elif candidate.finish_reason == 4:  # OTHER
-                        return "I encountered a technical issue generating a response. Please try again with your question."
-
-                # Try to extract text safely
-                if candidate.content and candidate.content.parts:
-                    for part in candidate.content.parts:
-                        if hasattr(part, "text") and part.text:
-                            try:
-                                return (
-                                    str(part.text)
-                                    .encode("utf-8", errors="replace")
-                                    .decode("utf-8")
-                                )
-                            except:
-                                return part.text
-
-            # Fallback - try direct text access with error handling
-            try:
-                if response and hasattr(response, "text") and response.text:
-                    return (
-                        str(response.text)
-                        .encode("utf-8", errors="replace")
-                        .decode("utf-8")
-                    )
-            except Exception:
-                pass  # Fall through to default message
-
-            return f"Based on the search results: {tool_result}"
-
-        except UnicodeEncodeError as e:
-            return "I apologize, there was an encoding issue with the function response. Please try again."
-        except Exception as e:
-            # Handle encoding issues in error messages
-            try:
-                error_msg = str(e).encode("utf-8", errors="replace").decode("utf-8")
-                return f"Error executing function: {error_msg}"
-            except:
-                return "Error executing function. Please try again."
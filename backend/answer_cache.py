@@ -0,0 +1,170 @@
+import re
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+
+# Numbers (lesson numbers, versions) change the meaning of otherwise similar
+# questions, so two queries only match when they mention the same numbers
+_NUMBER_PATTERN = re.compile(r"\d+")
+
+
+@dataclass
+class CachedAnswer:
+    """An answer and its sources stored for a past query"""
+
+    query: str
+    answer: str
+    sources: List[str]
+    embedding: np.ndarray
+    numbers: Tuple[str, ...]
+    created_at: float = field(default_factory=time.monotonic)
+
+
+class SemanticAnswerCache:
+    """Answer cache that matches new queries to past ones by embedding similarity"""
+
+    def __init__(
+        self,
+        embed: Callable[[str], np.ndarray],
+        max_entries: int = 256,
+        ttl_seconds: float = 3600,
+        similarity_threshold: float = 0.9,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.embed = embed
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.similarity_threshold = similarity_threshold
+        self.clock = clock
+
+        self._entries: "OrderedDict[str, CachedAnswer]" = OrderedDict()
+        self._matrix: Optional[np.ndarray] = None  # Rows follow _entries order
+        self._lock = threading.Lock()
+        self.generation = 0  # Bumped on every clear()
+        self.hits = 0
+        self.misses = 0
+
+    def get(
+        self, query: str, similarity_threshold: Optional[float] = None
+    ) -> Optional[CachedAnswer]:
+        """
+        Find a cached answer for a semantically equivalent query.
+
+        Args:
+            query: The user's question
+            similarity_threshold: Overrides the minimum similarity for this
+                lookup, e.g. to accept looser matches while the LLM is down
+
+        Returns:
+            The best matching cached answer, or None on a miss
+        """
+        embedding = self._normalize(self.embed(query))
+        numbers = self._numbers(query)
+        if similarity_threshold is None:
+            similarity_threshold = self.similarity_threshold
+
+        with self._lock:
+            self._evict_expired()
+
+            match = None
+            if self._entries:
+                entries = list(self._entries.values())
+                similarities = self._get_matrix() @ embedding
+                for index in np.argsort(-similarities):
+                    if similarities[index] < similarity_threshold:
+                        break
+                    entry = entries[index]
+                    if entry.numbers == numbers:
+                        match = entry
+                        break
+
+            if match is None:
+                self.misses += 1
+                return None
+
+            self.hits += 1
+            self._entries.move_to_end(match.query)
+            self._matrix = None
+            return match
+
+    def put(
+        self,
+        query: str,
+        answer: str,
+        sources: List[str],
+        generation: Optional[int] = None,
+    ):
+        """
+        Store an answer, evicting the least recently used entry when full.
+
+        Args:
+            query: The user's question
+            answer: The generated answer
+            sources: Sources the answer was based on
+            generation: Cache generation read before the answer was computed;
+                the answer is dropped if the cache was cleared meanwhile
+        """
+        entry = CachedAnswer(
+            query=query,
+            answer=answer,
+            sources=list(sources),
+            embedding=self._normalize(self.embed(query)),
+            numbers=self._numbers(query),
+            created_at=self.clock(),
+        )
+
+        with self._lock:
+            if generation is not None and generation != self.generation:
+                return
+            self._entries[query] = entry
+            self._entries.move_to_end(query)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+            self._matrix = None
+
+    def clear(self):
+        """Drop every cached answer, e.g. after the corpus changed"""
+        with self._lock:
+            self._entries.clear()
+            self._matrix = None
+            self.generation += 1
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get hit/miss counters and current size"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+            }
+
+    def _evict_expired(self):
+        """Remove entries older than the TTL (caller holds the lock)"""
+        cutoff = self.clock() - self.ttl_seconds
+        expired = [q for q, e in self._entries.items() if e.created_at < cutoff]
+        for query in expired:
+            del self._entries[query]
+        if expired:
+            self._matrix = None
+
+    def _get_matrix(self) -> np.ndarray:
+        """Stack entry embeddings into one matrix (caller holds the lock)"""
+        if self._matrix is None:
+            self._matrix = np.vstack([e.embedding for e in self._entries.values()])
+        return self._matrix
+
+    @staticmethod
+    def _normalize(embedding) -> np.ndarray:
+        vector = np.asarray(embedding, dtype=np.float32)
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
+
+    @staticmethod
+    def _numbers(query: str) -> Tuple[str, ...]:
+        return tuple(_NUMBER_PATTERN.findall(query))
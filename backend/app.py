@@ -1,5 +1,9 @@
+import time
 import warnings
 
+# Reference point for reporting time-to-listening and time-to-ready
+_PROCESS_STARTED = time.perf_counter()
+
 warnings.filterwarnings("ignore", message="resource_tracker: There appear to be.*")
 
 import os
@@ -16,15 +20,22 @@ if sys.platform.startswith("win"):
     except:
         pass
 
-from typing import List, Optional
+import hashlib
+import json
+import threading
+from dataclasses import asdict
+from typing import Any, Dict, List, Optional, Tuple
 
 from config import config
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, HTTPException, Query, Request, Response
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.middleware.trustedhost import TrustedHostMiddleware
+from fastapi.responses import JSONResponse, StreamingResponse
 from fastapi.staticfiles import StaticFiles
 from pydantic import BaseModel
+from query_executor import DrainedIterator, QueryExecutor, QueryQueueFullError
 from rag_system import RAGSystem
+from startup_tracker import StartupTracker
 
 # Initialize FastAPI app
 app = FastAPI(title="Course Materials RAG System", root_path="")
@@ -42,8 +53,16 @@ app.add_middleware(
     expose_headers=["*"],
 )
 
-# Initialize RAG system
-rag_system = RAGSystem(config)
+# The RAG system loads the embedding model, so it is built in the background
+# after the server starts listening rather than at import time
+rag_system: Optional[RAGSystem] = None
+startup_tracker = StartupTracker(started_at=_PROCESS_STARTED)
+
+# Bounded worker pool so blocking queries never stall the event loop
+query_executor = QueryExecutor(
+    config.MAX_CONCURRENT_QUERIES,
+    config.MAX_QUEUED_QUERIES,
+)
 
 
 # Pydantic models for request/response
@@ -62,6 +81,28 @@ class QueryResponse(BaseModel):
     session_id: str
 
 
+class SearchHit(BaseModel):
+    """One snippet returned by course search"""
+
+    course_title: str
+    lesson_number: Optional[int]
+    link: Optional[str]
+    snippet: str
+    highlights: List[Tuple[int, int]]  # [start, end) offsets of query terms
+
+
+class SearchResponse(BaseModel):
+    """Response model for course search"""
+
+    query: str
+    results: List[SearchHit]
+    page: int
+    page_size: int
+    has_more: bool
+    error: Optional[str] = None
+    took_ms: float
+
+
 class CourseStats(BaseModel):
     """Response model for course statistics"""
 
@@ -72,50 +113,222 @@ class CourseStats(BaseModel):
 # API Endpoints
 
 
+def _require_rag_system() -> RAGSystem:
+    """Return the RAG system, or answer 503 while it is still loading"""
+    if rag_system is None:
+        raise HTTPException(
+            status_code=503,
+            detail=f"Server is starting ({startup_tracker.phase}), retry shortly",
+            headers={"Retry-After": "5"},
+        )
+    return rag_system
+
+
 @app.post("/api/query", response_model=QueryResponse)
 async def query_documents(request: QueryRequest):
     """Process a query and return response with sources"""
+    rag = _require_rag_system()
     try:
         # Create session if not provided
         session_id = request.session_id
         if not session_id:
-            session_id = rag_system.session_manager.create_session()
+            session_id = rag.session_manager.create_session()
 
-        # Process query using RAG system
-        answer, sources = rag_system.query(request.query, session_id)
+        # Process query using RAG system in the worker pool
+        answer, sources = await query_executor.run(rag.query, request.query, session_id)
 
         return QueryResponse(answer=answer, sources=sources, session_id=session_id)
+    except QueryQueueFullError as e:
+        raise HTTPException(
+            status_code=429, detail=str(e), headers={"Retry-After": "1"}
+        )
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+def _format_sse(event: str, data: Dict[str, Any]) -> str:
+    """Format one Server-Sent Events message"""
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
+async def _stream_query_events(events: DrainedIterator, session_id: str):
+    """Translate RAG stream events into SSE messages"""
+    try:
+        # Send the session straight away so the first byte is not held back by
+        # retrieval
+        yield _format_sse("start", {"session_id": session_id})
+        async for event in events:
+            if event["type"] == "sources":
+                yield _format_sse("sources", {"sources": event["sources"]})
+            elif event["type"] == "token":
+                yield _format_sse("token", {"text": event["text"]})
+        yield _format_sse("done", {"session_id": session_id})
+    except Exception as e:
+        yield _format_sse("error", {"detail": str(e)})
+    finally:
+        # Frees the query slot when the client disconnects mid-stream
+        await events.aclose()
+
+
+@app.post("/api/query/stream")
+async def query_documents_stream(request: QueryRequest):
+    """Process a query and stream sources and answer tokens as Server-Sent Events"""
+    rag = _require_rag_system()
+    try:
+        session_id = request.session_id
+        if not session_id:
+            session_id = rag.session_manager.create_session()
+
+        events = query_executor.iterate(rag.query_stream(request.query, session_id))
+    except QueryQueueFullError as e:
+        raise HTTPException(
+            status_code=429, detail=str(e), headers={"Retry-After": "1"}
+        )
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+    return StreamingResponse(
+        _stream_query_events(events, session_id),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@app.get("/api/search", response_model=SearchResponse)
+async def search_courses(
+    q: str = Query(..., min_length=1),
+    course: Optional[str] = None,
+    lesson: Optional[int] = Query(None, ge=0),
+    page: int = Query(1, ge=1),
+    page_size: int = Query(10, ge=1, le=50),
+):
+    """Ranked course snippets with lesson links, without generating an answer"""
+    rag = _require_rag_system()
+    try:
+        result = await query_executor.run(
+            rag.search, q, course, lesson, page=page, page_size=page_size
+        )
+        return SearchResponse(
+            query=q,
+            results=[SearchHit(**asdict(hit)) for hit in result.hits],
+            page=result.page,
+            page_size=result.page_size,
+            has_more=result.has_more,
+            error=result.error,
+            took_ms=result.took_ms,
+        )
+    except QueryQueueFullError as e:
+        raise HTTPException(
+            status_code=429, detail=str(e), headers={"Retry-After": "1"}
+        )
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 
 @app.get("/api/courses", response_model=CourseStats)
-async def get_course_stats():
-    """Get course analytics and statistics"""
+async def get_course_stats(request: Request):
+    """Get course analytics and statistics, revalidated by ETag"""
+    rag = _require_rag_system()
     try:
-        analytics = rag_system.get_course_analytics()
-        return CourseStats(
+        analytics = rag.get_course_analytics()
+        stats = CourseStats(
             total_courses=analytics["total_courses"],
             course_titles=analytics["course_titles"],
         )
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+    body = stats.model_dump_json()
+    etag = f'"{hashlib.sha1(body.encode()).hexdigest()}"'
+    # Browsers revalidate on every page load and get a 304 while the
+    # catalog is unchanged
+    headers = {"ETag": etag, "Cache-Control": "no-cache"}
+    if_none_match = request.headers.get("if-none-match", "")
+    if etag in (tag.strip().removeprefix("W/") for tag in if_none_match.split(",")):
+        return Response(status_code=304, headers=headers)
+    return Response(content=body, media_type="application/json", headers=headers)
+
+
+@app.get("/api/stats")
+async def get_query_stats():
+    """Routing and model-call figures since startup, with worker pool load"""
+    rag = _require_rag_system()
+    return {
+        "routing": rag.routing_stats.get_stats(),
+        "executor": query_executor.get_stats(),
+    }
+
+
+@app.get("/healthz")
+async def healthz():
+    """Liveness: the process is up and startup has not failed"""
+    if not startup_tracker.is_alive:
+        return JSONResponse(status_code=503, content={"status": startup_tracker.phase})
+    return {"status": "ok"}
+
+
+@app.get("/readyz")
+async def readyz():
+    """Readiness: queries can be served, with ingestion progress and timings"""
+    status = startup_tracker.get_status()
+    return JSONResponse(status_code=200 if status["serving"] else 503, content=status)
+
+
+def _load_rag_system(docs_path: str):
+    """Load the model and ingest course documents off the event loop"""
+    global rag_system
+    try:
+        startup_tracker.set_phase(StartupTracker.LOADING_MODEL)
+        if rag_system is None:
+            rag_system = RAGSystem(config)
+        rag = rag_system
+    except Exception as e:
+        print(f"Error loading RAG system: {e}")
+        startup_tracker.mark_failed(str(e))
+        return
 
-@app.on_event("startup")
-async def startup_event():
-    """Load initial documents on startup"""
-    docs_path = "../docs"
+    # A persisted index can answer queries while the folder is re-synced
+    try:
+        has_courses = rag.get_course_analytics()["total_courses"] > 0
+    except Exception:
+        has_courses = False
+    if has_courses:
+        startup_tracker.mark_serving()
+
+    error = None
     if os.path.exists(docs_path):
+        startup_tracker.set_phase(StartupTracker.INGESTING)
         print("Loading initial documents...")
         try:
-            courses, chunks = rag_system.add_course_folder(
-                docs_path, clear_existing=False
+            courses, chunks = rag.add_course_folder(
+                docs_path,
+                clear_existing=False,
+                progress=startup_tracker.update_progress,
             )
             print(f"Loaded {courses} courses with {chunks} chunks")
         except Exception as e:
+            error = str(e)
             print(f"Error loading documents: {e}")
 
+    startup_tracker.mark_ready(error)
+    print(startup_tracker.summary())
+
+
+@app.on_event("startup")
+async def startup_event():
+    """Start listening straight away and load the RAG system in the background"""
+    startup_tracker.mark_listening()
+    threading.Thread(
+        target=_load_rag_system, args=("../docs",), name="rag-startup", daemon=True
+    ).start()
+
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    """Persist caches so the next start is warm"""
+    if rag_system is not None:
+        rag_system.shutdown()
+
 
 import os
 from pathlib import Path
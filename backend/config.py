@@ -14,6 +14,19 @@ class Config:
     # Google Gemini API settings
     GEMINI_API_KEY: str = os.getenv("GEMINI_API_KEY", "")
     GEMINI_MODEL: str = "gemini-2.5-flash"
+    # Cache the system prompt and tool declarations on Gemini's side. Only
+    # takes effect once they exceed the model's minimum cacheable size.
+    GEMINI_CONTEXT_CACHE: bool = False
+    GEMINI_CONTEXT_CACHE_TTL: int = 3600  # Seconds, extended while in use
+
+    # Gemini call resilience settings
+    LLM_TIMEOUT_SECONDS: float = 30.0  # Deadline per model call, retries included
+    LLM_MAX_RETRIES: int = 2  # Extra attempts after overload or transient errors
+    LLM_HEDGE: bool = False  # Race calls slower than the recent p95 with a 2nd one
+    LLM_BREAKER_FAILURES: int = 5  # Consecutive failed calls that open the circuit
+    LLM_BREAKER_RESET_SECONDS: float = 30.0  # Open time before a trial call
+    # Looser cached-answer match served while the circuit is open
+    LLM_FALLBACK_SIMILARITY: float = 0.8
 
     # Embedding model settings
     EMBEDDING_MODEL: str = "all-MiniLM-L6-v2"
@@ -22,8 +35,52 @@ class Config:
     CHUNK_SIZE: int = 800  # Size of text chunks for vector storage
     CHUNK_OVERLAP: int = 100  # Characters to overlap between chunks
     MAX_RESULTS: int = 5  # Maximum search results to return
+    CONTEXT_TOKEN_BUDGET: int = 1000  # Estimated tokens of search results per call
     MAX_HISTORY: int = 2  # Number of conversation messages to remember
 
+    # Session store settings
+    SESSION_MAX_COUNT: int = 10000  # Sessions kept in memory before LRU eviction
+    SESSION_TTL_SECONDS: int = 24 * 3600  # Idle time before a session expires
+    SESSION_DB_PATH: str = ""  # SQLite file shared by local workers, empty to disable
+    SESSION_REDIS_URL: str = ""  # redis:// URL shared by all hosts, empty to disable
+
+    # Tool calling settings
+    MAX_TOOL_ROUNDS: int = 2  # Model turns that may call tools before answering
+    MAX_PARALLEL_TOOLS: int = 4  # Tool calls from one turn run at the same time
+    # Search before calling the model when a heuristic says the question needs
+    # it, so most queries take one model call instead of two
+    QUERY_ROUTING: bool = True
+
+    # Query concurrency settings
+    MAX_CONCURRENT_QUERIES: int = 8  # Worker threads running RAG queries
+    MAX_QUEUED_QUERIES: int = 32  # Queries allowed to wait before answering 429
+
+    # Semantic answer cache settings
+    ANSWER_CACHE_ENABLED: bool = True
+    ANSWER_CACHE_MAX_ENTRIES: int = 256  # Answers kept before LRU eviction
+    ANSWER_CACHE_TTL_SECONDS: int = 3600  # Maximum age of a cached answer
+    ANSWER_CACHE_SIMILARITY: float = 0.9  # Minimum cosine similarity for a hit
+
+    # Embedding cache settings
+    EMBEDDING_CACHE_SIZE: int = 2048  # Query embeddings kept before LRU eviction
+    EMBEDDING_CACHE_PATH: str = ""  # File to persist the cache in, empty to disable
+
+    # Retrieval settings
+    SEARCH_MODE: str = "vector"  # "vector" or "hybrid" (dense + BM25 fused by RRF)
+    HYBRID_CANDIDATES: int = 20  # Results taken from each ranking before fusion
+    RRF_K: int = 60  # Reciprocal rank fusion damping constant
+
+    # Snippet search settings (/api/search, no LLM)
+    SEARCH_MAX_RESULTS: int = 100  # Deepest result reachable by paging
+    SEARCH_SNIPPET_CHARS: int = 240  # Longest snippet per result
+
+    # Ingestion pipeline settings
+    INGEST_WORKERS: int = min(4, os.cpu_count() or 1)  # Processes parsing files
+    EMBEDDING_BATCH_SIZE: int = 64  # Chunks embedded per model call
+    UPSERT_BATCH_SIZE: int = 256  # Chunks written to ChromaDB per call
+    STREAM_PARSE_BYTES: int = 64 * 1024 * 1024  # Larger files parsed lesson by lesson
+    EXTRACTION_TIMEOUT: float = 120.0  # Seconds to extract one PDF or DOCX file
+
     # Database paths
     CHROMA_PATH: str = "./chroma_db"  # ChromaDB storage location
 
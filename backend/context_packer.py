@@ -0,0 +1,217 @@
+import re
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+# Words, numbers and single punctuation marks, roughly where subword
+# tokenizers split English text
+_TOKEN_PIECES = re.compile(r"\w+|[^\w\s]")
+
+# Passages cut shorter than this are left out instead
+_MIN_TRUNCATED_TOKENS = 32
+_ELLIPSIS = " ..."
+
+
+def estimate_tokens(text: str) -> int:
+    """
+    Approximate the number of model tokens in text without a tokenizer.
+
+    Every punctuation mark counts as one token and every word as one token
+    per four characters, rounded up.
+    """
+    return sum((len(piece) + 3) // 4 for piece in _TOKEN_PIECES.findall(text))
+
+
+def strip_lesson_prefix(
+    document: str, course_title: str, lesson_number: Optional[int]
+) -> str:
+    """Remove the lesson context the processor prepends to some chunks"""
+    for prefix in (
+        f"Course {course_title} Lesson {lesson_number} content: ",
+        f"Lesson {lesson_number} content: ",
+    ):
+        if document.startswith(prefix):
+            return document[len(prefix) :]
+    return document
+
+
+@dataclass
+class Passage:
+    """Contiguous text of one lesson, merged from adjacent chunks"""
+
+    course_title: str
+    lesson_number: Optional[int]
+    text: str
+    rank: int  # Best search rank among its chunks, 0 being the most relevant
+    chunks: int = 1
+
+    @property
+    def label(self) -> str:
+        if self.lesson_number is None:
+            return self.course_title
+        return f"{self.course_title} - Lesson {self.lesson_number}"
+
+
+@dataclass
+class PackedContext:
+    """Search results packed into a prompt-ready block of text"""
+
+    text: str
+    sources: List[str] = field(default_factory=list)
+    retrieved_tokens: int = 0  # Estimated tokens of the chunks as retrieved
+    packed_tokens: int = 0  # Estimated tokens of text
+    chunks: int = 0  # Distinct chunks retrieved
+    passages: int = 0  # Passages included in text
+    dropped: int = 0  # Passages left out to stay within the budget
+    truncated: bool = False  # Whether the last passage was cut short
+
+
+class ContextPacker:
+    """Dedupes, merges and trims search results to a token budget"""
+
+    def __init__(self, token_budget: int = 1000, chunk_overlap: int = 100):
+        """
+        Args:
+            token_budget: Estimated tokens the packed text may use
+            chunk_overlap: Characters adjacent chunks were made to share
+        """
+        self.token_budget = token_budget
+        self.chunk_overlap = chunk_overlap
+
+    def pack(
+        self, documents: Sequence[str], metadata: Sequence[Dict[str, Any]]
+    ) -> PackedContext:
+        """
+        Pack ranked search results into one block of text.
+
+        Chunks retrieved more than once are kept once. Chunks of the same
+        lesson with consecutive chunk_index values are merged into a single
+        passage, with the text they overlap on kept once. Passages are then
+        added in rank order while they fit the budget; the first passage that
+        does not fit is cut at a word boundary if enough of it fits.
+
+        Args:
+            documents: Chunk texts, most relevant first
+            metadata: Chunk metadata with course_title, lesson_number and
+                chunk_index
+
+        Returns:
+            PackedContext with one "[Course - Lesson N]" block per passage
+        """
+        passages, chunks, retrieved_tokens = self._merge(documents, metadata)
+        passages.sort(key=lambda passage: passage.rank)
+
+        blocks: List[str] = []
+        sources: List[str] = []
+        used = 0
+        truncated = False
+        for passage in passages:
+            header = f"[{passage.label}]\n"
+            # Whitespace costs nothing, so block costs simply add up
+            cost = estimate_tokens(header + passage.text)
+            if used + cost <= self.token_budget:
+                body = passage.text
+            else:
+                remaining = (
+                    self.token_budget
+                    - used
+                    - estimate_tokens(header)
+                    - estimate_tokens(_ELLIPSIS)
+                )
+                if remaining < _MIN_TRUNCATED_TOKENS and blocks:
+                    break
+                body = self._truncate(passage.text, remaining)
+                truncated = True
+                cost = estimate_tokens(header + body)
+
+            blocks.append(header + body)
+            used += cost
+            if passage.label not in sources:
+                sources.append(passage.label)
+            if truncated:
+                break
+
+        return PackedContext(
+            text="\n\n".join(blocks),
+            sources=sources,
+            retrieved_tokens=retrieved_tokens,
+            packed_tokens=used,
+            chunks=chunks,
+            passages=len(blocks),
+            dropped=len(passages) - len(blocks),
+            truncated=truncated,
+        )
+
+    def _merge(
+        self, documents: Sequence[str], metadata: Sequence[Dict[str, Any]]
+    ) -> Tuple[List[Passage], int, int]:
+        """
+        Group chunks by lesson and merge runs of adjacent chunks.
+
+        Returns:
+            Tuple of (passages, distinct chunks, estimated retrieved tokens)
+        """
+        seen = set()
+        retrieved_tokens = 0
+        # (course, lesson) -> [(chunk_index, rank, text)]
+        lessons: Dict[Tuple[str, Optional[int]], List[Tuple[int, int, str]]] = {}
+        unindexed: List[Passage] = []
+        for rank, (document, meta) in enumerate(zip(documents, metadata)):
+            retrieved_tokens += estimate_tokens(document)
+            course_title = meta.get("course_title", "unknown")
+            lesson_number = meta.get("lesson_number")
+            chunk_index = meta.get("chunk_index")
+            key = (course_title, chunk_index if chunk_index is not None else document)
+            if key in seen:
+                continue
+            seen.add(key)
+
+            if chunk_index is None:
+                unindexed.append(Passage(course_title, lesson_number, document, rank))
+            else:
+                lessons.setdefault((course_title, lesson_number), []).append(
+                    (chunk_index, rank, document)
+                )
+
+        passages = unindexed
+        for (course_title, lesson_number), entries in lessons.items():
+            entries.sort()
+            previous_index = None
+            for chunk_index, rank, document in entries:
+                if previous_index is not None and chunk_index == previous_index + 1:
+                    passage = passages[-1]
+                    passage.text = self._join(
+                        passage.text,
+                        strip_lesson_prefix(document, course_title, lesson_number),
+                    )
+                    passage.rank = min(passage.rank, rank)
+                    passage.chunks += 1
+                else:
+                    passages.append(
+                        Passage(course_title, lesson_number, document, rank)
+                    )
+                previous_index = chunk_index
+
+        return passages, len(seen), retrieved_tokens
+
+    def _join(self, first: str, second: str) -> str:
+        """Concatenate adjacent chunks, keeping the text they share once"""
+        longest = min(len(first), len(second), self.chunk_overlap)
+        for size in range(longest, 0, -1):
+            # The overlap is whole sentences, so it starts and ends on a word
+            if (size == len(second) or second[size] == " ") and (
+                size == len(first) or first[-size - 1] == " "
+            ):
+                if first.endswith(second[:size]):
+                    return first + second[size:]
+        return f"{first} {second}"
+
+    @staticmethod
+    def _truncate(text: str, max_tokens: int) -> str:
+        """Cut text after the last whole word within max_tokens"""
+        words = text.split(" ")
+        used = 0
+        for count, word in enumerate(words):
+            used += estimate_tokens(word)
+            if used > max_tokens:
+                return " ".join(words[:count]) + _ELLIPSIS
+        return text
@@ -0,0 +1,85 @@
+import json
+import threading
+from typing import Any, Dict, List, Optional, Tuple
+
+from models import Course, Lesson
+
+
+class CourseCatalog:
+    """In-memory copy of the course catalog, indexed by title and lesson"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        # Replaced, never mutated, so readers need no lock
+        self._courses: Dict[str, Course] = {}
+        self._lessons: Dict[Tuple[str, int], Lesson] = {}
+
+    @staticmethod
+    def from_metadata(metadata: Dict[str, Any]) -> Course:
+        """Rebuild a course from its catalog metadata"""
+        lessons = [
+            Lesson(
+                lesson_number=lesson["lesson_number"],
+                title=lesson.get("lesson_title") or "",
+                lesson_link=lesson.get("lesson_link"),
+            )
+            for lesson in json.loads(metadata.get("lessons_json") or "[]")
+        ]
+        return Course(
+            title=metadata["title"],
+            course_link=metadata.get("course_link"),
+            instructor=metadata.get("instructor"),
+            lessons=lessons,
+        )
+
+    def load(self, courses: List[Course]):
+        """Replace the catalog contents"""
+        with self._lock:
+            self._replace({course.title: course for course in courses})
+
+    def add(self, course: Course):
+        """Add a course, or replace the one with the same title"""
+        with self._lock:
+            courses = dict(self._courses)
+            courses[course.title] = course.model_copy(deep=True)
+            self._replace(courses)
+
+    def remove(self, title: str):
+        """Drop a course and its lessons"""
+        with self._lock:
+            if title in self._courses:
+                courses = dict(self._courses)
+                del courses[title]
+                self._replace(courses)
+
+    def clear(self):
+        """Empty the catalog"""
+        self.load([])
+
+    @property
+    def titles(self) -> List[str]:
+        return list(self._courses)
+
+    def __len__(self) -> int:
+        return len(self._courses)
+
+    def all(self) -> List[Course]:
+        """Every course, in insertion order"""
+        return list(self._courses.values())
+
+    def get(self, title: str) -> Optional[Course]:
+        """Course with this exact title, or None"""
+        return self._courses.get(title)
+
+    def get_lesson(self, title: str, lesson_number: int) -> Optional[Lesson]:
+        """Lesson of a course by number, or None"""
+        return self._lessons.get((title, lesson_number))
+
+    def _replace(self, courses: Dict[str, Course]):
+        """Swap in new contents and rebuild the lesson index (caller holds the lock)"""
+        self._lessons = {
+            (course.title, lesson.lesson_number): lesson
+            for course in courses.values()
+            for lesson in course.lessons
+        }
+        self._courses = courses
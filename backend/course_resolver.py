@@ -0,0 +1,125 @@
+import threading
+from typing import Callable, List, Optional, Sequence
+
+import numpy as np
+
+
+class CourseNameResolver:
+    """In-memory index resolving user-supplied course names to catalog titles"""
+
+    def __init__(self, embed: Callable[[List[str]], Sequence]):
+        self.embed = embed
+        self._lock = threading.Lock()
+        self._titles: List[str] = []
+        self._folded: List[str] = []  # Case-folded titles, same order
+        self._matrix = np.zeros((0, 0), dtype=np.float32)  # Unit-length rows
+
+    def load(self, titles: List[str], embeddings: Optional[Sequence] = None):
+        """Replace the index contents, embedding titles if no vectors are given"""
+        if titles and embeddings is None:
+            embeddings = self.embed(list(titles))
+
+        matrix = (
+            self._normalize_rows(np.asarray(embeddings, dtype=np.float32))
+            if titles
+            else np.zeros((0, 0), dtype=np.float32)
+        )
+        with self._lock:
+            self._titles = list(titles)
+            self._folded = [title.casefold() for title in titles]
+            self._matrix = matrix
+
+    def add(self, title: str, embedding: Sequence[float]):
+        """Add or replace one title in the index"""
+        row = self._normalize_rows(np.asarray([embedding], dtype=np.float32))
+        with self._lock:
+            if title in self._titles:
+                index = self._titles.index(title)
+                matrix = self._matrix.copy()
+                matrix[index] = row[0]
+                self._matrix = matrix
+                return
+
+            # Copy-on-write so concurrent readers keep a consistent snapshot
+            self._titles = self._titles + [title]
+            self._folded = self._folded + [title.casefold()]
+            self._matrix = (
+                row if not len(self._matrix) else np.vstack([self._matrix, row])
+            )
+
+    def remove(self, title: str):
+        """Drop one title from the index"""
+        with self._lock:
+            if title not in self._titles:
+                return
+            index = self._titles.index(title)
+            self._titles = self._titles[:index] + self._titles[index + 1 :]
+            self._folded = self._folded[:index] + self._folded[index + 1 :]
+            self._matrix = np.delete(self._matrix, index, axis=0)
+
+    def clear(self):
+        """Empty the index"""
+        self.load([])
+
+    @property
+    def titles(self) -> List[str]:
+        return list(self._titles)
+
+    def resolve(self, course_name: str) -> Optional[str]:
+        """
+        Find the catalog title that best matches a course name.
+
+        String matches are tried first (exact, case-insensitive, prefix,
+        substring) and only an unmatched or ambiguous name is embedded and
+        compared against the title vectors.
+
+        Args:
+            course_name: Full or partial course name from the user or model
+
+        Returns:
+            The matching course title, or None if the catalog is empty
+        """
+        with self._lock:
+            titles, folded, matrix = self._titles, self._folded, self._matrix
+
+        if not titles:
+            return None
+
+        if course_name in titles:
+            return course_name
+
+        name = course_name.strip().casefold()
+        for predicate in (
+            lambda title: title == name,
+            lambda title: title.startswith(name),
+            lambda title: name in title,
+        ):
+            candidates = [i for i, title in enumerate(folded) if predicate(title)]
+            if len(candidates) == 1:
+                return titles[candidates[0]]
+            if candidates:
+                # Ambiguous string match - let the embeddings break the tie
+                return self._closest(course_name, titles, matrix, candidates)
+
+        return self._closest(course_name, titles, matrix, range(len(titles)))
+
+    def _closest(
+        self,
+        course_name: str,
+        titles: List[str],
+        matrix: np.ndarray,
+        candidates: Sequence[int],
+    ) -> str:
+        """Pick the candidate whose title vector is most similar to the name"""
+        candidates = list(candidates)
+        query = self._normalize_rows(
+            np.asarray(self.embed([course_name]), dtype=np.float32)
+        )[0]
+        scores = matrix[candidates] @ query
+        return titles[candidates[int(np.argmax(scores))]]
+
+    @staticmethod
+    def _normalize_rows(matrix: np.ndarray) -> np.ndarray:
+        norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+        norms[norms == 0] = 1.0
+        return matrix / norms
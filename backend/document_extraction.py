@@ -0,0 +1,271 @@
+import multiprocessing
+import os
+import time
+import zipfile
+from collections import deque
+from dataclasses import dataclass
+from multiprocessing.pool import AsyncResult
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+from xml.etree import ElementTree
+
+from ingest_manifest import file_digest
+
+_WORD_NS = "{http://schemas.openxmlformats.org/wordprocessingml/2006/main}"
+
+
+def extract_pdf_pages(file_path: str) -> Iterator[str]:
+    """Yield the text of each page of a PDF"""
+    try:
+        from pypdf import PdfReader
+    except ImportError as e:
+        raise RuntimeError("PDF extraction needs pypdf (uv sync --extra pdf)") from e
+
+    reader = PdfReader(file_path)
+    for page in reader.pages:
+        yield page.extract_text() or ""
+
+
+def extract_docx_paragraphs(file_path: str) -> Iterator[str]:
+    """Yield the text of each paragraph of a DOCX, one line per paragraph"""
+    with zipfile.ZipFile(file_path) as archive:
+        with archive.open("word/document.xml") as document:
+            parts: List[str] = []
+            for event, element in ElementTree.iterparse(
+                document, events=("start", "end")
+            ):
+                if event == "start":
+                    if element.tag == f"{_WORD_NS}p":
+                        parts = []
+                    continue
+                if element.tag == f"{_WORD_NS}t":
+                    parts.append(element.text or "")
+                elif element.tag == f"{_WORD_NS}tab":
+                    parts.append("\t")
+                elif element.tag in (f"{_WORD_NS}br", f"{_WORD_NS}cr"):
+                    parts.append("\n")
+                elif element.tag == f"{_WORD_NS}p":
+                    yield "".join(parts)
+                    element.clear()  # Keep memory bounded by one paragraph
+
+
+# File extension -> function yielding the document's text piece by piece.
+# Extractors run in spawned worker processes, so they must be module-level
+# functions importable by name.
+EXTRACTORS: Dict[str, Callable[[str], Iterator[str]]] = {
+    ".pdf": extract_pdf_pages,
+    ".docx": extract_docx_paragraphs,
+}
+
+
+def register_extractor(extension: str, extractor: Callable[[str], Iterator[str]]):
+    """Extract text from files with this extension (e.g. ".odt") with extractor"""
+    EXTRACTORS[extension.lower()] = extractor
+
+
+def extract_to_file(
+    extractor: Callable[[str], Iterator[str]], file_path: str, target_path: str
+) -> Tuple[int, float]:
+    """
+    Write a document's extracted text to target_path (runs inside a worker).
+
+    Pieces are written as they are extracted and the file only appears once
+    complete, so a killed worker never leaves a partial cache entry.
+
+    Returns:
+        Tuple of (pieces extracted, seconds spent)
+    """
+    started = time.perf_counter()
+    pieces = 0
+    tmp_path = f"{target_path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as file:
+        for text in extractor(file_path):
+            file.write(text)
+            file.write("\n")
+            pieces += 1
+    os.replace(tmp_path, target_path)
+    return pieces, time.perf_counter() - started
+
+
+@dataclass
+class ExtractionStats:
+    """Counters and timings for one file format in one ingestion run"""
+
+    files: int = 0  # Files extracted
+    cache_hits: int = 0
+    failed: int = 0
+    bytes: int = 0  # Size of the extracted source files
+    pieces: int = 0  # Pages or paragraphs
+    seconds: float = 0.0  # Summed across worker processes
+
+    @property
+    def megabytes_per_second(self) -> float:
+        return self.bytes / 1e6 / self.seconds if self.seconds else 0.0
+
+    def summary(self) -> str:
+        return (
+            f"{self.files} extracted ({self.pieces} pages or paragraphs, "
+            f"{self.megabytes_per_second:.1f} MB/s), {self.cache_hits} cached, "
+            f"{self.failed} failed"
+        )
+
+
+@dataclass
+class ExtractedDocument:
+    """Where the plain text of a binary document can be read from"""
+
+    file_path: str
+    text_path: Optional[str] = None
+    error: Optional[str] = None
+
+
+class DocumentExtractor:
+    """Extracts text from PDF and DOCX files into a content-addressed cache"""
+
+    def __init__(self, cache_dir: str, workers: int = 4, timeout: float = 120.0):
+        self.cache_dir = cache_dir
+        self.workers = workers
+        self.timeout = timeout  # Seconds one file may take before its worker is killed
+
+    @staticmethod
+    def cache_dir_for(chroma_path: str) -> str:
+        """Cache directory stored next to a ChromaDB directory"""
+        return chroma_path.rstrip("/\\") + ".extracted"
+
+    @staticmethod
+    def needs_extraction(file_path: str) -> bool:
+        """Whether a file is a binary format read through an extractor"""
+        return os.path.splitext(file_path)[1].lower() in EXTRACTORS
+
+    def extract_all(
+        self, file_paths: List[str], stats: Dict[str, ExtractionStats]
+    ) -> Dict[str, ExtractedDocument]:
+        """
+        Extract the text of every binary document among file_paths.
+
+        Text is cached under the SHA-256 of the source file, so unchanged
+        documents are never extracted twice, even when renamed or copied.
+        Cache misses are extracted in parallel worker processes; a file that
+        takes longer than the timeout has its worker killed and is reported
+        as failed.
+
+        Args:
+            file_paths: Files to ingest; plain text files are ignored
+            stats: Per-extension counters, updated in place
+
+        Returns:
+            ExtractedDocument per binary file path
+        """
+        results: Dict[str, ExtractedDocument] = {}
+        misses: Dict[str, List[str]] = {}  # Cache path -> source files
+        for file_path in file_paths:
+            extension = os.path.splitext(file_path)[1].lower()
+            if extension not in EXTRACTORS:
+                continue
+            format_stats = stats.setdefault(extension, ExtractionStats())
+            try:
+                text_path = os.path.join(
+                    self.cache_dir, f"{file_digest(file_path)}{extension}.txt"
+                )
+            except OSError as e:
+                format_stats.failed += 1
+                results[file_path] = ExtractedDocument(file_path, error=str(e))
+                continue
+            if os.path.exists(text_path):
+                format_stats.cache_hits += 1
+                results[file_path] = ExtractedDocument(file_path, text_path)
+            else:
+                misses.setdefault(text_path, []).append(file_path)
+
+        if misses:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            for text_path, error, pieces, seconds in self._extract_in_pool(
+                [(paths[0], text_path) for text_path, paths in misses.items()]
+            ):
+                for file_path in misses[text_path]:
+                    results[file_path] = ExtractedDocument(
+                        file_path, None if error else text_path, error
+                    )
+                first = misses[text_path][0]
+                format_stats = stats[os.path.splitext(first)[1].lower()]
+                if error:
+                    format_stats.failed += 1
+                else:
+                    format_stats.files += 1
+                    format_stats.pieces += pieces
+                    format_stats.seconds += seconds
+                    format_stats.bytes += os.path.getsize(first)
+        return results
+
+    def _extract_in_pool(
+        self, jobs: List[Tuple[str, str]]
+    ) -> Iterator[Tuple[str, Optional[str], int, float]]:
+        """
+        Run (source file, cache path) jobs with a per-file timeout.
+
+        At most one job per worker is in flight, so a job's deadline starts
+        when it starts running. A job past its deadline can only be stopped
+        by terminating the pool; jobs that were running alongside it are
+        queued again on a fresh pool.
+
+        Yields:
+            Tuple of (cache path, error or None, pieces, seconds)
+        """
+        context = multiprocessing.get_context("spawn")
+        workers = max(1, min(self.workers, len(jobs)))
+        queue = deque(jobs)
+        running: Dict[str, Tuple[str, AsyncResult, float]] = {}  # By cache path
+        pool = context.Pool(workers)
+        try:
+            while queue or running:
+                while queue and len(running) < workers:
+                    file_path, text_path = queue.popleft()
+                    extractor = EXTRACTORS[os.path.splitext(file_path)[1].lower()]
+                    result = pool.apply_async(
+                        extract_to_file, (extractor, file_path, text_path)
+                    )
+                    running[text_path] = (
+                        file_path,
+                        result,
+                        time.monotonic() + self.timeout,
+                    )
+
+                # Wait for the job closest to its deadline
+                _, oldest, deadline = min(running.values(), key=lambda job: job[2])
+                oldest.wait(max(0.0, min(deadline - time.monotonic(), 0.05)))
+
+                for text_path, (file_path, result, deadline) in list(running.items()):
+                    if result.ready():
+                        del running[text_path]
+                        try:
+                            pieces, seconds = result.get()
+                        except Exception as e:
+                            self._remove_partial(text_path)
+                            yield text_path, str(e) or type(e).__name__, 0, 0.0
+                        else:
+                            yield text_path, None, pieces, seconds
+
+                expired = [
+                    text_path
+                    for text_path, (_, _, deadline) in running.items()
+                    if time.monotonic() >= deadline
+                ]
+                if expired:
+                    pool.terminate()
+                    pool = context.Pool(workers)
+                    for text_path in expired:
+                        del running[text_path]
+                        self._remove_partial(text_path)
+                        yield text_path, f"timed out after {self.timeout:g}s", 0, 0.0
+                    for text_path, (file_path, _, _) in running.items():
+                        self._remove_partial(text_path)
+                        queue.appendleft((file_path, text_path))
+                    running.clear()
+        finally:
+            pool.terminate()
+
+    @staticmethod
+    def _remove_partial(text_path: str):
+        try:
+            os.remove(f"{text_path}.tmp")
+        except OSError:
+            pass
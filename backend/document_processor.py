@@ -1,9 +1,129 @@
 import os
 import re
-from typing import List, Tuple
+from bisect import bisect_left, bisect_right
+from itertools import accumulate, chain, islice
+from typing import Iterable, Iterator, List, NamedTuple, Optional, Tuple, Union
 
 from models import Course, CourseChunk, Lesson
 
+# Sentences end at ., ! or ? followed by whitespace and a capital letter, but
+# not after abbreviations. The full rule is
+#     (?<!\w\.\w.)(?<![A-Z][a-z]\.)(?<=\.|\!|\?)\s+(?=[A-Z])
+# which is slow to evaluate at every position, so whitespace-normalized text
+# is scanned for the cheap part and the lookbehinds are checked per candidate.
+_BREAK_CANDIDATE = re.compile(r"[.!?] (?=[A-Z])")
+_INITIALISM = re.compile(r"\w\.\w.")  # e.g. "i.e. "
+_TITLE_ABBREVIATION = re.compile(r"[A-Z][a-z]\.")  # e.g. "Dr. "
+
+# Course document structure, matched against stripped lines
+_COURSE_TITLE = re.compile(r"^Course Title:\s*(.+)$", re.IGNORECASE)
+_COURSE_FIELD = re.compile(r"^Course (Link|Instructor):\s*(.+)$", re.IGNORECASE)
+_LESSON_MARKER = re.compile(r"^Lesson\s+(\d+):\s*(.+)$", re.IGNORECASE)
+_LESSON_LINK = re.compile(r"^Lesson Link:\s*(.+)$", re.IGNORECASE)
+# Both lesson patterns need one of these first; "l" has no other case forms
+_LESSON_INITIALS = frozenset("Ll")
+
+
+def _is_sentence_break(text: str, space: int) -> bool:
+    """Check the abbreviation lookbehinds for a candidate break at text[space]"""
+    if space >= 4 and _INITIALISM.fullmatch(text, space - 4, space):
+        return False
+    if space >= 3 and _TITLE_ABBREVIATION.fullmatch(text, space - 3, space):
+        return False
+    return True
+
+
+def _split_sentences(text: str) -> Iterator[str]:
+    """Split whitespace-normalized text into sentences"""
+    start = 0
+    for match in _BREAK_CANDIDATE.finditer(text):
+        space = match.end() - 1
+        if _is_sentence_break(text, space):
+            yield text[start:space]
+            start = space + 1
+    if start < len(text):
+        yield text[start:]
+
+
+class _LessonStart(NamedTuple):
+    """A lesson marker line, plus the lesson link line that may follow it"""
+
+    number: int
+    title: str
+    link: Optional[str]
+
+
+def _scan_lessons(lines: Iterable[str]) -> Iterator[Union[str, _LessonStart]]:
+    """
+    Classify the body lines of a course document in one pass.
+
+    Lesson markers and their link lines become _LessonStart tokens; every
+    other line is yielded unchanged as content. Lines that cannot start with
+    "Lesson" are passed through without running a regex.
+    """
+    marker = None  # Lesson marker waiting to see if a link line follows
+    for line in lines:
+        stripped = line.strip()
+        is_candidate = stripped[:1] in _LESSON_INITIALS
+
+        if marker is not None:
+            link = _LESSON_LINK.match(stripped) if is_candidate else None
+            yield _LessonStart(
+                int(marker.group(1)),
+                marker.group(2).strip(),
+                link.group(1).strip() if link else None,
+            )
+            marker = None
+            if link:
+                continue  # The link line is not part of the content
+
+        if is_candidate:
+            marker = _LESSON_MARKER.match(stripped)
+            if marker:
+                continue
+        yield line
+
+    if marker is not None:
+        yield _LessonStart(int(marker.group(1)), marker.group(2).strip(), None)
+
+
+def _normalized_pieces(lines: Iterable[str]) -> Iterator[str]:
+    """Yield the whitespace-normalized form of "\n".join(lines) piece by piece"""
+    started = False
+    for line in lines:
+        core = " ".join(line.split())
+        if core:
+            if started:
+                yield " "
+            yield core
+            started = True
+
+
+def _split_sentences_stream(pieces: Iterable[str]) -> Iterator[str]:
+    """Split a stream of normalized text into sentences as they complete"""
+    text = ""  # Current sentence, preceded by up to 4 characters of context
+    sentence_start = 0
+    scan_from = 0
+    for piece in pieces:
+        text += piece
+        for match in _BREAK_CANDIDATE.finditer(text, scan_from):
+            space = match.end() - 1
+            if _is_sentence_break(text, space):
+                yield text[sentence_start:space]
+                sentence_start = space + 1
+        # A break right at the end needs the next piece's first character
+        scan_from = max(len(text) - 2, sentence_start)
+
+        # Keep the lookbehind context but drop finished sentences
+        cut = sentence_start - 4
+        if cut > 0:
+            text = text[cut:]
+            sentence_start -= cut
+            scan_from -= cut
+
+    if sentence_start < len(text):
+        yield text[sentence_start:]
+
 
 class DocumentProcessor:
     """Processes course documents and extracts structured information"""
@@ -26,76 +146,80 @@ class DocumentProcessor:
         """Split text into sentence-based chunks with overlap using config settings"""
 
         # Clean up the text
-        text = re.sub(r"\s+", " ", text.strip())  # Normalize whitespace
+        text = " ".join(text.split())  # Normalize whitespace, like re.sub(r"\s+")
 
-        # Better sentence splitting that handles abbreviations
-        # This regex looks for periods followed by whitespace and capital letters
-        # but ignores common abbreviations
-        sentence_endings = re.compile(
-            r"(?<!\w\.\w.)(?<![A-Z][a-z]\.)(?<=\.|\!|\?)\s+(?=[A-Z])"
-        )
-        sentences = sentence_endings.split(text)
-
-        # Clean sentences
-        sentences = [s.strip() for s in sentences if s.strip()]
+        sentences = list(_split_sentences(text))
+        prefix = list(accumulate((len(s) + 1 for s in sentences), initial=0))
 
         chunks = []
-        i = 0
-
-        while i < len(sentences):
-            current_chunk = []
-            current_size = 0
-
-            # Build chunk starting from sentence i
-            for j in range(i, len(sentences)):
-                sentence = sentences[j]
-
-                # Calculate size with space
-                space_size = 1 if current_chunk else 0
-                total_addition = len(sentence) + space_size
-
-                # Check if adding this sentence would exceed chunk size
-                if current_size + total_addition > self.chunk_size and current_chunk:
-                    break
-
-                current_chunk.append(sentence)
-                current_size += total_addition
-
-            # Add chunk if we have content
-            if current_chunk:
-                chunks.append(" ".join(current_chunk))
-
-                # Calculate overlap for next chunk
-                if hasattr(self, "chunk_overlap") and self.chunk_overlap > 0:
-                    # Find how many sentences to overlap
-                    overlap_size = 0
-                    overlap_sentences = 0
-
-                    # Count backwards from end of current chunk
-                    for k in range(len(current_chunk) - 1, -1, -1):
-                        sentence_len = len(current_chunk[k]) + (
-                            1 if k < len(current_chunk) - 1 else 0
-                        )
-                        if overlap_size + sentence_len <= self.chunk_overlap:
-                            overlap_size += sentence_len
-                            overlap_sentences += 1
-                        else:
-                            break
-
-                    # Move start position considering overlap
-                    next_start = i + len(current_chunk) - overlap_sentences
-                    i = max(next_start, i + 1)  # Ensure we make progress
-                else:
-                    # No overlap - move to next sentence after current chunk
-                    i += len(current_chunk)
-            else:
-                # No sentences fit, move to next
-                i += 1
+        start = 0
+        while start < len(sentences):
+            end, next_start = self._chunk_bounds(prefix, start)
+            chunks.append(" ".join(sentences[start:end]))
+            start = next_start
 
         return chunks
 
+    def chunk_text_stream(self, lines: Iterable[str]) -> Iterator[str]:
+        """
+        Yield the chunks chunk_text would return for "\n".join(lines).
+
+        Only the sentences of the chunk being built are held in memory, so
+        arbitrarily large inputs can be chunked from a file iterator.
+        """
+        sentences: List[str] = []
+        prefix = [0]  # prefix[k] = sum of len(sentence) + 1 over sentences[:k]
+        start = 0
+
+        for sentence in _split_sentences_stream(_normalized_pieces(lines)):
+            sentences.append(sentence)
+            prefix.append(prefix[-1] + len(sentence) + 1)
+
+            # The chunk at start is final once a sentence past its limit exists
+            while prefix[-1] > prefix[start] + self.chunk_size + 1:
+                end, next_start = self._chunk_bounds(prefix, start)
+                yield " ".join(sentences[start:end])
+                start = next_start
+
+            if start > 256:
+                # Drop sentences that can no longer be part of a chunk
+                offset = prefix[start]
+                del sentences[:start]
+                prefix = [total - offset for total in prefix[start:]]
+                start = 0
+
+        while start < len(sentences):
+            end, next_start = self._chunk_bounds(prefix, start)
+            yield " ".join(sentences[start:end])
+            start = next_start
+
+    def _chunk_bounds(self, prefix: List[int], start: int) -> Tuple[int, int]:
+        """
+        Locate the chunk beginning at sentence start.
+
+        A chunk of sentences[i:j] is prefix[j] - prefix[i] - 1 characters
+        long, so its end and the start of the overlapping next chunk are both
+        found by bisecting the prefix sums.
+
+        Returns:
+            Tuple of (end sentence index, exclusive; next chunk's start index)
+        """
+        # Take sentences while they fit, but always at least one
+        limit = prefix[start] + self.chunk_size + 1
+        end = max(bisect_right(prefix, limit, start + 1) - 1, start + 1)
+
+        if self.chunk_overlap > 0:
+            # Overlap with the longest run of trailing sentences that fits
+            overlap_start = bisect_left(
+                prefix, prefix[end] - self.chunk_overlap - 1, start, end
+            )
+            return end, max(overlap_start, start + 1)  # Ensure we make progress
+
+        # No overlap - move to next sentence after current chunk
+        return end, end
+
     def process_course_document(
-        self, file_path: str
+        self, file_path: str, source_name: Optional[str] = None
     ) -> Tuple[Course, List[CourseChunk]]:
         """
         Process a course document with expected format:
@@ -103,11 +227,29 @@ class DocumentProcessor:
         Line 2: Course Link: [url]
         Line 3: Course Instructor: [instructor]
         Following lines: Lesson markers and content
+
+        source_name is the file name used as the fallback title when
+        file_path holds text extracted from another file (PDF or DOCX).
         """
-        content = self.read_file(file_path)
-        filename = os.path.basename(file_path)
+        course, chunks = self.stream_course_document(file_path, source_name)
+        return course, list(chunks)
 
-        lines = content.strip().split("\n")
+    def stream_course_document(
+        self, file_path: str, source_name: Optional[str] = None
+    ) -> Tuple[Course, Iterator[CourseChunk]]:
+        """
+        Parse a course document lazily, in the format process_course_document
+        expects.
+
+        The metadata lines are read straight away. The returned iterator reads
+        the rest of the file line by line and yields each lesson's chunks as
+        soon as the lesson ends, appending the lesson to course.lessons as it
+        goes, so memory stays bounded by the largest lesson. Once the iterator
+        is exhausted, course and chunks match process_course_document.
+        """
+        lines = self._read_lines(file_path)
+        header = list(islice(lines, 4))
+        filename = source_name or os.path.basename(file_path)
 
         # Extract course metadata from first three lines
         course_title = filename  # Default fallback
@@ -115,34 +257,26 @@ class DocumentProcessor:
         instructor_name = "Unknown"
 
         # Parse course title from first line
-        if len(lines) >= 1 and lines[0].strip():
-            title_match = re.match(
-                r"^Course Title:\s*(.+)$", lines[0].strip(), re.IGNORECASE
-            )
+        if len(header) >= 1 and header[0].strip():
+            title_match = _COURSE_TITLE.match(header[0].strip())
             if title_match:
                 course_title = title_match.group(1).strip()
             else:
-                course_title = lines[0].strip()
+                course_title = header[0].strip()
 
         # Parse remaining lines for course metadata
-        for i in range(1, min(len(lines), 4)):  # Check first 4 lines for metadata
-            line = lines[i].strip()
+        for line in header[1:4]:  # Check first 4 lines for metadata
+            line = line.strip()
             if not line:
                 continue
 
-            # Try to match course link
-            link_match = re.match(r"^Course Link:\s*(.+)$", line, re.IGNORECASE)
-            if link_match:
-                course_link = link_match.group(1).strip()
-                continue
-
-            # Try to match instructor
-            instructor_match = re.match(
-                r"^Course Instructor:\s*(.+)$", line, re.IGNORECASE
-            )
-            if instructor_match:
-                instructor_name = instructor_match.group(1).strip()
-                continue
+            # Try to match course link or instructor
+            field_match = _COURSE_FIELD.match(line)
+            if field_match:
+                if field_match.group(1).lower() == "link":
+                    course_link = field_match.group(2).strip()
+                else:
+                    instructor_name = field_match.group(2).strip()
 
         # Create course object with title as ID
         course = Course(
@@ -151,121 +285,139 @@ class DocumentProcessor:
             instructor=instructor_name if instructor_name != "Unknown" else None,
         )
 
-        # Process lessons and create chunks
-        course_chunks = []
-        current_lesson = None
-        lesson_title = None
-        lesson_link = None
-        lesson_content = []
-        chunk_counter = 0
-
         # Start processing from line 4 (after metadata)
         start_index = 3
-        if len(lines) > 3 and not lines[3].strip():
+        if len(header) > 3 and not header[3].strip():
             start_index = 4  # Skip empty line after instructor
 
-        i = start_index
-        while i < len(lines):
-            line = lines[i]
+        body = chain(header[start_index:], lines)
+        return course, self._stream_chunks(
+            file_path, course, body, start_index, len(header) > 2
+        )
 
-            # Check for lesson markers (e.g., "Lesson 0: Introduction")
-            lesson_match = re.match(
-                r"^Lesson\s+(\d+):\s*(.+)$", line.strip(), re.IGNORECASE
-            )
+    def _read_lines(self, file_path: str) -> Iterator[str]:
+        """
+        Yield the lines of content.strip().split("\n") without reading the
+        whole file. Only leading whitespace is stripped; trailing blank lines
+        are yielded but never change the parse.
+        """
+        # Undecodable bytes are dropped, as read_file does when UTF-8 fails
+        with open(file_path, "r", encoding="utf-8", errors="ignore") as file:
+            started = False
+            for line in file:
+                line = line.rstrip("\n")
+                if not started:
+                    if not line.strip():
+                        continue
+                    line = line.lstrip()
+                    started = True
+                yield line
+
+    def _stream_chunks(
+        self,
+        file_path: str,
+        course: Course,
+        lines: Iterator[str],
+        start_index: int,
+        has_body: bool,
+    ) -> Iterator[CourseChunk]:
+        """Yield the chunks of the lines following the course metadata"""
+        current_lesson = None
+        lesson_title = None
+        lesson_link = None
+        lesson_content: List[str] = []
+        chunk_counter = 0
 
-            if lesson_match:
-                # Process previous lesson if it exists
-                if current_lesson is not None and lesson_content:
-                    lesson_text = "\n".join(lesson_content).strip()
-                    if lesson_text:
-                        # Add lesson to course
-                        lesson = Lesson(
-                            lesson_number=current_lesson,
-                            title=lesson_title,
-                            lesson_link=lesson_link,
-                        )
-                        course.lessons.append(lesson)
-
-                        # Create chunks for this lesson
-                        chunks = self.chunk_text(lesson_text)
-                        for idx, chunk in enumerate(chunks):
-                            # For the first chunk of each lesson, add lesson context
-                            if idx == 0:
-                                chunk_with_context = (
-                                    f"Lesson {current_lesson} content: {chunk}"
-                                )
-                            else:
-                                chunk_with_context = chunk
-
-                            course_chunk = CourseChunk(
-                                content=chunk_with_context,
-                                course_title=course.title,
-                                lesson_number=current_lesson,
-                                chunk_index=chunk_counter,
-                            )
-                            course_chunks.append(course_chunk)
-                            chunk_counter += 1
-
-                # Start new lesson
-                current_lesson = int(lesson_match.group(1))
-                lesson_title = lesson_match.group(2).strip()
-                lesson_link = None
-
-                # Check if next line is a lesson link
-                if i + 1 < len(lines):
-                    next_line = lines[i + 1].strip()
-                    link_match = re.match(
-                        r"^Lesson Link:\s*(.+)$", next_line, re.IGNORECASE
-                    )
-                    if link_match:
-                        lesson_link = link_match.group(1).strip()
-                        i += 1  # Skip the link line so it's not added to content
-
-                lesson_content = []
-            else:
+        for token in _scan_lessons(lines):
+            if token.__class__ is str:
                 # Add line to current lesson content
-                lesson_content.append(line)
+                lesson_content.append(token)
+                continue
+
+            # Lesson marker (e.g., "Lesson 0: Introduction"): process the
+            # previous lesson if it exists
+            if current_lesson is not None and lesson_content:
+                for chunk in self._lesson_chunks(
+                    course,
+                    current_lesson,
+                    lesson_title,
+                    lesson_link,
+                    lesson_content,
+                    chunk_counter,
+                    is_last=False,
+                ):
+                    yield chunk
+                    chunk_counter += 1
 
-            i += 1
+            # Start new lesson
+            current_lesson, lesson_title, lesson_link = token
+            lesson_content = []
 
         # Process the last lesson
         if current_lesson is not None and lesson_content:
-            lesson_text = "\n".join(lesson_content).strip()
-            if lesson_text:
-                lesson = Lesson(
-                    lesson_number=current_lesson,
-                    title=lesson_title,
-                    lesson_link=lesson_link,
+            for chunk in self._lesson_chunks(
+                course,
+                current_lesson,
+                lesson_title,
+                lesson_link,
+                lesson_content,
+                chunk_counter,
+                is_last=True,
+            ):
+                yield chunk
+                chunk_counter += 1
+
+        # If no lessons found, treat entire content as one document. Lines
+        # before the first lesson marker are not kept, so read them again.
+        if chunk_counter == 0 and has_body:
+            remaining = islice(self._read_lines(file_path), start_index, None)
+            for chunk in self.chunk_text_stream(remaining):
+                yield CourseChunk(
+                    content=chunk,
+                    course_title=course.title,
+                    chunk_index=chunk_counter,
                 )
-                course.lessons.append(lesson)
-
-                chunks = self.chunk_text(lesson_text)
-                for idx, chunk in enumerate(chunks):
-                    # For any chunk of each lesson, add lesson context & course title
-
-                    chunk_with_context = f"Course {course_title} Lesson {current_lesson} content: {chunk}"
-
-                    course_chunk = CourseChunk(
-                        content=chunk_with_context,
-                        course_title=course.title,
-                        lesson_number=current_lesson,
-                        chunk_index=chunk_counter,
-                    )
-                    course_chunks.append(course_chunk)
-                    chunk_counter += 1
+                chunk_counter += 1
+
+    def _lesson_chunks(
+        self,
+        course: Course,
+        lesson_number: int,
+        lesson_title: str,
+        lesson_link: Optional[str],
+        lesson_content: List[str],
+        first_index: int,
+        is_last: bool,
+    ) -> Iterator[CourseChunk]:
+        """Add a finished lesson to the course and yield its chunks"""
+        if not any(line.strip() for line in lesson_content):
+            return
+
+        # Add lesson to course
+        course.lessons.append(
+            Lesson(
+                lesson_number=lesson_number,
+                title=lesson_title,
+                lesson_link=lesson_link,
+            )
+        )
 
-        # If no lessons found, treat entire content as one document
-        if not course_chunks and len(lines) > 2:
-            remaining_content = "\n".join(lines[start_index:]).strip()
-            if remaining_content:
-                chunks = self.chunk_text(remaining_content)
-                for chunk in chunks:
-                    course_chunk = CourseChunk(
-                        content=chunk,
-                        course_title=course.title,
-                        chunk_index=chunk_counter,
-                    )
-                    course_chunks.append(course_chunk)
-                    chunk_counter += 1
+        # Create chunks for this lesson
+        for idx, chunk in enumerate(self.chunk_text_stream(lesson_content)):
+            if is_last:
+                # For any chunk of the last lesson, add lesson context & course title
+                chunk_with_context = (
+                    f"Course {course.title} Lesson {lesson_number} content: {chunk}"
+                )
+            elif idx == 0:
+                # For the first chunk of each lesson, add lesson context
+                chunk_with_context = f"Lesson {lesson_number} content: {chunk}"
+            else:
+                chunk_with_context = chunk
 
-        return course, course_chunks
+            yield CourseChunk(
+                content=chunk_with_context,
+                course_title=course.title,
+                lesson_number=lesson_number,
+                chunk_index=first_index + idx,
+            )
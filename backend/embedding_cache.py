@@ -0,0 +1,161 @@
+import os
+import re
+import sys
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+from chromadb.api.types import Documents, EmbeddingFunction, Embeddings
+
+_WHITESPACE = re.compile(r"\s+")
+
+
+class EmbeddingCache:
+    """Thread-safe LRU cache around a Chroma embedding function"""
+
+    def __init__(
+        self,
+        embedding_function: EmbeddingFunction,
+        max_entries: int = 2048,
+        cache_path: Optional[str] = None,
+        model_name: str = "",
+    ):
+        self.embedding_function = embedding_function
+        self.max_entries = max_entries
+        self.cache_path = cache_path
+        # Saved with the vectors, so a file written for another model is ignored
+        self.model_name = model_name
+
+        self._entries: "OrderedDict[str, np.ndarray]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+        if cache_path and os.path.exists(cache_path):
+            self.load(cache_path)
+
+    def __call__(self, input: Documents) -> Embeddings:
+        """Embed texts, computing only those not already cached"""
+        keys = [self.normalize(text) for text in input]
+        embeddings: List[Optional[np.ndarray]] = [None] * len(keys)
+        missing: Dict[str, List[int]] = {}
+
+        with self._lock:
+            for position, key in enumerate(keys):
+                cached = self._entries.get(key)
+                if cached is not None:
+                    self._entries.move_to_end(key)
+                    embeddings[position] = cached
+                    self.hits += 1
+                else:
+                    missing.setdefault(key, []).append(position)
+                    self.misses += 1
+
+        if missing:
+            # Embed the normalized text so every spelling of a key shares a vector
+            texts = list(missing)
+            computed = self.embedding_function(texts)
+            with self._lock:
+                for key, embedding in zip(texts, computed):
+                    vector = np.asarray(embedding, dtype=np.float32)
+                    for position in missing[key]:
+                        embeddings[position] = vector
+                    self._entries[key] = vector
+                    self._entries.move_to_end(key)
+                while len(self._entries) > self.max_entries:
+                    self._entries.popitem(last=False)
+
+        return embeddings
+
+    def embed_uncached(self, input: Documents) -> Embeddings:
+        """Embed texts without touching the cache (bulk document ingestion)"""
+        return self.embedding_function(list(input))
+
+    @staticmethod
+    def normalize(text: str) -> str:
+        """Cache key for a text: trimmed with whitespace runs collapsed"""
+        return _WHITESPACE.sub(" ", text).strip()
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get hit rate, size and approximate memory use of the cache"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            memory_bytes = sum(
+                vector.nbytes + sys.getsizeof(key)
+                for key, vector in self._entries.items()
+            )
+            return {
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "memory_bytes": memory_bytes,
+            }
+
+    def clear(self):
+        """Drop all cached embeddings"""
+        with self._lock:
+            self._entries.clear()
+
+    def save(self, path: Optional[str] = None):
+        """Persist cached embeddings so they survive a restart"""
+        path = path or self.cache_path
+        if not path:
+            return
+
+        with self._lock:
+            keys = list(self._entries)
+            vectors = list(self._entries.values())
+
+        if not keys:
+            return
+
+        stacked = np.vstack(vectors)
+        # Write to a temporary file first so a crash never leaves a torn cache
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "wb") as file:
+            np.savez(
+                file,
+                keys=np.array(keys),
+                vectors=stacked,
+                model=np.array(self.model_name),
+                dimensions=np.array(stacked.shape[1]),
+            )
+        os.replace(tmp_path, path)
+
+    def load(self, path: str):
+        """Load embeddings previously written by save() for the same model"""
+        try:
+            with np.load(path, allow_pickle=False) as data:
+                keys, vectors = data["keys"], data["vectors"]
+                model = str(data["model"]) if "model" in data else None
+                dimensions = int(data["dimensions"]) if "dimensions" in data else None
+        except Exception as e:
+            print(f"Error loading embedding cache: {e}")
+            return
+
+        if model != self.model_name:
+            print(
+                f"Ignoring embedding cache {path}: written for model {model!r}, "
+                f"not {self.model_name!r}"
+            )
+            return
+        current = self._current_dimensions()
+        if dimensions != current:
+            print(
+                f"Ignoring embedding cache {path}: {dimensions} dimensions, "
+                f"the model now gives {current}"
+            )
+            return
+
+        with self._lock:
+            for key, vector in zip(
+                keys[-self.max_entries :], vectors[-self.max_entries :]
+            ):
+                self._entries[str(key)] = vector
+
+    def _current_dimensions(self) -> int:
+        """Size of the vectors the embedding function produces now"""
+        return len(self.embedding_function(["dimensions"])[0])
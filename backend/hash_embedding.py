@@ -0,0 +1,37 @@
+import re
+import zlib
+
+import numpy as np
+from chromadb.api.types import EmbeddingFunction
+
+_TOKEN = re.compile(r"\w+")
+
+
+class HashEmbeddingFunction(EmbeddingFunction):
+    """Deterministic bag-of-words embedding for offline tests and benchmarks"""
+
+    def __init__(self, dim: int = 256):
+        self.dim = dim
+        self.calls = 0
+
+    def __call__(self, input):
+        self.calls += 1
+        embeddings = []
+        for text in input:
+            vector = np.zeros(self.dim, dtype=np.float32)
+            for token in _TOKEN.findall(text.lower()):
+                vector[zlib.crc32(token.encode()) % self.dim] += 1.0
+            norm = np.linalg.norm(vector)
+            embeddings.append(vector / norm if norm else vector)
+        return embeddings
+
+    @staticmethod
+    def name() -> str:
+        return "test_hash"
+
+    def get_config(self):
+        return {"dim": self.dim}
+
+    @staticmethod
+    def build_from_config(config):
+        return HashEmbeddingFunction(config["dim"])
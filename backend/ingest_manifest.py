@@ -0,0 +1,124 @@
+import hashlib
+import json
+import os
+from dataclasses import asdict, dataclass, field
+from typing import Dict, List, Optional
+
+
+@dataclass
+class ManifestEntry:
+    """What was indexed from one course file"""
+
+    path: str  # Absolute path of the source file
+    mtime: float
+    size: int
+    content_hash: str  # SHA-256 of the file contents
+    course_title: str
+    chunk_ids: List[str] = field(default_factory=list)  # Empty for duplicate titles
+
+
+def file_digest(file_path: str) -> str:
+    """SHA-256 of a file, read in blocks"""
+    digest = hashlib.sha256()
+    with open(file_path, "rb") as file:
+        for block in iter(lambda: file.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+class IngestManifest:
+    """Record of indexed files used to re-index only what changed"""
+
+    VERSION = 1
+
+    def __init__(self, path: str):
+        self.path = path
+        self._entries: Dict[str, ManifestEntry] = {}
+        self.load()
+
+    @staticmethod
+    def for_chroma_path(chroma_path: str) -> "IngestManifest":
+        """Manifest stored next to a ChromaDB directory"""
+        return IngestManifest(chroma_path.rstrip("/\\") + ".manifest.json")
+
+    def load(self):
+        """Read the manifest from disk, starting empty if it is missing or invalid"""
+        self._entries = {}
+        if not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path, "r", encoding="utf-8") as file:
+                data = json.load(file)
+            if data.get("version") == self.VERSION:
+                self._entries = {
+                    path: ManifestEntry(**entry)
+                    for path, entry in data["files"].items()
+                }
+        except Exception as e:
+            print(f"Error loading ingest manifest: {e}")
+
+    def save(self):
+        """Write the manifest atomically"""
+        data = {
+            "version": self.VERSION,
+            "files": {path: asdict(entry) for path, entry in self._entries.items()},
+        }
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as file:
+            json.dump(data, file, indent=2)
+        os.replace(tmp_path, self.path)
+
+    def get(self, path: str) -> Optional[ManifestEntry]:
+        return self._entries.get(os.path.abspath(path))
+
+    def set(self, entry: ManifestEntry):
+        self._entries[entry.path] = entry
+
+    def remove(self, path: str):
+        self._entries.pop(os.path.abspath(path), None)
+
+    def clear(self):
+        self._entries = {}
+
+    def entries_under(self, folder_path: str) -> List[ManifestEntry]:
+        """Entries for files directly inside a folder"""
+        folder = os.path.abspath(folder_path)
+        return [
+            entry
+            for entry in self._entries.values()
+            if os.path.dirname(entry.path) == folder
+        ]
+
+    def entries_for_title(self, course_title: str) -> List[ManifestEntry]:
+        """Entries of every file that parsed to the given course title"""
+        return [e for e in self._entries.values() if e.course_title == course_title]
+
+    def owner_of(self, course_title: str) -> Optional[str]:
+        """Path of the file whose chunks are indexed under a course title"""
+        for entry in self._entries.values():
+            if entry.course_title == course_title and entry.chunk_ids:
+                return entry.path
+        return None
+
+    def is_unchanged(self, path: str) -> bool:
+        """
+        Check whether a file still matches its manifest entry.
+
+        The size and mtime are compared first; only when they differ is the
+        file hashed, so touched-but-identical files are not re-indexed.
+        """
+        entry = self.get(path)
+        if entry is None:
+            return False
+
+        stat = os.stat(path)
+        if stat.st_mtime == entry.mtime and stat.st_size == entry.size:
+            return True
+
+        if stat.st_size == entry.size and file_digest(path) == entry.content_hash:
+            entry.mtime = stat.st_mtime
+            return True
+        return False
+
+    def __len__(self) -> int:
+        return len(self._entries)
@@ -0,0 +1,655 @@
+import multiprocessing
+import os
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from itertools import islice
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Set
+
+from document_extraction import DocumentExtractor, ExtractedDocument, ExtractionStats
+from document_processor import DocumentProcessor
+from ingest_manifest import IngestManifest, ManifestEntry, file_digest
+from models import Course, CourseChunk
+
+
+@dataclass
+class ParsedDocument:
+    """
+    Result of parsing one course file in a worker process. Large files are
+    streamed in the server process instead; their chunks are then an
+    iterator that parses lesson by lesson as it is consumed.
+    """
+
+    file_path: str
+    course: Optional[Course] = None
+    chunks: Iterable[CourseChunk] = field(default_factory=list)
+    parse_seconds: float = 0.0
+    error: Optional[str] = None
+    mtime: float = 0.0
+    size: int = 0
+    content_hash: str = ""
+
+
+@dataclass
+class QueuedCourse:
+    """A parsed course whose chunks are queued but not all stored yet"""
+
+    course: Course
+    file_name: str
+    is_update: bool
+    chunk_ids: List[str]
+    stale_ids: List[str]  # Stored chunks the file no longer provides
+    changed: int  # Chunks embedded for this course
+    entry: Optional[ManifestEntry] = None
+    # Manifest entries of files that parsed to the same course in this run
+    duplicates: List[ManifestEntry] = field(default_factory=list)
+
+
+@dataclass
+class IngestionStats:
+    """Counters and per-stage timings for one ingestion run"""
+
+    files: int = 0  # Files parsed
+    courses: int = 0  # Courses added or updated
+    chunks: int = 0  # Chunks embedded and stored
+    skipped: int = 0
+    failed: int = 0
+    unchanged: int = 0  # Files skipped unparsed because the manifest matched
+    removed: int = 0  # Files deleted since the last run
+    embeddings: int = 0
+    parse_seconds: float = 0.0  # Summed across worker processes
+    embed_seconds: float = 0.0
+    upsert_seconds: float = 0.0
+    extract_seconds: float = 0.0  # Wall time of the PDF/DOCX extraction stage
+    total_seconds: float = 0.0
+    # Per file extension, for formats read through a text extractor
+    extraction: Dict[str, ExtractionStats] = field(default_factory=dict)
+
+    @property
+    def files_per_second(self) -> float:
+        return self.files / self.total_seconds if self.total_seconds else 0.0
+
+    @property
+    def chunks_per_second(self) -> float:
+        return self.chunks / self.total_seconds if self.total_seconds else 0.0
+
+    @property
+    def embeddings_per_second(self) -> float:
+        return self.embeddings / self.embed_seconds if self.embed_seconds else 0.0
+
+    def summary(self) -> str:
+        """One-line throughput report for the startup log"""
+        extraction = "".join(
+            f"; {extension[1:]}: {format_stats.summary()}"
+            for extension, format_stats in sorted(self.extraction.items())
+        )
+        return (
+            f"Ingested {self.files} files ({self.courses} new or updated courses, "
+            f"{self.chunks} chunks, {self.unchanged} unchanged, "
+            f"{self.removed} removed) in {self.total_seconds:.2f}s: "
+            f"{self.files_per_second:.1f} files/s, "
+            f"{self.chunks_per_second:.1f} chunks/s, "
+            f"{self.embeddings_per_second:.1f} embeddings/s "
+            f"(parse {self.parse_seconds:.2f}s, embed {self.embed_seconds:.2f}s, "
+            f"upsert {self.upsert_seconds:.2f}s, "
+            f"extract {self.extract_seconds:.2f}s){extraction}"
+        )
+
+
+def parse_course_file(
+    file_path: str,
+    chunk_size: int,
+    chunk_overlap: int,
+    text_path: Optional[str] = None,
+) -> ParsedDocument:
+    """
+    Parse and chunk one course file (runs inside a worker process).
+
+    text_path is where the text extracted from a PDF or DOCX file_path was
+    written; stats and the content hash still describe file_path itself.
+    """
+    started = time.perf_counter()
+    try:
+        stat = os.stat(file_path)
+        content_hash = file_digest(file_path)
+        processor = DocumentProcessor(chunk_size, chunk_overlap)
+        course, chunks = processor.process_course_document(
+            text_path or file_path, os.path.basename(file_path)
+        )
+        return ParsedDocument(
+            file_path,
+            course,
+            chunks,
+            time.perf_counter() - started,
+            mtime=stat.st_mtime,
+            size=stat.st_size,
+            content_hash=content_hash,
+        )
+    except Exception as e:
+        return ParsedDocument(
+            file_path, parse_seconds=time.perf_counter() - started, error=str(e)
+        )
+
+
+def stream_course_file(
+    file_path: str,
+    document_processor: DocumentProcessor,
+    text_path: Optional[str] = None,
+) -> ParsedDocument:
+    """
+    Parse a large course file lazily in the calling process.
+
+    Only the metadata is read here. The returned chunks iterator reads one
+    lesson at a time and adds its parse time to parse_seconds.
+    """
+    started = time.perf_counter()
+    try:
+        stat = os.stat(file_path)
+        content_hash = file_digest(file_path)
+        course, chunks = document_processor.stream_course_document(
+            text_path or file_path, os.path.basename(file_path)
+        )
+    except Exception as e:
+        return ParsedDocument(
+            file_path, parse_seconds=time.perf_counter() - started, error=str(e)
+        )
+
+    parsed = ParsedDocument(
+        file_path,
+        course,
+        mtime=stat.st_mtime,
+        size=stat.st_size,
+        content_hash=content_hash,
+    )
+
+    def timed_chunks() -> Iterator[CourseChunk]:
+        while True:
+            resumed = time.perf_counter()
+            chunk = next(chunks, None)
+            parsed.parse_seconds += time.perf_counter() - resumed
+            if chunk is None:
+                return
+            yield chunk
+
+    parsed.parse_seconds = time.perf_counter() - started
+    parsed.chunks = timed_chunks()
+    return parsed
+
+
+class IngestionPipeline:
+    """Parses course files in a process pool while embedding and storing in batches"""
+
+    def __init__(
+        self,
+        document_processor: DocumentProcessor,
+        vector_store,
+        workers: int = 4,
+        embedding_batch_size: int = 64,
+        upsert_batch_size: int = 256,
+        stream_threshold_bytes: Optional[int] = 64 * 1024 * 1024,
+        extractor: Optional[DocumentExtractor] = None,
+    ):
+        self.document_processor = document_processor
+        self.vector_store = vector_store
+        self.workers = workers
+        self.embedding_batch_size = embedding_batch_size
+        self.upsert_batch_size = upsert_batch_size
+        # Files at least this large are streamed in-process (None: never)
+        self.stream_threshold_bytes = stream_threshold_bytes
+        # Reads PDF and DOCX files; without one every file is read as text
+        self.extractor = extractor
+
+    def ingest(
+        self,
+        file_paths: List[str],
+        existing_titles: Set[str],
+        manifest: Optional[IngestManifest] = None,
+        folder_path: Optional[str] = None,
+        progress: Optional[Callable[[int, int], None]] = None,
+    ) -> IngestionStats:
+        """
+        Add new courses from the given files to the vector store.
+
+        Files are parsed in parallel but consumed in input order, so course
+        metadata and chunks are stored exactly as the sequential loop would
+        store them. Without a manifest, courses whose title is already in
+        existing_titles are skipped; the set is updated with every course
+        added.
+
+        With a manifest, files it records as unchanged are skipped without
+        parsing, changed files only re-embed the chunks that differ from
+        what is stored, and files missing from folder_path have their
+        chunks removed.
+
+        Files of at least stream_threshold_bytes are parsed lesson by lesson
+        in this process, each lesson's chunks going straight into the
+        embedding batches, so memory stays bounded by one lesson.
+
+        With an extractor, the text of changed PDF and DOCX files is
+        extracted (or taken from its cache) before parsing, and the lesson
+        parser reads the extracted text.
+
+        Args:
+            file_paths: Course documents to ingest
+            existing_titles: Titles already present in the vector store
+            manifest: Optional record of previously indexed files
+            folder_path: Folder the files were listed from
+            progress: Optional callback receiving (files done, files total)
+
+        Returns:
+            IngestionStats describing the run
+        """
+        stats = IngestionStats()
+        started = time.perf_counter()
+        files_total = len(file_paths)
+
+        def report_progress():
+            if progress is not None:
+                progress(stats.unchanged + stats.files, files_total)
+
+        if manifest is not None:
+            if folder_path is not None:
+                self._remove_deleted_files(
+                    manifest, folder_path, file_paths, existing_titles, stats
+                )
+            changed_paths = []
+            for file_path in file_paths:
+                if manifest.is_unchanged(file_path):
+                    stats.unchanged += 1
+                else:
+                    changed_paths.append(file_path)
+            file_paths = changed_paths
+        report_progress()
+
+        extracted: Dict[str, ExtractedDocument] = {}
+        if self.extractor is not None:
+            extract_started = time.perf_counter()
+            extracted = self.extractor.extract_all(file_paths, stats.extraction)
+            stats.extract_seconds = time.perf_counter() - extract_started
+
+        pending_chunks: List[CourseChunk] = []  # Parsed, not yet embedded
+        upsert_chunks: List[CourseChunk] = []  # Embedded, not yet stored
+        upsert_embeddings: List = []
+        # A course only enters the catalog and manifest once all its chunks
+        # are stored, so a failed batch never leaves it recorded as complete
+        queued_courses: Dict[str, QueuedCourse] = {}
+        unstored: Dict[str, int] = {}  # Queued chunks per course title
+        stored_ids: Dict[str, List[str]] = {}  # Chunks stored so far this run
+
+        def embed_pending(flush: bool):
+            """Embed full batches of pending chunks (all of them when flushing)"""
+            while pending_chunks and (
+                flush or len(pending_chunks) >= self.embedding_batch_size
+            ):
+                # A batch that fails to embed stays queued for the next attempt
+                batch = pending_chunks[: self.embedding_batch_size]
+                embed_started = time.perf_counter()
+                embeddings = self.vector_store.embed_documents(
+                    [chunk.content for chunk in batch]
+                )
+                stats.embed_seconds += time.perf_counter() - embed_started
+                stats.embeddings += len(batch)
+                del pending_chunks[: len(batch)]
+
+                upsert_chunks.extend(batch)
+                upsert_embeddings.extend(embeddings)
+                upsert_pending(flush=False)
+
+        def upsert_pending(flush: bool):
+            """Store full batches of embedded chunks (all of them when flushing)"""
+            while upsert_chunks and (
+                flush or len(upsert_chunks) >= self.upsert_batch_size
+            ):
+                batch = upsert_chunks[: self.upsert_batch_size]
+                upsert_started = time.perf_counter()
+                self.vector_store.add_course_content(
+                    batch, upsert_embeddings[: self.upsert_batch_size]
+                )
+                stats.upsert_seconds += time.perf_counter() - upsert_started
+                del upsert_chunks[: len(batch)]
+                del upsert_embeddings[: len(batch)]
+
+                for chunk in batch:
+                    unstored[chunk.course_title] -= 1
+                    stored_ids.setdefault(chunk.course_title, []).append(
+                        self.vector_store.chunk_id(chunk)
+                    )
+                commit_stored_courses()
+
+        def commit_stored_courses():
+            """Record every queued course whose chunks are all stored"""
+            for title in [t for t in queued_courses if not unstored.get(t)]:
+                queued = queued_courses.pop(title)
+                try:
+                    self.vector_store.delete_course_content(queued.stale_ids)
+                    # A streamed course only knows all its lessons at this point
+                    self.vector_store.add_course_metadata(queued.course)
+                except Exception as e:
+                    fail_course(title, queued.file_name, e, queued.is_update)
+                    continue
+                unstored.pop(title, None)
+                stored_ids.pop(title, None)
+
+                if queued.entry is not None:
+                    queued.entry.chunk_ids = queued.chunk_ids
+                    manifest.set(queued.entry)
+                    for duplicate in queued.duplicates:
+                        manifest.set(duplicate)
+                stats.courses += 1
+                stats.chunks += queued.changed
+                if queued.is_update:
+                    print(
+                        f"Updated course: {title} ({queued.changed} of "
+                        f"{len(queued.chunk_ids)} chunks re-embedded, "
+                        f"{len(queued.stale_ids)} removed)"
+                    )
+                else:
+                    print(
+                        f"Added new course: {title} "
+                        f"({len(queued.chunk_ids)} chunks)"
+                    )
+
+        def fail_course(title: str, file_name: str, error: Any, is_update: bool):
+            """Drop a course's queued chunks and delete those already stored"""
+            stats.failed += 1
+            print(f"Error processing {file_name}: {error}")
+            pending_chunks[:] = [c for c in pending_chunks if c.course_title != title]
+            kept = [
+                (chunk, embedding)
+                for chunk, embedding in zip(upsert_chunks, upsert_embeddings)
+                if chunk.course_title != title
+            ]
+            upsert_chunks[:] = [chunk for chunk, _ in kept]
+            upsert_embeddings[:] = [embedding for _, embedding in kept]
+            unstored.pop(title, None)
+            queued_courses.pop(title, None)
+            if not is_update:
+                existing_titles.discard(title)
+            try:
+                self.vector_store.delete_course_content(stored_ids.pop(title, []))
+            except Exception as e:
+                print(f"Error removing chunks of {title}: {e}")
+
+        for parsed in self._parse_in_order(file_paths, extracted):
+            report_progress()
+            stats.files += 1
+            stats.parse_seconds += parsed.parse_seconds
+            header_parse_seconds = parsed.parse_seconds
+            file_name = os.path.basename(parsed.file_path)
+
+            if parsed.error is not None:
+                stats.failed += 1
+                print(f"Error processing {file_name}: {parsed.error}")
+                continue
+
+            course = parsed.course
+            if not course:
+                continue
+
+            entry = None
+            old_ids: List[str] = []
+            if manifest is None:
+                if course.title in existing_titles:
+                    stats.skipped += 1
+                    print(f"Course already exists: {course.title} - skipping")
+                    continue
+            elif course.title in queued_courses:
+                # Recorded as a duplicate only if the course itself is stored
+                queued_courses[course.title].duplicates.append(
+                    self._manifest_entry(parsed)
+                )
+                stats.skipped += 1
+                print(f"Course already exists: {course.title} - skipping")
+                continue
+            else:
+                entry = self._manifest_entry(parsed)
+                old_ids = self._previous_chunk_ids(entry, manifest, existing_titles)
+                if old_ids is None:
+                    manifest.set(entry)
+                    stats.skipped += 1
+                    print(f"Course already exists: {course.title} - skipping")
+                    continue
+
+            is_update = course.title in existing_titles
+            chunk_ids: List[str] = []
+            changed = 0
+            existing_titles.add(course.title)
+            unstored[course.title] = 0
+            try:
+                for batch in self._changed_batches(
+                    parsed.chunks, set(old_ids), chunk_ids
+                ):
+                    pending_chunks.extend(batch)
+                    unstored[course.title] += len(batch)
+                    changed += len(batch)
+                    embed_pending(flush=False)
+            except Exception as e:
+                fail_course(course.title, file_name, e, is_update)
+                continue
+            finally:
+                # Streamed documents are parsed while their chunks are read
+                stats.parse_seconds += parsed.parse_seconds - header_parse_seconds
+
+            queued_courses[course.title] = QueuedCourse(
+                course=course,
+                file_name=file_name,
+                is_update=is_update,
+                chunk_ids=chunk_ids,
+                stale_ids=sorted(set(old_ids) - set(chunk_ids)),
+                changed=changed,
+                entry=entry,
+            )
+            commit_stored_courses()
+
+        store_error: Any = None
+        try:
+            embed_pending(flush=True)
+            upsert_pending(flush=True)
+        except Exception as e:
+            store_error = e
+            print(f"Error storing course chunks: {e}")
+        # Courses with chunks still unstored are left out of the catalog and
+        # manifest, so the next run ingests them again
+        for queued in list(queued_courses.values()):
+            fail_course(
+                queued.course.title, queued.file_name, store_error, queued.is_update
+            )
+        # Only record progress once every chunk it describes is stored
+        if manifest is not None:
+            try:
+                manifest.save()
+            except Exception as e:
+                print(f"Error saving ingest manifest: {e}")
+        report_progress()
+
+        stats.total_seconds = time.perf_counter() - started
+        return stats
+
+    def _manifest_entry(self, parsed: ParsedDocument) -> ManifestEntry:
+        """New manifest entry for a parsed file, chunk IDs filled in later"""
+        return ManifestEntry(
+            path=os.path.abspath(parsed.file_path),
+            mtime=parsed.mtime,
+            size=parsed.size,
+            content_hash=parsed.content_hash,
+            course_title=parsed.course.title,
+        )
+
+    def _previous_chunk_ids(
+        self,
+        entry: ManifestEntry,
+        manifest: IngestManifest,
+        existing_titles: Set[str],
+    ) -> Optional[List[str]]:
+        """
+        Work out which stored chunks a changed file used to provide.
+
+        Returns:
+            The chunk IDs to diff the file's new chunks against, or None when
+            another file already provides the same course.
+        """
+        previous = manifest.get(entry.path)
+        owner = manifest.owner_of(entry.course_title)
+        if owner is not None and owner != entry.path:
+            if previous is not None and previous.chunk_ids:
+                # The file used to provide another course that is now gone
+                self.vector_store.delete_course_content(previous.chunk_ids)
+                self._remove_course(previous.course_title, manifest, existing_titles)
+            return None
+
+        if previous is not None and previous.chunk_ids:
+            if previous.course_title != entry.course_title:
+                self._remove_course(previous.course_title, manifest, existing_titles)
+            return previous.chunk_ids
+        if entry.course_title in existing_titles:
+            # Indexed before the manifest existed, adopt what is stored
+            return self.vector_store.get_course_chunk_ids(entry.course_title)
+        return []
+
+    def _changed_batches(
+        self,
+        chunks: Iterable[CourseChunk],
+        old_ids: Set[str],
+        chunk_ids: List[str],
+    ) -> Iterator[List[CourseChunk]]:
+        """
+        Yield, in embedding-sized batches, the chunks that are not already
+        stored unchanged under one of old_ids.
+
+        The ID of every chunk read is appended to chunk_ids, so once the
+        iterator is exhausted it lists all of the document's chunks.
+        """
+        chunks = iter(chunks)
+        while True:
+            batch = list(islice(chunks, self.embedding_batch_size))
+            if not batch:
+                return
+            ids = [self.vector_store.chunk_id(chunk) for chunk in batch]
+            chunk_ids.extend(ids)
+            lookup = [id_ for id_ in ids if id_ in old_ids]
+            stored = self.vector_store.get_stored_chunks(lookup) if lookup else {}
+            changed = [
+                chunk
+                for chunk, id_ in zip(batch, ids)
+                if id_ not in stored
+                or stored[id_] != (chunk.content, self._stored_metadata(chunk))
+            ]
+            if changed:
+                yield changed
+
+    def _stored_metadata(self, chunk: CourseChunk) -> Dict[str, Any]:
+        """Chunk metadata as Chroma returns it, which omits None values"""
+        metadata = self.vector_store.chunk_metadata(chunk)
+        return {key: value for key, value in metadata.items() if value is not None}
+
+    def _remove_deleted_files(
+        self,
+        manifest: IngestManifest,
+        folder_path: str,
+        file_paths: List[str],
+        existing_titles: Set[str],
+        stats: IngestionStats,
+    ):
+        """Drop the chunks of manifest files that no longer exist on disk"""
+        present = {os.path.abspath(path) for path in file_paths}
+        for entry in manifest.entries_under(folder_path):
+            if entry.path in present:
+                continue
+            manifest.remove(entry.path)
+            if entry.chunk_ids:
+                self.vector_store.delete_course_content(entry.chunk_ids)
+                self._remove_course(entry.course_title, manifest, existing_titles)
+            stats.removed += 1
+            print(
+                f"Removed deleted file: {os.path.basename(entry.path)} "
+                f"({entry.course_title})"
+            )
+
+    def _remove_course(
+        self, course_title: str, manifest: IngestManifest, existing_titles: Set[str]
+    ):
+        """Remove a course from the catalog once no file provides it"""
+        self.vector_store.delete_course_metadata(course_title)
+        existing_titles.discard(course_title)
+        # Files that duplicated the course get to provide it on their next parse
+        for entry in manifest.entries_for_title(course_title):
+            if not entry.chunk_ids:
+                manifest.remove(entry.path)
+
+    def _parse_in_order(
+        self, file_paths: List[str], extracted: Dict[str, ExtractedDocument]
+    ) -> Iterator[ParsedDocument]:
+        """Yield parsed files in input order, parsing ahead in worker processes"""
+        chunk_size = self.document_processor.chunk_size
+        chunk_overlap = self.document_processor.chunk_overlap
+
+        def text_path_of(file_path: str) -> Optional[str]:
+            document = extracted.get(file_path)
+            return document.text_path if document is not None else None
+
+        def runs_here(file_path: str) -> bool:
+            """Failed extractions and large files skip the worker pool"""
+            document = extracted.get(file_path)
+            if document is not None and document.error is not None:
+                return True
+            return self._should_stream(text_path_of(file_path) or file_path)
+
+        def parse_here(file_path: str) -> ParsedDocument:
+            document = extracted.get(file_path)
+            if document is not None and document.error is not None:
+                return ParsedDocument(
+                    file_path, error=f"Text extraction failed: {document.error}"
+                )
+            text_path = text_path_of(file_path)
+            if self._should_stream(text_path or file_path):
+                return stream_course_file(file_path, self.document_processor, text_path)
+            return parse_course_file(file_path, chunk_size, chunk_overlap, text_path)
+
+        if self.workers <= 1 or len(file_paths) <= 1:
+            for file_path in file_paths:
+                yield parse_here(file_path)
+            return
+
+        def submit(file_path: str):
+            """Start parsing in a worker, or None to parse the file here later"""
+            if runs_here(file_path):
+                return file_path, None
+            return file_path, pool.submit(
+                parse_course_file,
+                file_path,
+                chunk_size,
+                chunk_overlap,
+                text_path_of(file_path),
+            )
+
+        # Spawned workers stay clear of the threads (tokenizers, torch) already
+        # running in the server process
+        with ProcessPoolExecutor(
+            max_workers=min(self.workers, len(file_paths)),
+            mp_context=multiprocessing.get_context("spawn"),
+        ) as pool:
+            remaining = iter(file_paths)
+            # Bound read-ahead so parsed files never pile up faster than
+            # they can be embedded
+            in_flight = deque(
+                submit(path) for path in islice(remaining, self.workers * 2)
+            )
+            while in_flight:
+                file_path, future = in_flight.popleft()
+                next_path = next(remaining, None)
+                if next_path is not None:
+                    in_flight.append(submit(next_path))
+                if future is None:
+                    yield parse_here(file_path)
+                else:
+                    yield future.result()
+
+    def _should_stream(self, file_path: str) -> bool:
+        """Whether a file is too large to parse whole in a worker"""
+        if self.stream_threshold_bytes is None:
+            return False
+        try:
+            return os.path.getsize(file_path) >= self.stream_threshold_bytes
+        except OSError:
+            return False  # Let the parser report the error
@@ -0,0 +1,309 @@
+import json
+import os
+import re
+import threading
+from collections import Counter
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+_TOKEN = re.compile(r"\w+")
+
+# Words too common to help ranking; skipping them keeps posting scans short
+_STOPWORDS = frozenset(
+    "a an and are as at be by for from how i in is it of on or that the this "
+    "to was what when where which who why with you your".split()
+)
+
+
+def tokenize(text: str) -> List[str]:
+    """Lower-cased word tokens, keeping identifiers like lesson_3 or MCP whole"""
+    return [token for token in _TOKEN.findall(text.lower()) if token not in _STOPWORDS]
+
+
+def reciprocal_rank_fusion(
+    rankings: Sequence[Sequence[str]], k: int = 60
+) -> List[Tuple[str, float]]:
+    """
+    Fuse several rankings of the same items with reciprocal rank fusion.
+
+    Args:
+        rankings: Item IDs ordered best first, one list per retriever
+        k: Damping constant; larger values flatten the head of each ranking
+
+    Returns:
+        (item ID, fused score) pairs, best first
+    """
+    scores: Dict[str, float] = {}
+    for ranking in rankings:
+        for rank, item in enumerate(ranking):
+            scores[item] = scores.get(item, 0.0) + 1.0 / (k + rank + 1)
+    return sorted(scores.items(), key=lambda pair: pair[1], reverse=True)
+
+
+class BM25Index:
+    """In-memory inverted index with BM25 scoring over course content chunks"""
+
+    VERSION = 1
+
+    def __init__(self, path: Optional[str] = None, k1: float = 1.5, b: float = 0.75):
+        self.path = path
+        self.k1 = k1
+        self.b = b
+        self._lock = threading.Lock()
+        self.dirty = False  # Changed since the last save
+        # Content generation of the store this index was saved against, so a
+        # file left behind by a crash mid-write can be told apart
+        self.generation: Optional[int] = None
+        self._reset()
+
+    @staticmethod
+    def path_for(chroma_path: str) -> str:
+        """Index file stored next to a ChromaDB directory"""
+        return chroma_path.rstrip("/\\") + ".bm25.json"
+
+    def _reset(self):
+        self._slots: Dict[str, int] = {}  # Chunk ID -> slot
+        self._ids: List[Optional[str]] = []  # None for freed slots
+        self._term_counts: List[Dict[str, int]] = []
+        self._lengths: List[int] = []
+        self._course_codes: Dict[str, int] = {}
+        self._courses: List[int] = []  # Course code per slot
+        self._lessons: List[int] = []  # Lesson number per slot, -1 for none
+        self._free: List[int] = []
+        self._postings: Dict[str, Dict[int, int]] = {}  # Term -> {slot: tf}
+        self._total_length = 0
+        # Numpy views rebuilt lazily after writes
+        self._posting_arrays: Dict[str, Tuple[np.ndarray, np.ndarray]] = {}
+        self._slot_arrays: Optional[Tuple[np.ndarray, ...]] = None
+
+    def __len__(self) -> int:
+        return len(self._slots)
+
+    def add(
+        self,
+        ids: Sequence[str],
+        documents: Sequence[str],
+        metadatas: Sequence[Dict[str, Any]],
+    ):
+        """Index chunks, replacing any already stored under the same IDs"""
+        with self._lock:
+            for id_, document, metadata in zip(ids, documents, metadatas):
+                if id_ in self._slots:
+                    self._remove_slot(self._slots.pop(id_))
+                self._add_slot(id_, document, metadata)
+            self._slot_arrays = None
+            self.dirty = True
+
+    def remove(self, ids: Sequence[str]):
+        """Drop chunks from the index"""
+        with self._lock:
+            for id_ in ids:
+                slot = self._slots.pop(id_, None)
+                if slot is not None:
+                    self._remove_slot(slot)
+            self._slot_arrays = None
+            self.dirty = True
+
+    def clear(self):
+        """Empty the index"""
+        with self._lock:
+            self._reset()
+            self.dirty = True
+
+    def _add_slot(self, id_: str, document: str, metadata: Dict[str, Any]):
+        term_counts = dict(Counter(tokenize(document)))
+        length = sum(term_counts.values())
+        course_code = self._course_codes.setdefault(
+            metadata.get("course_title") or "", len(self._course_codes)
+        )
+        lesson_number = metadata.get("lesson_number")
+        lesson = -1 if lesson_number is None else int(lesson_number)
+
+        if self._free:
+            slot = self._free.pop()
+            self._ids[slot] = id_
+            self._term_counts[slot] = term_counts
+            self._lengths[slot] = length
+            self._courses[slot] = course_code
+            self._lessons[slot] = lesson
+        else:
+            slot = len(self._ids)
+            self._ids.append(id_)
+            self._term_counts.append(term_counts)
+            self._lengths.append(length)
+            self._courses.append(course_code)
+            self._lessons.append(lesson)
+
+        self._slots[id_] = slot
+        self._total_length += length
+        for term, count in term_counts.items():
+            self._postings.setdefault(term, {})[slot] = count
+            self._posting_arrays.pop(term, None)
+
+    def _remove_slot(self, slot: int):
+        for term in self._term_counts[slot]:
+            postings = self._postings[term]
+            del postings[slot]
+            if not postings:
+                del self._postings[term]
+            self._posting_arrays.pop(term, None)
+        self._total_length -= self._lengths[slot]
+        self._ids[slot] = None
+        self._term_counts[slot] = {}
+        self._lengths[slot] = 0
+        self._free.append(slot)
+
+    def search(
+        self,
+        query: str,
+        limit: int,
+        course_title: Optional[str] = None,
+        lesson_number: Optional[int] = None,
+    ) -> List[Tuple[str, float]]:
+        """
+        Rank chunks against a query with BM25.
+
+        Args:
+            query: Free-text query
+            limit: Maximum number of results
+            course_title: Only rank chunks of this course
+            lesson_number: Only rank chunks of this lesson
+
+        Returns:
+            (chunk ID, BM25 score) pairs, best first, positive scores only
+        """
+        terms = set(tokenize(query))
+        with self._lock:
+            if not terms or not self._slots or limit <= 0:
+                return []
+            if course_title is not None and course_title not in self._course_codes:
+                return []
+
+            norms, courses, lessons = self._get_slot_arrays()
+            doc_count = len(self._slots)
+
+            slot_parts, score_parts = [], []
+            for term in terms:
+                postings = self._get_posting_arrays(term)
+                if postings is None:
+                    continue
+                slots, tfs = postings
+                df = len(slots)
+                idf = np.log(1.0 + (doc_count - df + 0.5) / (df + 0.5))
+                slot_parts.append(slots)
+                score_parts.append(idf * tfs * (self.k1 + 1.0) / (tfs + norms[slots]))
+
+            if not slot_parts:
+                return []
+
+            scores = np.bincount(
+                np.concatenate(slot_parts),
+                weights=np.concatenate(score_parts),
+                minlength=len(norms),
+            )
+            if course_title is not None:
+                scores[courses != self._course_codes[course_title]] = 0.0
+            if lesson_number is not None:
+                scores[lessons != lesson_number] = 0.0
+
+            candidates = np.flatnonzero(scores > 0)
+            if len(candidates) > limit:
+                top = np.argpartition(scores[candidates], -limit)[-limit:]
+                candidates = candidates[top]
+            ranked = candidates[np.argsort(-scores[candidates], kind="stable")]
+            return [(self._ids[slot], float(scores[slot])) for slot in ranked]
+
+    def _get_slot_arrays(self) -> Tuple[np.ndarray, ...]:
+        """Per-slot BM25 length norms, course codes and lesson numbers"""
+        if self._slot_arrays is None:
+            lengths = np.asarray(self._lengths, dtype=np.float32)
+            average_length = self._total_length / max(len(self._slots), 1) or 1.0
+            self._slot_arrays = (
+                self.k1 * (1.0 - self.b + self.b * lengths / average_length),
+                np.asarray(self._courses, dtype=np.int32),
+                np.asarray(self._lessons, dtype=np.int32),
+            )
+        return self._slot_arrays
+
+    def _get_posting_arrays(self, term: str) -> Optional[Tuple[np.ndarray, ...]]:
+        arrays = self._posting_arrays.get(term)
+        if arrays is None:
+            postings = self._postings.get(term)
+            if not postings:
+                return None
+            arrays = (
+                np.fromiter(postings.keys(), dtype=np.int64, count=len(postings)),
+                np.fromiter(postings.values(), dtype=np.float32, count=len(postings)),
+            )
+            self._posting_arrays[term] = arrays
+        return arrays
+
+    def save(self, path: Optional[str] = None):
+        """Write the index atomically if it changed since it was loaded"""
+        path = path or self.path
+        if not path or not self.dirty:
+            return
+
+        with self._lock:
+            titles = {code: title for title, code in self._course_codes.items()}
+            documents = [
+                [
+                    id_,
+                    titles[self._courses[slot]],
+                    None if self._lessons[slot] < 0 else self._lessons[slot],
+                    self._term_counts[slot],
+                ]
+                for id_, slot in self._slots.items()
+            ]
+            self.dirty = False
+
+        data = {
+            "version": self.VERSION,
+            "generation": self.generation,
+            "documents": documents,
+        }
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as file:
+            # dumps() is much faster than streaming json.dump() for large indexes
+            file.write(json.dumps(data, separators=(",", ":")))
+        os.replace(tmp_path, path)
+
+    def load(self, path: Optional[str] = None) -> bool:
+        """
+        Read an index written by save().
+
+        Returns:
+            False if there is no usable file, leaving the index empty
+        """
+        path = path or self.path
+        if not path or not os.path.exists(path):
+            return False
+        try:
+            with open(path, "r", encoding="utf-8") as file:
+                data = json.load(file)
+            if data.get("version") != self.VERSION:
+                return False
+        except Exception as e:
+            print(f"Error loading lexical index: {e}")
+            return False
+
+        with self._lock:
+            self._reset()
+            for id_, course_title, lesson_number, term_counts in data["documents"]:
+                slot = len(self._ids)
+                length = sum(term_counts.values())
+                self._ids.append(id_)
+                self._term_counts.append(term_counts)
+                self._lengths.append(length)
+                self._courses.append(
+                    self._course_codes.setdefault(course_title, len(self._course_codes))
+                )
+                self._lessons.append(-1 if lesson_number is None else lesson_number)
+                self._slots[id_] = slot
+                self._total_length += length
+                for term, count in term_counts.items():
+                    self._postings.setdefault(term, {})[slot] = count
+            self.generation = data.get("generation")
+            self.dirty = False
+        return True
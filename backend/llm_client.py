@@ -0,0 +1,294 @@
+import random
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Any, Callable, Deque, Dict, Optional, Tuple, Type
+
+import requests
+from google.api_core import exceptions as api_exceptions
+
+# Overload, transient server faults and network failures are worth another
+# attempt; bad requests and auth errors would only fail again
+RETRYABLE_ERRORS: Tuple[Type[BaseException], ...] = (
+    api_exceptions.TooManyRequests,
+    api_exceptions.InternalServerError,
+    api_exceptions.BadGateway,
+    api_exceptions.ServiceUnavailable,
+    api_exceptions.GatewayTimeout,
+    requests.exceptions.ConnectionError,
+    requests.exceptions.Timeout,
+    ConnectionError,
+    TimeoutError,
+)
+
+
+class LLMUnavailableError(Exception):
+    """Raised when the model gave no answer within the deadline and retries"""
+
+
+class CircuitOpenError(LLMUnavailableError):
+    """Raised without calling the model while the circuit breaker is open"""
+
+
+class CircuitBreaker:
+    """Fails calls fast after repeated failures, then lets one trial call through"""
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(
+        self,
+        failure_threshold: int = 5,
+        reset_seconds: float = 30.0,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        """
+        Args:
+            failure_threshold: Consecutive failed calls that open the circuit
+            reset_seconds: Time the circuit stays open before a trial call
+            clock: Monotonic time source
+        """
+        self.failure_threshold = failure_threshold
+        self.reset_seconds = reset_seconds
+        self.clock = clock
+        self.state = self.CLOSED
+        self.failures = 0  # Consecutive failed calls
+        self.opened = 0  # Times the circuit has opened
+        self._opened_at = 0.0
+        self._trial_running = False
+        self._lock = threading.Lock()
+
+    def allow(self) -> bool:
+        """Whether a call may go ahead; only one at a time while half-open"""
+        with self._lock:
+            if self.state == self.OPEN:
+                if self.clock() - self._opened_at < self.reset_seconds:
+                    return False
+                self.state = self.HALF_OPEN
+            if self.state == self.HALF_OPEN:
+                if self._trial_running:
+                    return False
+                self._trial_running = True
+            return True
+
+    def record_success(self) -> None:
+        """Close the circuit after a call the upstream answered"""
+        with self._lock:
+            self.state = self.CLOSED
+            self.failures = 0
+            self._trial_running = False
+
+    def record_failure(self) -> None:
+        """Count a failed call, opening the circuit at the threshold"""
+        with self._lock:
+            self.failures += 1
+            self._trial_running = False
+            if self.state == self.HALF_OPEN or self.failures >= self.failure_threshold:
+                if self.state != self.OPEN:
+                    self.opened += 1
+                self.state = self.OPEN
+                self._opened_at = self.clock()
+
+
+class ResilientLLMClient:
+    """Runs model calls with a deadline, jittered retries, hedging and a breaker"""
+
+    def __init__(
+        self,
+        timeout: float = 30.0,
+        max_retries: int = 2,
+        backoff_base: float = 0.5,
+        backoff_max: float = 8.0,
+        hedge: bool = False,
+        hedge_percentile: float = 0.95,
+        hedge_min_samples: int = 20,
+        breaker: Optional[CircuitBreaker] = None,
+        max_workers: int = 32,
+    ):
+        """
+        Args:
+            timeout: Deadline for a whole call, retries included
+            max_retries: Extra attempts after retryable errors
+            backoff_base: Upper bound of the first retry's random delay,
+                doubled for each further retry
+            backoff_max: Upper bound of any retry delay
+            hedge: Whether a second request races an attempt that is slower
+                than hedge_percentile of recent calls
+            hedge_percentile: Latency percentile after which to hedge
+            hedge_min_samples: Successful calls needed before hedging starts
+            breaker: Circuit breaker shared by all calls
+            max_workers: Threads running attempts, hedges included
+        """
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.hedge = hedge
+        self.hedge_percentile = hedge_percentile
+        self.hedge_min_samples = hedge_min_samples
+        self.breaker = breaker or CircuitBreaker()
+        self.max_workers = max_workers
+
+        self._pool: Optional[ThreadPoolExecutor] = None
+        self._lock = threading.Lock()
+        # Latencies of recent successful attempts, for the hedge delay
+        self._latencies: Deque[float] = deque(maxlen=200)
+        self._counts = {
+            "calls": 0,
+            "retries": 0,
+            "hedged": 0,
+            "hedge_wins": 0,
+            "failures": 0,
+            "short_circuited": 0,
+        }
+
+    def call(self, func: Callable[[float], Any], hedge: Optional[bool] = None) -> Any:
+        """
+        Call func until it succeeds, fails for good or the deadline passes.
+
+        Args:
+            func: Makes one attempt. It receives the seconds left before the
+                deadline, to use as its own transport timeout.
+            hedge: Overrides whether slow attempts are hedged; streamed
+                responses cannot be raced, so streaming calls pass False
+
+        Returns:
+            What the first successful attempt returned
+
+        Raises:
+            CircuitOpenError: If the breaker is open; func is not called
+            LLMUnavailableError: If retries or the deadline ran out
+            Exception: Non-retryable errors from func, unchanged
+        """
+        self._count("calls")
+        if not self.breaker.allow():
+            self._count("short_circuited")
+            raise CircuitOpenError(
+                "The model is unavailable after repeated failures, please retry shortly"
+            )
+
+        deadline = time.monotonic() + self.timeout
+        if hedge is None:
+            hedge = self.hedge
+        attempts = 0
+        last_error: Optional[BaseException] = None
+        while attempts <= self.max_retries:
+            if attempts:
+                # Full jitter, so retries from many requests spread out
+                delay = random.uniform(
+                    0, min(self.backoff_max, self.backoff_base * 2 ** (attempts - 1))
+                )
+                if time.monotonic() + delay >= deadline:
+                    break
+                self._count("retries")
+                time.sleep(delay)
+            attempts += 1
+            try:
+                result = self._attempt(func, deadline, hedge)
+            except RETRYABLE_ERRORS as e:
+                last_error = e
+                continue
+            except Exception:
+                # The upstream answered, if only to reject the request
+                self.breaker.record_success()
+                raise
+            self.breaker.record_success()
+            return result
+
+        self.breaker.record_failure()
+        self._count("failures")
+        raise LLMUnavailableError(
+            f"Model call failed after {attempts} attempt(s): {last_error}"
+        ) from last_error
+
+    def stats(self) -> Dict[str, Any]:
+        """Breaker state, call counters and the current hedge delay"""
+        with self._lock:
+            counts = dict(self._counts)
+        return {
+            "state": self.breaker.state,
+            "opened": self.breaker.opened,
+            **counts,
+            "hedge_delay_seconds": self._hedge_delay(),
+        }
+
+    def close(self) -> None:
+        """Stop the attempt threads, abandoning attempts still running"""
+        with self._lock:
+            pool, self._pool = self._pool, None
+        if pool is not None:
+            pool.shutdown(wait=False)
+
+    def _attempt(
+        self, func: Callable[[float], Any], deadline: float, hedge: bool
+    ) -> Any:
+        """
+        One attempt, raced by a second request if it runs slower than usual.
+
+        Raises:
+            TimeoutError: If no request finished before the deadline
+        """
+        pool = self._get_pool()
+        started = time.monotonic()
+        primary = pool.submit(func, deadline - started)
+        pending = {primary}
+        hedge_at = None
+        if hedge:
+            delay = self._hedge_delay()
+            if delay is not None:
+                hedge_at = started + delay
+
+        error: Optional[BaseException] = None
+        while pending:
+            now = time.monotonic()
+            if now >= deadline:
+                break
+            until = deadline if hedge_at is None else min(deadline, hedge_at)
+            done, pending = wait(
+                pending, timeout=until - now, return_when=FIRST_COMPLETED
+            )
+            for future in done:
+                try:
+                    result = future.result()
+                except Exception as e:
+                    error = e
+                    continue
+                with self._lock:
+                    self._latencies.append(time.monotonic() - started)
+                    if future is not primary:
+                        self._counts["hedge_wins"] += 1
+                return result
+
+            if hedge_at is not None and time.monotonic() >= hedge_at:
+                hedge_at = None
+                if pending:
+                    self._count("hedged")
+                    pending.add(pool.submit(func, deadline - time.monotonic()))
+
+        if error is not None and not pending:
+            raise error
+        # Requests still running are abandoned; their own timeout ends them
+        raise TimeoutError(f"No model response within {self.timeout:g}s")
+
+    def _hedge_delay(self) -> Optional[float]:
+        """Recent latency percentile, or None until there are enough samples"""
+        with self._lock:
+            if len(self._latencies) < self.hedge_min_samples:
+                return None
+            latencies = sorted(self._latencies)
+        index = min(len(latencies) - 1, int(len(latencies) * self.hedge_percentile))
+        return latencies[index]
+
+    def _get_pool(self) -> ThreadPoolExecutor:
+        with self._lock:
+            if self._pool is None:
+                self._pool = ThreadPoolExecutor(
+                    max_workers=self.max_workers, thread_name_prefix="llm-call"
+                )
+            return self._pool
+
+    def _count(self, name: str) -> None:
+        with self._lock:
+            self._counts[name] += 1
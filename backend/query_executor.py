@@ -0,0 +1,155 @@
+import asyncio
+import functools
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, Dict, Iterator, Optional
+
+# Sentinel returned by next() once a drained iterator is exhausted
+_EXHAUSTED = object()
+
+
+class QueryQueueFullError(Exception):
+    """Raised when the executor cannot accept any more queries"""
+
+
+class QueryExecutor:
+    """Runs blocking RAG queries in a bounded worker pool off the event loop"""
+
+    def __init__(self, max_workers: int, max_queued: int):
+        self.max_workers = max_workers
+        self.max_queued = max_queued
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_workers, thread_name_prefix="rag-query"
+        )
+        self._lock = threading.Lock()
+        self._pending = 0  # Running plus waiting queries
+        self._rejected = 0
+
+    @property
+    def capacity(self) -> int:
+        """Maximum number of queries that may be running or waiting at once"""
+        return self.max_workers + self.max_queued
+
+    def _reserve(self):
+        """Claim a slot or raise QueryQueueFullError when saturated"""
+        with self._lock:
+            if self._pending >= self.capacity:
+                self._rejected += 1
+                raise QueryQueueFullError(
+                    f"Server is busy ({self._pending} queries in progress), "
+                    "please retry shortly"
+                )
+            self._pending += 1
+
+    def _release(self, _future: Future = None):
+        """Give back a slot once the work has finished or was cancelled"""
+        with self._lock:
+            self._pending -= 1
+
+    async def run(self, func: Callable[..., Any], *args, **kwargs) -> Any:
+        """
+        Run a blocking callable in the worker pool and await its result.
+
+        Args:
+            func: Blocking callable to execute
+            *args, **kwargs: Arguments passed to the callable
+
+        Returns:
+            Whatever the callable returns
+
+        Raises:
+            QueryQueueFullError: If all workers are busy and the queue is full
+        """
+        self._reserve()
+        try:
+            future = self._executor.submit(functools.partial(func, *args, **kwargs))
+        except Exception:
+            self._release()
+            raise
+
+        # Release from the future itself so a cancelled request does not free
+        # the slot while its worker thread is still busy
+        future.add_done_callback(self._release)
+        return await asyncio.wrap_future(future)
+
+    def iterate(self, iterator: Iterator[Any]) -> "DrainedIterator":
+        """
+        Drain a blocking iterator in the worker pool, one item at a time.
+
+        The slot is claimed immediately so a saturated executor can still be
+        reported before a streaming response starts. It is held until the
+        iterator is exhausted or closed, or until the returned object is
+        garbage collected without ever being iterated.
+
+        Raises:
+            QueryQueueFullError: If all workers are busy and the queue is full
+        """
+        self._reserve()
+        return DrainedIterator(self, iterator)
+
+    def get_stats(self) -> Dict[str, int]:
+        """Get current load figures for the executor"""
+        with self._lock:
+            return {
+                "max_workers": self.max_workers,
+                "max_queued": self.max_queued,
+                "pending": self._pending,
+                "rejected": self._rejected,
+            }
+
+    def shutdown(self):
+        """Stop accepting work and wait for running queries to finish"""
+        self._executor.shutdown(wait=True)
+
+
+class DrainedIterator:
+    """
+    Async view of a blocking iterator whose next() calls run in the pool.
+
+    Releases its executor slot exactly once: when the iterator is exhausted,
+    closed or garbage collected, and never while a worker is still inside
+    next() (the slot is then released by that call's future).
+    """
+
+    def __init__(self, executor: QueryExecutor, iterator: Iterator[Any]):
+        self._executor = executor
+        self._iterator = iterator
+        self._future: Optional[Future] = None  # next() call in a worker
+        self._released = False
+
+    def __aiter__(self) -> "DrainedIterator":
+        return self
+
+    async def __anext__(self) -> Any:
+        if self._released:
+            raise StopAsyncIteration
+        self._future = self._executor._executor.submit(next, self._iterator, _EXHAUSTED)
+        try:
+            item = await asyncio.wrap_future(self._future)
+        except BaseException:
+            self._close()
+            raise
+        self._future = None
+        if item is _EXHAUSTED:
+            self._close()
+            raise StopAsyncIteration
+        return item
+
+    async def aclose(self):
+        """Stop draining and give back the slot"""
+        self._close()
+
+    def _close(self):
+        """Release the slot once, waiting for a next() call still running"""
+        if self._released:
+            return
+        self._released = True
+        future, self._future = self._future, None
+        if future is not None and not future.done():
+            future.add_done_callback(self._executor._release)
+        else:
+            self._executor._release()
+
+    def __del__(self):
+        # A response that never started iterating never calls aclose
+        self._close()
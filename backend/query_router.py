@@ -0,0 +1,117 @@
+import re
+import threading
+from dataclasses import dataclass
+from typing import Any, Dict, Optional
+
+# Messages that need no course material at all
+_SMALL_TALK = re.compile(
+    r"^\s*(hi|hello|hey|thanks|thank you|thx|ok(ay)?|bye|goodbye|"
+    r"good (morning|afternoon|evening))( there)?[\s!.,]*$",
+    re.IGNORECASE,
+)
+
+# Lesson numbers only narrow a search once the course is known too, which
+# the model works out better than a pattern can
+_LESSON_REFERENCE = re.compile(r"\blesson\s*\d+", re.IGNORECASE)
+
+# Words that point back at the conversation instead of naming the subject
+_BACK_REFERENCES = frozenset(
+    "it its that this these those they them one ones more else above previous "
+    "earlier former latter".split()
+)
+_FOLLOW_UP_MAX_WORDS = 8
+
+
+@dataclass
+class Route:
+    """How one query is answered"""
+
+    kind: str  # QueryRouter.RETRIEVE, TOOLS or DIRECT
+    reason: str
+
+
+class QueryRouter:
+    """
+    Chooses, without calling the model, how a query is answered.
+
+    Most questions are searched for right away and answered in a single
+    model call with the results in the prompt. Small talk is answered
+    without tools, and questions only the model can turn into a good search
+    (follow-ups, lesson-specific questions) keep the tool-calling loop.
+    """
+
+    RETRIEVE = "retrieve"  # Search first, then one answer call
+    TOOLS = "tools"  # The model decides whether and how to search
+    DIRECT = "direct"  # Answer without tools
+
+    def route(self, query: str, history: Optional[str] = None) -> Route:
+        """
+        Route a query.
+
+        Args:
+            query: The user's question
+            history: Formatted conversation so far, if any
+
+        Returns:
+            Route with the chosen kind and why
+        """
+        if _SMALL_TALK.match(query):
+            return Route(self.DIRECT, "small talk")
+        if _LESSON_REFERENCE.search(query):
+            return Route(self.TOOLS, "needs course and lesson filters")
+        if history:
+            words = re.findall(r"\w+", query.lower())
+            if len(words) <= _FOLLOW_UP_MAX_WORDS and _BACK_REFERENCES.intersection(
+                words
+            ):
+                return Route(self.TOOLS, "follow-up to the conversation")
+        return Route(self.RETRIEVE, "course question")
+
+
+class RoutingStats:
+    """Counts routes taken, model calls made and prompt tokens sent per query"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.queries = 0
+        self.llm_calls = 0
+        self.routes: Dict[str, int] = {}
+        # Estimated tokens: model input, retrieved results, and their packed text
+        self.prompt_tokens = 0
+        self.retrieved_tokens = 0
+        self.packed_tokens = 0
+
+    def record(
+        self,
+        route: str,
+        llm_calls: int,
+        prompt_tokens: int = 0,
+        retrieved_tokens: int = 0,
+        packed_tokens: int = 0,
+    ):
+        """Count one answered query"""
+        with self._lock:
+            self.queries += 1
+            self.llm_calls += llm_calls
+            self.routes[route] = self.routes.get(route, 0) + 1
+            self.prompt_tokens += prompt_tokens
+            self.retrieved_tokens += retrieved_tokens
+            self.packed_tokens += packed_tokens
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Route counts, with model calls and token counts averaged per query"""
+        with self._lock:
+
+            def per_query(total: int) -> float:
+                return total / self.queries if self.queries else 0.0
+
+            return {
+                "queries": self.queries,
+                "llm_calls": self.llm_calls,
+                "llm_calls_per_query": per_query(self.llm_calls),
+                "routes": dict(self.routes),
+                "prompt_tokens": self.prompt_tokens,
+                "prompt_tokens_per_query": per_query(self.prompt_tokens),
+                "retrieved_tokens_per_query": per_query(self.retrieved_tokens),
+                "packed_tokens_per_query": per_query(self.packed_tokens),
+            }
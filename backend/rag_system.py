@@ -1,17 +1,32 @@
 import os
-from typing import Dict, List, Optional, Tuple
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
 
 from ai_generator import AIGenerator
+from answer_cache import SemanticAnswerCache
+from context_packer import ContextPacker
+from document_extraction import DocumentExtractor
 from document_processor import DocumentProcessor
+from ingest_manifest import IngestManifest
+from ingestion import IngestionPipeline, IngestionStats
+from lexical_index import BM25Index
+from llm_client import CircuitBreaker, LLMUnavailableError, ResilientLLMClient
 from models import Course, CourseChunk, Lesson
-from search_tools import CourseSearchTool, ToolManager
+from query_router import QueryRouter, RoutingStats
+from search_tools import CourseSearchTool, ToolContext, ToolManager
 from session_manager import SessionManager
+from snippet_search import SearchPage, SnippetSearch
 from vector_store import VectorStore
 
 
 class RAGSystem:
     """Main orchestrator for the Retrieval-Augmented Generation system"""
 
+    # Prefixed to search results returned while the model is unavailable
+    FALLBACK_NOTICE = (
+        "The assistant is temporarily unavailable, "
+        "so here is the most relevant course material:"
+    )
+
     def __init__(self, config):
         self.config = config
 
@@ -20,15 +35,87 @@ class RAGSystem:
             config.CHUNK_SIZE, config.CHUNK_OVERLAP
         )
         self.vector_store = VectorStore(
-            config.CHROMA_PATH, config.EMBEDDING_MODEL, config.MAX_RESULTS
+            config.CHROMA_PATH,
+            config.EMBEDDING_MODEL,
+            config.MAX_RESULTS,
+            embedding_cache_size=config.EMBEDDING_CACHE_SIZE,
+            embedding_cache_path=config.EMBEDDING_CACHE_PATH or None,
+            search_mode=config.SEARCH_MODE,
+            lexical_index_path=BM25Index.path_for(config.CHROMA_PATH),
+            hybrid_candidates=config.HYBRID_CANDIDATES,
+            rrf_k=config.RRF_K,
+        )
+        self.ai_generator = AIGenerator(
+            config.GEMINI_API_KEY,
+            config.GEMINI_MODEL,
+            max_tool_rounds=config.MAX_TOOL_ROUNDS,
+            max_parallel_tools=config.MAX_PARALLEL_TOOLS,
+            client=ResilientLLMClient(
+                timeout=config.LLM_TIMEOUT_SECONDS,
+                max_retries=config.LLM_MAX_RETRIES,
+                hedge=config.LLM_HEDGE,
+                breaker=CircuitBreaker(
+                    config.LLM_BREAKER_FAILURES, config.LLM_BREAKER_RESET_SECONDS
+                ),
+            ),
+        )
+        self.session_manager = SessionManager(
+            config.MAX_HISTORY,
+            max_sessions=config.SESSION_MAX_COUNT,
+            ttl_seconds=config.SESSION_TTL_SECONDS,
+            db_path=config.SESSION_DB_PATH or None,
+            redis_url=config.SESSION_REDIS_URL or None,
+        )
+
+        self.ingestion_pipeline = IngestionPipeline(
+            self.document_processor,
+            self.vector_store,
+            workers=config.INGEST_WORKERS,
+            embedding_batch_size=config.EMBEDDING_BATCH_SIZE,
+            upsert_batch_size=config.UPSERT_BATCH_SIZE,
+            stream_threshold_bytes=config.STREAM_PARSE_BYTES,
+            extractor=DocumentExtractor(
+                DocumentExtractor.cache_dir_for(config.CHROMA_PATH),
+                workers=config.INGEST_WORKERS,
+                timeout=config.EXTRACTION_TIMEOUT,
+            ),
         )
-        self.ai_generator = AIGenerator(config.GEMINI_API_KEY, config.GEMINI_MODEL)
-        self.session_manager = SessionManager(config.MAX_HISTORY)
+        self.last_ingestion_stats: Optional[IngestionStats] = None
+        # Record of indexed files so unchanged ones are skipped on restart
+        self.ingest_manifest = IngestManifest.for_chroma_path(config.CHROMA_PATH)
 
         # Initialize search tools
         self.tool_manager = ToolManager()
-        self.search_tool = CourseSearchTool(self.vector_store)
+        self.search_tool = CourseSearchTool(
+            self.vector_store,
+            ContextPacker(config.CONTEXT_TOKEN_BUDGET, config.CHUNK_OVERLAP),
+        )
         self.tool_manager.register_tool(self.search_tool)
+        # Searches up front when that spares the model a tool-decision call
+        self.query_router = QueryRouter() if config.QUERY_ROUTING else None
+        self.routing_stats = RoutingStats()
+
+        # Snippets for search-as-you-type, answered without the LLM
+        self.snippet_search = SnippetSearch(
+            self.vector_store,
+            max_results=config.SEARCH_MAX_RESULTS,
+            snippet_chars=config.SEARCH_SNIPPET_CHARS,
+        )
+        if config.GEMINI_CONTEXT_CACHE:
+            self.ai_generator.enable_context_cache(
+                self.tool_manager.get_tool_definitions(),
+                ttl_seconds=config.GEMINI_CONTEXT_CACHE_TTL,
+            )
+
+        # Semantic cache so near-duplicate questions skip retrieval and the LLM
+        self.answer_cache = None
+        if config.ANSWER_CACHE_ENABLED:
+            self.answer_cache = SemanticAnswerCache(
+                self.vector_store.embed_query,
+                max_entries=config.ANSWER_CACHE_MAX_ENTRIES,
+                ttl_seconds=config.ANSWER_CACHE_TTL_SECONDS,
+                similarity_threshold=config.ANSWER_CACHE_SIMILARITY,
+            )
 
     def add_course_document(self, file_path: str) -> Tuple[Course, int]:
         """
@@ -51,6 +138,7 @@ class RAGSystem:
 
             # Add course content chunks to vector store
             self.vector_store.add_course_content(course_chunks)
+            self._invalidate_answer_cache()
 
             return course, len(course_chunks)
         except Exception as e:
@@ -58,7 +146,10 @@ class RAGSystem:
             return None, 0
 
     def add_course_folder(
-        self, folder_path: str, clear_existing: bool = False
+        self,
+        folder_path: str,
+        clear_existing: bool = False,
+        progress: Optional[Callable[[int, int], None]] = None,
     ) -> Tuple[int, int]:
         """
         Add all course documents from a folder.
@@ -66,57 +157,56 @@ class RAGSystem:
         Args:
             folder_path: Path to folder containing course documents
             clear_existing: Whether to clear existing data first
+            progress: Optional callback receiving (files done, files total)
 
         Returns:
             Tuple of (total courses added, total chunks created)
         """
-        total_courses = 0
-        total_chunks = 0
-
         # Clear existing data if requested
         if clear_existing:
             print("Clearing existing data for fresh rebuild...")
             self.vector_store.clear_all_data()
+            self.ingest_manifest.clear()
 
         if not os.path.exists(folder_path):
             print(f"Folder {folder_path} does not exist")
             return 0, 0
 
-        # Get existing course titles to avoid re-processing
+        # Titles already stored; files indexed before the manifest existed are
+        # reconciled against these instead of being re-embedded
         existing_course_titles = set(self.vector_store.get_existing_course_titles())
 
-        # Process each file in the folder
-        for file_name in os.listdir(folder_path):
-            file_path = os.path.join(folder_path, file_name)
-            if os.path.isfile(file_path) and file_name.lower().endswith(
-                (".pdf", ".docx", ".txt")
-            ):
-                try:
-                    # Check if this course might already exist
-                    # We'll process the document to get the course ID, but only add if new
-                    course, course_chunks = (
-                        self.document_processor.process_course_document(file_path)
-                    )
-
-                    if course and course.title not in existing_course_titles:
-                        # This is a new course - add it to the vector store
-                        self.vector_store.add_course_metadata(course)
-                        self.vector_store.add_course_content(course_chunks)
-                        total_courses += 1
-                        total_chunks += len(course_chunks)
-                        print(
-                            f"Added new course: {course.title} ({len(course_chunks)} chunks)"
-                        )
-                        existing_course_titles.add(course.title)
-                    elif course:
-                        print(f"Course already exists: {course.title} - skipping")
-                except Exception as e:
-                    print(f"Error processing {file_name}: {e}")
+        file_paths = [
+            os.path.join(folder_path, file_name)
+            for file_name in os.listdir(folder_path)
+            if os.path.isfile(os.path.join(folder_path, file_name))
+            and file_name.lower().endswith((".pdf", ".docx", ".txt"))
+        ]
+
+        # Parse changed files in worker processes while embedding and storing
+        # in batches; unchanged files are skipped using the manifest
+        stats = self.ingestion_pipeline.ingest(
+            file_paths,
+            existing_course_titles,
+            manifest=self.ingest_manifest,
+            folder_path=folder_path,
+            progress=progress,
+        )
+        self.last_ingestion_stats = stats
+        print(stats.summary())
+        self.vector_store.save_lexical_index()
+        total_courses, total_chunks = stats.courses, stats.chunks
+
+        if clear_existing or total_courses or stats.removed:
+            self._invalidate_answer_cache()
 
         return total_courses, total_chunks
 
     def query(
-        self, query: str, session_id: Optional[str] = None
+        self,
+        query: str,
+        session_id: Optional[str] = None,
+        context: Optional[ToolContext] = None,
     ) -> Tuple[str, List[str]]:
         """
         Process a user query using the RAG system with tool-based search.
@@ -124,6 +214,8 @@ class RAGSystem:
         Args:
             query: User's question
             session_id: Optional session ID for conversation context
+            context: Receives this query's sources, per-round timings and
+                prompt-token counts, if given
 
         Returns:
             Tuple of (response, sources list - empty for tool-based approach)
@@ -136,19 +228,43 @@ class RAGSystem:
         if session_id:
             history = self.session_manager.get_conversation_history(session_id)
 
-        # Generate response using AI with tools
-        response = self.ai_generator.generate_response(
-            query=prompt,
-            conversation_history=history,
-            tools=self.tool_manager.get_tool_definitions(),
-            tool_manager=self.tool_manager,
-        )
+        # Answers only depend on the question itself without prior conversation
+        use_cache = self.answer_cache is not None and not history
+        if use_cache:
+            cached = self.answer_cache.get(query)
+            if cached:
+                if session_id:
+                    self.session_manager.add_exchange(session_id, query, cached.answer)
+                self.routing_stats.record("cache", 0)
+                return cached.answer, list(cached.sources)
+            cache_generation = self.answer_cache.generation
 
-        # Get sources from the search tool
-        sources = self.tool_manager.get_last_sources()
+        # Sources of this query only, even with other queries running
+        if context is None:
+            context = ToolContext()
+        route, tools, retrieved = self._route(query, history, context)
 
-        # Reset sources after retrieving them
-        self.tool_manager.reset_sources()
+        # Generate response using AI with tools
+        try:
+            response = self.ai_generator.generate_response(
+                query=prompt,
+                conversation_history=history,
+                tools=tools,
+                tool_manager=self.tool_manager,
+                context=context,
+                retrieved=retrieved,
+            )
+        except LLMUnavailableError as e:
+            print(f"Error generating response, answering without the model: {e}")
+            self._record_query(route, context)
+            return self._fallback_answer(query, retrieved, context.sources)
+        sources = context.sources
+        self._record_query(route, context)
+
+        # Only answers grounded in search results are worth reusing, and
+        # errors or refusals would be served again after the cause is fixed
+        if use_cache and sources and not context.failed:
+            self.answer_cache.put(query, response, sources, cache_generation)
 
         # Update conversation history
         if session_id:
@@ -157,6 +273,187 @@ class RAGSystem:
         # Return response with sources from tool searches
         return response, sources
 
+    def query_stream(
+        self,
+        query: str,
+        session_id: Optional[str] = None,
+        context: Optional[ToolContext] = None,
+    ) -> Iterator[Dict[str, Any]]:
+        """
+        Process a user query and stream the answer as it is generated.
+
+        Args:
+            query: User's question
+            session_id: Optional session ID for conversation context
+            context: Receives this query's sources, per-round timings and
+                prompt-token counts, if given
+
+        Yields:
+            Event dicts: "sources" once retrieval finishes, then "token"
+            events carrying pieces of the answer text
+        """
+        prompt = f"""Answer this question about course materials: {query}"""
+
+        history = None
+        if session_id:
+            history = self.session_manager.get_conversation_history(session_id)
+
+        use_cache = self.answer_cache is not None and not history
+        if use_cache:
+            cached = self.answer_cache.get(query)
+            if cached:
+                self.routing_stats.record("cache", 0)
+                yield {"type": "sources", "sources": list(cached.sources)}
+                yield {"type": "token", "text": cached.answer}
+                if session_id:
+                    self.session_manager.add_exchange(session_id, query, cached.answer)
+                return
+            cache_generation = self.answer_cache.generation
+
+        answer_parts = []
+        if context is None:
+            context = ToolContext()
+        route, tools, retrieved = self._route(query, history, context)
+        # Recorded however the stream ends, including a client disconnect
+        try:
+            if retrieved is not None:
+                yield {"type": "sources", "sources": list(context.sources)}
+            try:
+                for event in self.ai_generator.generate_response_stream(
+                    query=prompt,
+                    conversation_history=history,
+                    tools=tools,
+                    tool_manager=self.tool_manager,
+                    context=context,
+                    retrieved=retrieved,
+                ):
+                    if event["type"] == "token":
+                        answer_parts.append(event["text"])
+                    yield event
+            except LLMUnavailableError as e:
+                if answer_parts:
+                    raise
+                print(f"Error generating response, answering without the model: {e}")
+                answer, sources = self._fallback_answer(
+                    query, retrieved, context.sources
+                )
+                yield {"type": "sources", "sources": sources}
+                yield {"type": "token", "text": answer}
+                return
+        finally:
+            self._record_query(route, context)
+        sources = context.sources
+
+        # Only a fully streamed answer becomes part of the conversation
+        answer = "".join(answer_parts)
+        if session_id:
+            self.session_manager.add_exchange(session_id, query, answer)
+
+        if use_cache and sources and not context.failed:
+            self.answer_cache.put(query, answer, sources, cache_generation)
+
+    def _record_query(self, route: str, context: ToolContext):
+        """Add one query's model calls and token counts to the routing stats"""
+        self.routing_stats.record(
+            route,
+            context.llm_calls,
+            prompt_tokens=context.prompt_tokens,
+            retrieved_tokens=context.retrieved_tokens,
+            packed_tokens=context.packed_tokens,
+        )
+
+    def _route(
+        self, query: str, history: Optional[str], context: ToolContext
+    ) -> Tuple[str, Optional[List[Dict[str, Any]]], Optional[str]]:
+        """
+        Decide how to answer a query, searching right away if that is the route.
+
+        Returns:
+            Tuple of (route kind, tool definitions to offer the model,
+            search results to send with the question)
+        """
+        tools = self.tool_manager.get_tool_definitions()
+        if self.query_router is None:
+            return QueryRouter.TOOLS, tools, None
+
+        route = self.query_router.route(query, history)
+        if route.kind == QueryRouter.DIRECT:
+            return route.kind, None, None
+        if route.kind == QueryRouter.RETRIEVE:
+            # The model may still search again if the results fall short
+            retrieved = self.tool_manager.execute_tool(
+                "search_course_content", context=context, query=query
+            )
+            return route.kind, tools, retrieved
+        return route.kind, tools, None
+
+    def search(
+        self,
+        query: str,
+        course_name: Optional[str] = None,
+        lesson_number: Optional[int] = None,
+        page: int = 1,
+        page_size: int = 10,
+    ) -> SearchPage:
+        """
+        Search course content without generating an answer.
+
+        Args:
+            query: What to search for in course content
+            course_name: Optional course name/title to filter by
+            lesson_number: Optional lesson number to filter by
+            page: Page to return, starting at 1
+            page_size: Results per page
+
+        Returns:
+            SearchPage of highlighted snippets with lesson links
+        """
+        return self.snippet_search.search(
+            query, course_name, lesson_number, page=page, page_size=page_size
+        )
+
+    def _fallback_answer(
+        self,
+        query: str,
+        retrieved: Optional[str] = None,
+        retrieved_sources: Optional[List[str]] = None,
+    ) -> Tuple[str, List[str]]:
+        """
+        Answer without the model, while it is failing or its circuit is open.
+
+        A cached answer to a similar question is preferred; otherwise the
+        search results are returned as they are, reusing those already
+        retrieved for the query if any. Neither is cached or added to the
+        conversation.
+        """
+        if self.answer_cache is not None:
+            cached = self.answer_cache.get(
+                query, similarity_threshold=self.config.LLM_FALLBACK_SIMILARITY
+            )
+            if cached:
+                return cached.answer, list(cached.sources)
+
+        if retrieved is not None:
+            return f"{self.FALLBACK_NOTICE}\n\n{retrieved}", list(retrieved_sources)
+
+        context = ToolContext()
+        results = self.tool_manager.execute_tool(
+            "search_course_content", context=context, query=query
+        )
+        return f"{self.FALLBACK_NOTICE}\n\n{results}", context.sources
+
+    def _invalidate_answer_cache(self):
+        """Drop cached answers after the course corpus has changed"""
+        if self.answer_cache is not None:
+            self.answer_cache.clear()
+
+    def shutdown(self):
+        """Persist in-memory caches before the process exits"""
+        self.vector_store.save_embedding_cache()
+        self.vector_store.save_lexical_index()
+        self.session_manager.close()
+        self.ai_generator.close()
+
     def get_course_analytics(self) -> Dict:
         """Get analytics about the course catalog"""
         return {
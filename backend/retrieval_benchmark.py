@@ -0,0 +1,406 @@
+"""
+Retrieval benchmark and recall harness over the docs corpus.
+
+Loads docs/course*_script.txt into a temporary Chroma path, optionally
+replicated to show how latency and quality scale, and runs a labelled query
+set through VectorStore.search, CourseSearchTool.execute and a stub LLM
+that calls the search tool. Reports p50/p95/p99 latency, QPS at several
+concurrency levels and recall@k/MRR as JSON.
+
+Runs offline by default with a hashing embedding; pass --embedding-model to
+use a SentenceTransformer model instead.
+
+Usage (from backend/):
+    uv run python retrieval_benchmark.py --scales 1,10,100 --output bench.json
+"""
+
+import argparse
+import json
+import re
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+from document_processor import DocumentProcessor
+from hash_embedding import HashEmbeddingFunction
+from models import Course, CourseChunk
+from search_tools import CourseSearchTool, ToolContext, ToolManager
+from vector_store import VectorStore
+
+DOCS_PATH = Path(__file__).parent.parent / "docs"
+
+# Copies made when scaling the corpus are distinct courses with this suffix
+_SYNTHETIC_SUFFIX = re.compile(r" \[synthetic \d+\]$")
+_SENTENCE_END = re.compile(r"(?<=[.!?])\s+")
+
+Corpus = List[Tuple[Course, List[CourseChunk]]]
+
+
+@dataclass
+class LabelledQuery:
+    """A query and the course lesson that answers it"""
+
+    query: str
+    course_title: str
+    lesson_number: Optional[int]
+    kind: str  # "lesson_title", "passage" or "custom"
+
+
+def base_title(course_title: str) -> str:
+    """Course title with any synthetic copy suffix removed"""
+    return _SYNTHETIC_SUFFIX.sub("", course_title)
+
+
+def load_corpus(
+    docs_path: Path = DOCS_PATH, chunk_size: int = 800, chunk_overlap: int = 100
+) -> Corpus:
+    """Parse and chunk every course script in a folder"""
+    processor = DocumentProcessor(chunk_size, chunk_overlap)
+    return [
+        processor.process_course_document(str(path))
+        for path in sorted(Path(docs_path).glob("course*_script.txt"))
+    ]
+
+
+def scale_corpus(corpus: Corpus, factor: int) -> Corpus:
+    """Replicate the corpus factor times, renaming the courses of each copy"""
+    scaled = list(corpus)
+    for copy in range(1, factor):
+        for course, chunks in corpus:
+            title = f"{course.title} [synthetic {copy}]"
+            scaled.append(
+                (
+                    course.model_copy(update={"title": title}),
+                    [
+                        chunk.model_copy(update={"course_title": title})
+                        for chunk in chunks
+                    ],
+                )
+            )
+    return scaled
+
+
+def build_queries(corpus: Corpus, passages_per_lesson: int = 1) -> List[LabelledQuery]:
+    """
+    Derive a labelled query set from the corpus itself.
+
+    Each lesson contributes its title as a topical query and a few sentences
+    from its chunks as known-item queries, labelled with that lesson.
+    """
+    queries = []
+    for course, chunks in corpus:
+        for lesson in course.lessons:
+            queries.append(
+                LabelledQuery(
+                    lesson.title, course.title, lesson.lesson_number, "lesson_title"
+                )
+            )
+
+            lesson_chunks = [
+                c for c in chunks if c.lesson_number == lesson.lesson_number
+            ]
+            step = max(1, len(lesson_chunks) // max(passages_per_lesson, 1))
+            for chunk in lesson_chunks[::step][:passages_per_lesson]:
+                sentences = [s for s in _SENTENCE_END.split(chunk.content) if s]
+                sentence = max(sentences, key=len)
+                queries.append(
+                    LabelledQuery(
+                        sentence, course.title, lesson.lesson_number, "passage"
+                    )
+                )
+    return queries
+
+
+def load_queries(path: str) -> List[LabelledQuery]:
+    """Read a labelled query set: [{"query", "course_title", "lesson_number"}]"""
+    with open(path, "r", encoding="utf-8") as file:
+        return [
+            LabelledQuery(
+                item["query"],
+                item["course_title"],
+                item.get("lesson_number"),
+                item.get("kind", "custom"),
+            )
+            for item in json.load(file)
+        ]
+
+
+def build_store(
+    chroma_path: str,
+    corpus: Corpus,
+    max_results: int,
+    search_mode: str,
+    embedding_model: Optional[str] = None,
+    batch_size: int = 256,
+) -> VectorStore:
+    """Index a corpus into a fresh vector store"""
+    store = VectorStore(
+        chroma_path,
+        embedding_model or "all-MiniLM-L6-v2",
+        max_results,
+        # No query cache, so repeated benchmark queries pay for their embedding
+        embedding_cache_size=0,
+        search_mode=search_mode,
+        embedding_function=None if embedding_model else HashEmbeddingFunction(),
+    )
+    for course, chunks in corpus:
+        store.add_course_metadata(course)
+        for start in range(0, len(chunks), batch_size):
+            store.add_course_content(chunks[start : start + batch_size])
+    return store
+
+
+class StubLLM:
+    """Stands in for AIGenerator: always calls the search tool, never the network"""
+
+    def generate_response(
+        self,
+        query: str,
+        conversation_history: Optional[str] = None,
+        tools: Optional[List] = None,
+        tool_manager=None,
+        context=None,
+    ) -> str:
+        return tool_manager.execute_tool(
+            "search_course_content", context=context, query=query
+        )
+
+
+def percentiles(samples: Sequence[float]) -> Dict[str, float]:
+    """p50/p95/p99 of latency samples in milliseconds (nearest rank)"""
+    ordered = sorted(samples)
+
+    def rank(p: float) -> float:
+        index = min(len(ordered) - 1, max(0, round(p / 100 * len(ordered)) - 1))
+        return round(ordered[index] * 1000, 3)
+
+    return {"p50_ms": rank(50), "p95_ms": rank(95), "p99_ms": rank(99)}
+
+
+def measure_latency(
+    run: Callable[[LabelledQuery], Any], queries: List[LabelledQuery], repeats: int
+) -> Dict[str, float]:
+    """Time each query sequentially"""
+    samples = []
+    for _ in range(repeats):
+        for query in queries:
+            started = time.perf_counter()
+            run(query)
+            samples.append(time.perf_counter() - started)
+    return percentiles(samples)
+
+
+def measure_qps(
+    run: Callable[[LabelledQuery], Any],
+    queries: List[LabelledQuery],
+    concurrency_levels: Sequence[int],
+) -> Dict[str, float]:
+    """Throughput with the query set spread across worker threads"""
+    qps = {}
+    for workers in concurrency_levels:
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            started = time.perf_counter()
+            list(executor.map(run, queries))
+            elapsed = time.perf_counter() - started
+        qps[str(workers)] = round(len(queries) / elapsed, 2)
+    return qps
+
+
+def measure_quality(
+    ranked_lessons: Callable[[LabelledQuery], List[Tuple[str, Optional[int]]]],
+    queries: List[LabelledQuery],
+    k_values: Sequence[int],
+) -> Dict[str, Any]:
+    """Recall@k and MRR against each query's labelled lesson"""
+    hits = {k: 0 for k in k_values}
+    reciprocal_ranks = 0.0
+    for query in queries:
+        target = (base_title(query.course_title), query.lesson_number)
+        lessons = [(base_title(title), n) for title, n in ranked_lessons(query)]
+        if target in lessons:
+            rank = lessons.index(target) + 1
+            reciprocal_ranks += 1.0 / rank
+            for k in k_values:
+                hits[k] += rank <= k
+
+    total = len(queries) or 1
+    return {
+        "recall_at_k": {str(k): round(hits[k] / total, 4) for k in k_values},
+        "mrr": round(reciprocal_ranks / total, 4),
+    }
+
+
+def _sources_to_lessons(sources: List[str]) -> List[Tuple[str, Optional[int]]]:
+    """Parse 'Course - Lesson N' source labels back into (title, lesson)"""
+    lessons = []
+    for source in sources:
+        title, _, lesson = source.rpartition(" - Lesson ")
+        lessons.append((title, int(lesson)) if title else (source, None))
+    return lessons
+
+
+def benchmark_targets(
+    store: VectorStore, modes: Sequence[str], limit: int
+) -> Dict[str, Tuple[Callable, Callable]]:
+    """(run, ranked lessons) callables for every benchmarked entry point"""
+    targets = {}
+    for mode in modes:
+
+        def search(query: LabelledQuery, mode: str = mode):
+            return store.search(query.query, limit=limit, mode=mode)
+
+        def search_lessons(query: LabelledQuery, search=search):
+            return [
+                (meta.get("course_title"), meta.get("lesson_number"))
+                for meta in search(query).metadata
+            ]
+
+        targets[f"vector_store.search[{mode}]"] = (search, search_lessons)
+
+    tool = CourseSearchTool(store)
+
+    def execute_tool(query: LabelledQuery):
+        return tool.execute(query=query.query)
+
+    def tool_lessons(query: LabelledQuery):
+        return _sources_to_lessons(tool.run(query=query.query).sources)
+
+    targets["search_tool.execute"] = (execute_tool, tool_lessons)
+
+    tool_manager = ToolManager()
+    tool_manager.register_tool(CourseSearchTool(store))
+    llm = StubLLM()
+    definitions = tool_manager.get_tool_definitions()
+
+    def ask(query: LabelledQuery):
+        return llm.generate_response(
+            query.query, tools=definitions, tool_manager=tool_manager
+        )
+
+    def ask_lessons(query: LabelledQuery):
+        context = ToolContext()
+        llm.generate_response(
+            query.query, tools=definitions, tool_manager=tool_manager, context=context
+        )
+        return _sources_to_lessons(context.sources)
+
+    targets["stub_llm.generate_response"] = (ask, ask_lessons)
+    return targets
+
+
+def run_benchmark(
+    docs_path: Path = DOCS_PATH,
+    scales: Sequence[int] = (1,),
+    k_values: Sequence[int] = (1, 3, 5),
+    concurrency_levels: Sequence[int] = (1, 4, 8),
+    modes: Sequence[str] = ("vector", "hybrid"),
+    embedding_model: Optional[str] = None,
+    queries: Optional[List[LabelledQuery]] = None,
+    passages_per_lesson: int = 1,
+    repeats: int = 1,
+) -> Dict[str, Any]:
+    """
+    Run the benchmark at every corpus scale.
+
+    Returns:
+        JSON-serialisable report with one entry per scale
+    """
+    corpus = load_corpus(docs_path)
+    if queries is None:
+        queries = build_queries(corpus, passages_per_lesson)
+    limit = max(k_values)
+
+    report: Dict[str, Any] = {
+        "config": {
+            "docs_path": str(docs_path),
+            "embedding": embedding_model or HashEmbeddingFunction.name(),
+            "k_values": list(k_values),
+            "concurrency_levels": list(concurrency_levels),
+            "modes": list(modes),
+            "queries": len(queries),
+            "query_kinds": sorted({query.kind for query in queries}),
+            "repeats": repeats,
+        },
+        "scales": [],
+    }
+
+    for scale in scales:
+        scaled = scale_corpus(corpus, scale)
+        with tempfile.TemporaryDirectory(ignore_cleanup_errors=True) as chroma_path:
+            started = time.perf_counter()
+            store = build_store(
+                chroma_path, scaled, limit, modes[0], embedding_model=embedding_model
+            )
+            ingest_seconds = time.perf_counter() - started
+
+            results = {}
+            for name, (run, ranked_lessons) in benchmark_targets(
+                store, modes, limit
+            ).items():
+                run(queries[0])  # Warm up lazily built indexes
+                results[name] = {
+                    "latency": measure_latency(run, queries, repeats),
+                    "qps": measure_qps(run, queries, concurrency_levels),
+                    **measure_quality(ranked_lessons, queries, k_values),
+                }
+
+            report["scales"].append(
+                {
+                    "scale": scale,
+                    "courses": len(scaled),
+                    "chunks": sum(len(chunks) for _, chunks in scaled),
+                    "ingest_seconds": round(ingest_seconds, 3),
+                    "targets": results,
+                }
+            )
+            del store
+
+    return report
+
+
+def _int_list(value: str) -> List[int]:
+    return [int(item) for item in value.split(",") if item]
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--docs", default=str(DOCS_PATH), help="Course scripts folder")
+    parser.add_argument("--scales", type=_int_list, default=[1], help="e.g. 1,10,100")
+    parser.add_argument("--k", type=_int_list, default=[1, 3, 5], help="Recall cutoffs")
+    parser.add_argument(
+        "--concurrency", type=_int_list, default=[1, 4, 8], help="QPS thread counts"
+    )
+    parser.add_argument(
+        "--modes", default="vector,hybrid", help="VectorStore search modes to compare"
+    )
+    parser.add_argument("--embedding-model", help="SentenceTransformer model name")
+    parser.add_argument("--queries", help="JSON file with a labelled query set")
+    parser.add_argument("--passages-per-lesson", type=int, default=1)
+    parser.add_argument("--repeats", type=int, default=1, help="Latency passes")
+    parser.add_argument("--output", help="Write the JSON report here")
+    args = parser.parse_args(argv)
+
+    report = run_benchmark(
+        docs_path=Path(args.docs),
+        scales=args.scales,
+        k_values=args.k,
+        concurrency_levels=args.concurrency,
+        modes=[mode for mode in args.modes.split(",") if mode],
+        embedding_model=args.embedding_model,
+        queries=load_queries(args.queries) if args.queries else None,
+        passages_per_lesson=args.passages_per_lesson,
+        repeats=args.repeats,
+    )
+
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as file:
+            file.write(output)
+    print(output)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,9 +1,53 @@
 from abc import ABC, abstractmethod
-from typing import Any, Dict, Optional, Protocol
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Protocol
 
+from context_packer import ContextPacker
 from vector_store import SearchResults, VectorStore
 
 
+@dataclass
+class ToolResult:
+    """Text for the model plus the sources it was built from"""
+
+    text: str
+    sources: List[str] = field(default_factory=list)
+    retrieved_tokens: int = 0  # Estimated tokens retrieved before packing
+    packed_tokens: int = 0  # Estimated tokens of text, for retrieval tools
+
+
+@dataclass
+class ToolRound:
+    """Timing and prompt size of one model call and the tools it requested"""
+
+    round: int
+    model_seconds: float
+    tool_seconds: float = 0.0
+    tools: List[str] = field(default_factory=list)  # Names, in call order
+    prompt_tokens: int = 0  # Estimated input tokens of the model call
+
+
+@dataclass
+class ToolContext:
+    """Sources, timings and token counts collected while answering one query"""
+
+    sources: List[str] = field(default_factory=list)
+    rounds: List[ToolRound] = field(default_factory=list)
+    retrieved_tokens: int = 0
+    packed_tokens: int = 0
+    failed: bool = False  # The answer is an error or refusal, not worth reusing
+
+    @property
+    def prompt_tokens(self) -> int:
+        """Estimated input tokens across all model calls"""
+        return sum(round_.prompt_tokens for round_ in self.rounds)
+
+    @property
+    def llm_calls(self) -> int:
+        """Model calls made, one per round"""
+        return len(self.rounds)
+
+
 class Tool(ABC):
     """Abstract base class for all tools"""
 
@@ -17,13 +61,20 @@ class Tool(ABC):
         """Execute the tool with given parameters"""
         pass
 
+    def run(self, **kwargs) -> ToolResult:
+        """Execute the tool, returning its sources alongside the text"""
+        return ToolResult(self.execute(**kwargs))
+
 
 class CourseSearchTool(Tool):
     """Tool for searching course content with semantic course name matching"""
 
-    def __init__(self, vector_store: VectorStore):
+    def __init__(
+        self, vector_store: VectorStore, packer: Optional[ContextPacker] = None
+    ):
         self.store = vector_store
-        self.last_sources = []  # Track sources from last search
+        # Keeps results within a token budget, merging overlapping chunks
+        self.packer = packer or ContextPacker()
 
     def get_tool_definition(self) -> Dict[str, Any]:
         """Return Anthropic tool definition for this tool"""
@@ -67,7 +118,17 @@ class CourseSearchTool(Tool):
         Returns:
             Formatted search results or error message
         """
+        return self.run(
+            query=query, course_name=course_name, lesson_number=lesson_number
+        ).text
 
+    def run(
+        self,
+        query: str,
+        course_name: Optional[str] = None,
+        lesson_number: Optional[int] = None,
+    ) -> ToolResult:
+        """Search, returning the formatted results and the sources they cite"""
         # Use the vector store's unified search interface
         results = self.store.search(
             query=query, course_name=course_name, lesson_number=lesson_number
@@ -75,7 +136,7 @@ class CourseSearchTool(Tool):
 
         # Handle errors
         if results.error:
-            return results.error
+            return ToolResult(results.error)
 
         # Handle empty results
         if results.is_empty():
@@ -84,38 +145,21 @@ class CourseSearchTool(Tool):
                 filter_info += f" in course '{course_name}'"
             if lesson_number:
                 filter_info += f" in lesson {lesson_number}"
-            return f"No relevant content found{filter_info}."
+            return ToolResult(f"No relevant content found{filter_info}.")
 
         # Format and return results
         return self._format_results(results)
 
-    def _format_results(self, results: SearchResults) -> str:
+    def _format_results(self, results: SearchResults) -> ToolResult:
         """Format search results with course and lesson context"""
-        formatted = []
-        sources = []  # Track sources for the UI
-
-        for doc, meta in zip(results.documents, results.metadata):
-            course_title = meta.get("course_title", "unknown")
-            lesson_num = meta.get("lesson_number")
-
-            # Build context header
-            header = f"[{course_title}"
-            if lesson_num is not None:
-                header += f" - Lesson {lesson_num}"
-            header += "]"
-
-            # Track source for the UI
-            source = course_title
-            if lesson_num is not None:
-                source += f" - Lesson {lesson_num}"
-            sources.append(source)
-
-            formatted.append(f"{header}\n{doc}")
-
-        # Store sources for retrieval
-        self.last_sources = sources
-
-        return "\n\n".join(formatted)
+        # Overlapping chunks are merged and the total kept within the budget
+        packed = self.packer.pack(results.documents, results.metadata)
+        return ToolResult(
+            packed.text,
+            packed.sources,
+            retrieved_tokens=packed.retrieved_tokens,
+            packed_tokens=packed.packed_tokens,
+        )
 
 
 class ToolManager:
@@ -136,23 +180,21 @@ class ToolManager:
         """Get all tool definitions for Anthropic tool calling"""
         return [tool.get_tool_definition() for tool in self.tools.values()]
 
-    def execute_tool(self, tool_name: str, **kwargs) -> str:
-        """Execute a tool by name with given parameters"""
+    def execute_tool(
+        self, tool_name: str, context: Optional[ToolContext] = None, **kwargs
+    ) -> str:
+        """
+        Execute a tool by name with given parameters.
+
+        Sources go to the caller's context rather than the shared tools, so
+        concurrent queries never see each other's sources.
+        """
         if tool_name not in self.tools:
             return f"Tool '{tool_name}' not found"
 
-        return self.tools[tool_name].execute(**kwargs)
-
-    def get_last_sources(self) -> list:
-        """Get sources from the last search operation"""
-        # Check all tools for last_sources attribute
-        for tool in self.tools.values():
-            if hasattr(tool, "last_sources") and tool.last_sources:
-                return tool.last_sources
-        return []
-
-    def reset_sources(self):
-        """Reset sources from all tools that track sources"""
-        for tool in self.tools.values():
-            if hasattr(tool, "last_sources"):
-                tool.last_sources = []
+        result = self.tools[tool_name].run(**kwargs)
+        if context is not None:
+            context.sources.extend(result.sources)
+            context.retrieved_tokens += result.retrieved_tokens
+            context.packed_tokens += result.packed_tokens
+        return result.text
@@ -1,8 +1,15 @@
-from dataclasses import dataclass
-from typing import Dict, List, Optional
+import json
+import sqlite3
+import threading
+import time
+import uuid
+from abc import ABC, abstractmethod
+from collections import OrderedDict, deque
+from dataclasses import dataclass, field
+from typing import Any, Callable, Deque, Dict, Iterable, List, Optional
 
 
-@dataclass
+@dataclass(slots=True)
 class Message:
     """Represents a single message in a conversation"""
 
@@ -10,57 +17,405 @@ class Message:
     content: str  # The message content
 
 
+def format_history(messages: Iterable[Message]) -> Optional[str]:
+    """Format messages for context, or None if there are none"""
+    history = "\n".join(f"{msg.role.title()}: {msg.content}" for msg in messages)
+    return history or None
+
+
+@dataclass(slots=True)
+class Session:
+    """Message history and activity time of one conversation"""
+
+    messages: Deque[Message]
+    last_active: float
+    history: Optional[str] = field(default=None)  # Formatted, until next append
+
+    def formatted_history(self) -> Optional[str]:
+        """History formatted for the prompt, built once per change"""
+        if self.history is None:
+            self.history = format_history(self.messages)
+        return self.history
+
+
+class SessionBackend(ABC):
+    """Abstract base class for where session histories are stored"""
+
+    @abstractmethod
+    def create(self, session_id: str):
+        """Start an empty session"""
+        pass
+
+    @abstractmethod
+    def append(self, session_id: str, messages: List[Message]):
+        """Atomically append messages, keeping only the most recent ones"""
+        pass
+
+    @abstractmethod
+    def history(self, session_id: str) -> Optional[str]:
+        """Formatted history of a live session, or None"""
+        pass
+
+    @abstractmethod
+    def clear(self, session_id: str):
+        """Remove all messages from a session"""
+        pass
+
+    def stats(self) -> Dict[str, Any]:
+        """Counts for monitoring"""
+        return {}
+
+    def close(self):
+        """Release connections held by the backend"""
+        pass
+
+
+class InMemorySessionBackend(SessionBackend):
+    """Sessions held by this process, for a single worker"""
+
+    def __init__(
+        self,
+        max_messages: int,
+        max_sessions: int = 10000,
+        ttl_seconds: float = 24 * 3600,
+        clock: Callable[[], float] = time.time,
+    ):
+        self.max_messages = max_messages
+        self.max_sessions = max_sessions
+        self.ttl_seconds = ttl_seconds
+        self.clock = clock
+        # Least recently active first
+        self.sessions: "OrderedDict[str, Session]" = OrderedDict()
+        self.evicted = 0  # Dropped to stay under max_sessions
+        self.expired = 0  # Dropped after ttl_seconds idle
+        self._lock = threading.Lock()
+
+    def create(self, session_id: str):
+        with self._lock:
+            self._store(session_id, self._new_session())
+
+    def append(self, session_id: str, messages: List[Message]):
+        with self._lock:
+            session = self._get(session_id)
+            if session is None:
+                session = self._new_session()
+
+            # The deque drops the oldest messages once history is full
+            session.messages.extend(messages)
+            session.history = None
+            self._store(session_id, session)
+
+    def history(self, session_id: str) -> Optional[str]:
+        with self._lock:
+            session = self._get(session_id)
+            return session.formatted_history() if session is not None else None
+
+    def clear(self, session_id: str):
+        with self._lock:
+            session = self._get(session_id)
+            if session is not None:
+                session.messages.clear()
+                session.history = None
+                self._store(session_id, session)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "backend": "memory",
+                "sessions": len(self.sessions),
+                "max_sessions": self.max_sessions,
+                "evicted": self.evicted,
+                "expired": self.expired,
+            }
+
+    def _new_session(self) -> Session:
+        return Session(deque(maxlen=self.max_messages), self.clock())
+
+    def _get(self, session_id: str) -> Optional[Session]:
+        """Look up a live session and mark it recently used"""
+        session = self.sessions.get(session_id)
+        if session is None:
+            return None
+        if self.clock() - session.last_active > self.ttl_seconds:
+            del self.sessions[session_id]
+            self.expired += 1
+            return None
+
+        # Reads count as activity, so expiry and eviction order agree
+        session.last_active = self.clock()
+        self.sessions.move_to_end(session_id)
+        return session
+
+    def _store(self, session_id: str, session: Session):
+        """Mark a session active and enforce the limits"""
+        session.last_active = self.clock()
+        self.sessions[session_id] = session
+        self.sessions.move_to_end(session_id)
+
+        idle_since = self.clock() - self.ttl_seconds
+        # Oldest first, so stop at the first session still in use
+        while self.sessions:
+            oldest = next(iter(self.sessions.values()))
+            if oldest.last_active >= idle_since:
+                break
+            self.sessions.popitem(last=False)
+            self.expired += 1
+
+        while len(self.sessions) > self.max_sessions:
+            self.sessions.popitem(last=False)
+            self.evicted += 1
+
+
+class SQLiteSessionBackend(SessionBackend):
+    """Sessions in a SQLite file shared by all workers on one host"""
+
+    def __init__(
+        self,
+        path: str,
+        max_messages: int,
+        ttl_seconds: float = 24 * 3600,
+        clock: Callable[[], float] = time.time,
+    ):
+        self.path = path
+        self.max_messages = max_messages
+        self.ttl_seconds = ttl_seconds
+        self.clock = clock
+        self._lock = threading.Lock()
+        # Autocommit, so appends can take the write lock before reading
+        self._connection = sqlite3.connect(
+            path, timeout=30, isolation_level=None, check_same_thread=False
+        )
+        self._connection.execute("PRAGMA journal_mode=WAL")
+        self._connection.execute("PRAGMA synchronous=NORMAL")
+        self._connection.execute("""
+            CREATE TABLE IF NOT EXISTS sessions (
+                id TEXT PRIMARY KEY,
+                last_active REAL NOT NULL,
+                messages TEXT NOT NULL
+            )
+            """)
+        self._connection.execute(
+            "CREATE INDEX IF NOT EXISTS sessions_last_active "
+            "ON sessions (last_active)"
+        )
+        self.expired = 0
+        self._delete_idle()
+
+    def create(self, session_id: str):
+        with self._lock:
+            self._delete_idle()
+            self._connection.execute(
+                "INSERT OR REPLACE INTO sessions VALUES (?, ?, '[]')",
+                (session_id, self.clock()),
+            )
+
+    def append(self, session_id: str, messages: List[Message]):
+        with self._lock:
+            # BEGIN IMMEDIATE serializes appends from every worker process
+            self._connection.execute("BEGIN IMMEDIATE")
+            try:
+                row = self._connection.execute(
+                    "SELECT messages FROM sessions WHERE id = ? AND last_active >= ?",
+                    (session_id, self._idle_since()),
+                ).fetchone()
+                stored = json.loads(row[0]) if row else []
+                stored.extend([msg.role, msg.content] for msg in messages)
+                # stored[-0:] would keep everything
+                stored = stored[-self.max_messages :] if self.max_messages > 0 else []
+                self._connection.execute(
+                    "INSERT OR REPLACE INTO sessions VALUES (?, ?, ?)",
+                    (
+                        session_id,
+                        self.clock(),
+                        json.dumps(stored),
+                    ),
+                )
+            except BaseException:
+                self._connection.execute("ROLLBACK")
+                raise
+            self._connection.execute("COMMIT")
+
+    def history(self, session_id: str) -> Optional[str]:
+        with self._lock:
+            row = self._connection.execute(
+                "SELECT messages FROM sessions WHERE id = ? AND last_active >= ?",
+                (session_id, self._idle_since()),
+            ).fetchone()
+        if row is None:
+            return None
+        return format_history(
+            Message(role, content) for role, content in json.loads(row[0])
+        )
+
+    def clear(self, session_id: str):
+        with self._lock:
+            self._connection.execute(
+                "UPDATE sessions SET messages = '[]', last_active = ? "
+                "WHERE id = ? AND last_active >= ?",
+                (self.clock(), session_id, self._idle_since()),
+            )
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            (count,) = self._connection.execute(
+                "SELECT COUNT(*) FROM sessions"
+            ).fetchone()
+        return {"backend": "sqlite", "sessions": count, "expired": self.expired}
+
+    def close(self):
+        with self._lock:
+            self._connection.close()
+
+    def _idle_since(self) -> float:
+        return self.clock() - self.ttl_seconds
+
+    def _delete_idle(self):
+        cursor = self._connection.execute(
+            "DELETE FROM sessions WHERE last_active < ?", (self._idle_since(),)
+        )
+        self.expired += cursor.rowcount
+
+
+class RedisSessionBackend(SessionBackend):
+    """Sessions in Redis (or a server speaking its protocol), shared by all hosts"""
+
+    def __init__(
+        self,
+        client: Any,
+        max_messages: int,
+        ttl_seconds: float = 24 * 3600,
+        key_prefix: str = "ragchatbot:session:",
+    ):
+        """
+        Args:
+            client: redis.Redis-compatible client
+            max_messages: Messages kept per session
+            ttl_seconds: Idle time after which Redis expires a session
+            key_prefix: Prepended to session ids to form list keys
+        """
+        self.client = client
+        self.max_messages = max_messages
+        self.ttl_seconds = ttl_seconds
+        self.key_prefix = key_prefix
+
+    @classmethod
+    def from_url(cls, url: str, max_messages: int, ttl_seconds: float = 24 * 3600):
+        """Connect to the server at a redis:// URL"""
+        try:
+            import redis
+        except ImportError as e:
+            raise RuntimeError(
+                "Redis sessions need redis-py (uv sync --extra redis)"
+            ) from e
+        return cls(redis.Redis.from_url(url), max_messages, ttl_seconds)
+
+    def create(self, session_id: str):
+        # An empty session needs no key; its list appears on first append
+        pass
+
+    def append(self, session_id: str, messages: List[Message]):
+        if self.max_messages <= 0:
+            # LTRIM key -0 -1 would keep the whole list
+            return
+        key = self.key_prefix + session_id
+        # MULTI/EXEC, so concurrent appends never interleave with the trim
+        pipeline = self.client.pipeline(transaction=True)
+        pipeline.rpush(key, *(json.dumps([m.role, m.content]) for m in messages))
+        pipeline.ltrim(key, -self.max_messages, -1)
+        pipeline.pexpire(key, int(self.ttl_seconds * 1000))
+        pipeline.execute()
+
+    def history(self, session_id: str) -> Optional[str]:
+        stored = self.client.lrange(self.key_prefix + session_id, 0, -1)
+        return format_history(Message(*json.loads(item)) for item in stored)
+
+    def clear(self, session_id: str):
+        self.client.delete(self.key_prefix + session_id)
+
+    def stats(self) -> Dict[str, Any]:
+        return {"backend": "redis"}
+
+    def close(self):
+        self.client.close()
+
+
 class SessionManager:
     """Manages conversation sessions and message history"""
 
-    def __init__(self, max_history: int = 5):
+    def __init__(
+        self,
+        max_history: int = 5,
+        max_sessions: int = 10000,
+        ttl_seconds: float = 24 * 3600,
+        db_path: Optional[str] = None,
+        redis_url: Optional[str] = None,
+        clock: Callable[[], float] = time.time,
+        backend: Optional[SessionBackend] = None,
+    ):
+        """
+        Args:
+            max_history: Exchanges kept per session (two messages each)
+            max_sessions: Sessions kept in memory before LRU eviction
+                (in-memory backend only)
+            ttl_seconds: Idle time after which a session expires
+            db_path: SQLite file shared by local workers, None to disable
+            redis_url: Redis server shared by all hosts, None to disable
+            clock: Wall-clock time source (persisted, so not monotonic)
+            backend: Storage to use instead of the one chosen from the
+                arguments above
+        """
         self.max_history = max_history
-        self.sessions: Dict[str, List[Message]] = {}
-        self.session_counter = 0
+        if backend is None:
+            max_messages = max_history * 2
+            if redis_url:
+                backend = RedisSessionBackend.from_url(
+                    redis_url, max_messages, ttl_seconds
+                )
+            elif db_path:
+                backend = SQLiteSessionBackend(
+                    db_path, max_messages, ttl_seconds, clock
+                )
+            else:
+                backend = InMemorySessionBackend(
+                    max_messages, max_sessions, ttl_seconds, clock
+                )
+        self.backend = backend
 
     def create_session(self) -> str:
         """Create a new conversation session"""
-        self.session_counter += 1
-        session_id = f"session_{self.session_counter}"
-        self.sessions[session_id] = []
+        # Random ids, so workers sharing a backend never collide
+        session_id = f"session_{uuid.uuid4().hex}"
+        self.backend.create(session_id)
         return session_id
 
     def add_message(self, session_id: str, role: str, content: str):
         """Add a message to the conversation history"""
-        if session_id not in self.sessions:
-            self.sessions[session_id] = []
-
-        message = Message(role=role, content=content)
-        self.sessions[session_id].append(message)
-
-        # Keep conversation history within limits
-        if len(self.sessions[session_id]) > self.max_history * 2:
-            self.sessions[session_id] = self.sessions[session_id][
-                -self.max_history * 2 :
-            ]
+        self.backend.append(session_id, [Message(role=role, content=content)])
 
     def add_exchange(self, session_id: str, user_message: str, assistant_message: str):
         """Add a complete question-answer exchange"""
-        self.add_message(session_id, "user", user_message)
-        self.add_message(session_id, "assistant", assistant_message)
+        self.backend.append(
+            session_id,
+            [
+                Message(role="user", content=user_message),
+                Message(role="assistant", content=assistant_message),
+            ],
+        )
 
     def get_conversation_history(self, session_id: Optional[str]) -> Optional[str]:
         """Get formatted conversation history for a session"""
-        if not session_id or session_id not in self.sessions:
-            return None
-
-        messages = self.sessions[session_id]
-        if not messages:
+        if not session_id:
             return None
-
-        # Format messages for context
-        formatted_messages = []
-        for msg in messages:
-            formatted_messages.append(f"{msg.role.title()}: {msg.content}")
-
-        return "\n".join(formatted_messages)
+        return self.backend.history(session_id)
 
     def clear_session(self, session_id: str):
         """Clear all messages from a session"""
-        if session_id in self.sessions:
-            self.sessions[session_id] = []
+        self.backend.clear(session_id)
+
+    def stats(self) -> Dict[str, Any]:
+        """Session counts for monitoring"""
+        return self.backend.stats()
+
+    def close(self):
+        """Close the session backend's connections"""
+        self.backend.close()
@@ -0,0 +1,199 @@
+import re
+import time
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Tuple
+
+from context_packer import strip_lesson_prefix
+from lexical_index import tokenize
+from vector_store import VectorStore
+
+_WORD = re.compile(r"\w+")
+_ELLIPSIS = "..."
+
+
+@dataclass
+class Snippet:
+    """Excerpt of a chunk with the positions of the query's terms"""
+
+    text: str
+    highlights: List[Tuple[int, int]] = field(default_factory=list)  # [start, end)
+
+
+@dataclass
+class SearchHit:
+    """One ranked search result, ready to show without an answer"""
+
+    course_title: str
+    lesson_number: Optional[int]
+    link: Optional[str]  # Lesson link, or the course link for course-level chunks
+    snippet: str
+    highlights: List[Tuple[int, int]]
+
+
+@dataclass
+class SearchPage:
+    """One page of ranked search results"""
+
+    hits: List[SearchHit]
+    page: int
+    page_size: int
+    has_more: bool
+    error: Optional[str] = None
+    took_ms: float = 0.0
+
+
+def make_snippet(text: str, query: str, max_chars: int = 240) -> Snippet:
+    """
+    Cut the part of text holding the most query terms and mark where they are.
+
+    Terms are matched as whole words, ignoring case and stopwords. The
+    excerpt starts and ends on word boundaries and is marked with "..."
+    where text was cut.
+
+    Args:
+        text: Chunk text
+        query: The user's search
+        max_chars: Longest excerpt, not counting the "..." markers
+
+    Returns:
+        Snippet whose highlights are offsets into its own text
+    """
+    terms = set(tokenize(query))
+    matches = [m for m in _WORD.finditer(text) if m.group().lower() in terms]
+
+    start, end = 0, len(text)
+    if len(text) > max_chars:
+        # Window holding the most matches, with some text before the first
+        best_start, best_count, last = 0, 0, 0
+        for first, match in enumerate(matches):
+            last = max(last, first)
+            while (
+                last < len(matches) and matches[last].end() - match.start() <= max_chars
+            ):
+                last += 1
+            if last - first > best_count:
+                best_start, best_count = match.start(), last - first
+        if best_count:
+            start = max(0, best_start - max_chars // 4)
+            if start and not text[start - 1].isspace():
+                space = text.find(" ", start, best_start)
+                start = space + 1 if space != -1 else best_start
+        end = min(len(text), start + max_chars)
+        if end < len(text):
+            space = text.rfind(" ", start, end + 1)
+            if space > start:
+                end = space
+
+    body = text[start:end].rstrip()
+    prefix = _ELLIPSIS if start else ""
+    suffix = _ELLIPSIS if start + len(body) < len(text) else ""
+    highlights = [
+        (m.start() - start + len(prefix), m.end() - start + len(prefix))
+        for m in matches
+        if m.start() >= start and m.end() <= start + len(body)
+    ]
+    return Snippet(prefix + body + suffix, highlights)
+
+
+class SnippetSearch:
+    """Ranked, highlighted course snippets from the vector store, without the LLM"""
+
+    def __init__(
+        self,
+        vector_store: VectorStore,
+        max_results: int = 100,
+        snippet_chars: int = 240,
+    ):
+        """
+        Args:
+            vector_store: Store searched with its configured search mode
+            max_results: Deepest result reachable by paging
+            snippet_chars: Longest snippet per result
+        """
+        self.store = vector_store
+        self.max_results = max_results
+        self.snippet_chars = snippet_chars
+
+    def search(
+        self,
+        query: str,
+        course_name: Optional[str] = None,
+        lesson_number: Optional[int] = None,
+        page: int = 1,
+        page_size: int = 10,
+    ) -> SearchPage:
+        """
+        Search course content and return one page of snippets.
+
+        Args:
+            query: What to search for in course content
+            course_name: Optional course name/title to filter by
+            lesson_number: Optional lesson number to filter by
+            page: Page to return, starting at 1
+            page_size: Results per page
+
+        Returns:
+            SearchPage; its error is set when the course is not found or the
+            search failed
+        """
+        started = time.perf_counter()
+        offset = (page - 1) * page_size
+        hits: List[SearchHit] = []
+        has_more = False
+        error = None
+        if offset < self.max_results:
+            # One result past the page tells whether another page follows
+            limit = min(offset + page_size + 1, self.max_results)
+            results = self.store.search(
+                query,
+                course_name=course_name,
+                lesson_number=lesson_number,
+                limit=limit,
+            )
+            error = results.error
+            has_more = len(results.documents) > offset + page_size
+            links: Dict[Tuple[str, Optional[int]], Optional[str]] = {}
+            for document, meta in zip(
+                results.documents[offset : offset + page_size],
+                results.metadata[offset : offset + page_size],
+            ):
+                course_title = meta.get("course_title", "unknown")
+                lesson = meta.get("lesson_number")
+                snippet = make_snippet(
+                    strip_lesson_prefix(document, course_title, lesson),
+                    query,
+                    self.snippet_chars,
+                )
+                hits.append(
+                    SearchHit(
+                        course_title=course_title,
+                        lesson_number=lesson,
+                        link=self._link(links, course_title, lesson),
+                        snippet=snippet.text,
+                        highlights=snippet.highlights,
+                    )
+                )
+
+        return SearchPage(
+            hits=hits,
+            page=page,
+            page_size=page_size,
+            has_more=has_more,
+            error=error,
+            took_ms=(time.perf_counter() - started) * 1000,
+        )
+
+    def _link(
+        self,
+        links: Dict[Tuple[str, Optional[int]], Optional[str]],
+        course_title: str,
+        lesson_number: Optional[int],
+    ) -> Optional[str]:
+        """Link for a result, looked up once per lesson on the page"""
+        key = (course_title, lesson_number)
+        if key not in links:
+            if lesson_number is None:
+                links[key] = self.store.get_course_link(course_title)
+            else:
+                links[key] = self.store.get_lesson_link(course_title, lesson_number)
+        return links[key]
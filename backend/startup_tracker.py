@@ -0,0 +1,127 @@
+import threading
+import time
+from typing import Any, Dict, Optional
+
+
+class StartupTracker:
+    """Tracks background startup so liveness and readiness can be reported"""
+
+    STARTING = "starting"
+    LOADING_MODEL = "loading_model"
+    INGESTING = "ingesting"
+    READY = "ready"
+    FAILED = "failed"
+
+    def __init__(self, started_at: Optional[float] = None):
+        # Monotonic reference point, normally taken when the app module loads
+        self.started_at = time.perf_counter() if started_at is None else started_at
+        self._lock = threading.Lock()
+        self._phase = self.STARTING
+        self._serving = False  # Queries can be answered from the persisted index
+        self._error: Optional[str] = None
+        self._files_done = 0
+        self._files_total = 0
+        self._listening_at: Optional[float] = None
+        self._serving_at: Optional[float] = None
+        self._ready_at: Optional[float] = None
+        self._finished = threading.Event()
+
+    @property
+    def phase(self) -> str:
+        with self._lock:
+            return self._phase
+
+    @property
+    def is_alive(self) -> bool:
+        """Whether the process can still become ready without a restart"""
+        with self._lock:
+            return self._phase != self.FAILED
+
+    @property
+    def is_serving(self) -> bool:
+        """Whether queries can be answered, possibly while ingestion runs"""
+        with self._lock:
+            return self._serving
+
+    def mark_listening(self):
+        """Record that the server is about to accept connections"""
+        with self._lock:
+            self._listening_at = time.perf_counter()
+
+    def set_phase(self, phase: str):
+        with self._lock:
+            self._phase = phase
+
+    def mark_serving(self):
+        """Record that queries can now be answered"""
+        with self._lock:
+            if not self._serving:
+                self._serving = True
+                self._serving_at = time.perf_counter()
+
+    def update_progress(self, files_done: int, files_total: int):
+        """Record how many course files ingestion has gone through"""
+        with self._lock:
+            self._files_done = files_done
+            self._files_total = files_total
+
+    def mark_ready(self, error: Optional[str] = None):
+        """
+        Record that startup has finished.
+
+        An ingestion error leaves the persisted index in service, so it is
+        reported but does not stop the process from being ready.
+        """
+        with self._lock:
+            self._phase = self.READY
+            self._serving = True
+            self._error = error
+            now = time.perf_counter()
+            self._serving_at = self._serving_at or now
+            self._ready_at = now
+        self._finished.set()
+
+    def mark_failed(self, error: str):
+        """Record that startup failed and queries cannot be served"""
+        with self._lock:
+            self._phase = self.FAILED
+            self._serving = False
+            self._error = error
+        self._finished.set()
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        """Block until startup has finished, returning False on timeout"""
+        return self._finished.wait(timeout)
+
+    def _elapsed(self, moment: Optional[float]) -> Optional[float]:
+        """Seconds from process start to a recorded moment"""
+        if moment is None:
+            return None
+        return round(moment - self.started_at, 3)
+
+    def get_status(self) -> Dict[str, Any]:
+        """Get the current phase, ingestion progress and startup timings"""
+        with self._lock:
+            return {
+                "phase": self._phase,
+                "serving": self._serving,
+                "error": self._error,
+                "ingestion": {
+                    "files_done": self._files_done,
+                    "files_total": self._files_total,
+                },
+                "timings": {
+                    "time_to_listening_seconds": self._elapsed(self._listening_at),
+                    "time_to_serving_seconds": self._elapsed(self._serving_at),
+                    "time_to_ready_seconds": self._elapsed(self._ready_at),
+                },
+            }
+
+    def summary(self) -> str:
+        """One-line startup timing report for the log"""
+        timings = self.get_status()["timings"]
+        return (
+            f"Startup: listening after {timings['time_to_listening_seconds']}s, "
+            f"serving after {timings['time_to_serving_seconds']}s, "
+            f"ready after {timings['time_to_ready_seconds']}s"
+        )
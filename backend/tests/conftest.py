@@ -7,9 +7,22 @@ from pathlib import Path
 # Add backend directory to Python path
 sys.path.insert(0, str(Path(__file__).parent.parent))
 
+import fakeredis
 from fastapi.testclient import TestClient
+from hash_embedding import HashEmbeddingFunction
 from rag_system import RAGSystem
 from config import Config
+from document_processor import DocumentProcessor
+from session_manager import (
+    InMemorySessionBackend,
+    RedisSessionBackend,
+    SessionManager,
+    SQLiteSessionBackend,
+)
+from snippet_search import SnippetSearch
+from vector_store import VectorStore
+
+DOCS_PATH = Path(__file__).parent.parent.parent / "docs"
 
 
 @pytest.fixture
@@ -61,6 +74,7 @@ def test_client(mock_rag_system):
     from fastapi.middleware.cors import CORSMiddleware
     from fastapi.middleware.trustedhost import TrustedHostMiddleware
     from app import QueryRequest, QueryResponse, CourseStats
+    from query_executor import QueryExecutor, QueryQueueFullError
     
     # Create a test app without static file mounting
     test_app = FastAPI(title="Course Materials RAG System", root_path="")
@@ -80,6 +94,8 @@ def test_client(mock_rag_system):
         expose_headers=["*"],
     )
     
+    query_executor = QueryExecutor(max_workers=2, max_queued=2)
+
     # Add API endpoints without importing the full app
     @test_app.post("/api/query", response_model=QueryResponse)
     async def query_documents(request: QueryRequest):
@@ -88,13 +104,18 @@ def test_client(mock_rag_system):
             if not session_id:
                 session_id = mock_rag_system.session_manager.create_session()
             
-            answer, sources = mock_rag_system.query(request.query, session_id)
+            answer, sources = await query_executor.run(
+                mock_rag_system.query, request.query, session_id
+            )
             
             return QueryResponse(
                 answer=answer,
                 sources=sources,
                 session_id=session_id
             )
+        except QueryQueueFullError as e:
+            from fastapi import HTTPException
+            raise HTTPException(status_code=429, detail=str(e))
         except Exception as e:
             from fastapi import HTTPException
             raise HTTPException(status_code=500, detail=str(e))
@@ -112,6 +133,7 @@ def test_client(mock_rag_system):
             raise HTTPException(status_code=500, detail=str(e))
     
     yield TestClient(test_app)
+    query_executor.shutdown()
 
 
 @pytest.fixture
@@ -203,4 +225,111 @@ def cleanup_test_environment():
     # Clean up any test artifacts
     if os.path.exists("test_chroma_db"):
         import shutil
-        shutil.rmtree("test_chroma_db", ignore_errors=True)
\ No newline at end of file
+        shutil.rmtree("test_chroma_db", ignore_errors=True)
+
+
+@pytest.fixture
+def app_module(mock_rag_system):
+    """The real app module rebuilt around the mocked RAG system"""
+    import importlib
+
+    # Reload while RAGSystem is patched so the app is built around the mock
+    with patch('fastapi.staticfiles.StaticFiles'):
+        import app as app_module
+
+        importlib.reload(app_module)
+
+    # The real RAG system is loaded by the startup thread, which is not run here
+    app_module.rag_system = mock_rag_system
+    yield app_module
+    app_module.query_executor.shutdown()
+
+
+@pytest.fixture
+async def async_client(app_module):
+    """Async HTTP client for the real app, able to issue concurrent requests"""
+    import httpx
+
+    transport = httpx.ASGITransport(app=app_module.app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+        yield client
+
+
+@pytest.fixture
+def rag_with_mocked_backends(tmp_path):
+    """A real RAGSystem whose vector store and Gemini client are mocks"""
+    with patch('rag_system.VectorStore'), patch('rag_system.AIGenerator'):
+        rag = RAGSystem(Config(CHROMA_PATH=str(tmp_path / "chroma")))
+    yield rag
+
+
+@pytest.fixture
+def hash_embedding_function():
+    """Offline stand-in for the SentenceTransformer embedding function"""
+    return HashEmbeddingFunction()
+
+
+@pytest.fixture
+def vector_store(tmp_path, hash_embedding_function):
+    """A real VectorStore on a temporary Chroma path with offline embeddings"""
+    with patch(
+        'chromadb.utils.embedding_functions.SentenceTransformerEmbeddingFunction',
+        return_value=hash_embedding_function,
+    ):
+        store = VectorStore(str(tmp_path / "chroma"), "all-MiniLM-L6-v2", max_results=5)
+    yield store
+
+
+@pytest.fixture
+def worker_factory(request, tmp_path):
+    """Build SessionManagers that share one backend, like separate workers"""
+    kind = request.param
+    if kind == "redis":
+        server = fakeredis.FakeServer()
+    shared = {}
+
+    def make(max_history: int = 2) -> SessionManager:
+        if kind == "memory":
+            # One process only, so "workers" share the same backend object
+            backend = shared.setdefault(
+                "memory", InMemorySessionBackend(max_history * 2)
+            )
+            return SessionManager(max_history, backend=backend)
+        if kind == "sqlite":
+            backend = SQLiteSessionBackend(
+                str(tmp_path / "sessions.db"), max_history * 2
+            )
+        else:
+            backend = RedisSessionBackend(
+                fakeredis.FakeRedis(server=server), max_history * 2
+            )
+        return SessionManager(max_history, backend=backend)
+
+    return make
+
+
+@pytest.fixture
+def fake_gemini():
+    """Local Gemini REST server with scripted latency and errors"""
+    from tests.test_llm_client import FakeGeminiServer
+
+    server = FakeGeminiServer()
+    yield server
+    server.close()
+
+
+@pytest.fixture
+def course_store(vector_store):
+    """A VectorStore holding the first two course scripts"""
+    processor = DocumentProcessor(800, 100)
+    for name in ("course1_script.txt", "course2_script.txt"):
+        course, chunks = processor.process_course_document(str(DOCS_PATH / name))
+        vector_store.add_course_metadata(course)
+        vector_store.add_course_content(chunks)
+    return vector_store
+
+
+@pytest.fixture
+def snippet_search(course_store):
+    """SnippetSearch over the first two course scripts"""
+    return SnippetSearch(course_store, max_results=30)
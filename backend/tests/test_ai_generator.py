@@ -0,0 +1,282 @@
+import threading
+from types import SimpleNamespace
+from unittest.mock import Mock, patch
+
+import google.generativeai as genai
+import pytest
+from google.generativeai import protos
+
+from ai_generator import AIGenerator
+from context_packer import estimate_tokens
+from search_tools import ToolContext
+
+SEARCH_TOOL = {
+    "name": "search_course_content",
+    "description": "Search course materials",
+    "input_schema": {"type": "object", "properties": {}},
+}
+
+
+def make_response(parts, finish_reason=1):
+    """Build a Gemini-like response holding the given parts"""
+    candidate = SimpleNamespace(
+        content=SimpleNamespace(parts=parts), finish_reason=finish_reason
+    )
+    return SimpleNamespace(candidates=[candidate])
+
+
+def call(query):
+    """Function call part searching for query"""
+    function_call = SimpleNamespace(name="search_course_content", args={"query": query})
+    return SimpleNamespace(function_call=function_call)
+
+
+@pytest.fixture
+def generator():
+    generator = AIGenerator(api_key="test_key", model="gemini-2.5-flash")
+    generator.model = Mock()
+    return generator
+
+
+@pytest.fixture
+def tool_manager():
+    """Tool manager whose searches return the query and cite it as a source"""
+    manager = Mock()
+
+    def execute_tool(name, context=None, query=""):
+        context.sources.append(query)
+        return f"results for {query}"
+
+    manager.execute_tool.side_effect = execute_tool
+    return manager
+
+
+class TestToolRounds:
+    """Test the bounded, parallel tool-calling loop of generate_response"""
+
+    def test_second_round_after_first_results(self, generator, tool_manager):
+        """Test the model can search again after seeing the first results"""
+        generator.model.generate_content.side_effect = [
+            make_response([call("MCP")]),
+            make_response([call("Chroma")]),
+            make_response([SimpleNamespace(text="MCP and Chroma compared.")]),
+        ]
+        context = ToolContext()
+
+        answer = generator.generate_response(
+            "Compare", tools=[SEARCH_TOOL], tool_manager=tool_manager, context=context
+        )
+
+        assert answer == "MCP and Chroma compared."
+        assert context.sources == ["MCP", "Chroma"]
+        contents = generator.model.generate_content.call_args_list[2].args[0]
+        assert [turn["role"] for turn in contents[::2]] == ["user"] * 3
+        assert contents[-1]["parts"] == [
+            {
+                "function_response": {
+                    "name": "search_course_content",
+                    "response": {"result": "results for Chroma"},
+                }
+            }
+        ]
+        assert [r.round for r in context.rounds] == [1, 2, 3]
+        assert all(r.model_seconds >= 0 for r in context.rounds)
+        # Each round's prompt grows by the tool results sent back
+        first, second, third = (r.prompt_tokens for r in context.rounds)
+        assert first == estimate_tokens(generator.SYSTEM_PROMPT) + estimate_tokens(
+            generator._build_prompt("Compare", None)
+        )
+        assert second == first + estimate_tokens("results for MCP")
+        assert third == second + estimate_tokens("results for Chroma")
+        assert context.prompt_tokens == first + second + third
+
+    def test_calls_in_one_turn_run_concurrently(self, generator):
+        """Test several calls from one turn execute at the same time"""
+        generator.model.generate_content.side_effect = [
+            make_response([call("A"), call("B"), call("C")]),
+            make_response([SimpleNamespace(text="Done")]),
+        ]
+        barrier = threading.Barrier(3, timeout=5)
+        manager = Mock()
+
+        def execute_tool(name, context=None, query=""):
+            barrier.wait()  # Only passes if all three run at once
+            context.sources.append(query)
+            return query
+
+        manager.execute_tool.side_effect = execute_tool
+        context = ToolContext()
+
+        answer = generator.generate_response(
+            "Q", tools=[SEARCH_TOOL], tool_manager=manager, context=context
+        )
+
+        assert answer == "Done"
+        assert context.sources == ["A", "B", "C"]  # Call order, not finish order
+        responses = generator.model.generate_content.call_args_list[1].args[0][-1]
+        assert [
+            p["function_response"]["response"]["result"] for p in responses["parts"]
+        ] == [
+            "A",
+            "B",
+            "C",
+        ]
+        assert context.rounds[0].tools == ["search_course_content"] * 3
+
+    def test_rounds_are_bounded(self, generator, tool_manager):
+        """Test the model must answer once max_tool_rounds is used up"""
+        generator.max_tool_rounds = 2
+        generator.model.generate_content.side_effect = [
+            make_response([call("one")]),
+            make_response([call("two")]),
+            make_response([SimpleNamespace(text="Answer")]),
+        ]
+
+        answer = generator.generate_response(
+            "Q", tools=[SEARCH_TOOL], tool_manager=tool_manager
+        )
+
+        assert answer == "Answer"
+        calls = generator.model.generate_content.call_args_list
+        assert "tool_config" not in calls[1].kwargs
+        assert calls[2].kwargs["tool_config"] == {
+            "function_calling_config": {"mode": "NONE"}
+        }
+        assert tool_manager.execute_tool.call_count == 2
+
+    def test_tool_errors_are_sent_to_the_model(self, generator):
+        """Test a failing tool call becomes that call's result"""
+        generator.model.generate_content.side_effect = [
+            make_response([call("MCP")]),
+            make_response([SimpleNamespace(text="Sorry")]),
+        ]
+        manager = Mock()
+        manager.execute_tool.side_effect = RuntimeError("store offline")
+
+        answer = generator.generate_response(
+            "Q", tools=[SEARCH_TOOL], tool_manager=manager
+        )
+
+        assert answer == "Sorry"
+        contents = generator.model.generate_content.call_args_list[1].args[0]
+        result = contents[-1]["parts"][0]["function_response"]["response"]["result"]
+        assert result == "Error executing search_course_content: store offline"
+
+    def test_answer_without_tools(self, generator):
+        """Test a plain question is answered in a single call"""
+        generator.model.generate_content.return_value = make_response(
+            [SimpleNamespace(text="Hello")]
+        )
+        context = ToolContext()
+
+        answer = generator.generate_response("hi", context=context)
+
+        assert answer == "Hello"
+        assert "tools" not in generator.model.generate_content.call_args.kwargs
+        assert len(context.rounds) == 1 and context.rounds[0].tools == []
+        assert not context.failed
+
+    def test_blocked_answer_is_flagged(self, generator):
+        """Test a safety-blocked response marks the answer as failed"""
+        generator.model.generate_content.return_value = make_response(
+            [], finish_reason=2
+        )
+        context = ToolContext()
+
+        answer = generator.generate_response("hi", context=context)
+
+        assert answer.startswith("I'm having trouble processing")
+        assert context.failed
+
+
+class StubClient:
+    """Stands in for the Gemini transport, recording the size of each request"""
+
+    def __init__(self):
+        self.request_bytes = []
+
+    def generate_content(self, request, **kwargs):
+        self.request_bytes.append(len(type(request).serialize(request)))
+        return protos.GenerateContentResponse(
+            candidates=[
+                protos.Candidate(
+                    content=protos.Content(
+                        role="model", parts=[protos.Part(text="Answer")]
+                    ),
+                    finish_reason=protos.Candidate.FinishReason.STOP,
+                )
+            ]
+        )
+
+
+class TestRequestSize:
+    """Test bytes sent per request with the static prompt moved out of it"""
+
+    def test_bytes_sent_per_request(self):
+        """Test request bytes with inline prompt, system_instruction and cache"""
+        generator = AIGenerator(api_key="test_key", model="gemini-2.5-flash")
+        stub = StubClient()
+        question = "What is covered in lesson 2 of the MCP course?"
+
+        # Before: system prompt inlined into the request
+        legacy_model = genai.GenerativeModel("gemini-2.5-flash")
+        legacy_model._client = stub
+        legacy_model.generate_content(
+            generator.SYSTEM_PROMPT + "\n\n" + generator._build_prompt(question, None),
+            generation_config=generator.generation_config,
+            safety_settings=generator.safety_settings,
+            tools=generator._convert_tools_to_gemini_format([SEARCH_TOOL]),
+        )
+        inline_bytes = stub.request_bytes[-1]
+
+        # After: system_instruction and tool declarations built once
+        generator.model._client = stub
+        answer = generator.generate_response(
+            question, tools=[SEARCH_TOOL], tool_manager=Mock()
+        )
+        instruction_bytes = stub.request_bytes[-1]
+        assert answer == "Answer"
+
+        # Cached: the request only names the cached prefix
+        cache = SimpleNamespace(
+            name="cachedContents/course-assistant", model="models/gemini-2.5-flash"
+        )
+        with patch.object(genai.caching.CachedContent, "create", return_value=cache):
+            assert generator.enable_context_cache([SEARCH_TOOL])
+        generator._cached_model._client = stub
+        generator.generate_response(question, tools=[SEARCH_TOOL], tool_manager=Mock())
+        cached_bytes = stub.request_bytes[-1]
+
+        # The prompt moves to its own field, so only the cache shrinks requests
+        assert abs(instruction_bytes - inline_bytes) < 64
+        assert cached_bytes < instruction_bytes / 4
+
+    def test_final_round_bypasses_cache(self):
+        """Test the no-more-tools round uses the plain model with a tool config"""
+        generator = AIGenerator(api_key="test_key", model="gemini-2.5-flash")
+        generator.max_tool_rounds = 0
+        stub = StubClient()
+        generator.model._client = stub
+        cache = SimpleNamespace(
+            name="cachedContents/course-assistant", model="models/gemini-2.5-flash"
+        )
+        with patch.object(genai.caching.CachedContent, "create", return_value=cache):
+            generator.enable_context_cache([SEARCH_TOOL])
+        generator._cached_model = Mock()
+
+        assert generator.generate_response("Q", tools=[SEARCH_TOOL]) == "Answer"
+        generator._cached_model.generate_content.assert_not_called()
+        assert len(stub.request_bytes) == 1
+
+    def test_cache_failure_falls_back(self):
+        """Test requests still work when Gemini refuses to cache the prefix"""
+        generator = AIGenerator(api_key="test_key", model="gemini-2.5-flash")
+        generator.model._client = StubClient()
+        with patch.object(
+            genai.caching.CachedContent,
+            "create",
+            side_effect=RuntimeError("Cached content is too small"),
+        ):
+            assert not generator.enable_context_cache([SEARCH_TOOL])
+
+        assert generator.generate_response("Q", tools=[SEARCH_TOOL]) == "Answer"
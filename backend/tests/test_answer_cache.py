@@ -0,0 +1,206 @@
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+
+from ai_generator import AIGenerator
+from answer_cache import SemanticAnswerCache
+from tests.test_query_router import make_response
+from vector_store import SearchResults
+
+# Hand-picked unit vectors: paraphrases sit close together, topics far apart
+EMBEDDINGS = {
+    "What is MCP?": [1.0, 0.0, 0.0],
+    "what's MCP": [0.98, 0.2, 0.0],
+    "What is lesson 2 about?": [0.0, 1.0, 0.0],
+    "What is lesson 3 about?": [0.0, 1.0, 0.0],
+    "How does retrieval work?": [0.0, 0.0, 1.0],
+}
+
+
+def fake_embed(text):
+    return np.array(EMBEDDINGS[text], dtype=np.float32)
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock():
+    return FakeClock()
+
+
+@pytest.fixture
+def cache(clock):
+    return SemanticAnswerCache(
+        fake_embed,
+        max_entries=2,
+        ttl_seconds=60,
+        similarity_threshold=0.9,
+        clock=clock,
+    )
+
+
+class TestSemanticAnswerCache:
+    """Test cases for the embedding-keyed answer cache"""
+
+    def test_paraphrase_hits(self, cache):
+        """Test a similar query returns the cached answer and sources"""
+        cache.put("What is MCP?", "MCP is a protocol", ["MCP - Lesson 1"])
+
+        cached = cache.get("what's MCP")
+
+        assert cached.answer == "MCP is a protocol"
+        assert cached.sources == ["MCP - Lesson 1"]
+        assert cache.get_stats()["hits"] == 1
+
+    def test_unrelated_query_misses(self, cache):
+        """Test a dissimilar query is a miss"""
+        cache.put("What is MCP?", "MCP is a protocol", ["MCP - Lesson 1"])
+
+        assert cache.get("How does retrieval work?") is None
+        assert cache.get_stats() == {
+            "entries": 1,
+            "hits": 0,
+            "misses": 1,
+            "hit_rate": 0.0,
+        }
+
+    def test_different_numbers_never_match(self, cache):
+        """Test queries differing only in numbers are not treated as equal"""
+        cache.put("What is lesson 2 about?", "Lesson two", ["A - Lesson 2"])
+
+        assert cache.get("What is lesson 3 about?") is None
+        assert cache.get("What is lesson 2 about?").answer == "Lesson two"
+
+    def test_lru_eviction(self, cache):
+        """Test the least recently used entry is evicted at capacity"""
+        cache.put("What is MCP?", "mcp", ["s"])
+        cache.put("What is lesson 2 about?", "lesson", ["s"])
+        cache.get("What is MCP?")  # Refresh MCP so lesson 2 is the oldest
+        cache.put("How does retrieval work?", "retrieval", ["s"])
+
+        assert cache.get("What is MCP?") is not None
+        assert cache.get("What is lesson 2 about?") is None
+        assert cache.get_stats()["entries"] == 2
+
+    def test_ttl_expiry(self, cache, clock):
+        """Test entries older than the TTL are no longer returned"""
+        cache.put("What is MCP?", "mcp", ["s"])
+        clock.now = 61
+
+        assert cache.get("What is MCP?") is None
+        assert cache.get_stats()["entries"] == 0
+
+    def test_clear_discards_stale_puts(self, cache):
+        """Test answers computed before an invalidation are not stored"""
+        generation = cache.generation
+        cache.clear()
+
+        cache.put("What is MCP?", "stale", ["s"], generation)
+
+        assert cache.get_stats()["entries"] == 0
+
+
+class TestRAGSystemAnswerCache:
+    """Test the answer cache in front of RAGSystem.query"""
+
+    @pytest.fixture
+    def rag(self, rag_with_mocked_backends):
+        rag = rag_with_mocked_backends
+        rag.vector_store.embed_query.side_effect = fake_embed
+        rag.retrieved = ["MCP - Lesson 1"]
+
+        def generate_response(context=None, **kwargs):
+            context.sources.extend(rag.retrieved)
+            return "MCP is a protocol"
+
+        rag.ai_generator.generate_response.side_effect = generate_response
+        return rag
+
+    def test_repeat_question_skips_llm(self, rag):
+        """Test a paraphrased question is answered from the cache"""
+        first = rag.query("What is MCP?")
+        rag.retrieved = []
+        second = rag.query("what's MCP")
+
+        assert first == second == ("MCP is a protocol", ["MCP - Lesson 1"])
+        assert rag.ai_generator.generate_response.call_count == 1
+
+    def test_follow_up_in_conversation_bypasses_cache(self, rag):
+        """Test questions with conversation history are always answered fresh"""
+        session_id = rag.session_manager.create_session()
+        rag.query("What is MCP?", session_id)
+        rag.query("what's MCP", session_id)
+
+        assert rag.ai_generator.generate_response.call_count == 2
+
+    def test_adding_documents_invalidates(self, rag):
+        """Test corpus changes clear cached answers"""
+        rag.document_processor.process_course_document = lambda path: (
+            object(),
+            [],
+        )
+        rag.query("What is MCP?")
+        rag.add_course_document("new_course.txt")
+        rag.query("What is MCP?")
+
+        assert rag.ai_generator.generate_response.call_count == 2
+
+
+class FlakyGemini:
+    """Model whose first call is rejected, as with an expired API key"""
+
+    def __init__(self):
+        self.calls = 0
+
+    def generate_content(self, contents, stream=False, **kwargs):
+        self.calls += 1
+        if self.calls == 1:
+            raise ValueError("400 API key expired")
+        response = make_response([SimpleNamespace(text="MCP is a protocol")])
+        return iter([response]) if stream else response
+
+
+class TestFailedAnswersNotCached:
+    """Test error answers from the model never reach the answer cache"""
+
+    @pytest.fixture
+    def rag(self, rag_with_mocked_backends):
+        rag = rag_with_mocked_backends
+        rag.vector_store.embed_query.side_effect = fake_embed
+        rag.vector_store.search.return_value = SearchResults(
+            documents=["MCP servers expose tools to clients"],
+            metadata=[{"course_title": "MCP", "lesson_number": 1}],
+            distances=[0.1],
+        )
+        rag.ai_generator = AIGenerator(api_key="test_key", model="gemini-2.5-flash")
+        rag.ai_generator.model = FlakyGemini()
+        return rag
+
+    def test_query_retries_after_error(self, rag):
+        """Test a question is answered afresh after the model failed on it"""
+        first, _ = rag.query("What is MCP?")
+        second, _ = rag.query("What is MCP?")
+
+        assert first == "Error generating response: 400 API key expired"
+        assert second == "MCP is a protocol"
+        assert rag.query("What is MCP?")[0] == "MCP is a protocol"
+        assert rag.ai_generator.model.calls == 2
+
+    def test_stream_retries_after_error(self, rag):
+        """Test a streamed error answer is not served from the cache"""
+
+        def answer():
+            events = rag.query_stream("What is MCP?")
+            return "".join(e["text"] for e in events if e["type"] == "token")
+
+        assert answer() == "Error generating response: 400 API key expired"
+        assert answer() == "MCP is a protocol"
+        assert answer() == "MCP is a protocol"
+        assert rag.ai_generator.model.calls == 2
@@ -1,9 +1,15 @@
 import pytest
-from unittest.mock import patch, Mock
+from unittest.mock import call, patch, Mock
 import asyncio
+import threading
+from pathlib import Path
 from fastapi.testclient import TestClient
 from fastapi import status
 
+from startup_tracker import StartupTracker
+
+DOCS_PATH = Path(__file__).parent.parent.parent / "docs"
+
 
 class TestAppStartup:
     """Test application startup events and initialization"""
@@ -20,11 +26,17 @@ class TestAppStartup:
             from app import app
             import app as app_module
             app_module.rag_system = mock_rag_system
+            app_module.startup_tracker = StartupTracker()
             
             # Simulate startup event
             with TestClient(app) as client:
-                # Startup event should have been triggered
-                mock_rag_system.add_course_folder.assert_called_once_with("../docs", clear_existing=False)
+                # Documents are loaded by the background startup thread
+                assert app_module.startup_tracker.wait(timeout=5)
+                mock_rag_system.add_course_folder.assert_called_once_with(
+                    "../docs",
+                    clear_existing=False,
+                    progress=app_module.startup_tracker.update_progress,
+                )
                 mock_print.assert_any_call("Loading initial documents...")
                 mock_print.assert_any_call("Loaded 3 courses with 15 chunks")
 
@@ -39,12 +51,14 @@ class TestAppStartup:
             from app import app
             import app as app_module
             app_module.rag_system = mock_rag_system
+            app_module.startup_tracker = StartupTracker()
             
             # Simulate startup event
             with TestClient(app):
+                assert app_module.startup_tracker.wait(timeout=5)
                 # Should not attempt to load documents
                 mock_rag_system.add_course_folder.assert_not_called()
-                mock_print.assert_not_called()
+                assert call("Loading initial documents...") not in mock_print.call_args_list
 
     @patch('os.path.exists')
     @patch('builtins.print')
@@ -58,12 +72,123 @@ class TestAppStartup:
             from app import app
             import app as app_module
             app_module.rag_system = mock_rag_system
+            app_module.startup_tracker = StartupTracker()
             
             # Simulate startup event
             with TestClient(app):
+                assert app_module.startup_tracker.wait(timeout=5)
                 mock_print.assert_any_call("Loading initial documents...")
                 mock_print.assert_any_call("Error loading documents: Loading failed")
 
+            # The persisted index keeps serving after a failed re-sync
+            status = app_module.startup_tracker.get_status()
+            assert status["serving"] is True
+            assert status["error"] == "Loading failed"
+
+
+class TestBackgroundStartup:
+    """Test lazy model loading, health endpoints and serving during ingestion"""
+
+    @pytest.fixture
+    def startup_app(self, app_module, mock_rag_system):
+        """The app with nothing loaded yet and a fresh startup tracker"""
+        app_module.rag_system = None
+        app_module.startup_tracker = StartupTracker()
+        return app_module
+
+    async def test_queries_rejected_until_model_loaded(self, startup_app, async_client):
+        """Test endpoints answer 503 before the RAG system exists"""
+        query = await async_client.post("/api/query", json={"query": "q"})
+        readiness = await async_client.get("/readyz")
+        liveness = await async_client.get("/healthz")
+
+        assert query.status_code == status.HTTP_503_SERVICE_UNAVAILABLE
+        assert query.headers["retry-after"] == "5"
+        assert readiness.status_code == status.HTTP_503_SERVICE_UNAVAILABLE
+        assert readiness.json()["phase"] == StartupTracker.STARTING
+        assert liveness.status_code == status.HTTP_200_OK
+
+    @patch('builtins.print')
+    async def test_queries_served_while_ingesting(
+        self, mock_print, startup_app, async_client, mock_rag_system
+    ):
+        """Test the persisted index answers queries before ingestion finishes"""
+        release = threading.Event()
+
+        def slow_ingest(folder, clear_existing, progress):
+            progress(1, 4)
+            release.wait()
+            return 0, 0
+
+        mock_rag_system.add_course_folder.side_effect = slow_ingest
+        startup_app.rag_system = mock_rag_system
+        loader = threading.Thread(
+            target=startup_app._load_rag_system, args=(str(DOCS_PATH),)
+        )
+        loader.start()
+        for _ in range(100):
+            if startup_app.startup_tracker.get_status()["ingestion"]["files_done"]:
+                break
+            await asyncio.sleep(0.01)
+
+        readiness = await async_client.get("/readyz")
+        query = await async_client.post(
+            "/api/query", json={"query": "q", "session_id": "s"}
+        )
+        release.set()
+        loader.join(timeout=5)
+
+        assert readiness.status_code == status.HTTP_200_OK
+        assert readiness.json()["phase"] == StartupTracker.INGESTING
+        assert readiness.json()["ingestion"] == {"files_done": 1, "files_total": 4}
+        assert query.status_code == status.HTTP_200_OK
+        assert startup_app.startup_tracker.phase == StartupTracker.READY
+
+    @patch('builtins.print')
+    async def test_empty_index_not_ready_until_ingested(
+        self, mock_print, startup_app, async_client, mock_rag_system
+    ):
+        """Test a pod with no persisted courses only turns ready after ingestion"""
+        mock_rag_system.get_course_analytics.return_value = {
+            "total_courses": 0,
+            "course_titles": [],
+        }
+        release = threading.Event()
+        mock_rag_system.add_course_folder.side_effect = lambda *a, **k: (
+            release.wait(),
+            (4, 40),
+        )[1]
+        startup_app.rag_system = mock_rag_system
+        loader = threading.Thread(
+            target=startup_app._load_rag_system, args=(str(DOCS_PATH),)
+        )
+        loader.start()
+        await asyncio.sleep(0.05)
+
+        before = await async_client.get("/readyz")
+        release.set()
+        loader.join(timeout=5)
+        after = await async_client.get("/readyz")
+
+        assert before.status_code == status.HTTP_503_SERVICE_UNAVAILABLE
+        assert after.status_code == status.HTTP_200_OK
+        timings = after.json()["timings"]
+        assert timings["time_to_ready_seconds"] >= timings["time_to_serving_seconds"]
+
+    @patch('builtins.print')
+    async def test_model_load_failure_fails_liveness(
+        self, mock_print, startup_app, async_client
+    ):
+        """Test a failed model load is reported so the pod gets restarted"""
+        with patch.object(startup_app, 'RAGSystem', side_effect=OSError("no model")):
+            startup_app._load_rag_system(str(DOCS_PATH))
+
+        liveness = await async_client.get("/healthz")
+        readiness = await async_client.get("/readyz")
+
+        assert liveness.status_code == status.HTTP_503_SERVICE_UNAVAILABLE
+        assert readiness.json()["error"] == "no model"
+
 
 class TestAppConfiguration:
     """Test application configuration and middleware setup"""
@@ -0,0 +1,78 @@
+from unittest.mock import Mock
+
+import pytest
+
+from vector_store import SearchFilter
+
+QUERIES = [
+    "tool use",
+    "prompt caching",
+    "computer use",
+    "retrieval",
+    "MCP",
+    "image requests",
+    "streaming responses",
+    "evaluating the model",
+]
+
+
+class TestSearchMany:
+    """Test batched searches match one search per query"""
+
+    @pytest.mark.parametrize("mode", ["vector", "hybrid"])
+    def test_matches_single_searches(self, course_store, mode):
+        """Test each result equals the same search run on its own"""
+        filters = [
+            None,
+            SearchFilter(course_name="Computer Use"),
+            SearchFilter(lesson_number=2),
+            SearchFilter(course_name="Computer Use", lesson_number=3),
+        ] * 2
+
+        batched = course_store.search_many(QUERIES, filters, limit=5, mode=mode)
+
+        for query, search_filter, results in zip(QUERIES, filters, batched):
+            single = course_store.search(
+                query,
+                course_name=search_filter.course_name if search_filter else None,
+                lesson_number=search_filter.lesson_number if search_filter else None,
+                limit=5,
+                mode=mode,
+            )
+            assert results == single
+
+    def test_one_query_call_per_filter(self, course_store):
+        """Test queries are embedded together and grouped by filter"""
+        course_store.course_content = Mock(wraps=course_store.course_content)
+        course_store.embedding_cache = Mock(wraps=course_store.embedding_cache)
+        filters = [None, SearchFilter(lesson_number=1)] * 4
+
+        results = course_store.search_many(QUERIES, filters, mode="vector")
+
+        assert all(len(r.documents) == 5 for r in results)
+        assert course_store.embedding_cache.call_count == 1
+        assert course_store.course_content.query.call_count == 2
+
+    def test_batches_are_capped(self, course_store):
+        """Test a large group is sent to Chroma batch_size queries at a time"""
+        course_store.course_content = Mock(wraps=course_store.course_content)
+
+        course_store.search_many(QUERIES, mode="vector", batch_size=3)
+
+        assert course_store.course_content.query.call_count == 3
+
+    def test_unknown_course_only_fails_its_query(self, course_store):
+        """Test an unresolved course name is reported for that query alone"""
+        course_store.course_resolver.resolve = lambda name: None
+
+        results = course_store.search_many(
+            ["tool use", "tool use"], [SearchFilter(course_name="Nope"), None]
+        )
+
+        assert results[0].error == "No course found matching 'Nope'"
+        assert results[1].error is None and results[1].documents
+
+    def test_filters_must_match_queries(self, course_store):
+        """Test a filter list of the wrong length is rejected"""
+        with pytest.raises(ValueError):
+            course_store.search_many(QUERIES, [None])
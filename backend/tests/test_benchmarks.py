@@ -0,0 +1,256 @@
+import os
+import random
+import time
+from pathlib import Path
+from typing import List
+
+import pytest
+
+from document_processor import DocumentProcessor, _scan_lessons
+from lexical_index import BM25Index, reciprocal_rank_fusion
+from llm_client import ResilientLLMClient
+from tests.test_batch_search import QUERIES
+from tests.test_course_catalog import TITLES, chroma_lesson_link, make_course
+from tests.test_document_processor import (
+    corpus_texts,
+    reference_chunk_text,
+    reference_scan,
+)
+from tests.test_llm_client import make_generator
+from tests.test_session_manager import BACKENDS
+
+# Timing benchmarks, deselected by default: run with `pytest -m benchmark`.
+# Figures are reported as test properties (pytest --junitxml) rather than
+# printed, and thresholds only guard against gross regressions.
+pytestmark = pytest.mark.benchmark
+
+DOCS_PATH = Path(__file__).parent.parent.parent / "docs"
+
+
+def percentile(samples, fraction):
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))]
+
+
+def write_scaled_docs(folder: Path, total_bytes: int) -> List[Path]:
+    """Repeat each course script's lessons until the four files reach total_bytes"""
+    paths = []
+    for source in sorted(DOCS_PATH.glob("*.txt")):
+        lines = source.read_text(encoding="utf-8").split("\n")
+        header, body = "\n".join(lines[:4]) + "\n", "\n".join(lines[4:]) + "\n"
+        path = folder / source.name
+        with open(path, "w", encoding="utf-8") as file:
+            file.write(header)
+            for _ in range(total_bytes // 4 // len(body) + 1):
+                file.write(body)
+        paths.append(path)
+    return paths
+
+
+class TestLexicalIndexBenchmark:
+    """Benchmark BM25 search at scale"""
+
+    def test_query_latency_at_100k_chunks(self, record_property):
+        """Benchmark: BM25 plus fusion stays in single-digit ms at 100k chunks"""
+        rng = random.Random(0)
+        vocabulary = [f"term{i}" for i in range(20000)]
+        count = 100_000
+        index = BM25Index()
+        index.add(
+            [f"chunk_{i}" for i in range(count)],
+            [" ".join(rng.choices(vocabulary, k=40)) for _ in range(count)],
+            [
+                {"course_title": f"Course {i % 50}", "lesson_number": i % 10}
+                for i in range(count)
+            ],
+        )
+        queries = [" ".join(rng.choices(vocabulary, k=6)) for _ in range(100)]
+        index.search(queries[0], 20)  # Build posting arrays once
+
+        timings = []
+        for i, query in enumerate(queries):
+            started = time.perf_counter()
+            lexical = index.search(query, 20, course_title=f"Course {i % 50}")
+            reciprocal_rank_fusion(
+                [[f"chunk_{j}" for j in range(20)], [id_ for id_, _ in lexical]]
+            )
+            timings.append(time.perf_counter() - started)
+
+        median_ms = percentile(timings, 0.5) * 1000
+        record_property("bm25_p50_ms", round(median_ms, 2))
+        record_property("bm25_p95_ms", round(percentile(timings, 0.95) * 1000, 2))
+        assert median_ms < 10
+
+
+class TestChunkingBenchmark:
+    """Benchmark sentence chunking against the original implementation"""
+
+    def test_faster_than_reference_on_docs(self, record_property):
+        """Benchmark: chunk the docs corpus with both implementations"""
+        processor = DocumentProcessor(800, 100)
+        texts = corpus_texts() * 3
+
+        def timed(chunk):
+            started = time.perf_counter()
+            for text in texts:
+                chunk(text)
+            return time.perf_counter() - started
+
+        reference = timed(lambda text: reference_chunk_text(processor, text))
+        current = timed(processor.chunk_text)
+
+        record_property("chunk_text_ms", round(current * 1000, 1))
+        record_property("reference_chunk_text_ms", round(reference * 1000, 1))
+        assert current < reference
+
+
+class TestParseBenchmark:
+    """Benchmark document parsing on the course scripts scaled up"""
+
+    def test_structure_scan_on_scaled_docs(self, tmp_path, record_property):
+        """Benchmark: lesson scanning and full parse of the docs scaled up.
+
+        Set PARSE_BENCHMARK_BYTES=1000000000 for the 1 GB run."""
+        total_bytes = int(os.environ.get("PARSE_BENCHMARK_BYTES", 8_000_000))
+        paths = write_scaled_docs(tmp_path, total_bytes)
+        size_mb = sum(path.stat().st_size for path in paths) / 1e6
+        processor = DocumentProcessor(800, 100)
+
+        def timed(scan):
+            started = time.perf_counter()
+            for path in paths:
+                with open(path, encoding="utf-8") as file:
+                    scan(file)
+            return time.perf_counter() - started
+
+        reference = timed(reference_scan)
+        current = timed(lambda file: sum(1 for _ in _scan_lessons(file)))
+
+        started = time.perf_counter()
+        chunks = 0
+        for path in paths:
+            chunks += sum(1 for _ in processor.stream_course_document(str(path))[1])
+        parse = time.perf_counter() - started
+
+        record_property("docs_mb", round(size_mb))
+        record_property("lesson_scan_s", round(current, 2))
+        record_property("reference_scan_s", round(reference, 2))
+        record_property("parse_mb_per_s", round(size_mb / parse, 1))
+        record_property("chunks", chunks)
+        assert current < reference
+
+
+@pytest.mark.parametrize("worker_factory", BACKENDS, indirect=True)
+class TestSessionBenchmark:
+    """Benchmark session storage per chat request"""
+
+    def test_per_request_overhead(self, worker_factory, record_property):
+        """Benchmark: session work per chat request (read history, add exchange)"""
+        manager = worker_factory()
+        session_ids = [manager.create_session() for _ in range(50)]
+        answer = "The client lists the tools each server exposes. " * 8
+
+        requests = 500
+        started = time.perf_counter()
+        for i in range(requests):
+            session_id = session_ids[i % len(session_ids)]
+            manager.get_conversation_history(session_id)
+            manager.add_exchange(session_id, f"question {i}", answer)
+        elapsed = time.perf_counter() - started
+
+        record_property("session_overhead_us", round(elapsed / requests * 1e6))
+        assert elapsed / requests < 0.05
+
+
+class TestHedgingBenchmark:
+    """Benchmark hedged requests against a fake upstream with a slow tail"""
+
+    def test_hedging_cuts_tail_latency(self, fake_gemini, record_property):
+        """Benchmark: p50/p99 latency with a slow 1-in-10 tail, hedged and not"""
+        fake_gemini.slow_every = 10
+        fake_gemini.slow_delay = 0.3
+        requests = 40
+
+        results = {}
+        for hedge in (False, True):
+            generator = make_generator(
+                fake_gemini, ResilientLLMClient(hedge=hedge, hedge_min_samples=5)
+            )
+            latencies = []
+            for _ in range(requests):
+                started = time.perf_counter()
+                assert generator.generate_response("What is MCP?") == "OK"
+                latencies.append(time.perf_counter() - started)
+            latencies.sort()
+            results[hedge] = (latencies[requests // 2], latencies[-1])
+            generator.close()
+
+        for hedge, label in ((False, "unhedged"), (True, "hedged")):
+            record_property(f"{label}_p50_ms", round(results[hedge][0] * 1000))
+            record_property(f"{label}_p99_ms", round(results[hedge][1] * 1000))
+        assert results[True][1] < results[False][1]
+
+
+class TestSnippetSearchBenchmark:
+    """Benchmark snippet search requests"""
+
+    def test_search_latency(self, snippet_search, record_property):
+        """Benchmark: time per search request without the LLM"""
+        queries = ["tool use", "prompt caching", "computer use", "retrieval", "MCP"]
+        snippet_search.search("warm up")
+
+        requests = 50
+        started = time.perf_counter()
+        for i in range(requests):
+            snippet_search.search(queries[i % len(queries)], page_size=10)
+        elapsed = (time.perf_counter() - started) / requests
+
+        record_property("search_ms", round(elapsed * 1000, 1))
+        assert elapsed < 0.1
+
+
+class TestCourseCatalogBenchmark:
+    """Benchmark lesson link lookups"""
+
+    def test_lesson_link_latency(self, vector_store, record_property):
+        """Benchmark: lesson link lookups from Chroma versus the cached catalog"""
+        for title in TITLES:
+            vector_store.add_course_metadata(make_course(title, lessons=10))
+        lookups = [(title, n) for title in TITLES for n in range(10)] * 5
+
+        started = time.perf_counter()
+        for title, n in lookups:
+            chroma_lesson_link(vector_store, title, n)
+        before = (time.perf_counter() - started) / len(lookups)
+
+        started = time.perf_counter()
+        for title, n in lookups:
+            vector_store.get_lesson_link(title, n)
+        after = (time.perf_counter() - started) / len(lookups)
+
+        record_property("chroma_lookup_us", round(before * 1e6))
+        record_property("catalog_lookup_us", round(after * 1e6, 1))
+        assert after < before
+
+
+class TestBatchSearchBenchmark:
+    """Benchmark batched searches against one search per query"""
+
+    def test_throughput(self, course_store, record_property):
+        """Benchmark: queries per second, single-query loop versus search_many"""
+        queries = [f"{query} {i}" for i in range(25) for query in QUERIES]
+        course_store.search_many(["warm up"], mode="vector")
+
+        qps = {}
+        for label, run in (
+            ("loop", lambda: [course_store.search(q, mode="vector") for q in queries]),
+            ("batched", lambda: course_store.search_many(queries, mode="vector")),
+        ):
+            course_store.embedding_cache.clear()
+            started = time.perf_counter()
+            run()
+            qps[label] = len(queries) / (time.perf_counter() - started)
+
+        record_property("loop_qps", round(qps["loop"]))
+        record_property("batched_qps", round(qps["batched"]))
+        assert qps["batched"] > qps["loop"]
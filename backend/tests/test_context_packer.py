@@ -0,0 +1,138 @@
+from pathlib import Path
+
+import pytest
+
+from context_packer import ContextPacker, estimate_tokens
+from document_processor import DocumentProcessor
+
+DOCS_PATH = Path(__file__).parent.parent.parent / "docs"
+
+TEXT = " ".join(
+    f"Sentence number {i} explains part {i % 7} of the protocol in some detail."
+    for i in range(60)
+)
+
+
+def lesson_results(chunks, course="MCP", lesson=1, first_index=0):
+    """Documents and metadata as the vector store returns them"""
+    metadata = [
+        {
+            "course_title": course,
+            "lesson_number": lesson,
+            "chunk_index": first_index + i,
+        }
+        for i in range(len(chunks))
+    ]
+    return list(chunks), metadata
+
+
+class TestEstimateTokens:
+    """Test the local token count approximation"""
+
+    def test_words_and_punctuation(self):
+        """Test short words cost one token and long words one per four chars"""
+        assert estimate_tokens("") == 0
+        assert estimate_tokens("What is MCP?") == 4
+        assert estimate_tokens("internationalization") == 5
+        assert estimate_tokens("a  \n b") == estimate_tokens("a b")
+
+
+class TestContextPacker:
+    """Test deduping, merging and budgeting of search results"""
+
+    def test_adjacent_chunks_merge_without_overlap(self):
+        """Test a run of overlapping chunks becomes the original text once"""
+        chunks = DocumentProcessor(200, 80).chunk_text(TEXT)
+        assert len(chunks) > 5
+
+        packed = ContextPacker(token_budget=10_000, chunk_overlap=80).pack(
+            *lesson_results(chunks)
+        )
+
+        assert packed.text == f"[MCP - Lesson 1]\n{TEXT}"
+        assert packed.passages == 1
+        assert packed.chunks == len(chunks)
+        assert packed.packed_tokens < packed.retrieved_tokens
+
+    def test_lesson_prefixes_kept_once(self):
+        """Test the context prefix of last-lesson chunks is not repeated"""
+        chunks = DocumentProcessor(200, 80).chunk_text(TEXT)[:3]
+        prefixed = [f"Course MCP Lesson 4 content: {chunk}" for chunk in chunks]
+
+        packed = ContextPacker(10_000, 80).pack(*lesson_results(prefixed, lesson=4))
+
+        assert packed.text.count("content:") == 1
+        assert packed.text.endswith(chunks[2])
+
+    def test_duplicates_and_gaps(self):
+        """Test repeated chunks are kept once and gaps start a new passage"""
+        documents = ["Alpha one.", "Gamma three.", "Alpha one."]
+        metadata = [
+            {"course_title": "MCP", "lesson_number": 1, "chunk_index": 1},
+            {"course_title": "MCP", "lesson_number": 1, "chunk_index": 3},
+            {"course_title": "MCP", "lesson_number": 1, "chunk_index": 1},
+        ]
+
+        packed = ContextPacker().pack(documents, metadata)
+
+        assert packed.text == (
+            "[MCP - Lesson 1]\nAlpha one.\n\n[MCP - Lesson 1]\nGamma three."
+        )
+        assert packed.sources == ["MCP - Lesson 1"]
+        assert packed.chunks == 2
+
+    def test_passages_follow_best_rank(self):
+        """Test a merged passage ranks as its best chunk"""
+        documents = ["Other course.", "Second half.", "First half."]
+        metadata = [
+            {"course_title": "Chroma", "lesson_number": 2, "chunk_index": 9},
+            {"course_title": "MCP", "lesson_number": 1, "chunk_index": 5},
+            {"course_title": "MCP", "lesson_number": 1, "chunk_index": 4},
+        ]
+
+        packed = ContextPacker().pack(documents, metadata)
+
+        assert packed.sources == ["Chroma - Lesson 2", "MCP - Lesson 1"]
+        assert packed.text.endswith("First half. Second half.")
+
+    @pytest.mark.parametrize("budget", [60, 120, 250])
+    def test_trimmed_to_budget(self, budget):
+        """Test lower-ranked passages are cut or dropped to fit the budget"""
+        chunks = DocumentProcessor(300, 0).chunk_text(TEXT)
+        documents, metadata = lesson_results(chunks)
+        for i, meta in enumerate(metadata):
+            meta["lesson_number"] = i  # No merging, one passage per chunk
+
+        packed = ContextPacker(token_budget=budget).pack(documents, metadata)
+
+        assert packed.packed_tokens == estimate_tokens(packed.text)
+        assert packed.packed_tokens <= budget
+        assert packed.text.startswith(f"[MCP - Lesson 0]\n{chunks[0][:40]}")
+        assert packed.passages + packed.dropped == len(chunks)
+        assert len(packed.sources) == packed.passages
+        if packed.truncated:
+            assert packed.text.endswith(" ...")
+
+    def test_token_savings_on_course_results(self):
+        """Test typical top-5 results pack into fewer tokens than retrieved"""
+        processor = DocumentProcessor(800, 100)
+        course, chunks = processor.process_course_document(
+            str(DOCS_PATH / "course1_script.txt")
+        )
+        # A query hitting one lesson returns neighbouring chunks and repeats
+        lesson = [c for c in chunks if c.lesson_number == chunks[0].lesson_number]
+        picked = lesson[:4] + lesson[:1]
+        documents = [c.content for c in picked]
+        metadata = [
+            {
+                "course_title": c.course_title,
+                "lesson_number": c.lesson_number,
+                "chunk_index": c.chunk_index,
+            }
+            for c in picked
+        ]
+
+        packed = ContextPacker(1000, 100).pack(documents, metadata)
+
+        assert packed.packed_tokens <= 1000
+        assert packed.packed_tokens < packed.retrieved_tokens
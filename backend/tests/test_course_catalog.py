@@ -0,0 +1,222 @@
+import json
+import threading
+import time
+from unittest.mock import Mock, patch
+
+from course_catalog import CourseCatalog
+from models import Course, Lesson
+from vector_store import VectorStore
+
+TITLES = [
+    "MCP: Build Rich-Context AI Apps with Anthropic",
+    "Building Towards Computer Use with Anthropic",
+    "Advanced Retrieval for AI with Chroma",
+]
+
+
+def make_course(title, lessons=3):
+    return Course(
+        title=title,
+        course_link=f"https://example.com/{len(title)}",
+        instructor="Ada",
+        lessons=[
+            Lesson(
+                lesson_number=n,
+                title=f"Lesson {n}",
+                lesson_link=f"https://example.com/{len(title)}/{n}",
+            )
+            for n in range(lessons)
+        ],
+    )
+
+
+def chroma_lesson_link(store, course_title, lesson_number):
+    """Lesson link the way it was looked up before the catalog was cached"""
+    results = store.course_catalog.get(ids=[course_title])
+    for lesson in json.loads(results["metadatas"][0]["lessons_json"]):
+        if lesson.get("lesson_number") == lesson_number:
+            return lesson.get("lesson_link")
+    return None
+
+
+class TestCourseCatalog:
+    """Test the in-memory course and lesson index"""
+
+    def test_lessons_indexed_by_title_and_number(self):
+        """Test lessons are found by course title and lesson number"""
+        catalog = CourseCatalog()
+        catalog.load([make_course(TITLES[0]), make_course(TITLES[1])])
+
+        assert catalog.titles == TITLES[:2] and len(catalog) == 2
+        assert catalog.get_lesson(TITLES[1], 2).lesson_link.endswith("/2")
+        assert catalog.get_lesson(TITLES[1], 9) is None
+        assert catalog.get("Unknown") is None
+
+    def test_add_replaces_and_remove_drops_lessons(self):
+        """Test re-adding a course replaces its lessons and removal drops them"""
+        catalog = CourseCatalog()
+        catalog.add(make_course(TITLES[0], lessons=3))
+        catalog.add(make_course(TITLES[0], lessons=1))
+
+        assert len(catalog) == 1
+        assert catalog.get_lesson(TITLES[0], 2) is None
+
+        catalog.remove(TITLES[0])
+        assert catalog.titles == [] and catalog.get_lesson(TITLES[0], 0) is None
+
+    def test_added_course_is_copied(self):
+        """Test later changes to the caller's course do not leak into the catalog"""
+        catalog = CourseCatalog()
+        course = make_course(TITLES[0])
+        catalog.add(course)
+
+        course.lessons.clear()
+
+        assert len(catalog.get(TITLES[0]).lessons) == 3
+
+    def test_from_metadata_parses_lessons(self):
+        """Test catalog metadata is rebuilt into a course with its lessons"""
+        course = CourseCatalog.from_metadata(
+            {
+                "title": TITLES[2],
+                "instructor": "Ada",
+                "lessons_json": json.dumps(
+                    [{"lesson_number": 1, "lesson_title": "Intro", "lesson_link": None}]
+                ),
+            }
+        )
+
+        assert course.title == TITLES[2] and course.course_link is None
+        assert course.lessons == [Lesson(lesson_number=1, title="Intro")]
+
+
+class TestVectorStoreCatalog:
+    """Test the vector store serves catalog reads from memory"""
+
+    def test_reads_hit_chroma_once(self, vector_store):
+        """Test titles, counts and links come from one catalog read"""
+        for title in TITLES:
+            vector_store.add_course_metadata(make_course(title))
+        vector_store.course_catalog = Mock(wraps=vector_store.course_catalog)
+
+        assert vector_store.get_existing_course_titles() == TITLES
+        assert vector_store.get_course_count() == 3
+        assert (
+            vector_store.get_course_link(TITLES[0])
+            == make_course(TITLES[0]).course_link
+        )
+        assert vector_store.get_lesson_link(TITLES[1], 1) == chroma_lesson_link(
+            vector_store, TITLES[1], 1
+        )
+        assert vector_store.get_lesson_link(TITLES[1], 7) is None
+        assert vector_store.get_course_link("Unknown") is None
+
+        # One load, plus the reference lookup above
+        assert vector_store.course_catalog.get.call_count == 2
+
+    def test_metadata_shape_is_unchanged(self, vector_store):
+        """Test all-courses metadata keeps the parsed lessons list"""
+        vector_store.add_course_metadata(make_course(TITLES[0], lessons=1))
+
+        assert vector_store.get_all_courses_metadata() == [
+            {
+                "title": TITLES[0],
+                "instructor": "Ada",
+                "course_link": make_course(TITLES[0]).course_link,
+                "lesson_count": 1,
+                "lessons": [
+                    {
+                        "lesson_number": 0,
+                        "lesson_title": "Lesson 0",
+                        "lesson_link": make_course(TITLES[0]).lessons[0].lesson_link,
+                    }
+                ],
+            }
+        ]
+
+    def test_catalog_follows_add_delete_and_clear(self, vector_store):
+        """Test writes after the first read keep the catalog coherent"""
+        vector_store.add_course_metadata(make_course(TITLES[0]))
+        assert vector_store.get_course_count() == 1
+
+        vector_store.add_course_metadata(make_course(TITLES[1]))
+        assert vector_store.get_existing_course_titles() == TITLES[:2]
+
+        vector_store.delete_course_metadata(TITLES[0])
+        assert vector_store.get_existing_course_titles() == [TITLES[1]]
+        assert vector_store.get_lesson_link(TITLES[0], 1) is None
+
+        vector_store.clear_all_data()
+        assert vector_store.get_course_count() == 0
+
+    def test_course_added_during_load_is_kept(self, vector_store):
+        """Test a course stored while the catalog loads is not left out of it"""
+        vector_store.add_course_metadata(make_course(TITLES[0]))
+        catalog_get = vector_store.course_catalog.get
+        reading = threading.Event()
+
+        def slow_get(**kwargs):
+            results = catalog_get(**kwargs)
+            reading.set()
+            time.sleep(0.1)
+            return results
+
+        vector_store.course_catalog = Mock(wraps=vector_store.course_catalog)
+        vector_store.course_catalog.get.side_effect = slow_get
+        loader = threading.Thread(target=vector_store.get_course_count)
+        loader.start()
+        reading.wait(timeout=2)
+        vector_store.add_course_metadata(make_course(TITLES[1]))
+        loader.join()
+
+        assert vector_store.get_existing_course_titles() == TITLES[:2]
+
+    def test_catalog_loaded_from_persisted_store(
+        self, vector_store, hash_embedding_function, tmp_path
+    ):
+        """Test a new store parses the courses already in Chroma"""
+        vector_store.add_course_metadata(make_course(TITLES[2]))
+
+        with patch(
+            "chromadb.utils.embedding_functions.SentenceTransformerEmbeddingFunction",
+            return_value=hash_embedding_function,
+        ):
+            reopened = VectorStore(str(tmp_path / "chroma"), "all-MiniLM-L6-v2")
+
+        assert reopened.get_lesson_link(TITLES[2], 2).endswith("/2")
+
+
+class TestCoursesEndpointETag:
+    """Test /api/courses revalidation"""
+
+    async def test_unchanged_catalog_returns_304(self, async_client):
+        """Test a matching If-None-Match gets an empty 304"""
+        first = await async_client.get("/api/courses")
+        etag = first.headers["etag"]
+
+        again = await async_client.get("/api/courses", headers={"If-None-Match": etag})
+        weak = await async_client.get(
+            "/api/courses", headers={"If-None-Match": f'"other", W/{etag}'}
+        )
+
+        assert first.status_code == 200 and first.json()["total_courses"] == 2
+        assert first.headers["cache-control"] == "no-cache"
+        assert again.status_code == 304 and again.content == b""
+        assert again.headers["etag"] == etag
+        assert weak.status_code == 304
+
+    async def test_changed_catalog_gets_new_etag(self, async_client, mock_rag_system):
+        """Test the ETag changes with the catalog and stale tags get the body"""
+        etag = (await async_client.get("/api/courses")).headers["etag"]
+        mock_rag_system.get_course_analytics.return_value = {
+            "total_courses": 1,
+            "course_titles": ["Only Course"],
+        }
+
+        response = await async_client.get(
+            "/api/courses", headers={"If-None-Match": etag}
+        )
+
+        assert response.status_code == 200
+        assert response.json() == {"total_courses": 1, "course_titles": ["Only Course"]}
+        assert response.headers["etag"] != etag
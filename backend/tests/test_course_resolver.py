@@ -0,0 +1,155 @@
+import threading
+import time
+from unittest.mock import Mock, patch
+
+import numpy as np
+import pytest
+
+from course_resolver import CourseNameResolver
+from models import Course, CourseChunk
+from vector_store import VectorStore
+
+TITLES = [
+    "MCP: Build Rich-Context AI Apps with Anthropic",
+    "Building Towards Computer Use with Anthropic",
+    "Advanced Retrieval for AI with Chroma",
+]
+
+
+def make_course(title):
+    return Course(title=title, course_link="https://example.com", instructor="Ada")
+
+
+@pytest.fixture
+def embed():
+    """Embedding stub: one-hot vector per known title, query vectors by keyword"""
+
+    def fake_embed(texts):
+        vectors = []
+        for text in texts:
+            vector = np.zeros(len(TITLES), dtype=np.float32)
+            for i, keyword in enumerate(["mcp", "computer", "retrieval"]):
+                if keyword in text.lower():
+                    vector[i] = 1.0
+            vectors.append(vector)
+        return vectors
+
+    return Mock(side_effect=fake_embed)
+
+
+@pytest.fixture
+def resolver(embed):
+    resolver = CourseNameResolver(embed)
+    resolver.load(TITLES, np.eye(len(TITLES)))
+    embed.reset_mock()
+    return resolver
+
+
+class TestCourseNameResolver:
+    """Test cases for the in-memory course title index"""
+
+    @pytest.mark.parametrize(
+        "name,expected",
+        [
+            (TITLES[0], TITLES[0]),
+            ("advanced retrieval for ai with chroma", TITLES[2]),
+            ("MCP", TITLES[0]),
+            ("Computer Use", TITLES[1]),
+        ],
+    )
+    def test_string_matches_skip_embedding(self, resolver, embed, name, expected):
+        """Test exact, case-insensitive, prefix and substring matches"""
+        assert resolver.resolve(name) == expected
+        embed.assert_not_called()
+
+    def test_falls_back_to_cosine(self, resolver, embed):
+        """Test names with no string match use embedding similarity"""
+        assert resolver.resolve("the retrieval course") == TITLES[2]
+        embed.assert_called_once_with(["the retrieval course"])
+
+    def test_ambiguous_substring_uses_cosine(self, resolver):
+        """Test a substring shared by several titles is decided by embeddings"""
+        assert resolver.resolve("Anthropic computer") == TITLES[1]
+
+    def test_empty_index(self, embed):
+        """Test an empty catalog resolves nothing"""
+        assert CourseNameResolver(embed).resolve("MCP") is None
+
+    def test_add_and_remove(self, resolver):
+        """Test titles can be added and removed incrementally"""
+        resolver.add("Prompt Compression", [0.0, 0.0, 0.0])
+        assert resolver.resolve("prompt") == "Prompt Compression"
+
+        resolver.remove("Prompt Compression")
+        assert "Prompt Compression" not in resolver.titles
+
+
+class TestVectorStoreCourseResolution:
+    """Test VectorStore keeps its title index coherent with the catalog"""
+
+    def test_filtered_search_does_not_query_catalog(self, vector_store):
+        """Test a course filter is resolved without a catalog ANN query"""
+        vector_store.add_course_metadata(make_course(TITLES[0]))
+        vector_store.add_course_content(
+            [
+                CourseChunk(
+                    content="MCP servers",
+                    course_title=TITLES[0],
+                    lesson_number=1,
+                    chunk_index=0,
+                )
+            ]
+        )
+        vector_store.course_catalog = Mock(wraps=vector_store.course_catalog)
+
+        results = vector_store.search("servers", course_name="mcp")
+
+        assert results.metadata[0]["course_title"] == TITLES[0]
+        vector_store.course_catalog.query.assert_not_called()
+
+    def test_index_refreshes_on_metadata_and_clear(self, vector_store):
+        """Test adding metadata and clearing data update the index"""
+        vector_store.add_course_metadata(make_course(TITLES[1]))
+        assert vector_store._resolve_course_name("computer") == TITLES[1]
+
+        vector_store.add_course_metadata(make_course(TITLES[2]))
+        assert vector_store._resolve_course_name("Chroma") == TITLES[2]
+
+        vector_store.clear_all_data()
+        assert vector_store._resolve_course_name("Chroma") is None
+
+    def test_course_added_during_load_is_indexed(self, vector_store):
+        """Test a course stored while the index loads is not left out of it"""
+        vector_store.add_course_metadata(make_course(TITLES[0]))
+        catalog_get = vector_store.course_catalog.get
+        reading = threading.Event()
+
+        def slow_get(**kwargs):
+            results = catalog_get(**kwargs)
+            reading.set()
+            time.sleep(0.1)
+            return results
+
+        vector_store.course_catalog = Mock(wraps=vector_store.course_catalog)
+        vector_store.course_catalog.get.side_effect = slow_get
+        loader = threading.Thread(target=vector_store._get_course_resolver)
+        loader.start()
+        reading.wait(timeout=2)
+        vector_store.add_course_metadata(make_course(TITLES[1]))
+        loader.join()
+
+        assert sorted(vector_store.course_resolver.titles) == sorted(TITLES[:2])
+
+    def test_index_loaded_from_persisted_catalog(
+        self, vector_store, hash_embedding_function, tmp_path
+    ):
+        """Test a new store builds its index from titles already in Chroma"""
+        vector_store.add_course_metadata(make_course(TITLES[2]))
+
+        with patch(
+            "chromadb.utils.embedding_functions.SentenceTransformerEmbeddingFunction",
+            return_value=hash_embedding_function,
+        ):
+            reopened = VectorStore(str(tmp_path / "chroma"), "all-MiniLM-L6-v2")
+
+        assert reopened._resolve_course_name("retrieval") == TITLES[2]
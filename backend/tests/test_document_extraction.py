@@ -0,0 +1,222 @@
+import time
+import zipfile
+from pathlib import Path
+from typing import List
+from unittest.mock import Mock, patch
+
+import pytest
+
+from document_extraction import (
+    EXTRACTORS,
+    DocumentExtractor,
+    extract_docx_paragraphs,
+    extract_pdf_pages,
+)
+from document_processor import DocumentProcessor
+from ingestion import IngestionPipeline
+
+DOCS_PATH = Path(__file__).parent.parent.parent / "docs"
+
+
+def make_docx(path: Path, paragraphs: List[str]):
+    """Write a minimal DOCX with one paragraph per string (tabs become w:tab)"""
+
+    def paragraph(text: str) -> str:
+        runs = "<w:tab/>".join(
+            f'<w:t xml:space="preserve">{part}</w:t>' for part in text.split("\t")
+        )
+        return f"<w:p><w:r>{runs}</w:r></w:p>"
+
+    body = "".join(
+        paragraph(text.replace("&", "&amp;").replace("<", "&lt;"))
+        for text in paragraphs
+    )
+    with zipfile.ZipFile(path, "w") as archive:
+        archive.writestr(
+            "[Content_Types].xml",
+            '<Types xmlns="http://schemas.openxmlformats.org/package/2006/'
+            'content-types"/>',
+        )
+        archive.writestr(
+            "word/document.xml",
+            '<w:document xmlns:w="http://schemas.openxmlformats.org/'
+            f'wordprocessingml/2006/main"><w:body>{body}</w:body></w:document>',
+        )
+
+
+def make_pdf(path: Path, pages: List[List[str]]):
+    """Write a minimal PDF with the given lines of Helvetica text per page"""
+    count = len(pages)
+    objects = [
+        "<< /Type /Catalog /Pages 2 0 R >>",
+        "<< /Type /Pages /Kids [%s] /Count %d >>"
+        % (" ".join(f"{4 + 2 * i} 0 R" for i in range(count)), count),
+        "<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>",
+    ]
+    for i, lines in enumerate(pages):
+        stream = "BT /F1 12 Tf 72 720 Td 14 TL %s ET" % " ".join(
+            f"({line}) Tj T*" for line in lines
+        )
+        objects.append(
+            "<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] "
+            f"/Contents {5 + 2 * i} 0 R /Resources << /Font << /F1 3 0 R >> >> >>"
+        )
+        objects.append(f"<< /Length {len(stream)} >>\nstream\n{stream}\nendstream")
+
+    data = b"%PDF-1.4\n"
+    offsets = []
+    for number, body in enumerate(objects, 1):
+        offsets.append(len(data))
+        data += f"{number} 0 obj\n{body}\nendobj\n".encode("latin-1")
+    xref = len(data)
+    data += f"xref\n0 {len(objects) + 1}\n0000000000 65535 f \n".encode("latin-1")
+    for offset in offsets:
+        data += f"{offset:010d} 00000 n \n".encode("latin-1")
+    data += (
+        f"trailer\n<< /Size {len(objects) + 1} /Root 1 0 R >>\n"
+        f"startxref\n{xref}\n%%EOF\n"
+    ).encode("latin-1")
+    path.write_bytes(data)
+
+
+def slow_extractor(file_path: str):
+    """Extractor that never finishes in time (imported by name in workers)"""
+    time.sleep(60)
+    yield ""
+
+
+@pytest.fixture
+def script_lines() -> List[str]:
+    return (DOCS_PATH / "course1_script.txt").read_text(encoding="utf-8").split("\n")
+
+
+@pytest.fixture
+def extractor(tmp_path):
+    return DocumentExtractor(str(tmp_path / "cache"), workers=2, timeout=30)
+
+
+class TestExtractors:
+    """Test the PDF and DOCX text extractors"""
+
+    def test_docx_paragraphs(self, tmp_path):
+        """Test each paragraph becomes one line with its tabs kept"""
+        path = tmp_path / "notes.docx"
+        make_docx(path, ["Course Title: Notes", "a\tb", "", "x < y & z"])
+
+        assert list(extract_docx_paragraphs(str(path))) == [
+            "Course Title: Notes",
+            "a\tb",
+            "",
+            "x < y & z",
+        ]
+
+    def test_pdf_pages(self, tmp_path):
+        """Test the text of every page is extracted in order"""
+        path = tmp_path / "course.pdf"
+        make_pdf(path, [["Course Title: PDF Course", "Lesson 1: Start"], ["Page two"]])
+
+        pages = list(extract_pdf_pages(str(path)))
+
+        assert len(pages) == 2
+        assert pages[0].split("\n")[:2] == [
+            "Course Title: PDF Course",
+            "Lesson 1: Start",
+        ]
+        assert pages[1].strip() == "Page two"
+
+
+class TestDocumentExtractor:
+    """Test cached, parallel extraction of binary course documents"""
+
+    def test_docx_course_parses_like_text(self, tmp_path, extractor, script_lines):
+        """Test a DOCX course yields the same course and chunks as its text"""
+        path = tmp_path / "course1_script.docx"
+        make_docx(path, script_lines)
+        stats = {}
+
+        extracted = extractor.extract_all([str(path)], stats)
+
+        processor = DocumentProcessor(800, 100)
+        text_path = extracted[str(path)].text_path
+        assert processor.process_course_document(
+            text_path, path.name
+        ) == processor.process_course_document(str(DOCS_PATH / "course1_script.txt"))
+        assert stats[".docx"].files == 1
+        assert stats[".docx"].pieces == len(script_lines)
+
+    def test_unchanged_documents_are_not_re_extracted(self, tmp_path, extractor):
+        """Test the content-hash cache serves unchanged and copied documents"""
+        first, copy = tmp_path / "a.docx", tmp_path / "b.docx"
+        make_docx(first, ["Course Title: A", "Lesson 1: One", "Text."])
+        copy.write_bytes(first.read_bytes())
+        extractor.extract_all([str(first), str(copy)], {})
+
+        stats = {}
+        with patch.object(
+            DocumentExtractor, "_extract_in_pool", side_effect=AssertionError
+        ):
+            extracted = extractor.extract_all([str(first), str(copy)], stats)
+
+        assert stats[".docx"].cache_hits == 2
+        assert extracted[str(first)].text_path == extracted[str(copy)].text_path
+
+    def test_timeout_kills_worker(self, tmp_path, extractor, monkeypatch):
+        """Test a hung extraction fails alone while other files still extract"""
+        monkeypatch.setitem(EXTRACTORS, ".slow", slow_extractor)
+        extractor.timeout = 2
+        slow = tmp_path / "hung.slow"
+        slow.write_text("anything")
+        docs = []
+        for i in range(3):
+            docs.append(tmp_path / f"doc{i}.docx")
+            make_docx(docs[-1], [f"Course Title: Doc {i}"])
+        stats = {}
+
+        started = time.perf_counter()
+        extracted = extractor.extract_all([str(slow)] + [str(p) for p in docs], stats)
+
+        assert time.perf_counter() - started < 30
+        assert "timed out" in extracted[str(slow)].error
+        assert all(extracted[str(p)].text_path for p in docs)
+        assert stats[".slow"].failed == 1
+        assert stats[".docx"].files == 3
+
+    def test_corrupt_document_is_reported(self, tmp_path, extractor):
+        """Test a file the extractor cannot read is counted as failed"""
+        path = tmp_path / "broken.docx"
+        path.write_bytes(b"not a zip file")
+        stats = {}
+
+        extracted = extractor.extract_all([str(path)], stats)
+
+        assert extracted[str(path)].error
+        assert stats[".docx"].failed == 1
+        assert not list((tmp_path / "cache").iterdir())
+
+
+class TestExtractionIngestion:
+    """Test binary documents flowing through the ingestion pipeline"""
+
+    def test_pipeline_ingests_docx(self, tmp_path, extractor, script_lines):
+        """Test extracted text is parsed and extraction throughput reported"""
+        docx = tmp_path / "course1_script.docx"
+        make_docx(docx, script_lines)
+        broken = tmp_path / "broken.docx"
+        broken.write_bytes(b"not a zip file")
+        store = Mock()
+        store.embed_documents.side_effect = lambda texts: [[0.0]] * len(texts)
+        pipeline = IngestionPipeline(
+            DocumentProcessor(800, 100), store, workers=2, extractor=extractor
+        )
+
+        stats = pipeline.ingest([str(docx), str(broken)], set())
+
+        course = store.add_course_metadata.call_args.args[0]
+        expected, chunks = DocumentProcessor(800, 100).process_course_document(
+            str(DOCS_PATH / "course1_script.txt")
+        )
+        assert course == expected
+        assert stats.chunks == len(chunks)
+        assert stats.failed == 1
+        assert stats.extraction[".docx"].files == 1
+        assert "docx: 1 extracted" in stats.summary()
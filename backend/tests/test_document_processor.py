@@ -0,0 +1,349 @@
+import os
+import random
+import re
+import tracemalloc
+from pathlib import Path
+from typing import List
+
+import pytest
+
+from document_processor import DocumentProcessor, _scan_lessons
+from models import Course, CourseChunk, Lesson
+
+DOCS_PATH = Path(__file__).parent.parent.parent / "docs"
+
+
+def reference_chunk_text(self, text: str) -> List[str]:
+    """The original nested-loop chunk_text, kept as the equivalence oracle"""
+
+    # Clean up the text
+    text = re.sub(r"\s+", " ", text.strip())  # Normalize whitespace
+
+    # Better sentence splitting that handles abbreviations
+    # This regex looks for periods followed by whitespace and capital letters
+    # but ignores common abbreviations
+    sentence_endings = re.compile(
+        r"(?<!\w\.\w.)(?<![A-Z][a-z]\.)(?<=\.|\!|\?)\s+(?=[A-Z])"
+    )
+    sentences = sentence_endings.split(text)
+
+    # Clean sentences
+    sentences = [s.strip() for s in sentences if s.strip()]
+
+    chunks = []
+    i = 0
+
+    while i < len(sentences):
+        current_chunk = []
+        current_size = 0
+
+        # Build chunk starting from sentence i
+        for j in range(i, len(sentences)):
+            sentence = sentences[j]
+
+            # Calculate size with space
+            space_size = 1 if current_chunk else 0
+            total_addition = len(sentence) + space_size
+
+            # Check if adding this sentence would exceed chunk size
+            if current_size + total_addition > self.chunk_size and current_chunk:
+                break
+
+            current_chunk.append(sentence)
+            current_size += total_addition
+
+        # Add chunk if we have content
+        if current_chunk:
+            chunks.append(" ".join(current_chunk))
+
+            # Calculate overlap for next chunk
+            if hasattr(self, "chunk_overlap") and self.chunk_overlap > 0:
+                # Find how many sentences to overlap
+                overlap_size = 0
+                overlap_sentences = 0
+
+                # Count backwards from end of current chunk
+                for k in range(len(current_chunk) - 1, -1, -1):
+                    sentence_len = len(current_chunk[k]) + (
+                        1 if k < len(current_chunk) - 1 else 0
+                    )
+                    if overlap_size + sentence_len <= self.chunk_overlap:
+                        overlap_size += sentence_len
+                        overlap_sentences += 1
+                    else:
+                        break
+
+                # Move start position considering overlap
+                next_start = i + len(current_chunk) - overlap_sentences
+                i = max(next_start, i + 1)  # Ensure we make progress
+            else:
+                # No overlap - move to next sentence after current chunk
+                i += len(current_chunk)
+        else:
+            # No sentences fit, move to next
+            i += 1
+
+    return chunks
+
+
+def reference_process_course_document(self, file_path: str):
+    """The original whole-file process_course_document, as the oracle"""
+    content = self.read_file(file_path)
+    lines = content.strip().split("\n")
+
+    course_title = os.path.basename(file_path)
+    course_link = None
+    instructor_name = None
+    if lines[0].strip():
+        title_match = re.match(r"^Course Title:\s*(.+)$", lines[0].strip(), re.I)
+        course_title = title_match.group(1).strip() if title_match else lines[0].strip()
+    for line in lines[1:4]:
+        link_match = re.match(r"^Course Link:\s*(.+)$", line.strip(), re.I)
+        instructor_match = re.match(r"^Course Instructor:\s*(.+)$", line.strip(), re.I)
+        if link_match:
+            course_link = link_match.group(1).strip()
+        elif instructor_match:
+            instructor_name = instructor_match.group(1).strip()
+    course = Course(
+        title=course_title, course_link=course_link, instructor=instructor_name
+    )
+
+    course_chunks = []
+    lessons = []  # (number, title, link, content lines)
+    start_index = 4 if len(lines) > 3 and not lines[3].strip() else 3
+    i = start_index
+    while i < len(lines):
+        lesson_match = re.match(r"^Lesson\s+(\d+):\s*(.+)$", lines[i].strip(), re.I)
+        if lesson_match:
+            link = None
+            if i + 1 < len(lines):
+                link_match = re.match(
+                    r"^Lesson Link:\s*(.+)$", lines[i + 1].strip(), re.I
+                )
+                if link_match:
+                    link = link_match.group(1).strip()
+                    i += 1
+            lessons.append(
+                (int(lesson_match.group(1)), lesson_match.group(2).strip(), link, [])
+            )
+        elif lessons:
+            lessons[-1][3].append(lines[i])
+        i += 1
+
+    for position, (number, title, link, content) in enumerate(lessons):
+        lesson_text = "\n".join(content).strip()
+        if not lesson_text:
+            continue
+        course.lessons.append(
+            Lesson(lesson_number=number, title=title, lesson_link=link)
+        )
+        for idx, chunk in enumerate(self.chunk_text(lesson_text)):
+            if position == len(lessons) - 1:
+                chunk = f"Course {course_title} Lesson {number} content: {chunk}"
+            elif idx == 0:
+                chunk = f"Lesson {number} content: {chunk}"
+            course_chunks.append(
+                CourseChunk(
+                    content=chunk,
+                    course_title=course.title,
+                    lesson_number=number,
+                    chunk_index=len(course_chunks),
+                )
+            )
+
+    if not course_chunks and len(lines) > 2:
+        for chunk in self.chunk_text("\n".join(lines[start_index:])):
+            course_chunks.append(
+                CourseChunk(
+                    content=chunk,
+                    course_title=course.title,
+                    chunk_index=len(course_chunks),
+                )
+            )
+    return course, course_chunks
+
+
+def corpus_texts() -> List[str]:
+    return [
+        path.read_text(encoding="utf-8") for path in sorted(DOCS_PATH.glob("*.txt"))
+    ]
+
+
+WORDS = ["alpha", "Beta", "e.g.", "i.e.", "Dr.", "Mr.", "U.S.", "MCP", "x", "Chroma"]
+ENDINGS = [".", "!", "?", "", ","]
+
+
+def random_text(rng: random.Random) -> str:
+    """Text mixing sentence ends, abbreviations, case and odd whitespace"""
+    parts = []
+    for _ in range(rng.randint(0, 120)):
+        word = rng.choice(WORDS)
+        if rng.random() < 0.3:
+            word = word.capitalize() if rng.random() < 0.5 else word.lower()
+        parts.append(word + rng.choice(ENDINGS))
+        parts.append(rng.choice([" ", " ", "  ", "\n", "\t ", " \n\n", "\u00a0"]))
+    if rng.random() < 0.2:
+        parts.append("x" * rng.randint(1, 300))  # A sentence longer than a chunk
+    return "".join(parts)
+
+
+class TestChunkText:
+    """Test the prefix-sum chunker against the original implementation"""
+
+    @pytest.mark.parametrize("chunk_size,chunk_overlap", [(800, 100), (200, 0)])
+    def test_matches_reference_on_docs(self, chunk_size, chunk_overlap):
+        """Test identical chunks for every course script"""
+        processor = DocumentProcessor(chunk_size, chunk_overlap)
+        for text in corpus_texts():
+            assert processor.chunk_text(text) == reference_chunk_text(processor, text)
+
+    def test_matches_reference_on_random_text(self):
+        """Property test: identical chunks for random text and settings"""
+        rng = random.Random(1234)
+        for _ in range(500):
+            processor = DocumentProcessor(rng.randint(1, 120), rng.randint(0, 60))
+            text = random_text(rng)
+            expected = reference_chunk_text(processor, text)
+
+            assert processor.chunk_text(text) == expected
+            lines = text.split("\n")
+            assert list(processor.chunk_text_stream(lines)) == expected
+
+    def test_stream_matches_on_docs(self):
+        """Test chunking file lines lazily gives the same chunks"""
+        processor = DocumentProcessor(800, 100)
+        for path in sorted(DOCS_PATH.glob("*.txt")):
+            with open(path, encoding="utf-8") as file:
+                streamed = list(processor.chunk_text_stream(file))
+            assert streamed == processor.chunk_text(path.read_text(encoding="utf-8"))
+
+    def test_empty_text(self):
+        """Test blank input yields no chunks"""
+        processor = DocumentProcessor(800, 100)
+
+        assert processor.chunk_text(" \n\t ") == []
+        assert list(processor.chunk_text_stream(["", "  "])) == []
+
+
+EDGE_CASES = {
+    "no_lessons": (
+        "Course Title: Plain\nCourse Link: http://x\nInstructor: Y\n\n"
+        "Just text. More Text."
+    ),
+    "leading_blank_lines": (
+        "\n\n  \n   Course Title: Padded\nCourse Link: http://x\n\n"
+        "Lesson 1: A\nBody. Here.\n\n\n"
+    ),
+    "lesson_links": (
+        "T\nL\nI\n\nLesson 0: Intro\nLesson Link: http://a\nOne. Two.\n"
+        "Lesson 1: Next\nLesson Link: http://b\nThree."
+    ),
+    "marker_after_marker": (
+        "T\n\nLesson 1: A\nLesson 2: B\nLesson Link: http://b\nText. More."
+    ),
+    "empty_lessons": "T\nL\nI\n\nLesson 1: A\n  \nLesson 2: B\n",
+    "text_before_lessons": "T\nL\nI\nPreamble. Here.\nLesson 3: C\nBody.",
+    "lower_case_markers": (
+        "T\n\nlesson 1: a\nLESSON LINK: http://l\nBody.\n  Lesson 2:  b  \nMore."
+    ),
+    "crlf": (
+        "Course Title: Win\r\nCourse Link: http://x\r\nCourse Instructor: Z\r\n\r\n"
+        "Lesson 1: A\r\nBody. Text.\r\n"
+    ),
+    "short": "Only a title",
+    "two_lines": "Title\nBody. Here.",
+    "empty": "",
+}
+
+
+def course_files(tmp_path) -> List[Path]:
+    paths = sorted(DOCS_PATH.glob("*.txt"))
+    for name, text in EDGE_CASES.items():
+        path = tmp_path / f"{name}.txt"
+        path.write_bytes(text.encode("utf-8"))
+        paths.append(path)
+    return paths
+
+
+def write_large_course(path: Path, lessons: int, lesson_bytes: int):
+    """Write a synthetic course file of about lessons * lesson_bytes bytes"""
+    rng = random.Random(7)
+    words = ["alpha", "beta", "gamma", "delta", "Retrieval", "Chroma", "MCP"]
+    with open(path, "w", encoding="utf-8") as file:
+        file.write("Course Title: Large\nCourse Link: http://x\n")
+        file.write("Course Instructor: Someone\n\n")
+        for number in range(lessons):
+            file.write(f"Lesson {number}: Part {number}\n")
+            written = 0
+            while written < lesson_bytes:
+                line = " ".join(rng.choices(words, k=12)).capitalize() + ".\n"
+                file.write(line)
+                written += len(line)
+
+
+def reference_scan(lines) -> int:
+    """The original per-line lesson marker check"""
+    markers = 0
+    for line in lines:
+        if re.match(r"^Lesson\s+(\d+):\s*(.+)$", line.strip(), re.IGNORECASE):
+            markers += 1
+    return markers
+
+
+class TestStreamCourseDocument:
+    """Test the line-by-line parser against the original whole-file parser"""
+
+    def test_matches_reference(self, tmp_path):
+        """Test identical course metadata and chunks for docs and edge cases"""
+        processor = DocumentProcessor(120, 20)
+        for path in course_files(tmp_path):
+            expected = reference_process_course_document(processor, str(path))
+
+            assert processor.process_course_document(str(path)) == expected, path.name
+
+    def test_scan_finds_reference_markers(self, tmp_path):
+        """Test the one-pass scan finds every lesson the per-line regex finds"""
+        for path in course_files(tmp_path):
+            lines = path.read_text(encoding="utf-8").split("\n")
+            tokens = list(_scan_lessons(lines))
+
+            lessons = [token for token in tokens if not isinstance(token, str)]
+            assert len(lessons) == reference_scan(lines), path.name
+
+    def test_lessons_are_emitted_as_they_end(self, tmp_path):
+        """Test a lesson's chunks arrive before the next lesson is read"""
+        path = tmp_path / "course.txt"
+        write_large_course(path, lessons=3, lesson_bytes=2000)
+        course, chunks = DocumentProcessor(800, 100).stream_course_document(str(path))
+
+        assert course.title == "Large" and course.lessons == []
+        first = next(chunks)
+        assert first.lesson_number == 0
+        assert [lesson.lesson_number for lesson in course.lessons] == [0]
+
+        rest = list(chunks)
+        assert [lesson.lesson_number for lesson in course.lessons] == [0, 1, 2]
+        assert [chunk.chunk_index for chunk in [first] + rest] == list(
+            range(len(rest) + 1)
+        )
+
+    def test_memory_bounded_by_one_lesson(self, tmp_path):
+        """Test peak memory tracks the lesson size rather than the file size"""
+        path = tmp_path / "large.txt"
+        lesson_bytes = 100_000
+        write_large_course(path, lessons=80, lesson_bytes=lesson_bytes)
+        file_size = path.stat().st_size
+        processor = DocumentProcessor(800, 100)
+
+        tracemalloc.start()
+        try:
+            course, chunks = processor.stream_course_document(str(path))
+            count = sum(1 for _ in chunks)
+            _, peak = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+
+        assert len(course.lessons) == 80
+        assert count > 0
+        assert peak < 10 * lesson_bytes
+        assert peak < file_size / 4
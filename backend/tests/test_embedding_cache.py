@@ -0,0 +1,203 @@
+import threading
+from unittest.mock import Mock, patch
+
+import numpy as np
+
+from embedding_cache import EmbeddingCache
+from hash_embedding import HashEmbeddingFunction
+from models import CourseChunk
+from vector_store import VectorStore
+
+
+class TestEmbeddingCache:
+    """Test cases for the query embedding LRU cache"""
+
+    def test_repeated_texts_embedded_once(self, hash_embedding_function):
+        """Test a cached text is served without calling the model"""
+        cache = EmbeddingCache(hash_embedding_function)
+
+        first = cache(["What is MCP?"])
+        second = cache(["What is MCP?"])
+
+        assert hash_embedding_function.calls == 1
+        np.testing.assert_array_equal(first[0], second[0])
+        assert cache.get_stats()["hit_rate"] == 0.5
+
+    def test_keys_normalize_whitespace(self, hash_embedding_function):
+        """Test texts differing only in whitespace share one entry"""
+        cache = EmbeddingCache(hash_embedding_function)
+
+        cache(["What is  MCP?\n"])
+        cache([" What is MCP?"])
+
+        assert hash_embedding_function.calls == 1
+        assert cache.get_stats()["entries"] == 1
+
+    def test_batch_only_embeds_missing_texts(self, hash_embedding_function):
+        """Test a mixed batch keeps input order and embeds only misses"""
+        inner = Mock(side_effect=hash_embedding_function)
+        cache = EmbeddingCache(inner)
+        cache(["alpha"])
+
+        results = cache(["beta", "alpha", "beta"])
+
+        inner.assert_called_with(["beta"])
+        expected = hash_embedding_function(["beta", "alpha", "beta"])
+        for result, vector in zip(results, expected):
+            np.testing.assert_allclose(result, vector)
+        assert cache.get_stats()["entries"] == 2
+
+    def test_lru_eviction(self, hash_embedding_function):
+        """Test the least recently used text is evicted when full"""
+        cache = EmbeddingCache(hash_embedding_function, max_entries=2)
+        cache(["a"])
+        cache(["b"])
+        cache(["a"])
+        cache(["c"])
+
+        calls = hash_embedding_function.calls
+        cache(["a"])
+        cache(["b"])
+
+        assert hash_embedding_function.calls == calls + 1
+        assert cache.get_stats()["entries"] == 2
+
+    def test_stats_report_memory(self, hash_embedding_function):
+        """Test memory use grows with the number of cached vectors"""
+        cache = EmbeddingCache(hash_embedding_function)
+        cache(["one"])
+        single = cache.get_stats()["memory_bytes"]
+        cache(["two"])
+
+        assert single >= hash_embedding_function.dim * 4
+        assert cache.get_stats()["memory_bytes"] > single
+
+    def test_uncached_embedding_bypasses_cache(self, hash_embedding_function):
+        """Test bulk document embedding leaves the cache untouched"""
+        cache = EmbeddingCache(hash_embedding_function)
+
+        cache.embed_uncached(["chunk one", "chunk two"])
+
+        assert cache.get_stats()["entries"] == 0
+
+    def test_concurrent_lookups(self, hash_embedding_function):
+        """Test concurrent callers see consistent vectors"""
+        cache = EmbeddingCache(hash_embedding_function, max_entries=8)
+        texts = [f"query {i % 12}" for i in range(400)]
+        results = {}
+
+        def worker(offset):
+            for text in texts[offset::4]:
+                results.setdefault(text, []).append(cache([text])[0])
+
+        threads = [threading.Thread(target=worker, args=(i,)) for i in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        for vectors in results.values():
+            for vector in vectors:
+                np.testing.assert_array_equal(vector, vectors[0])
+        assert cache.get_stats()["entries"] <= 8
+
+    def test_persists_across_restarts(self, hash_embedding_function, tmp_path):
+        """Test a saved cache is loaded by a new instance"""
+        path = str(tmp_path / "embeddings.npz")
+        cache = EmbeddingCache(hash_embedding_function, cache_path=path)
+        original = cache(["persist me"])[0]
+        cache.save()
+
+        reloaded = EmbeddingCache(hash_embedding_function, cache_path=path)
+        calls = hash_embedding_function.calls
+
+        np.testing.assert_array_equal(reloaded(["persist me"])[0], original)
+        assert hash_embedding_function.calls == calls
+
+    def test_cache_of_another_model_is_ignored(self, tmp_path):
+        """Test vectors saved for another model name or size are not loaded"""
+        path = str(tmp_path / "embeddings.npz")
+        cache = EmbeddingCache(
+            HashEmbeddingFunction(dim=64), cache_path=path, model_name="small"
+        )
+        cache(["persist me"])
+        cache.save()
+
+        renamed = EmbeddingCache(
+            HashEmbeddingFunction(dim=64), cache_path=path, model_name="large"
+        )
+        resized = EmbeddingCache(
+            HashEmbeddingFunction(dim=128), cache_path=path, model_name="small"
+        )
+        same = EmbeddingCache(
+            HashEmbeddingFunction(dim=64), cache_path=path, model_name="small"
+        )
+
+        assert renamed.get_stats()["entries"] == 0
+        assert resized.get_stats()["entries"] == 0
+        assert len(resized(["persist me"])[0]) == 128
+        assert same.get_stats()["entries"] == 1
+
+
+class TestVectorStoreEmbeddingCache:
+    """Test VectorStore routes catalog and content queries through one cache"""
+
+    def test_repeated_search_hits_cache(self, vector_store, hash_embedding_function):
+        """Test the same question is embedded once across searches"""
+        vector_store.add_course_content(
+            [
+                CourseChunk(
+                    content="MCP servers expose tools",
+                    course_title="MCP",
+                    lesson_number=1,
+                    chunk_index=0,
+                )
+            ]
+        )
+        vector_store.search("What are MCP servers?")
+        calls = hash_embedding_function.calls
+
+        results = vector_store.search("What are  MCP servers?")
+
+        assert results.documents == ["MCP servers expose tools"]
+        assert hash_embedding_function.calls == calls
+        assert vector_store.get_embedding_cache_stats()["hits"] >= 1
+
+    def test_ingested_chunks_not_cached(self, vector_store):
+        """Test adding content does not fill the query cache"""
+        vector_store.add_course_content(
+            [
+                CourseChunk(
+                    content=f"chunk {i}",
+                    course_title="MCP",
+                    lesson_number=1,
+                    chunk_index=i,
+                )
+                for i in range(5)
+            ]
+        )
+
+        assert vector_store.get_embedding_cache_stats()["entries"] == 0
+
+    def test_cache_path_from_store(self, tmp_path, hash_embedding_function):
+        """Test the store saves and reloads its cache from the configured path"""
+        cache_path = str(tmp_path / "embeddings.npz")
+        with patch(
+            "chromadb.utils.embedding_functions.SentenceTransformerEmbeddingFunction",
+            return_value=hash_embedding_function,
+        ):
+            store = VectorStore(
+                str(tmp_path / "chroma"),
+                "all-MiniLM-L6-v2",
+                embedding_cache_path=cache_path,
+            )
+            store.embed_query("warm start")
+            store.save_embedding_cache()
+
+            reopened = VectorStore(
+                str(tmp_path / "chroma"),
+                "all-MiniLM-L6-v2",
+                embedding_cache_path=cache_path,
+            )
+
+        assert reopened.get_embedding_cache_stats()["entries"] == 1
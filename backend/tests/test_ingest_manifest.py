@@ -0,0 +1,281 @@
+import os
+import shutil
+from pathlib import Path
+from unittest.mock import patch
+
+import pytest
+
+from document_processor import DocumentProcessor
+from ingest_manifest import IngestManifest
+from ingestion import IngestionPipeline
+from vector_store import VectorStore
+
+DOCS_PATH = Path(__file__).parent.parent.parent / "docs"
+
+
+@pytest.fixture
+def docs_folder(tmp_path):
+    """A writable copy of the bundled course scripts"""
+    folder = tmp_path / "docs"
+    shutil.copytree(DOCS_PATH, folder)
+    return folder
+
+
+@pytest.fixture
+def make_store(tmp_path, hash_embedding_function):
+    """Factory for vector stores sharing the offline embedding function"""
+
+    def factory(name):
+        with patch(
+            "chromadb.utils.embedding_functions.SentenceTransformerEmbeddingFunction",
+            return_value=hash_embedding_function,
+        ):
+            return VectorStore(str(tmp_path / name), "all-MiniLM-L6-v2")
+
+    return factory
+
+
+def sync(store, manifest, folder):
+    """Run one incremental ingestion of a folder"""
+    pipeline = IngestionPipeline(DocumentProcessor(800, 100), store, workers=1)
+    file_paths = [str(folder / name) for name in sorted(os.listdir(folder))]
+    return pipeline.ingest(
+        file_paths,
+        set(store.get_existing_course_titles()),
+        manifest=manifest,
+        folder_path=str(folder),
+    )
+
+
+def stored_content(store):
+    """Everything stored in the content collection, ordered by id"""
+    results = store.course_content.get(include=["documents", "metadatas"])
+    return sorted(
+        (id_, document, sorted(metadata.items()))
+        for id_, document, metadata in zip(
+            results["ids"], results["documents"], results["metadatas"]
+        )
+    )
+
+
+def edit_last_sentence(path):
+    """Change the final sentence of a course script in place"""
+    text = path.read_text(encoding="utf-8").rstrip()
+    path.write_text(text + " This sentence was added later.\n", encoding="utf-8")
+
+
+class TestIncrementalIngestion:
+    """Test re-indexing only what changed between runs"""
+
+    def test_unchanged_files_skipped_without_parsing(
+        self, make_store, docs_folder, tmp_path
+    ):
+        """Test a second run parses and embeds nothing"""
+        store = make_store("chroma")
+        manifest = IngestManifest(str(tmp_path / "manifest.json"))
+        first = sync(store, manifest, docs_folder)
+
+        with patch("ingestion.parse_course_file") as parse:
+            second = sync(store, IngestManifest(manifest.path), docs_folder)
+
+        assert first.courses == 4
+        assert second.unchanged == 4
+        assert second.files == 0
+        assert second.embeddings == 0
+        parse.assert_not_called()
+
+    def test_touched_file_is_not_reindexed(self, make_store, docs_folder, tmp_path):
+        """Test a new mtime with identical content is detected by hash"""
+        store = make_store("chroma")
+        manifest = IngestManifest(str(tmp_path / "manifest.json"))
+        sync(store, manifest, docs_folder)
+
+        path = docs_folder / "course2_script.txt"
+        os.utime(path, (1, 1))
+        stats = sync(store, manifest, docs_folder)
+
+        assert stats.unchanged == 4
+        assert manifest.get(str(path)).mtime == 1
+
+    def test_edited_file_reembeds_only_changed_chunks(
+        self, make_store, docs_folder, tmp_path
+    ):
+        """Test an edit re-embeds the differing chunks and matches a full rebuild"""
+        store = make_store("chroma")
+        manifest = IngestManifest(str(tmp_path / "manifest.json"))
+        first = sync(store, manifest, docs_folder)
+
+        edit_last_sentence(docs_folder / "course3_script.txt")
+        stats = sync(store, manifest, docs_folder)
+
+        reference = make_store("reference")
+        sync(reference, IngestManifest(str(tmp_path / "ref.json")), docs_folder)
+        assert stats.files == 1
+        assert stats.unchanged == 3
+        assert 0 < stats.embeddings < first.embeddings / 4
+        assert stored_content(store) == stored_content(reference)
+
+    def test_deleted_file_chunks_removed(self, make_store, docs_folder, tmp_path):
+        """Test removing a file deletes its chunks and catalog entry"""
+        store = make_store("chroma")
+        manifest = IngestManifest(str(tmp_path / "manifest.json"))
+        sync(store, manifest, docs_folder)
+        title = store.get_existing_course_titles()[0]
+        path = next(
+            docs_folder / name
+            for name in os.listdir(docs_folder)
+            if manifest.get(str(docs_folder / name)).course_title == title
+        )
+
+        path.unlink()
+        stats = sync(store, manifest, docs_folder)
+
+        assert stats.removed == 1
+        assert title not in store.get_existing_course_titles()
+        assert store.get_course_chunk_ids(title) == []
+        assert manifest.get(str(path)) is None
+
+    def test_duplicate_takes_over_deleted_course(
+        self, make_store, docs_folder, tmp_path
+    ):
+        """Test a file duplicating a course provides it once the original is gone"""
+        shutil.copy(docs_folder / "course1_script.txt", docs_folder / "zz_copy.txt")
+        store = make_store("chroma")
+        manifest = IngestManifest(str(tmp_path / "manifest.json"))
+        first = sync(store, manifest, docs_folder)
+        title = manifest.get(str(docs_folder / "course1_script.txt")).course_title
+        chunk_count = len(store.get_course_chunk_ids(title))
+
+        (docs_folder / "course1_script.txt").unlink()
+        stats = sync(store, manifest, docs_folder)
+
+        assert first.skipped == 1
+        assert stats.removed == 1
+        assert title in store.get_existing_course_titles()
+        assert len(store.get_course_chunk_ids(title)) == chunk_count
+        assert manifest.owner_of(title) == str(docs_folder / "zz_copy.txt")
+
+    def test_adopts_data_indexed_without_manifest(
+        self, make_store, docs_folder, tmp_path
+    ):
+        """Test an existing store is reconciled without re-embedding"""
+        store = make_store("chroma")
+        pipeline = IngestionPipeline(DocumentProcessor(800, 100), store, workers=1)
+        pipeline.ingest(
+            [str(docs_folder / name) for name in os.listdir(docs_folder)], set()
+        )
+
+        stats = sync(
+            store, IngestManifest(str(tmp_path / "manifest.json")), docs_folder
+        )
+
+        assert stats.files == 4
+        assert stats.embeddings == 0
+
+    def test_manifest_round_trip(self, tmp_path, docs_folder, make_store):
+        """Test the manifest persists path, size, hash and chunk ids"""
+        manifest = IngestManifest(str(tmp_path / "manifest.json"))
+        sync(make_store("chroma"), manifest, docs_folder)
+
+        reloaded = IngestManifest(manifest.path)
+        entry = reloaded.get(str(docs_folder / "course4_script.txt"))
+
+        assert len(reloaded) == 4
+        assert entry.size == (docs_folder / "course4_script.txt").stat().st_size
+        assert len(entry.content_hash) == 64
+        assert entry.chunk_ids
+
+    def test_manifest_stored_next_to_chroma_path(self):
+        """Test the manifest file sits beside the ChromaDB directory"""
+        manifest = IngestManifest.for_chroma_path("./chroma_db/")
+
+        assert manifest.path == "./chroma_db.manifest.json"
+
+
+def chunk_texts(path):
+    """Contents of the chunks a course script is split into"""
+    return {
+        chunk.content
+        for chunk in DocumentProcessor(800, 100).process_course_document(str(path))[1]
+    }
+
+
+def assert_consistent(store, manifest, folder):
+    """Check stored chunks and catalog entries are exactly what the manifest records"""
+    entries = [e for e in manifest.entries_under(str(folder)) if e.chunk_ids]
+    assert set(store.course_content.get()["ids"]) == {
+        id_ for entry in entries for id_ in entry.chunk_ids
+    }
+    assert set(store.get_existing_course_titles()) == {
+        entry.course_title for entry in entries
+    }
+
+
+class TestIngestionFailures:
+    """Test a failed course is never recorded and leaves no chunks behind"""
+
+    def ingest(self, store, manifest, folder):
+        pipeline = IngestionPipeline(
+            DocumentProcessor(800, 100),
+            store,
+            workers=1,
+            embedding_batch_size=7,
+            upsert_batch_size=20,
+        )
+        file_paths = [str(folder / name) for name in sorted(os.listdir(folder))]
+        return pipeline.ingest(
+            file_paths, set(), manifest=manifest, folder_path=str(folder)
+        )
+
+    def test_failed_batch_is_retried(self, make_store, docs_folder, tmp_path):
+        """Test a batch mixing two courses is retried for the earlier course"""
+        store = make_store("chroma")
+        manifest = IngestManifest(str(tmp_path / "manifest.json"))
+        embed = store.embed_documents
+        second_course = chunk_texts(docs_folder / "course2_script.txt")
+        failures = []
+
+        def flaky_embed(texts):
+            if not failures and second_course.intersection(texts):
+                failures.append(texts)
+                raise RuntimeError("embedding service unavailable")
+            return embed(texts)
+
+        store.embed_documents = flaky_embed
+        stats = self.ingest(store, manifest, docs_folder)
+
+        # The failed batch also held the first course's last chunks
+        assert not chunk_texts(docs_folder / "course1_script.txt").isdisjoint(
+            failures[0]
+        )
+        assert (stats.courses, stats.failed) == (3, 1)
+        assert manifest.get(str(docs_folder / "course2_script.txt")) is None
+        assert_consistent(store, manifest, docs_folder)
+
+        store.embed_documents = embed
+        retry = sync(store, manifest, docs_folder)
+        reference = make_store("reference")
+        sync(reference, IngestManifest(str(tmp_path / "ref.json")), docs_folder)
+        assert (retry.files, retry.courses) == (1, 1)
+        assert stored_content(store) == stored_content(reference)
+
+    def test_failed_course_leaves_no_chunks(self, make_store, docs_folder, tmp_path):
+        """Test chunks of a course that cannot be stored are removed again"""
+        store = make_store("chroma")
+        manifest = IngestManifest(str(tmp_path / "manifest.json"))
+        embed = store.embed_documents
+        broken_course = chunk_texts(docs_folder / "course3_script.txt")
+
+        def failing_embed(texts):
+            if broken_course.intersection(texts):
+                raise RuntimeError("cannot embed")
+            return embed(texts)
+
+        store.embed_documents = failing_embed
+        stats = self.ingest(store, manifest, docs_folder)
+
+        title = "Advanced Retrieval for AI with Chroma"
+        assert stats.failed >= 1
+        assert title not in store.get_existing_course_titles()
+        assert store.get_course_chunk_ids(title) == []
+        assert_consistent(store, manifest, docs_folder)
@@ -0,0 +1,184 @@
+import os
+import shutil
+from pathlib import Path
+from unittest.mock import Mock, patch
+
+import pytest
+
+from document_processor import DocumentProcessor
+from ingestion import IngestionPipeline, parse_course_file, stream_course_file
+from vector_store import VectorStore
+
+DOCS_PATH = Path(__file__).parent.parent.parent / "docs"
+
+
+@pytest.fixture
+def course_files(tmp_path):
+    """The bundled course scripts plus a copy of one of them"""
+    folder = tmp_path / "docs"
+    shutil.copytree(DOCS_PATH, folder)
+    shutil.copy(folder / "course1_script.txt", folder / "course1_copy.txt")
+    return [str(folder / name) for name in sorted(os.listdir(folder))]
+
+
+def ingest_sequentially(vector_store, file_paths):
+    """The original one-file-at-a-time ingestion loop, used as the reference"""
+    processor = DocumentProcessor(800, 100)
+    existing = set()
+    for file_path in file_paths:
+        course, chunks = processor.process_course_document(file_path)
+        if course.title not in existing:
+            vector_store.add_course_metadata(course)
+            vector_store.add_course_content(chunks)
+            existing.add(course.title)
+
+
+def stored_content(vector_store):
+    """Everything stored in the content collection, ordered by id"""
+    results = vector_store.course_content.get(
+        include=["documents", "metadatas", "embeddings"]
+    )
+    return sorted(
+        (id_, doc, sorted(meta.items()), embedding.tobytes())
+        for id_, doc, meta, embedding in zip(
+            results["ids"],
+            results["documents"],
+            results["metadatas"],
+            results["embeddings"],
+        )
+    )
+
+
+class TestIngestionPipeline:
+    """Test cases for the batched ingestion pipeline"""
+
+    @pytest.mark.parametrize("stream_threshold_bytes", [None, 0])
+    @pytest.mark.parametrize("workers", [1, 2])
+    def test_matches_sequential_ingestion(
+        self,
+        vector_store,
+        tmp_path,
+        hash_embedding_function,
+        course_files,
+        workers,
+        stream_threshold_bytes,
+    ):
+        """Test pipelined ingestion stores exactly what the sequential loop stores"""
+        with patch(
+            "chromadb.utils.embedding_functions.SentenceTransformerEmbeddingFunction",
+            return_value=hash_embedding_function,
+        ):
+            reference = VectorStore(str(tmp_path / "reference"), "all-MiniLM-L6-v2")
+        ingest_sequentially(reference, course_files)
+
+        pipeline = IngestionPipeline(
+            DocumentProcessor(800, 100),
+            vector_store,
+            workers=workers,
+            embedding_batch_size=7,
+            upsert_batch_size=20,
+            stream_threshold_bytes=stream_threshold_bytes,
+        )
+        stats = pipeline.ingest(course_files, set())
+
+        assert stats.courses == 4
+        assert stats.skipped == 1
+        assert stored_content(vector_store) == stored_content(reference)
+        assert (
+            vector_store.course_catalog.get()["metadatas"]
+            == reference.course_catalog.get()["metadatas"]
+        )
+
+    def test_batches_are_bounded(self, course_files):
+        """Test embedding and storage calls never exceed their batch sizes"""
+        store = Mock()
+        store.embed_documents.side_effect = lambda texts: [[0.0]] * len(texts)
+        pipeline = IngestionPipeline(
+            DocumentProcessor(800, 100),
+            store,
+            workers=1,
+            embedding_batch_size=16,
+            upsert_batch_size=40,
+        )
+
+        stats = pipeline.ingest(course_files[:2], set())
+
+        embed_sizes = [len(c.args[0]) for c in store.embed_documents.call_args_list]
+        upsert_sizes = [len(c.args[0]) for c in store.add_course_content.call_args_list]
+        assert max(embed_sizes) <= 16
+        assert max(upsert_sizes) <= 40
+        assert sum(embed_sizes) == sum(upsert_sizes) == stats.chunks
+        assert stats.embeddings == stats.chunks
+
+    def test_large_files_are_streamed(self, course_files):
+        """Test files over the threshold are parsed lazily in-process"""
+        store = Mock()
+        store.embed_documents.side_effect = lambda texts: [[0.0]] * len(texts)
+        store.chunk_id.side_effect = lambda chunk: str(chunk.chunk_index)
+        pipeline = IngestionPipeline(
+            DocumentProcessor(800, 100),
+            store,
+            workers=2,
+            embedding_batch_size=16,
+            stream_threshold_bytes=os.path.getsize(course_files[0]),
+        )
+
+        with patch(
+            "ingestion.stream_course_file", wraps=stream_course_file
+        ) as streamed:
+            stats = pipeline.ingest(course_files, set())
+
+        streamed_paths = [c.args[0] for c in streamed.call_args_list]
+        assert course_files[0] in streamed_paths
+        assert all(
+            os.path.getsize(path) >= pipeline.stream_threshold_bytes
+            for path in streamed_paths
+        )
+        # Metadata is stored once the streamed course's lessons are known
+        stored_courses = [c.args[0] for c in store.add_course_metadata.call_args_list]
+        assert all(course.lessons for course in stored_courses)
+        assert stats.courses == 4
+
+    def test_skips_existing_titles(self, course_files):
+        """Test courses already in the store are neither embedded nor stored"""
+        processor = DocumentProcessor(800, 100)
+        titles = {
+            processor.process_course_document(path)[0].title for path in course_files
+        }
+        store = Mock()
+
+        stats = IngestionPipeline(processor, store, workers=1).ingest(
+            course_files, set(titles)
+        )
+
+        assert stats.courses == 0
+        assert stats.skipped == len(course_files)
+        store.add_course_metadata.assert_not_called()
+        store.embed_documents.assert_not_called()
+
+    def test_parse_errors_are_reported(self, tmp_path):
+        """Test a file that fails to parse is counted and does not stop the run"""
+        missing = str(tmp_path / "missing.txt")
+
+        parsed = parse_course_file(missing, 800, 100)
+        stats = IngestionPipeline(
+            DocumentProcessor(800, 100), Mock(), workers=1
+        ).ingest([missing], set())
+
+        assert parsed.error
+        assert stats.failed == 1
+
+    def test_stats_report_throughput(self, course_files):
+        """Test per-stage throughput figures are filled in"""
+        store = Mock()
+        store.embed_documents.side_effect = lambda texts: [[0.0]] * len(texts)
+
+        stats = IngestionPipeline(DocumentProcessor(800, 100), store, workers=1).ingest(
+            course_files, set()
+        )
+
+        assert stats.files == len(course_files)
+        assert stats.files_per_second > 0
+        assert stats.chunks_per_second > 0
+        assert stats.embeddings_per_second > 0
+        assert "files/s" in stats.summary()
@@ -0,0 +1,174 @@
+import threading
+import time
+
+import pytest
+
+from lexical_index import BM25Index, reciprocal_rank_fusion, tokenize
+from models import CourseChunk
+from vector_store import VectorStore
+
+CHUNKS = [
+    ("a_0", "Lesson 1 introduces the MCP protocol and its client", "A", 1),
+    ("a_1", "Servers expose tools and resources over MCP", "A", 2),
+    ("b_0", "Retrieval with Chroma uses embeddings for semantic search", "B", 1),
+    ("b_1", "Query expansion improves retrieval recall", "B", 2),
+    ("c_0", "Prompt caching with error code ERR_4012 explained", "C", None),
+]
+
+
+def metadata(course_title, lesson_number):
+    return {"course_title": course_title, "lesson_number": lesson_number}
+
+
+@pytest.fixture
+def index():
+    index = BM25Index()
+    index.add(
+        [id_ for id_, *_ in CHUNKS],
+        [text for _, text, *_ in CHUNKS],
+        [metadata(course, lesson) for _, _, course, lesson in CHUNKS],
+    )
+    return index
+
+
+def ids(results):
+    return [id_ for id_, _ in results]
+
+
+class TestBM25Index:
+    """Test cases for the BM25 inverted index"""
+
+    def test_tokenize_keeps_identifiers(self):
+        """Test identifiers and acronyms survive tokenization whole"""
+        assert tokenize("What is ERR_4012 in MCP?") == ["err_4012", "mcp"]
+
+    def test_exact_terms_rank_first(self, index):
+        """Test rare exact terms find the chunk that contains them"""
+        assert ids(index.search("err_4012", 3)) == ["c_0"]
+        assert ids(index.search("MCP client", 3))[0] == "a_0"
+
+    def test_filters(self, index):
+        """Test course and lesson filters restrict the ranking"""
+        assert set(ids(index.search("mcp retrieval", 5, course_title="B"))) == {
+            "b_0",
+            "b_1",
+        }
+        assert ids(index.search("mcp", 5, lesson_number=2)) == ["a_1"]
+        assert index.search("mcp", 5, course_title="Unknown") == []
+
+    def test_incremental_update(self, index):
+        """Test replacing and removing chunks updates the postings"""
+        index.add(["a_0"], ["Now about transformers"], [metadata("A", 1)])
+        index.remove(["a_1"])
+
+        assert index.search("mcp", 5) == []
+        assert ids(index.search("transformers", 5)) == ["a_0"]
+        assert len(index) == 4
+
+    def test_persists_round_trip(self, index, tmp_path):
+        """Test a saved index ranks identically after loading"""
+        index.save(str(tmp_path / "index.json"))
+        loaded = BM25Index()
+
+        assert loaded.load(str(tmp_path / "index.json"))
+        assert loaded.search("retrieval mcp", 5) == index.search("retrieval mcp", 5)
+        assert loaded.search("code", 5, lesson_number=None) == index.search("code", 5)
+
+    def test_reciprocal_rank_fusion(self):
+        """Test items ranked well by both lists come first"""
+        fused = reciprocal_rank_fusion([["x", "y", "z"], ["z", "x"]], k=60)
+
+        assert ids(fused) == ["x", "z", "y"]
+
+
+class TestHybridSearch:
+    """Test hybrid search through the vector store"""
+
+    @pytest.fixture
+    def store(self, vector_store):
+        chunks = [
+            CourseChunk(
+                content=text,
+                course_title=course,
+                lesson_number=lesson,
+                chunk_index=i,
+            )
+            for i, (_, text, course, lesson) in enumerate(CHUNKS)
+        ]
+        vector_store.add_course_content(chunks)
+        return vector_store
+
+    def test_hybrid_finds_exact_identifier(self, store):
+        """Test an identifier query puts the matching chunk first"""
+        results = store.search("ERR_4012", limit=2, mode="hybrid")
+
+        assert "ERR_4012" in results.documents[0]
+        assert results.distances == sorted(results.distances)
+
+    def test_hybrid_honours_filters(self, store):
+        """Test the lesson filter applies to both rankings"""
+        results = store.search("MCP", lesson_number=2, limit=5, mode="hybrid")
+
+        assert results.metadata
+        assert all(meta["lesson_number"] == 2 for meta in results.metadata)
+
+    def test_index_rebuilt_from_chroma(self, store):
+        """Test a missing index file is rebuilt from the stored chunks"""
+        store.lexical_index.clear()
+        store._lexical_index_loaded = False
+
+        assert store.search("ERR_4012", limit=1, mode="hybrid").documents
+        assert len(store.lexical_index) == len(CHUNKS)
+
+    def test_concurrent_first_use_rebuilds_once(self, store):
+        """Test threads racing to load the index trigger a single rebuild"""
+        store.lexical_index.clear()
+        store._lexical_index_loaded = False
+        rebuild = store._rebuild_lexical_index
+        rebuilds = []
+
+        def slow_rebuild():
+            rebuilds.append(threading.get_ident())
+            time.sleep(0.05)
+            rebuild()
+
+        store._rebuild_lexical_index = slow_rebuild
+        threads = [threading.Thread(target=store._get_lexical_index) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        assert len(rebuilds) == 1
+        assert len(store.lexical_index) == len(CHUNKS)
+
+    def test_deleted_chunks_leave_index(self, store):
+        """Test deleting content also drops it from the lexical index"""
+        store.delete_course_content(["C_4"])
+
+        assert store.lexical_index.search("err_4012", 5) == []
+
+    def test_unsaved_rewrite_rebuilds_index(self, tmp_path, hash_embedding_function):
+        """Test chunks rewritten after the last save are re-indexed on restart"""
+        chroma_path = str(tmp_path / "chroma")
+
+        def open_store():
+            return VectorStore(
+                chroma_path,
+                "all-MiniLM-L6-v2",
+                lexical_index_path=BM25Index.path_for(chroma_path),
+                embedding_function=hash_embedding_function,
+            )
+
+        chunk = CourseChunk(content="About MCP", course_title="A", chunk_index=0)
+        store = open_store()
+        store.add_course_content([chunk])
+        store.save_lexical_index()
+        # Same chunk ID and count, but the process dies before saving again
+        chunk.content = "About transformers"
+        store.add_course_content([chunk])
+
+        reopened = open_store()
+
+        assert reopened.search("transformers", limit=1, mode="hybrid").documents
+        assert reopened.lexical_index.search("mcp", 5) == []
@@ -0,0 +1,292 @@
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import List, Tuple
+from unittest.mock import Mock
+
+import pytest
+from google.ai import generativelanguage as glm
+from google.api_core import exceptions as api_exceptions
+
+from ai_generator import AIGenerator
+from llm_client import (
+    CircuitBreaker,
+    CircuitOpenError,
+    LLMUnavailableError,
+    ResilientLLMClient,
+)
+from search_tools import ToolContext
+
+
+class FakeGeminiServer:
+    """Local stand-in for the Gemini REST API that injects latency and errors"""
+
+    def __init__(self):
+        # (delay seconds, HTTP status) for upcoming requests, then fast 200s
+        self.script: List[Tuple[float, int]] = []
+        self.slow_every = 0  # Delay every Nth request by slow_delay, 0 for never
+        self.slow_delay = 0.0
+        self.requests = 0
+        self._lock = threading.Lock()
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_POST(self):
+                self.rfile.read(int(self.headers.get("Content-Length", 0)))
+                delay, status = server._next()
+                time.sleep(delay)
+                if status == 200:
+                    body = {
+                        "candidates": [
+                            {
+                                "content": {"role": "model", "parts": [{"text": "OK"}]},
+                                "finishReason": "STOP",
+                            }
+                        ]
+                    }
+                else:
+                    body = {"error": {"code": status, "message": "injected"}}
+                data = json.dumps(body).encode()
+                try:
+                    self.send_response(status)
+                    self.send_header("Content-Type", "application/json")
+                    self.send_header("Content-Length", str(len(data)))
+                    self.end_headers()
+                    self.wfile.write(data)
+                except OSError:
+                    pass  # The client gave up on this request
+
+            def log_message(self, *args):
+                pass
+
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self._server.daemon_threads = True
+        self.url = f"http://127.0.0.1:{self._server.server_address[1]}"
+        threading.Thread(target=self._server.serve_forever, daemon=True).start()
+
+    def _next(self) -> Tuple[float, int]:
+        with self._lock:
+            self.requests += 1
+            if self.script:
+                return self.script.pop(0)
+            if self.slow_every and self.requests % self.slow_every == 0:
+                return self.slow_delay, 200
+            return 0.0, 200
+
+    def client(self) -> glm.GenerativeServiceClient:
+        """SDK client sending its requests to this server"""
+        return glm.GenerativeServiceClient(
+            transport="rest",
+            client_options={"api_endpoint": self.url, "api_key": "test_key"},
+        )
+
+    def close(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+
+def make_generator(server: FakeGeminiServer, client: ResilientLLMClient):
+    generator = AIGenerator(api_key="test_key", model="gemini-2.5-flash", client=client)
+    generator.model._client = server.client()
+    return generator
+
+
+class TestResilientLLMClient:
+    """Test deadlines, retries and hedging around a model call"""
+
+    def test_retries_transient_errors(self):
+        """Test overload errors are retried and the first success returned"""
+        client = ResilientLLMClient(max_retries=2, backoff_base=0.01)
+        func = Mock(
+            side_effect=[
+                api_exceptions.ServiceUnavailable("overloaded"),
+                api_exceptions.TooManyRequests("slow down"),
+                "answer",
+            ]
+        )
+
+        assert client.call(func) == "answer"
+        assert func.call_count == 3
+        assert client.stats()["retries"] == 2
+
+    def test_bad_requests_are_not_retried(self):
+        """Test a non-retryable error surfaces unchanged after one attempt"""
+        client = ResilientLLMClient(max_retries=2, backoff_base=0.01)
+        func = Mock(side_effect=api_exceptions.InvalidArgument("bad schema"))
+
+        with pytest.raises(api_exceptions.InvalidArgument):
+            client.call(func)
+        assert func.call_count == 1
+        assert client.breaker.failures == 0
+
+    def test_deadline_bounds_slow_calls(self):
+        """Test a hung call gives up at the deadline, passing it as timeout"""
+        client = ResilientLLMClient(timeout=0.2, max_retries=3)
+        timeouts = []
+
+        def hang(timeout):
+            timeouts.append(timeout)
+            time.sleep(1)
+
+        started = time.perf_counter()
+        with pytest.raises(LLMUnavailableError):
+            client.call(hang)
+
+        assert time.perf_counter() - started < 0.5
+        assert len(timeouts) == 1 and 0 < timeouts[0] <= 0.2
+
+    def test_hedged_request_beats_slow_attempt(self):
+        """Test a second request is sent once an attempt exceeds the p95"""
+        client = ResilientLLMClient(hedge=True, hedge_min_samples=5)
+        for _ in range(5):
+            client.call(lambda timeout: "warm-up")
+        delays = iter([1.0, 0.0])
+
+        def call(timeout):
+            time.sleep(next(delays))
+            return "answer"
+
+        started = time.perf_counter()
+        assert client.call(call) == "answer"
+
+        assert time.perf_counter() - started < 0.5
+        stats = client.stats()
+        assert stats["hedged"] == 1 and stats["hedge_wins"] == 1
+
+    def test_streams_are_not_hedged(self):
+        """Test calls made with hedge=False never send a second request"""
+        client = ResilientLLMClient(hedge=True, hedge_min_samples=1)
+        client.call(lambda timeout: "warm-up")
+        func = Mock(side_effect=lambda timeout: time.sleep(0.05) or "stream")
+
+        assert client.call(func, hedge=False) == "stream"
+        assert func.call_count == 1
+
+
+class TestCircuitBreaker:
+    """Test the breaker opening, failing fast and recovering"""
+
+    def test_opens_after_failures_and_recovers(self):
+        """Test failed calls open the circuit until a trial call succeeds"""
+        now = [0.0]
+        breaker = CircuitBreaker(2, reset_seconds=30, clock=lambda: now[0])
+        client = ResilientLLMClient(max_retries=0, breaker=breaker)
+        failing = Mock(side_effect=ConnectionError("refused"))
+
+        for _ in range(2):
+            with pytest.raises(LLMUnavailableError):
+                client.call(failing)
+        with pytest.raises(CircuitOpenError):
+            client.call(failing)
+        assert failing.call_count == 2
+
+        now[0] += 31
+        assert breaker.allow()
+        assert not breaker.allow()  # Only one trial call at a time
+        breaker.record_success()
+
+        assert client.call(lambda timeout: "answer") == "answer"
+        assert client.stats()["state"] == "closed"
+        assert client.stats()["short_circuited"] == 1
+
+
+class TestFakeGeminiServer:
+    """Test the generator against a local server injecting latency and errors"""
+
+    def test_recovers_from_injected_errors(self, fake_gemini):
+        """Test 503 and 429 responses are retried until the server answers"""
+        fake_gemini.script = [(0.0, 503), (0.0, 429)]
+        generator = make_generator(
+            fake_gemini, ResilientLLMClient(max_retries=2, backoff_base=0.01)
+        )
+
+        assert generator.generate_response("What is MCP?") == "OK"
+        assert fake_gemini.requests == 3
+
+    def test_unhealthy_upstream_fails_fast(self, fake_gemini):
+        """Test a hung server hits the deadline, then the breaker stops calls"""
+        fake_gemini.script = [(2.0, 200)] * 2
+        breaker = CircuitBreaker(failure_threshold=2)
+        generator = make_generator(
+            fake_gemini,
+            ResilientLLMClient(timeout=0.3, max_retries=0, breaker=breaker),
+        )
+
+        for _ in range(2):
+            started = time.perf_counter()
+            with pytest.raises(LLMUnavailableError):
+                generator.generate_response("What is MCP?")
+            assert time.perf_counter() - started < 1.0
+        with pytest.raises(CircuitOpenError):
+            generator.generate_response("What is MCP?")
+
+        assert fake_gemini.requests == 2
+
+
+class TestUnavailableModelFallback:
+    """Test answers served without the model while it is unavailable"""
+
+    @pytest.fixture
+    def rag(self, rag_with_mocked_backends):
+        rag = rag_with_mocked_backends
+        rag.search_tool.execute = Mock(return_value="[MCP - Lesson 1]\nServers")
+        rag.search_tool.run = Mock(
+            return_value=Mock(
+                text="[MCP - Lesson 1]\nServers",
+                sources=["MCP - Lesson 1"],
+                retrieved_tokens=0,
+                packed_tokens=0,
+            )
+        )
+        rag.ai_generator.generate_response.side_effect = CircuitOpenError("open")
+        return rag
+
+    def test_retrieval_only_answer(self, rag):
+        """Test the search results are returned when nothing is cached"""
+        rag.answer_cache = None
+        session_id = rag.session_manager.create_session()
+
+        answer, sources = rag.query("What is MCP?", session_id)
+
+        assert answer == f"{rag.FALLBACK_NOTICE}\n\n[MCP - Lesson 1]\nServers"
+        assert sources == ["MCP - Lesson 1"]
+        assert rag.session_manager.get_conversation_history(session_id) is None
+        # The up-front search is reused rather than repeated
+        assert rag.search_tool.run.call_count == 1
+
+    def test_similar_cached_answer(self, rag):
+        """Test a looser cached match is preferred over raw search results"""
+        rag.answer_cache = Mock()
+        rag.answer_cache.get.side_effect = [
+            None,
+            Mock(answer="Cached answer", sources=["MCP - Lesson 2"]),
+        ]
+
+        assert rag.query("What is MCP?") == ("Cached answer", ["MCP - Lesson 2"])
+        assert rag.answer_cache.get.call_args.kwargs == {
+            "similarity_threshold": rag.config.LLM_FALLBACK_SIMILARITY
+        }
+        rag.answer_cache.put.assert_not_called()
+
+    def test_stream_falls_back(self, rag):
+        """Test a stream whose model is down still sends sources and an answer"""
+        rag.answer_cache = None
+
+        def unavailable(**kwargs):
+            raise LLMUnavailableError("deadline exceeded")
+            yield
+
+        rag.ai_generator.generate_response_stream.side_effect = unavailable
+
+        events = list(rag.query_stream("What is MCP?", context=ToolContext()))
+
+        assert events == [
+            # Sent by the up-front search, then again with the fallback answer
+            {"type": "sources", "sources": ["MCP - Lesson 1"]},
+            {"type": "sources", "sources": ["MCP - Lesson 1"]},
+            {
+                "type": "token",
+                "text": f"{rag.FALLBACK_NOTICE}\n\n[MCP - Lesson 1]\nServers",
+            },
+        ]
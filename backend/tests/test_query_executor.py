@@ -0,0 +1,179 @@
+import asyncio
+import threading
+
+import pytest
+from fastapi import status
+
+from query_executor import QueryExecutor, QueryQueueFullError
+
+
+class TestQueryExecutor:
+    """Test cases for the bounded query worker pool"""
+
+    async def test_run_returns_result(self):
+        """Test blocking callables run in the pool and return their result"""
+        executor = QueryExecutor(max_workers=1, max_queued=0)
+        caller_thread = threading.get_ident()
+
+        result = await executor.run(lambda x: (x * 2, threading.get_ident()), 21)
+
+        assert result[0] == 42
+        assert result[1] != caller_thread
+        executor.shutdown()
+
+    async def test_run_propagates_exceptions(self):
+        """Test exceptions raised by the callable reach the caller"""
+        executor = QueryExecutor(max_workers=1, max_queued=0)
+
+        def fail():
+            raise ValueError("boom")
+
+        with pytest.raises(ValueError, match="boom"):
+            await executor.run(fail)
+
+        assert executor.get_stats()["pending"] == 0
+        executor.shutdown()
+
+    async def test_rejects_when_saturated(self):
+        """Test backpressure once workers and queue are all in use"""
+        executor = QueryExecutor(max_workers=1, max_queued=1)
+        release = threading.Event()
+
+        running = [asyncio.ensure_future(executor.run(release.wait)) for _ in range(2)]
+        await asyncio.sleep(0.05)
+
+        with pytest.raises(QueryQueueFullError):
+            await executor.run(lambda: None)
+
+        release.set()
+        await asyncio.gather(*running)
+
+        stats = executor.get_stats()
+        assert stats["pending"] == 0
+        assert stats["rejected"] == 1
+        executor.shutdown()
+
+    async def test_unstarted_stream_releases_slot(self):
+        """Test a stream dropped before iteration gives its slot back"""
+        executor = QueryExecutor(max_workers=1, max_queued=0)
+
+        events = executor.iterate(iter(["a"]))
+        assert executor.get_stats()["pending"] == 1
+        del events
+
+        assert executor.get_stats()["pending"] == 0
+        executor.shutdown()
+
+    async def test_closed_stream_releases_once(self):
+        """Test closing a stream twice, then exhausting it, frees one slot"""
+        executor = QueryExecutor(max_workers=1, max_queued=0)
+        events = executor.iterate(iter(["a", "b"]))
+
+        assert await events.__anext__() == "a"
+        await events.aclose()
+        await events.aclose()
+
+        assert [event async for event in events] == []
+        assert executor.get_stats()["pending"] == 0
+        executor.shutdown()
+
+    async def test_cancelled_stream_holds_slot_until_worker_is_done(self):
+        """Test cancelling mid-stream keeps the slot while next() still runs"""
+        executor = QueryExecutor(max_workers=1, max_queued=0)
+        release = threading.Event()
+
+        def blocking_events():
+            release.wait()
+            yield "late"
+
+        events = executor.iterate(blocking_events())
+        consumer = asyncio.ensure_future(events.__anext__())
+        await asyncio.sleep(0.05)
+        consumer.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await consumer
+
+        assert executor.get_stats()["pending"] == 1
+        with pytest.raises(QueryQueueFullError):
+            executor.iterate(iter([]))
+
+        release.set()
+        executor.shutdown()
+        assert executor.get_stats()["pending"] == 0
+
+
+class TestNonBlockingQueryEndpoint:
+    """Test /api/query keeps the event loop free and applies backpressure"""
+
+    async def test_returns_429_when_saturated(
+        self, app_module, async_client, mock_rag_system
+    ):
+        """Test a saturated executor answers 429 instead of queueing forever"""
+        release = threading.Event()
+        mock_rag_system.query.side_effect = lambda *a: (release.wait(), ("a", []))[1]
+        app_module.query_executor = QueryExecutor(max_workers=1, max_queued=0)
+
+        first = asyncio.ensure_future(
+            async_client.post("/api/query", json={"query": "slow", "session_id": "s"})
+        )
+        await asyncio.sleep(0.05)
+
+        rejected = await async_client.post(
+            "/api/query", json={"query": "fast", "session_id": "s"}
+        )
+        release.set()
+        accepted = await first
+
+        assert rejected.status_code == status.HTTP_429_TOO_MANY_REQUESTS
+        assert rejected.headers["retry-after"] == "1"
+        assert accepted.status_code == status.HTTP_200_OK
+
+    async def test_courses_served_while_query_blocks(
+        self, app_module, async_client, mock_rag_system
+    ):
+        """Test other endpoints respond while a slow query is in flight"""
+        release = threading.Event()
+        mock_rag_system.query.side_effect = lambda *a: (release.wait(), ("a", []))[1]
+        app_module.query_executor = QueryExecutor(max_workers=1, max_queued=0)
+
+        slow = asyncio.ensure_future(
+            async_client.post("/api/query", json={"query": "slow", "session_id": "s"})
+        )
+        await asyncio.sleep(0.05)
+
+        courses = await asyncio.wait_for(async_client.get("/api/courses"), timeout=2)
+        assert not slow.done()
+        release.set()
+        await slow
+
+        assert courses.status_code == status.HTTP_200_OK
+
+    async def test_queries_use_every_worker(
+        self, app_module, async_client, mock_rag_system
+    ):
+        """Test concurrent queries occupy all workers at once, not one by one"""
+        workers = 8
+        # Only lets queries through once every worker is holding one
+        barrier = threading.Barrier(workers, timeout=5)
+
+        def stub_query(query, session_id):
+            barrier.wait()
+            return f"answer to {query}", []
+
+        mock_rag_system.query.side_effect = stub_query
+        app_module.query_executor.shutdown()
+        app_module.query_executor = QueryExecutor(
+            max_workers=workers, max_queued=workers
+        )
+
+        responses = await asyncio.gather(
+            *[
+                async_client.post(
+                    "/api/query", json={"query": f"q{i}", "session_id": "s"}
+                )
+                for i in range(workers * 2)
+            ]
+        )
+
+        assert [r.status_code for r in responses] == [200] * workers * 2
+        assert not barrier.broken
@@ -0,0 +1,171 @@
+import time
+from types import SimpleNamespace
+
+import pytest
+
+from ai_generator import AIGenerator
+from query_router import QueryRouter, RoutingStats
+from search_tools import ToolContext
+from vector_store import SearchResults
+
+QUESTIONS = [
+    "What is MCP?",
+    "How do MCP servers expose tools?",
+    "Explain prompt caching",
+    "What does the computer use demo do?",
+    "How is retrieval evaluated in the Chroma course?",
+    "Which models support tool use?",
+    "What is covered in lesson 3 of the MCP course?",
+    "hello!",
+]
+
+
+def make_response(parts):
+    candidate = SimpleNamespace(content=SimpleNamespace(parts=parts), finish_reason=1)
+    return SimpleNamespace(candidates=[candidate])
+
+
+class FakeGemini:
+    """Model that searches unless course material came with the question"""
+
+    def __init__(self, latency: float = 0.0):
+        self.latency = latency
+        self.calls = 0
+
+    def generate_content(self, contents, stream=False, **kwargs):
+        self.calls += 1
+        time.sleep(self.latency)
+        prompt = contents[0]["parts"][0]
+        answered = "Course material retrieved" in prompt or len(contents) > 1
+        if answered or "tools" not in kwargs:
+            response = make_response([SimpleNamespace(text="Answer")])
+        else:
+            search = SimpleNamespace(
+                name="search_course_content", args={"query": prompt}
+            )
+            response = make_response([SimpleNamespace(function_call=search)])
+        return iter([response]) if stream else response
+
+
+@pytest.fixture
+def rag(rag_with_mocked_backends):
+    rag = rag_with_mocked_backends
+    rag.answer_cache = None
+    rag.vector_store.search.return_value = SearchResults(
+        documents=["MCP servers expose tools to clients"],
+        metadata=[{"course_title": "MCP", "lesson_number": 1}],
+        distances=[0.1],
+    )
+    rag.ai_generator = AIGenerator(api_key="test_key", model="gemini-2.5-flash")
+    rag.ai_generator.model = FakeGemini()
+    return rag
+
+
+class TestQueryRouter:
+    """Test the routing heuristics"""
+
+    @pytest.mark.parametrize(
+        "query, history, kind",
+        [
+            ("What is MCP?", None, QueryRouter.RETRIEVE),
+            ("Thanks!", None, QueryRouter.DIRECT),
+            ("good morning", None, QueryRouter.DIRECT),
+            ("Where does lesson 3 talk about images?", None, QueryRouter.TOOLS),
+            ("Tell me more about it", "User: What is MCP?", QueryRouter.TOOLS),
+            ("Tell me more about it", None, QueryRouter.RETRIEVE),
+            ("How does MCP compare to tool use?", "User: hi", QueryRouter.RETRIEVE),
+        ],
+    )
+    def test_routes(self, query, history, kind):
+        """Test each kind of message is routed as expected"""
+        assert QueryRouter().route(query, history).kind == kind
+
+
+class TestRoutedQueries:
+    """Test routed queries reach the model fewer times"""
+
+    def test_course_question_takes_one_call(self, rag):
+        """Test a routed question is searched first and answered in one call"""
+        context = ToolContext()
+
+        answer, sources = rag.query("What is MCP?", context=context)
+
+        assert answer == "Answer"
+        assert sources == ["MCP - Lesson 1"]
+        assert context.llm_calls == 1
+        assert rag.routing_stats.get_stats()["routes"] == {"retrieve": 1}
+
+    def test_prompt_tokens_are_recorded(self, rag):
+        """Test each query's prompt and retrieval token counts reach the stats"""
+        context = ToolContext()
+
+        rag.query("What is MCP?", context=context)
+        stats = rag.routing_stats.get_stats()
+
+        assert context.prompt_tokens > 0
+        assert stats["prompt_tokens"] == context.prompt_tokens
+        assert stats["retrieved_tokens_per_query"] == context.retrieved_tokens
+        assert stats["packed_tokens_per_query"] == context.packed_tokens
+
+    def test_small_talk_offers_no_tools(self, rag):
+        """Test small talk is answered without searching"""
+        answer, sources = rag.query("hello!")
+
+        assert (answer, sources) == ("Answer", [])
+        rag.vector_store.search.assert_not_called()
+
+    def test_stream_sends_sources_before_the_first_call(self, rag):
+        """Test routed streams send sources at once and stream one call"""
+        context = ToolContext()
+
+        events = list(rag.query_stream("What is MCP?", context=context))
+
+        assert events == [
+            {"type": "sources", "sources": ["MCP - Lesson 1"]},
+            {"type": "token", "text": "Answer"},
+        ]
+        assert context.llm_calls == 1
+
+    def test_disconnected_stream_is_recorded(self, rag):
+        """Test a stream closed after its sources still counts its route"""
+        events = rag.query_stream("What is MCP?")
+
+        assert next(events)["type"] == "sources"
+        events.close()
+
+        assert rag.routing_stats.get_stats()["routes"] == {"retrieve": 1}
+
+    def test_llm_calls_per_query(self, rag):
+        """Test routing cuts the model calls per query"""
+        rag.ai_generator.model = FakeGemini()
+        results = {}
+        for routing in (False, True):
+            rag.query_router = QueryRouter() if routing else None
+            rag.routing_stats = type(rag.routing_stats)()
+            for question in QUESTIONS:
+                assert rag.query(question)[0] == "Answer"
+            results[routing] = rag.routing_stats.get_stats()
+
+        before, after = results[False], results[True]
+        assert before["llm_calls_per_query"] == 2
+        assert after["llm_calls_per_query"] < 1.5
+
+
+class TestStatsEndpoint:
+    """Test the /api/stats endpoint"""
+
+    async def test_reports_routing_and_executor(self, async_client, mock_rag_system):
+        """Test routing counts and worker pool figures are served"""
+        mock_rag_system.routing_stats = RoutingStats()
+        mock_rag_system.routing_stats.record("retrieve", 1, prompt_tokens=900)
+        mock_rag_system.routing_stats.record("direct", 2, prompt_tokens=300)
+
+        response = await async_client.get("/api/stats")
+
+        assert response.status_code == 200
+        stats = response.json()
+        assert stats["routing"]["queries"] == 2
+        assert stats["routing"]["llm_calls_per_query"] == 1.5
+        assert stats["routing"]["routes"] == {"retrieve": 1, "direct": 1}
+        assert stats["routing"]["prompt_tokens_per_query"] == 600
+        assert stats["executor"]["pending"] == 0
@@ -0,0 +1,109 @@
+import json
+
+import pytest
+
+from retrieval_benchmark import (
+    base_title,
+    build_queries,
+    load_corpus,
+    main,
+    percentiles,
+    run_benchmark,
+    scale_corpus,
+)
+
+
+@pytest.fixture(scope="module")
+def corpus():
+    return load_corpus()
+
+
+class TestRetrievalBenchmark:
+    """Test the offline retrieval benchmark harness"""
+
+    def test_queries_labelled_from_corpus(self, corpus):
+        """Test every lesson yields a title query and a passage query"""
+        queries = build_queries(corpus, passages_per_lesson=1)
+        lessons = sum(len(course.lessons) for course, _ in corpus)
+
+        assert len(queries) == 2 * lessons
+        assert {query.kind for query in queries} == {"lesson_title", "passage"}
+
+    def test_scaled_copies_share_labels(self, corpus):
+        """Test synthetic copies are separate courses that map back to the original"""
+        scaled = scale_corpus(corpus, 3)
+
+        assert len(scaled) == 3 * len(corpus)
+        assert len({course.title for course, _ in scaled}) == len(scaled)
+        assert {base_title(course.title) for course, _ in scaled} == {
+            course.title for course, _ in corpus
+        }
+        assert all(
+            chunk.course_title == course.title
+            for course, chunks in scaled
+            for chunk in chunks
+        )
+
+    def test_percentiles(self):
+        """Test nearest-rank percentiles in milliseconds"""
+        samples = [i / 1000 for i in range(1, 101)]
+
+        assert percentiles(samples) == {"p50_ms": 50.0, "p95_ms": 95.0, "p99_ms": 99.0}
+
+    def test_report_covers_targets_and_scales(self, corpus):
+        """Test a small run reports latency, QPS and quality for every target"""
+        queries = build_queries(corpus)[:12]
+        report = run_benchmark(
+            scales=(1, 2), concurrency_levels=(1, 2), queries=queries
+        )
+
+        json.dumps(report)
+        first, second = report["scales"]
+        assert second["chunks"] == 2 * first["chunks"]
+        assert set(first["targets"]) == {
+            "vector_store.search[vector]",
+            "vector_store.search[hybrid]",
+            "search_tool.execute",
+            "stub_llm.generate_response",
+        }
+        for result in first["targets"].values():
+            assert set(result["latency"]) == {"p50_ms", "p95_ms", "p99_ms"}
+            assert set(result["qps"]) == {"1", "2"}
+            assert 0 <= result["mrr"] <= result["recall_at_k"]["5"] <= 1
+
+    def test_passage_queries_are_found(self, corpus):
+        """Test known-item queries are retrieved by hybrid search"""
+        queries = [q for q in build_queries(corpus) if q.kind == "passage"]
+        report = run_benchmark(
+            concurrency_levels=(1,), modes=("hybrid",), queries=queries
+        )
+
+        quality = report["scales"][0]["targets"]["vector_store.search[hybrid]"]
+        assert quality["recall_at_k"]["5"] > 0.8
+
+    def test_cli_writes_json(self, tmp_path, capsys):
+        """Test the command line entry point emits the JSON report"""
+        output = tmp_path / "bench.json"
+        queries = tmp_path / "queries.json"
+        queries.write_text(
+            json.dumps(
+                [{"query": "computer use", "course_title": "x", "lesson_number": 1}]
+            )
+        )
+
+        main(
+            [
+                "--concurrency",
+                "1",
+                "--modes",
+                "vector",
+                "--queries",
+                str(queries),
+                "--output",
+                str(output),
+            ]
+        )
+
+        report = json.loads(output.read_text())
+        assert report["config"]["queries"] == 1
+        assert json.loads(capsys.readouterr().out) == report
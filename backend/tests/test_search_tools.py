@@ -0,0 +1,130 @@
+import random
+import time
+from concurrent.futures import ThreadPoolExecutor
+from unittest.mock import Mock
+
+import pytest
+
+from context_packer import estimate_tokens
+from search_tools import CourseSearchTool, ToolContext, ToolManager
+from vector_store import SearchResults
+
+
+def slow_search(query, course_name=None, lesson_number=None):
+    """Search whose results name the query, after a delay that interleaves threads"""
+    time.sleep(random.uniform(0, 0.002))
+    return SearchResults(
+        documents=[f"Content about {query}"],
+        metadata=[{"course_title": query, "lesson_number": 1}],
+        distances=[0.1],
+    )
+
+
+class TestToolSources:
+    """Test sources are returned with tool results instead of stored on tools"""
+
+    def test_run_returns_sources(self):
+        """Test the search tool returns its text and sources together"""
+        store = Mock()
+        store.search.side_effect = slow_search
+        tool = CourseSearchTool(store)
+
+        result = tool.run(query="MCP")
+
+        assert result.text == "[MCP - Lesson 1]\nContent about MCP"
+        assert result.sources == ["MCP - Lesson 1"]
+        assert tool.execute(query="MCP") == result.text
+
+    def test_execute_tool_fills_context(self):
+        """Test sources land in the context passed by the caller"""
+        store = Mock()
+        store.search.side_effect = slow_search
+        manager = ToolManager()
+        manager.register_tool(CourseSearchTool(store))
+        context = ToolContext()
+
+        text = manager.execute_tool("search_course_content", context=context, query="A")
+        manager.execute_tool("search_course_content", query="B")
+
+        assert text.startswith("[A - Lesson 1]")
+        assert context.sources == ["A - Lesson 1"]
+        assert context.packed_tokens == estimate_tokens(text)
+        assert context.retrieved_tokens == estimate_tokens("Content about A")
+
+    def test_errors_have_no_sources(self):
+        """Test a failed search reports its error without sources"""
+        store = Mock()
+        store.search.return_value = SearchResults.empty("No course found")
+        context = ToolContext()
+        manager = ToolManager()
+        manager.register_tool(CourseSearchTool(store))
+
+        text = manager.execute_tool("search_course_content", context=context, query="A")
+
+        assert text == "No course found"
+        assert context.sources == []
+
+
+class TestConcurrentSourceAttribution:
+    """Stress test sources staying with their own query under concurrency"""
+
+    @pytest.fixture
+    def rag(self, rag_with_mocked_backends):
+        rag = rag_with_mocked_backends
+        rag.answer_cache = None
+        # Sources here come from the model's own tool calls
+        rag.query_router = None
+        rag.vector_store.search.side_effect = slow_search
+
+        def generate_response(query, tool_manager=None, context=None, **kwargs):
+            tool_manager.execute_tool(
+                "search_course_content", context=context, query=query
+            )
+            time.sleep(random.uniform(0, 0.002))
+            return f"Answer to {query}"
+
+        def generate_response_stream(query, tool_manager=None, context=None, **kw):
+            tool_manager.execute_tool(
+                "search_course_content", context=context, query=query
+            )
+            yield {"type": "sources", "sources": list(context.sources)}
+            time.sleep(random.uniform(0, 0.002))
+            yield {"type": "token", "text": f"Answer to {query}"}
+
+        rag.ai_generator.generate_response.side_effect = generate_response
+        rag.ai_generator.generate_response_stream.side_effect = generate_response_stream
+        return rag
+
+    def test_concurrent_queries_get_their_own_sources(self, rag):
+        """Test hundreds of concurrent queries each return only their sources"""
+
+        def ask(number):
+            prompt = f"Answer this question about course materials: question {number}"
+            answer, sources = rag.query(f"question {number}")
+            return answer == f"Answer to {prompt}" and sources == [
+                f"{prompt} - Lesson 1"
+            ]
+
+        with ThreadPoolExecutor(max_workers=32) as pool:
+            results = list(pool.map(ask, range(400)))
+
+        assert all(results)
+
+    def test_concurrent_streams_get_their_own_sources(self, rag):
+        """Test interleaved streamed queries each send only their sources"""
+
+        def ask(number):
+            prompt = f"Answer this question about course materials: question {number}"
+            session_id = rag.session_manager.create_session()
+            events = list(rag.query_stream(f"question {number}", session_id))
+            return events[0] == {
+                "type": "sources",
+                "sources": [f"{prompt} - Lesson 1"],
+            } and rag.session_manager.get_conversation_history(session_id).endswith(
+                f"Answer to {prompt}"
+            )
+
+        with ThreadPoolExecutor(max_workers=32) as pool:
+            results = list(pool.map(ask, range(400)))
+
+        assert all(results)
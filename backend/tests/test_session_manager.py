@@ -0,0 +1,268 @@
+import threading
+import tracemalloc
+
+import fakeredis
+import pytest
+
+from session_manager import RedisSessionBackend, SessionManager
+
+BACKENDS = ["memory", "sqlite", "redis"]
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1_000_000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock():
+    return FakeClock()
+
+
+class TestSessionManager:
+    """Test the bounded, expiring session store"""
+
+    def test_history_keeps_latest_exchanges(self):
+        """Test only the last max_history exchanges are formatted"""
+        manager = SessionManager(max_history=2)
+        session_id = manager.create_session()
+        for i in range(5):
+            manager.add_exchange(session_id, f"question {i}", f"answer {i}")
+
+        assert manager.get_conversation_history(session_id) == (
+            "User: question 3\nAssistant: answer 3\n"
+            "User: question 4\nAssistant: answer 4"
+        )
+        assert manager.get_conversation_history("unknown") is None
+        assert manager.get_conversation_history(None) is None
+
+    def test_formatted_history_cached_until_append(self):
+        """Test the history string is reused until a message is added"""
+        manager = SessionManager(max_history=2)
+        session_id = manager.create_session()
+        manager.add_message(session_id, "user", "hello")
+
+        first = manager.get_conversation_history(session_id)
+        assert manager.get_conversation_history(session_id) is first
+
+        manager.add_message(session_id, "assistant", "hi")
+        assert manager.get_conversation_history(session_id) == (
+            "User: hello\nAssistant: hi"
+        )
+
+    def test_idle_sessions_expire(self, clock):
+        """Test a session idle for longer than the TTL is dropped"""
+        manager = SessionManager(ttl_seconds=60, clock=clock)
+        idle = manager.create_session()
+        manager.add_message(idle, "user", "old")
+        clock.now += 30
+        active = manager.create_session()
+        manager.add_message(active, "user", "recent")
+
+        clock.now += 45
+        manager.create_session()  # Sweeps expired sessions
+
+        assert idle not in manager.backend.sessions
+        assert manager.get_conversation_history(idle) is None
+        assert manager.get_conversation_history(active) == "User: recent"
+        assert manager.stats()["expired"] == 1
+
+    def test_read_session_does_not_expire(self, clock):
+        """Test reading a session keeps it alive for another TTL"""
+        manager = SessionManager(ttl_seconds=60, clock=clock)
+        session_id = manager.create_session()
+        manager.add_message(session_id, "user", "hello")
+
+        clock.now += 45
+        assert manager.get_conversation_history(session_id) == "User: hello"
+        clock.now += 45
+        manager.create_session()  # Sweeps expired sessions
+
+        assert manager.get_conversation_history(session_id) == "User: hello"
+        assert manager.stats()["expired"] == 0
+
+    def test_least_recently_active_evicted(self):
+        """Test the global cap evicts the least recently active session"""
+        manager = SessionManager(max_sessions=2)
+        first = manager.create_session()
+        second = manager.create_session()
+        manager.add_message(first, "user", "still here")
+
+        manager.create_session()
+
+        assert list(manager.backend.sessions)[0] == first
+        assert second not in manager.backend.sessions
+        assert manager.stats()["evicted"] == 1
+
+    def test_clear_session(self):
+        """Test clearing keeps the session but drops its history"""
+        manager = SessionManager()
+        session_id = manager.create_session()
+        manager.add_message(session_id, "user", "hello")
+
+        manager.clear_session(session_id)
+
+        assert session_id in manager.backend.sessions
+        assert manager.get_conversation_history(session_id) is None
+
+
+@pytest.mark.parametrize("worker_factory", BACKENDS, indirect=True)
+class TestSessionBackends:
+    """Test every backend behaves the same when shared between workers"""
+
+    def test_session_ids_are_unique(self, worker_factory):
+        """Test workers never hand out the same session id"""
+        first, second = worker_factory(), worker_factory()
+
+        ids = {first.create_session() for _ in range(100)}
+        ids |= {second.create_session() for _ in range(100)}
+
+        assert len(ids) == 200
+
+    def test_history_shared_and_bounded(self, worker_factory):
+        """Test exchanges from any worker land in one bounded history"""
+        first, second = worker_factory(), worker_factory()
+        session_id = first.create_session()
+        assert first.get_conversation_history(session_id) is None
+
+        for i in range(3):
+            worker = (first, second)[i % 2]
+            worker.add_exchange(session_id, f"question {i}", f"answer {i}")
+
+        assert second.get_conversation_history(session_id) == (
+            "User: question 1\nAssistant: answer 1\n"
+            "User: question 2\nAssistant: answer 2"
+        )
+        first.clear_session(session_id)
+        assert second.get_conversation_history(session_id) is None
+
+    def test_no_history_kept(self, worker_factory):
+        """Test max_history=0 keeps no messages rather than all of them"""
+        manager = worker_factory(max_history=0)
+        session_id = manager.create_session()
+
+        manager.add_exchange(session_id, "question", "answer")
+
+        assert manager.get_conversation_history(session_id) is None
+
+    def test_concurrent_appends_are_not_lost(self, worker_factory):
+        """Test simultaneous appends from several workers all land"""
+        workers = [worker_factory(max_history=100) for _ in range(4)]
+        session_id = workers[0].create_session()
+
+        def append(worker, number):
+            for i in range(10):
+                worker.add_message(session_id, "user", f"{number}-{i}")
+
+        threads = [
+            threading.Thread(target=append, args=(worker, n))
+            for n, worker in enumerate(workers)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        history = workers[-1].get_conversation_history(session_id)
+        assert len(history.split("\n")) == 40
+        # Each worker's own messages stay in order
+        for n in range(4):
+            own = [line for line in history.split("\n") if f" {n}-" in line]
+            assert own == [f"User: {n}-{i}" for i in range(10)]
+
+
+class TestRedisSessionBackend:
+    """Test the Redis-specific storage layout"""
+
+    def test_sessions_expire_in_redis(self):
+        """Test each append refreshes the key's TTL and trims the list"""
+        client = fakeredis.FakeRedis()
+        manager = SessionManager(
+            1, backend=RedisSessionBackend(client, 2, ttl_seconds=60)
+        )
+        session_id = manager.create_session()
+
+        manager.add_exchange(session_id, "first", "one")
+        manager.add_exchange(session_id, "second", "two")
+
+        key = f"ragchatbot:session:{session_id}"
+        assert client.llen(key) == 2
+        assert 0 < client.pttl(key) <= 60_000
+
+
+class TestSessionPersistence:
+    """Test SQLite-backed sessions surviving restarts"""
+
+    def test_sessions_survive_restart(self, tmp_path):
+        """Test history and session numbering carry over to a new manager"""
+        path = str(tmp_path / "sessions.db")
+        manager = SessionManager(max_history=1, db_path=path)
+        session_id = manager.create_session()
+        manager.add_exchange(session_id, "first", "one")
+        manager.add_exchange(session_id, "second", "two")
+        manager.close()
+
+        restarted = SessionManager(max_history=1, db_path=path)
+
+        assert restarted.get_conversation_history(session_id) == (
+            "User: second\nAssistant: two"
+        )
+        assert restarted.create_session() != session_id
+
+    def test_workers_share_sessions(self, tmp_path):
+        """Test a session created by one worker is continued by another"""
+        path = str(tmp_path / "sessions.db")
+        first, second = SessionManager(db_path=path), SessionManager(db_path=path)
+        session_id = first.create_session()
+
+        second.add_exchange(session_id, "hello", "hi")
+        first.add_exchange(session_id, "again", "hi again")
+
+        assert second.get_conversation_history(session_id) == (
+            "User: hello\nAssistant: hi\nUser: again\nAssistant: hi again"
+        )
+
+    def test_expired_sessions_deleted(self, tmp_path, clock):
+        """Test expired sessions are removed from the database on restart"""
+        path = str(tmp_path / "sessions.db")
+        manager = SessionManager(ttl_seconds=60, db_path=path, clock=clock)
+        session_id = manager.create_session()
+        manager.add_message(session_id, "user", "hello")
+        manager.close()
+
+        clock.now += 120
+        restarted = SessionManager(ttl_seconds=60, db_path=path, clock=clock)
+        clock.now -= 120  # Would still be live had it been kept
+
+        assert restarted.get_conversation_history(session_id) is None
+
+
+class TestSessionMemory:
+    """Measure the memory held by idle sessions"""
+
+    @pytest.mark.parametrize("exchanges", [0, 2])
+    def test_memory_per_idle_session(self, exchanges):
+        """Benchmark: bytes per idle session, empty and with a full history"""
+        count = 10_000
+        manager = SessionManager(max_history=2, max_sessions=count)
+        question = "How does the MCP client discover server tools? " * 2
+        answer = "The client lists the tools each server exposes. " * 8
+
+        tracemalloc.start()
+        try:
+            before, _ = tracemalloc.get_traced_memory()
+            for _ in range(count):
+                session_id = manager.create_session()
+                for _ in range(exchanges):
+                    # Distinct strings, as real messages would be
+                    manager.add_exchange(session_id, question + " ", answer + " ")
+            after, _ = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+
+        per_session = (after - before) / count
+        text = exchanges * (len(question) + len(answer) + 2)
+        assert per_session - text < 2000
@@ -0,0 +1,134 @@
+from snippet_search import SearchHit, SearchPage, make_snippet
+
+COURSE = "Building Towards Computer Use with Anthropic"
+
+
+class TestMakeSnippet:
+    """Test snippet windows and highlight offsets"""
+
+    def test_short_text_is_kept_whole(self):
+        """Test every occurrence of a term is highlighted, ignoring case"""
+        snippet = make_snippet("Tool use lets the model call tools. TOOL!", "tool")
+
+        assert snippet.text == "Tool use lets the model call tools. TOOL!"
+        assert [snippet.text[s:e] for s, e in snippet.highlights] == ["Tool", "TOOL"]
+
+    def test_window_follows_the_matches(self):
+        """Test long text is cut around the terms on word boundaries"""
+        text = " ".join(["filler"] * 100 + ["prompt", "caching", "saves"] + ["x"] * 100)
+
+        snippet = make_snippet(text, "What is prompt caching?", max_chars=60)
+
+        assert snippet.text.startswith("...filler") and snippet.text.endswith("x...")
+        assert len(snippet.text) <= 60 + 6
+        assert [snippet.text[s:e] for s, e in snippet.highlights] == [
+            "prompt",
+            "caching",
+        ]
+
+    def test_no_match_starts_at_the_beginning(self):
+        """Test text without the terms is excerpted from its start"""
+        snippet = make_snippet("alpha beta gamma delta", "omega", max_chars=11)
+
+        assert snippet.text == "alpha beta..."
+        assert snippet.highlights == []
+
+
+class TestSnippetSearch:
+    """Test retrieval-only search over an indexed corpus"""
+
+    def test_filters_and_lesson_links(self, snippet_search):
+        """Test results stay within the filter and carry their lesson link"""
+        page = snippet_search.search(
+            "multimodal image requests", course_name="Computer Use", lesson_number=3
+        )
+
+        assert page.error is None and page.hits
+        for hit in page.hits:
+            assert (hit.course_title, hit.lesson_number) == (COURSE, 3)
+            assert hit.link.startswith("https://learn.deeplearning.ai/")
+        assert any(hit.highlights for hit in page.hits)
+
+    def test_pages_do_not_overlap(self, snippet_search):
+        """Test consecutive pages continue the same ranking"""
+        first = snippet_search.search("model", page=1, page_size=5)
+        second = snippet_search.search("model", page=2, page_size=5)
+        both = snippet_search.search("model", page=1, page_size=10)
+
+        assert first.has_more and len(first.hits) == 5
+        assert first.hits + second.hits == both.hits
+
+    def test_paging_stops_at_max_results(self, snippet_search):
+        """Test the last reachable page reports no further pages"""
+        last = snippet_search.search("model", page=3, page_size=10)
+        beyond = snippet_search.search("model", page=4, page_size=10)
+
+        assert len(last.hits) == 10 and not last.has_more
+        assert beyond.hits == [] and not beyond.has_more
+
+    def test_unknown_course_is_reported(self, snippet_search):
+        """Test a course filter matching nothing returns the store's error"""
+        snippet_search.store.course_resolver.resolve = lambda name: None
+
+        page = snippet_search.search("model", course_name="Underwater Basket Weaving")
+
+        assert page.hits == []
+        assert page.error == "No course found matching 'Underwater Basket Weaving'"
+
+
+class TestSearchEndpoint:
+    """Test the /api/search endpoint"""
+
+    async def test_returns_snippets(self, async_client, mock_rag_system):
+        """Test hits, paging and filters pass through to the RAG system"""
+        mock_rag_system.search.return_value = SearchPage(
+            hits=[
+                SearchHit(
+                    COURSE, 3, "https://example.com/l3", "Send an image", [(8, 13)]
+                )
+            ],
+            page=2,
+            page_size=5,
+            has_more=True,
+            took_ms=4.2,
+        )
+
+        response = await async_client.get(
+            "/api/search",
+            params={
+                "q": "image",
+                "course": "Computer",
+                "lesson": 3,
+                "page": 2,
+                "page_size": 5,
+            },
+        )
+
+        assert response.status_code == 200
+        assert response.json() == {
+            "query": "image",
+            "results": [
+                {
+                    "course_title": COURSE,
+                    "lesson_number": 3,
+                    "link": "https://example.com/l3",
+                    "snippet": "Send an image",
+                    "highlights": [[8, 13]],
+                }
+            ],
+            "page": 2,
+            "page_size": 5,
+            "has_more": True,
+            "error": None,
+            "took_ms": 4.2,
+        }
+        mock_rag_system.search.assert_called_once_with(
+            "image", "Computer", 3, page=2, page_size=5
+        )
+
+    async def test_rejects_bad_paging(self, async_client, mock_rag_system):
+        """Test out-of-range paging and empty queries are rejected"""
+        for params in ({"q": "x", "page": 0}, {"q": "x", "page_size": 500}, {"q": ""}):
+            response = await async_client.get("/api/search", params=params)
+            assert response.status_code == 422
+        mock_rag_system.search.assert_not_called()
@@ -0,0 +1,228 @@
+import asyncio
+import json
+import threading
+from types import SimpleNamespace
+from unittest.mock import Mock
+
+import pytest
+from fastapi import status
+
+from ai_generator import AIGenerator
+from query_executor import QueryExecutor
+from search_tools import ToolContext
+
+SEARCH_TOOL = {
+    "name": "search_course_content",
+    "description": "Search course materials",
+    "input_schema": {"type": "object", "properties": {}},
+}
+
+
+def parse_sse(body: str):
+    """Split an SSE body into (event, data) pairs"""
+    events = []
+    for message in body.strip().split("\n\n"):
+        fields = dict(line.split(": ", 1) for line in message.split("\n"))
+        events.append((fields["event"], json.loads(fields["data"])))
+    return events
+
+
+def make_response(parts, finish_reason=1):
+    """Build a Gemini-like response holding the given parts"""
+    candidate = SimpleNamespace(
+        content=SimpleNamespace(parts=parts), finish_reason=finish_reason
+    )
+    return SimpleNamespace(candidates=[candidate])
+
+
+class TestQueryStreamEndpoint:
+    """Test cases for /api/query/stream"""
+
+    async def test_streams_sources_then_tokens(self, async_client, mock_rag_system):
+        """Test the SSE stream carries session, sources, tokens and done in order"""
+        mock_rag_system.query_stream.return_value = iter(
+            [
+                {"type": "sources", "sources": ["Course A - Lesson 1"]},
+                {"type": "token", "text": "Hello "},
+                {"type": "token", "text": "world"},
+            ]
+        )
+
+        response = await async_client.post(
+            "/api/query/stream", json={"query": "hi", "session_id": "abc"}
+        )
+
+        assert response.status_code == status.HTTP_200_OK
+        assert response.headers["content-type"].startswith("text/event-stream")
+        assert parse_sse(response.text) == [
+            ("start", {"session_id": "abc"}),
+            ("sources", {"sources": ["Course A - Lesson 1"]}),
+            ("token", {"text": "Hello "}),
+            ("token", {"text": "world"}),
+            ("done", {"session_id": "abc"}),
+        ]
+        mock_rag_system.query_stream.assert_called_once_with("hi", "abc")
+
+    async def test_creates_session_when_missing(self, async_client, mock_rag_system):
+        """Test a new session id is announced in the start event"""
+        mock_rag_system.query_stream.return_value = iter([])
+
+        response = await async_client.post("/api/query/stream", json={"query": "hi"})
+
+        assert parse_sse(response.text)[0] == (
+            "start",
+            {"session_id": "test_session_id"},
+        )
+
+    async def test_error_mid_stream(self, async_client, mock_rag_system):
+        """Test failures after streaming started are reported as an error event"""
+
+        def failing_stream():
+            yield {"type": "token", "text": "partial"}
+            raise RuntimeError("upstream failed")
+
+        mock_rag_system.query_stream.return_value = failing_stream()
+
+        response = await async_client.post(
+            "/api/query/stream", json={"query": "hi", "session_id": "abc"}
+        )
+
+        assert parse_sse(response.text)[-1] == (
+            "error",
+            {"detail": "upstream failed"},
+        )
+
+    async def test_returns_429_when_saturated(
+        self, app_module, async_client, mock_rag_system
+    ):
+        """Test streaming requests share the query executor's backpressure"""
+        release = threading.Event()
+        mock_rag_system.query.side_effect = lambda *a: (release.wait(), ("a", []))[1]
+        app_module.query_executor = QueryExecutor(max_workers=1, max_queued=0)
+
+        busy_task = asyncio.ensure_future(
+            app_module.query_executor.run(mock_rag_system.query, "slow", "s")
+        )
+        await asyncio.sleep(0.05)
+
+        response = await async_client.post(
+            "/api/query/stream", json={"query": "hi", "session_id": "abc"}
+        )
+        release.set()
+        await busy_task
+
+        assert response.status_code == status.HTTP_429_TOO_MANY_REQUESTS
+
+
+class TestGenerateResponseStream:
+    """Test cases for AIGenerator.generate_response_stream"""
+
+    @pytest.fixture
+    def generator(self):
+        generator = AIGenerator(api_key="test_key", model="gemini-2.5-flash")
+        generator.model = Mock()
+        return generator
+
+    def test_sources_sent_before_streamed_tokens(self, generator):
+        """Test the tool result's sources precede the streamed answer"""
+        function_call = SimpleNamespace(name="search_course_content", args=None)
+        chunks = [
+            make_response([SimpleNamespace(text="MCP is ")]),
+            make_response([SimpleNamespace(text="a protocol.")]),
+        ]
+        generator.model.generate_content.side_effect = [
+            make_response([SimpleNamespace(function_call=function_call)]),
+            iter(chunks),
+        ]
+        tool_manager = Mock()
+
+        def execute_tool(name, context=None, **kwargs):
+            context.sources.append("MCP - Lesson 1")
+            return "[MCP - Lesson 1]\nMCP content"
+
+        tool_manager.execute_tool.side_effect = execute_tool
+
+        events = list(
+            generator.generate_response_stream(
+                "What is MCP?",
+                tools=[SEARCH_TOOL],
+                tool_manager=tool_manager,
+                context=ToolContext(),
+            )
+        )
+
+        assert events == [
+            {"type": "sources", "sources": ["MCP - Lesson 1"]},
+            {"type": "token", "text": "MCP is "},
+            {"type": "token", "text": "a protocol."},
+        ]
+        follow_up = generator.model.generate_content.call_args_list[1]
+        assert follow_up.kwargs["stream"] is True
+        function_response = follow_up.args[0][-1]["parts"][0]["function_response"]
+        assert function_response["response"]["result"] == (
+            "[MCP - Lesson 1]\nMCP content"
+        )
+
+    def test_streamed_round_can_call_more_tools(self, generator):
+        """Test a streamed turn that calls a tool is followed by another round"""
+        search = SimpleNamespace(name="search_course_content", args=None)
+        generator.model.generate_content.side_effect = [
+            make_response([SimpleNamespace(function_call=search)]),
+            iter([make_response([SimpleNamespace(function_call=search)])]),
+            iter([make_response([SimpleNamespace(text="Both lessons agree.")])]),
+        ]
+        tool_manager = Mock()
+        lessons = iter(["Lesson 1", "Lesson 2"])
+
+        def execute_tool(name, context=None, **kwargs):
+            context.sources.append(next(lessons))
+            return "content"
+
+        tool_manager.execute_tool.side_effect = execute_tool
+        context = ToolContext()
+
+        events = list(
+            generator.generate_response_stream(
+                "Compare",
+                tools=[SEARCH_TOOL],
+                tool_manager=tool_manager,
+                context=context,
+            )
+        )
+
+        assert events == [
+            {"type": "sources", "sources": ["Lesson 1"]},
+            {"type": "sources", "sources": ["Lesson 1", "Lesson 2"]},
+            {"type": "token", "text": "Both lessons agree."},
+        ]
+        final = generator.model.generate_content.call_args_list[2]
+        assert final.kwargs["tool_config"] == {
+            "function_calling_config": {"mode": "NONE"}
+        }
+        assert [r.tools for r in context.rounds] == [
+            ["search_course_content"],
+            ["search_course_content"],
+            [],
+        ]
+
+    def test_direct_answer_without_tool_call(self, generator):
+        """Test an answer given without searching is emitted as one token"""
+        generator.model.generate_content.return_value = make_response(
+            [SimpleNamespace(text="Hello there")]
+        )
+
+        events = list(
+            generator.generate_response_stream(
+                "hi", tools=[SEARCH_TOOL], tool_manager=Mock()
+            )
+        )
+
+        assert events == [{"type": "token", "text": "Hello there"}]
+
+    def test_upstream_error_becomes_token(self, generator):
+        """Test upstream failures end the stream with an error message"""
+        generator.model.generate_content.side_effect = RuntimeError("503")
+
+        events = list(generator.generate_response_stream("hi"))
+
+        assert events == [{"type": "token", "text": "Error generating response: 503"}]
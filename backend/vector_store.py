@@ -1,8 +1,13 @@
+import threading
 from dataclasses import dataclass
-from typing import Any, Dict, List, Optional
+from typing import Any, Dict, List, Optional, Sequence, Tuple
 
 import chromadb
 from chromadb.config import Settings
+from course_catalog import CourseCatalog
+from course_resolver import CourseNameResolver
+from embedding_cache import EmbeddingCache
+from lexical_index import BM25Index, reciprocal_rank_fusion
 from models import Course, CourseChunk
 from sentence_transformers import SentenceTransformer
 
@@ -17,17 +22,17 @@ class SearchResults:
     error: Optional[str] = None
 
     @classmethod
-    def from_chroma(cls, chroma_results: Dict) -> "SearchResults":
-        """Create SearchResults from ChromaDB query results"""
+    def from_chroma(cls, chroma_results: Dict, row: int = 0) -> "SearchResults":
+        """Create SearchResults from one query's row of ChromaDB query results"""
         return cls(
             documents=(
-                chroma_results["documents"][0] if chroma_results["documents"] else []
+                chroma_results["documents"][row] if chroma_results["documents"] else []
             ),
             metadata=(
-                chroma_results["metadatas"][0] if chroma_results["metadatas"] else []
+                chroma_results["metadatas"][row] if chroma_results["metadatas"] else []
             ),
             distances=(
-                chroma_results["distances"][0] if chroma_results["distances"] else []
+                chroma_results["distances"][row] if chroma_results["distances"] else []
             ),
         )
 
@@ -41,23 +46,62 @@ class SearchResults:
         return len(self.documents) == 0
 
 
+@dataclass(frozen=True)
+class SearchFilter:
+    """Course and lesson restriction for one query of a batched search"""
+
+    course_name: Optional[str] = None
+    lesson_number: Optional[int] = None
+
+
 class VectorStore:
     """Vector storage using ChromaDB for course content and metadata"""
 
-    def __init__(self, chroma_path: str, embedding_model: str, max_results: int = 5):
+    SEARCH_MODES = ("vector", "hybrid")
+    # Content collection metadata key counting writes since the BM25 index
+    # was last saved
+    GENERATION_KEY = "lexical_generation"
+
+    def __init__(
+        self,
+        chroma_path: str,
+        embedding_model: str,
+        max_results: int = 5,
+        embedding_cache_size: int = 2048,
+        embedding_cache_path: Optional[str] = None,
+        search_mode: str = "vector",
+        lexical_index_path: Optional[str] = None,
+        hybrid_candidates: int = 20,
+        rrf_k: int = 60,
+        embedding_function: Optional[Any] = None,
+    ):
+        if search_mode not in self.SEARCH_MODES:
+            raise ValueError(f"Unknown search mode: {search_mode}")
         self.max_results = max_results
+        self.search_mode = search_mode
+        self.hybrid_candidates = hybrid_candidates
+        self.rrf_k = rrf_k
         # Initialize ChromaDB client
         self.client = chromadb.PersistentClient(
             path=chroma_path, settings=Settings(anonymized_telemetry=False)
         )
 
-        # Set up sentence transformer embedding function
-        self.embedding_function = (
+        # Set up sentence transformer embedding function unless one is given
+        self.embedding_function = embedding_function or (
             chromadb.utils.embedding_functions.SentenceTransformerEmbeddingFunction(
                 model_name=embedding_model
             )
         )
 
+        # Queries are embedded through an LRU cache shared by catalog and
+        # content lookups, then passed to Chroma as vectors
+        self.embedding_cache = EmbeddingCache(
+            self.embedding_function,
+            max_entries=embedding_cache_size,
+            cache_path=embedding_cache_path,
+            model_name=embedding_model,
+        )
+
         # Create collections for different types of data
         self.course_catalog = self._create_collection(
             "course_catalog"
@@ -66,18 +110,44 @@ class VectorStore:
             "course_content"
         )  # Actual course material
 
+        # In-memory title index, loaded from the catalog on first use
+        self.course_resolver = CourseNameResolver(self.embedding_cache)
+        self._course_resolver_loaded = False
+        # Held by the catalog loaders (title index and parsed courses) and
+        # across each catalog write, so a course added while the catalog is
+        # read cannot be left out of either
+        self._catalog_lock = threading.RLock()
+
+        # Parsed courses and lessons, loaded from the catalog on first use
+        self.courses = CourseCatalog()
+        self._courses_loaded = False
+
+        # BM25 index over content chunks, loaded or rebuilt on first use
+        self.lexical_index = BM25Index(lexical_index_path)
+        self._lexical_index_loaded = False
+        # Held while the index is loaded or rebuilt and across each content
+        # write, so a rebuild never pages Chroma while chunks change
+        self._lexical_lock = threading.RLock()
+        # Whether the content generation moved past the saved index yet
+        self._lexical_generation_bumped = False
+
     def _create_collection(self, name: str):
         """Create or get a ChromaDB collection"""
         return self.client.get_or_create_collection(
             name=name, embedding_function=self.embedding_function
         )
 
+    def embed_query(self, text: str) -> List[float]:
+        """Embed a single query string with the collection's embedding model"""
+        return self.embedding_cache([text])[0]
+
     def search(
         self,
         query: str,
         course_name: Optional[str] = None,
         lesson_number: Optional[int] = None,
         limit: Optional[int] = None,
+        mode: Optional[str] = None,
     ) -> SearchResults:
         """
         Main search interface that handles course resolution and content search.
@@ -87,6 +157,7 @@ class VectorStore:
             course_name: Optional course name/title to filter by
             lesson_number: Optional lesson number to filter by
             limit: Maximum results to return
+            mode: "vector" or "hybrid", defaulting to the store's search_mode
 
         Returns:
             SearchResults object with documents and metadata
@@ -105,27 +176,268 @@ class VectorStore:
         # Use provided limit or fall back to configured max_results
         search_limit = limit if limit is not None else self.max_results
 
+        if (mode or self.search_mode) == "hybrid":
+            return self._hybrid_search(
+                query, course_title, lesson_number, filter_dict, search_limit
+            )
+
         try:
             results = self.course_content.query(
-                query_texts=[query], n_results=search_limit, where=filter_dict
+                query_embeddings=self.embedding_cache([query]),
+                n_results=search_limit,
+                where=filter_dict,
             )
             return SearchResults.from_chroma(results)
         except Exception as e:
             return SearchResults.empty(f"Search error: {str(e)}")
 
-    def _resolve_course_name(self, course_name: str) -> Optional[str]:
-        """Use vector search to find best matching course by name"""
+    def search_many(
+        self,
+        queries: Sequence[str],
+        filters: Optional[Sequence[Optional[SearchFilter]]] = None,
+        limit: Optional[int] = None,
+        mode: Optional[str] = None,
+        batch_size: int = 256,
+    ) -> List[SearchResults]:
+        """
+        Run many searches with batched embedding and Chroma queries.
+
+        All queries are embedded in one call, and queries sharing a filter
+        are sent to Chroma together, batch_size at a time. Results match
+        what search returns for each query on its own.
+
+        Args:
+            queries: What to search for, one entry per search
+            filters: Optional course/lesson filter per query (None entries
+                are unfiltered); defaults to no filters
+            limit: Maximum results per query
+            mode: "vector" or "hybrid", defaulting to the store's search_mode
+            batch_size: Most queries sent to Chroma in one call
+
+        Returns:
+            One SearchResults per query, in the order given
+        """
+        if filters is None:
+            filters = [None] * len(queries)
+        if len(filters) != len(queries):
+            raise ValueError("filters must have one entry per query")
+
+        search_limit = limit if limit is not None else self.max_results
+        hybrid = (mode or self.search_mode) == "hybrid"
+        n_results = (
+            max(search_limit, self.hybrid_candidates) if hybrid else search_limit
+        )
+        results: List[Optional[SearchResults]] = [None] * len(queries)
+
+        # Resolve each course name once and group queries by the filter they need
+        resolved: Dict[str, Optional[str]] = {}
+        groups: Dict[Tuple[Optional[str], Optional[int]], List[int]] = {}
+        for i, search_filter in enumerate(filters):
+            course_name = search_filter.course_name if search_filter else None
+            lesson_number = search_filter.lesson_number if search_filter else None
+            course_title = None
+            if course_name:
+                if course_name not in resolved:
+                    resolved[course_name] = self._resolve_course_name(course_name)
+                course_title = resolved[course_name]
+                if not course_title:
+                    results[i] = SearchResults.empty(
+                        f"No course found matching '{course_name}'"
+                    )
+                    continue
+            groups.setdefault((course_title, lesson_number), []).append(i)
+
+        searched = [i for members in groups.values() for i in members]
         try:
-            results = self.course_catalog.query(query_texts=[course_name], n_results=1)
+            embeddings = dict(
+                zip(searched, self.embedding_cache([queries[i] for i in searched]))
+            )
+        except Exception as e:
+            for i in searched:
+                results[i] = SearchResults.empty(f"Search error: {str(e)}")
+            return results
+
+        for (course_title, lesson_number), members in groups.items():
+            filter_dict = self._build_filter(course_title, lesson_number)
+            for start in range(0, len(members), batch_size):
+                batch = members[start : start + batch_size]
+                try:
+                    dense = self.course_content.query(
+                        query_embeddings=[embeddings[i] for i in batch],
+                        n_results=n_results,
+                        where=filter_dict,
+                    )
+                except Exception as e:
+                    for i in batch:
+                        results[i] = SearchResults.empty(f"Search error: {str(e)}")
+                    continue
+                for row, i in enumerate(batch):
+                    if hybrid:
+                        results[i] = self._fuse(
+                            queries[i],
+                            course_title,
+                            lesson_number,
+                            dense,
+                            row,
+                            search_limit,
+                        )
+                    else:
+                        results[i] = SearchResults.from_chroma(dense, row)
+        return results
+
+    def _hybrid_search(
+        self,
+        query: str,
+        course_title: Optional[str],
+        lesson_number: Optional[int],
+        filter_dict: Optional[Dict],
+        limit: int,
+    ) -> SearchResults:
+        """
+        Fuse dense and BM25 rankings with reciprocal rank fusion.
+
+        Distances of hybrid results are negated fused scores, so lower is
+        still better.
+        """
+        candidates = max(limit, self.hybrid_candidates)
+        try:
+            dense = self.course_content.query(
+                query_embeddings=self.embedding_cache([query]),
+                n_results=candidates,
+                where=filter_dict,
+            )
+        except Exception as e:
+            return SearchResults.empty(f"Search error: {str(e)}")
+        return self._fuse(query, course_title, lesson_number, dense, 0, limit)
 
-            if results["documents"][0] and results["metadatas"][0]:
-                # Return the title (which is now the ID)
-                return results["metadatas"][0][0]["title"]
+    def _fuse(
+        self,
+        query: str,
+        course_title: Optional[str],
+        lesson_number: Optional[int],
+        dense: Dict,
+        row: int,
+        limit: int,
+    ) -> SearchResults:
+        """Fuse one row of dense query results with a BM25 search for the query"""
+        candidates = max(limit, self.hybrid_candidates)
+        try:
+            lexical = self._get_lexical_index().search(
+                query, candidates, course_title, lesson_number
+            )
+        except Exception as e:
+            return SearchResults.empty(f"Search error: {str(e)}")
+
+        dense_ids = dense["ids"][row] if dense["ids"] else []
+        fused = reciprocal_rank_fusion(
+            [dense_ids, [id_ for id_, _ in lexical]], k=self.rrf_k
+        )[:limit]
+
+        # Chunks only the lexical side found still need their text and metadata
+        found = {
+            id_: (document, metadata)
+            for id_, document, metadata in zip(
+                dense_ids, dense["documents"][row], dense["metadatas"][row]
+            )
+        }
+        missing = [id_ for id_, _ in fused if id_ not in found]
+        if missing:
+            found.update(self.get_stored_chunks(missing))
+
+        fused = [(id_, score) for id_, score in fused if id_ in found]
+        return SearchResults(
+            documents=[found[id_][0] for id_, _ in fused],
+            metadata=[found[id_][1] for id_, _ in fused],
+            distances=[-score for _, score in fused],
+        )
+
+    def _get_lexical_index(self) -> BM25Index:
+        """Return the BM25 index, loading it from disk or Chroma if needed"""
+        if not self._lexical_index_loaded:
+            with self._lexical_lock:
+                if not self._lexical_index_loaded:
+                    loaded = self.lexical_index.load()
+                    if (
+                        not loaded
+                        or self.lexical_index.generation != self._content_generation()
+                        or len(self.lexical_index) != self.course_content.count()
+                    ):
+                        self._rebuild_lexical_index()
+                    self._lexical_index_loaded = True
+        return self.lexical_index
+
+    def _content_generation(self) -> int:
+        """Counter in the content collection's metadata, bumped by writes"""
+        metadata = self.course_content.metadata or {}
+        return int(metadata.get(self.GENERATION_KEY, 0))
+
+    def _mark_lexical_index_stale(self):
+        """
+        Bump the content generation before the first write since the BM25
+        index was saved (caller holds the lexical lock).
+
+        A crash after the write leaves the saved index a generation behind,
+        so it is rebuilt on the next start even if the chunk count matches.
+        """
+        if self.lexical_index.path is None or self._lexical_generation_bumped:
+            return
+        metadata = dict(self.course_content.metadata or {})
+        metadata[self.GENERATION_KEY] = self._content_generation() + 1
+        self.course_content.modify(metadata=metadata)
+        self._lexical_generation_bumped = True
+
+    def _rebuild_lexical_index(self, page_size: int = 1000):
+        """Re-index every stored content chunk from Chroma"""
+        self.lexical_index.clear()
+        offset = 0
+        while True:
+            results = self.course_content.get(
+                include=["documents", "metadatas"], limit=page_size, offset=offset
+            )
+            if not results["ids"]:
+                break
+            self.lexical_index.add(
+                results["ids"], results["documents"], results["metadatas"]
+            )
+            offset += len(results["ids"])
+
+    def _resolve_course_name(self, course_name: str) -> Optional[str]:
+        """Find best matching course by name using the in-memory title index"""
+        try:
+            return self._get_course_resolver().resolve(course_name)
         except Exception as e:
             print(f"Error resolving course name: {e}")
 
         return None
 
+    def _get_course_resolver(self) -> CourseNameResolver:
+        """Return the course title index, loading it from the catalog if needed"""
+        if not self._course_resolver_loaded:
+            with self._catalog_lock:
+                if not self._course_resolver_loaded:
+                    results = self.course_catalog.get(include=["embeddings"])
+                    titles = results["ids"]
+                    self.course_resolver.load(
+                        titles, results["embeddings"] if titles else None
+                    )
+                    self._course_resolver_loaded = True
+        return self.course_resolver
+
+    def _get_courses(self) -> CourseCatalog:
+        """Parsed course catalog, read from Chroma once"""
+        if not self._courses_loaded:
+            with self._catalog_lock:
+                if not self._courses_loaded:
+                    results = self.course_catalog.get(include=["metadatas"])
+                    self.courses.load(
+                        [
+                            CourseCatalog.from_metadata(meta)
+                            for meta in results["metadatas"]
+                        ]
+                    )
+                    self._courses_loaded = True
+        return self.courses
+
     def _build_filter(
         self, course_title: Optional[str], lesson_number: Optional[int]
     ) -> Optional[Dict]:
@@ -153,6 +465,9 @@ class VectorStore:
 
         course_text = course.title
 
+        # Embed once and share the vector between Chroma and the title index
+        title_embedding = self.embedding_cache([course_text])[0]
+
         # Build lessons metadata and serialize as JSON string
         lessons_metadata = []
         for lesson in course.lessons:
@@ -164,63 +479,168 @@ class VectorStore:
                 }
             )
 
-        self.course_catalog.add(
-            documents=[course_text],
-            metadatas=[
-                {
-                    "title": course.title,
-                    "instructor": course.instructor,
-                    "course_link": course.course_link,
-                    "lessons_json": json.dumps(
-                        lessons_metadata
-                    ),  # Serialize as JSON string
-                    "lesson_count": len(course.lessons),
-                }
-            ],
-            ids=[course.title],
-        )
+        with self._catalog_lock:
+            self.course_catalog.upsert(
+                documents=[course_text],
+                metadatas=[
+                    {
+                        "title": course.title,
+                        "instructor": course.instructor,
+                        "course_link": course.course_link,
+                        "lessons_json": json.dumps(
+                            lessons_metadata
+                        ),  # Serialize as JSON string
+                        "lesson_count": len(course.lessons),
+                    }
+                ],
+                embeddings=[title_embedding],
+                ids=[course.title],
+            )
 
-    def add_course_content(self, chunks: List[CourseChunk]):
-        """Add course content chunks to the vector store"""
+            if self._course_resolver_loaded:
+                self.course_resolver.add(course.title, title_embedding)
+            if self._courses_loaded:
+                self.courses.add(course)
+
+    def add_course_content(
+        self, chunks: List[CourseChunk], embeddings: Optional[List[Any]] = None
+    ):
+        """Add course content chunks, embedding them unless vectors are given"""
         if not chunks:
             return
 
         documents = [chunk.content for chunk in chunks]
-        metadatas = [
-            {
-                "course_title": chunk.course_title,
-                "lesson_number": chunk.lesson_number,
-                "chunk_index": chunk.chunk_index,
-            }
-            for chunk in chunks
-        ]
+        metadatas = [self.chunk_metadata(chunk) for chunk in chunks]
+        ids = [self.chunk_id(chunk) for chunk in chunks]
+
+        if embeddings is None:
+            embeddings = self.embed_documents(documents)
+
+        with self._lexical_lock:
+            lexical_index = self._get_lexical_index()
+            self._mark_lexical_index_stale()
+            self.course_content.upsert(
+                documents=documents,
+                metadatas=metadatas,
+                embeddings=embeddings,
+                ids=ids,
+            )
+            lexical_index.add(ids, documents, metadatas)
+
+    @staticmethod
+    def chunk_id(chunk: CourseChunk) -> str:
+        """Stable ID of a content chunk"""
         # Use title with chunk index for unique IDs
-        ids = [
-            f"{chunk.course_title.replace(' ', '_')}_{chunk.chunk_index}"
-            for chunk in chunks
-        ]
+        return f"{chunk.course_title.replace(' ', '_')}_{chunk.chunk_index}"
+
+    @staticmethod
+    def chunk_metadata(chunk: CourseChunk) -> Dict[str, Any]:
+        """Metadata stored alongside a content chunk"""
+        return {
+            "course_title": chunk.course_title,
+            "lesson_number": chunk.lesson_number,
+            "chunk_index": chunk.chunk_index,
+        }
+
+    def get_course_chunk_ids(self, course_title: str) -> List[str]:
+        """Get the IDs of every content chunk stored for a course"""
+        try:
+            results = self.course_content.get(
+                where={"course_title": course_title}, include=[]
+            )
+            return results["ids"]
+        except Exception as e:
+            print(f"Error getting chunk ids for {course_title}: {e}")
+            return []
+
+    def get_stored_chunks(self, ids: List[str]) -> Dict[str, Tuple[str, Dict]]:
+        """Get stored (document, metadata) pairs keyed by chunk ID"""
+        if not ids:
+            return {}
+        results = self.course_content.get(ids=ids, include=["documents", "metadatas"])
+        return {
+            id_: (document, metadata)
+            for id_, document, metadata in zip(
+                results["ids"], results["documents"], results["metadatas"]
+            )
+        }
+
+    def delete_course_content(self, ids: List[str]):
+        """Remove content chunks by ID"""
+        if ids:
+            with self._lexical_lock:
+                lexical_index = self._get_lexical_index()
+                self._mark_lexical_index_stale()
+                self.course_content.delete(ids=ids)
+                lexical_index.remove(ids)
+
+    def delete_course_metadata(self, course_title: str):
+        """Remove a course from the catalog and the title index"""
+        with self._catalog_lock:
+            self.course_catalog.delete(ids=[course_title])
+            if self._course_resolver_loaded:
+                self.course_resolver.remove(course_title)
+            if self._courses_loaded:
+                self.courses.remove(course_title)
+
+    def embed_documents(self, documents: List[str]) -> List[Any]:
+        """Embed document texts for storage, bypassing the query cache"""
+        # Chunks are embedded once and never queried by their text, so keep
+        # them out of the query cache
+        return self.embedding_cache.embed_uncached(documents)
+
+    def get_embedding_cache_stats(self) -> Dict[str, Any]:
+        """Get hit rate and memory use of the query embedding cache"""
+        return self.embedding_cache.get_stats()
+
+    def save_embedding_cache(self):
+        """Write the query embedding cache to disk if persistence is configured"""
+        try:
+            self.embedding_cache.save()
+        except Exception as e:
+            print(f"Error saving embedding cache: {e}")
 
-        self.course_content.add(documents=documents, metadatas=metadatas, ids=ids)
+    def save_lexical_index(self):
+        """Write the BM25 index to disk if it changed and persistence is configured"""
+        try:
+            with self._lexical_lock:
+                if not self.lexical_index.dirty:
+                    return
+                self.lexical_index.generation = self._content_generation()
+                self.lexical_index.save()
+                self._lexical_generation_bumped = False
+        except Exception as e:
+            print(f"Error saving lexical index: {e}")
 
     def clear_all_data(self):
         """Clear all data from both collections"""
         try:
-            self.client.delete_collection("course_catalog")
-            self.client.delete_collection("course_content")
-            # Recreate collections
-            self.course_catalog = self._create_collection("course_catalog")
-            self.course_content = self._create_collection("course_content")
+            with self._catalog_lock, self._lexical_lock:
+                generation = self._content_generation()
+                self.client.delete_collection("course_catalog")
+                self.client.delete_collection("course_content")
+                # Recreate collections
+                self.course_catalog = self._create_collection("course_catalog")
+                self.course_content = self._create_collection("course_content")
+                # Carry the generation on, so an index saved before the clear
+                # never matches the emptied collection
+                self.course_content.modify(
+                    metadata={self.GENERATION_KEY: generation + 1}
+                )
+                self._lexical_generation_bumped = True
+                self.course_resolver.clear()
+                self._course_resolver_loaded = True
+                self.courses.clear()
+                self._courses_loaded = True
+                self.lexical_index.clear()
+                self._lexical_index_loaded = True
         except Exception as e:
             print(f"Error clearing data: {e}")
 
     def get_existing_course_titles(self) -> List[str]:
         """Get all existing course titles from the vector store"""
         try:
-            # Get all documents from the catalog
-            results = self.course_catalog.get()
-            if results and "ids" in results:
-                return results["ids"]
-            return []
+            return self._get_courses().titles
         except Exception as e:
             print(f"Error getting existing course titles: {e}")
             return []
@@ -228,33 +648,31 @@ class VectorStore:
     def get_course_count(self) -> int:
         """Get the total number of courses in the vector store"""
         try:
-            results = self.course_catalog.get()
-            if results and "ids" in results:
-                return len(results["ids"])
-            return 0
+            return len(self._get_courses())
         except Exception as e:
             print(f"Error getting course count: {e}")
             return 0
 
     def get_all_courses_metadata(self) -> List[Dict[str, Any]]:
         """Get metadata for all courses in the vector store"""
-        import json
-
         try:
-            results = self.course_catalog.get()
-            if results and "metadatas" in results:
-                # Parse lessons JSON for each course
-                parsed_metadata = []
-                for metadata in results["metadatas"]:
-                    course_meta = metadata.copy()
-                    if "lessons_json" in course_meta:
-                        course_meta["lessons"] = json.loads(course_meta["lessons_json"])
-                        del course_meta[
-                            "lessons_json"
-                        ]  # Remove the JSON string version
-                    parsed_metadata.append(course_meta)
-                return parsed_metadata
-            return []
+            return [
+                {
+                    "title": course.title,
+                    "instructor": course.instructor,
+                    "course_link": course.course_link,
+                    "lesson_count": len(course.lessons),
+                    "lessons": [
+                        {
+                            "lesson_number": lesson.lesson_number,
+                            "lesson_title": lesson.title,
+                            "lesson_link": lesson.lesson_link,
+                        }
+                        for lesson in course.lessons
+                    ],
+                }
+                for course in self._get_courses().all()
+            ]
         except Exception as e:
             print(f"Error getting courses metadata: {e}")
             return []
@@ -262,32 +680,17 @@ class VectorStore:
     def get_course_link(self, course_title: str) -> Optional[str]:
         """Get course link for a given course title"""
         try:
-            # Get course by ID (title is the ID)
-            results = self.course_catalog.get(ids=[course_title])
-            if results and "metadatas" in results and results["metadatas"]:
-                metadata = results["metadatas"][0]
-                return metadata.get("course_link")
-            return None
+            course = self._get_courses().get(course_title)
+            return course.course_link if course else None
         except Exception as e:
             print(f"Error getting course link: {e}")
             return None
 
     def get_lesson_link(self, course_title: str, lesson_number: int) -> Optional[str]:
         """Get lesson link for a given course title and lesson number"""
-        import json
-
         try:
-            # Get course by ID (title is the ID)
-            results = self.course_catalog.get(ids=[course_title])
-            if results and "metadatas" in results and results["metadatas"]:
-                metadata = results["metadatas"][0]
-                lessons_json = metadata.get("lessons_json")
-                if lessons_json:
-                    lessons = json.loads(lessons_json)
-                    # Find the lesson with matching number
-                    for lesson in lessons:
-                        if lesson.get("lesson_number") == lesson_number:
-                            return lesson.get("lesson_link")
-            return None
+            lesson = self._get_courses().get_lesson(course_title, lesson_number)
+            return lesson.lesson_link if lesson else None
         except Exception as e:
             print(f"Error getting lesson link: {e}")
+            return None
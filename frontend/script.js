@@ -99,7 +99,7 @@ async function sendMessage() {
     chatMessages.scrollTop = chatMessages.scrollHeight;
 
     try {
-        const response = await fetch(`${API_URL}/query`, {
+        const response = await fetch(`${API_URL}/query/stream`, {
             method: 'POST',
             headers: {
                 'Content-Type': 'application/json',
@@ -110,18 +110,46 @@ async function sendMessage() {
             })
         });
 
-        if (!response.ok) throw new Error('Query failed');
-
-        const data = await response.json();
-        
-        // Update session ID if new
-        if (!currentSessionId) {
-            currentSessionId = data.session_id;
+        if (!response.ok) {
+            throw new Error(response.status === 429 ? 'Server is busy, please try again shortly' : 'Query failed');
         }
 
-        // Replace loading message with response
-        loadingMessage.remove();
-        addMessage(data.answer, 'assistant', data.sources);
+        let answer = '';
+        let sources = [];
+        let messageDiv = null;
+
+        await readEventStream(response, (event, data) => {
+            if (event === 'start' || event === 'done') {
+                // Update session ID if new
+                if (!currentSessionId) {
+                    currentSessionId = data.session_id;
+                }
+            } else if (event === 'sources') {
+                sources = data.sources;
+            } else if (event === 'token') {
+                answer += data.text;
+
+                // Replace loading message with the response on the first token
+                if (!messageDiv) {
+                    loadingMessage.remove();
+                    addMessage('', 'assistant');
+                    messageDiv = chatMessages.lastElementChild;
+                }
+                messageDiv.querySelector('.message-content').innerHTML = marked.parse(answer);
+                chatMessages.scrollTop = chatMessages.scrollHeight;
+            } else if (event === 'error') {
+                throw new Error(data.detail);
+            }
+        });
+
+        if (!messageDiv) {
+            loadingMessage.remove();
+            addMessage(answer, 'assistant');
+            messageDiv = chatMessages.lastElementChild;
+        }
+        if (sources.length > 0) {
+            messageDiv.insertAdjacentHTML('beforeend', buildSourcesHtml(sources));
+        }
 
     } catch (error) {
         // Replace loading message with error
@@ -134,6 +162,36 @@ async function sendMessage() {
     }
 }
 
+// Read a Server-Sent Events response body, calling onEvent for each message
+async function readEventStream(response, onEvent) {
+    const reader = response.body.getReader();
+    const decoder = new TextDecoder();
+    let buffer = '';
+
+    while (true) {
+        const { done, value } = await reader.read();
+        if (done) break;
+
+        buffer += decoder.decode(value, { stream: true });
+
+        // Messages are separated by a blank line
+        let boundary;
+        while ((boundary = buffer.indexOf('\n\n')) !== -1) {
+            const rawMessage = buffer.slice(0, boundary);
+            buffer = buffer.slice(boundary + 2);
+
+            let event = 'message';
+            let data = '';
+            rawMessage.split('\n').forEach(line => {
+                if (line.startsWith('event: ')) event = line.slice(7);
+                else if (line.startsWith('data: ')) data += line.slice(6);
+            });
+
+            if (data) onEvent(event, JSON.parse(data));
+        }
+    }
+}
+
 function createLoadingMessage() {
     const messageDiv = document.createElement('div');
     messageDiv.className = 'message assistant';
@@ -161,16 +219,7 @@ function addMessage(content, type, sources = null, isWelcome = false) {
     let html = `<div class="message-content">${displayContent}</div>`;
     
     if (sources && sources.length > 0) {
-        const sourcesHtml = sources.map(source => 
-            `<span class="source-item" onclick="highlightSource('${escapeHtml(source)}')">${escapeHtml(source)}</span>`
-        ).join('');
-        
-        html += `
-            <details class="sources-collapsible">
-                <summary class="sources-header">Sources (${sources.length})</summary>
-                <div class="sources-content">${sourcesHtml}</div>
-            </details>
-        `;
+        html += buildSourcesHtml(sources);
     }
     
     messageDiv.innerHTML = html;
@@ -180,6 +229,20 @@ function addMessage(content, type, sources = null, isWelcome = false) {
     return messageId;
 }
 
+// Build the collapsible sources block shown under an answer
+function buildSourcesHtml(sources) {
+    const sourcesHtml = sources.map(source => 
+        `<span class="source-item" onclick="highlightSource('${escapeHtml(source)}')">${escapeHtml(source)}</span>`
+    ).join('');
+    
+    return `
+        <details class="sources-collapsible">
+            <summary class="sources-header">Sources (${sources.length})</summary>
+            <div class="sources-content">${sourcesHtml}</div>
+        </details>
+    `;
+}
+
 // Helper function to escape HTML for user messages
 function escapeHtml(text) {
     const div = document.createElement('div');